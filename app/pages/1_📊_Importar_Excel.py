@@ -6,7 +6,8 @@ import streamlit as st
 from pathlib import Path
 import sys
 import re
-from datetime import datetime
+import io
+import hashlib
 
 # Verifica dependências
 try:
@@ -26,7 +27,10 @@ except ImportError:
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 try:
-    from src.cnab240 import validate
+    from src.validation_cache import ValidationCache
+    from src.cnab240 import rules
+    from src.pagination import TAMANHOS_PAGINA, filter_frame, paginate, review_frame
+    from src.cnab240.dates import normalize_date
 except ImportError as e:
     st.error(f"❌ Erro ao importar módulos: {str(e)}")
     st.info("💡 Certifique-se de que todas as dependências estão instaladas: `pip install -r requirements.txt`")
@@ -56,6 +60,162 @@ if 'pagamentos_df' not in st.session_state:
 if 'validacao_resultado' not in st.session_state:
     st.session_state.validacao_resultado = None
 
+
+def _validation_cache() -> ValidationCache:
+    """Cache de validação da sessão (compartilhado com a página Fornecedores)."""
+    if 'validacao_cache' not in st.session_state:
+        # Mesmas regras do CLI (dia útil e diretório de bancos conforme `arquivo`)
+        arquivo = (st.session_state.config or {}).get('arquivo', {})
+        st.session_state.validacao_cache = ValidationCache(rules.for_config(arquivo))
+    return st.session_state.validacao_cache
+
+
+def _review_frame(pagamentos, resultado) -> pd.DataFrame:
+    """Grade de revisão da sessão, remontada só quando a validação muda."""
+    versao = _validation_cache().version
+    cache = st.session_state.get('grade_revisao')
+    if cache is None or cache[0] != versao:
+        cache = (versao, review_frame(pagamentos, resultado))
+        st.session_state.grade_revisao = cache
+    return cache[1]
+
+
+def _grade_validacao(pagamentos, resultado, status_padrao, key):
+    """
+    Exibe o resultado da validação paginado e filtrado no servidor: apenas a
+    página visível é enviada ao navegador.
+    """
+    df = _review_frame(pagamentos, resultado)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        status = st.multiselect("Status", ['ERRO', 'AVISO', 'OK'], default=status_padrao, key=f"{key}_status")
+    with col2:
+        tipos = st.multiselect("Tipo", sorted(df['tipo_pagamento'].cat.categories), key=f"{key}_tipo")
+    with col3:
+        favorecido = st.text_input("Favorecido contém", key=f"{key}_favorecido")
+    filtrado = filter_frame(df, status, tipos, favorecido)
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        tamanho = st.selectbox("Linhas por página", TAMANHOS_PAGINA, key=f"{key}_tamanho")
+    total_paginas = paginate(filtrado, 1, tamanho).pages
+    with col2:
+        pagina = st.number_input("Página", min_value=1, max_value=total_paginas, value=1, step=1,
+                                 key=f"{key}_pagina_{total_paginas}")
+    pagina = paginate(filtrado, pagina, tamanho)
+
+    if pagina.total == 0:
+        st.info("Nenhum registro para os filtros selecionados.")
+        return
+    st.dataframe(
+        pagina.rows,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "id_pagamento": st.column_config.TextColumn("ID Pagamento", width="small"),
+            "tipo_pagamento": st.column_config.TextColumn("Tipo", width="small"),
+            "nome_favorecido": st.column_config.TextColumn("Favorecido", width="medium"),
+            "valor": st.column_config.NumberColumn("Valor", format="R$ %.2f", width="small"),
+            "status": st.column_config.TextColumn("Status", width="small"),
+            "mensagem": st.column_config.TextColumn("Mensagem", width="large")
+        }
+    )
+    st.caption(f"Mostrando {pagina.start + 1}–{pagina.end} de {pagina.total} registro(s) · página {pagina.page}/{pagina.pages}")
+
+
+@st.cache_data(max_entries=8, ttl=3600, show_spinner="Lendo planilha...")
+def _parse_upload(digest: str, _data: bytes):
+    """
+    Lê e normaliza a planilha enviada.
+
+    O resultado fica em cache pelo digest do conteúdo (o parâmetro `_data` não entra
+    na chave), então reruns e reenvios do mesmo arquivo não relêem o Excel.
+
+    Args:
+        digest: SHA-256 do conteúdo enviado (chave do cache)
+        _data: Bytes do arquivo Excel
+
+    Returns:
+        Tupla (DataFrame original, lista de pagamentos normalizados)
+    """
+    # Lê o arquivo Excel sem inferir tipos (como main.iter_excel): células de texto como
+    # '01234567890' (CPF, chave PIX, banco, agência) mantêm os zeros à esquerda
+    df = pd.read_excel(io.BytesIO(_data), sheet_name=0, dtype=object)
+    
+    # Normaliza nomes das colunas
+    df.columns = df.columns.str.strip().str.lower()
+    
+    # Funções auxiliares para processamento
+    def clean_numeric(value):
+        """Limpa valores numéricos removendo .0 e espaços."""
+        if pd.isna(value):
+            return ''
+        value_str = str(value).replace('.0', '').strip()
+        return value_str
+    
+    def normalize_numeric_field(value, length):
+        """
+        Normaliza campo numérico preenchendo com zeros à esquerda.
+        
+        Args:
+            value: Valor a ser normalizado
+            length: Tamanho total desejado
+        
+        Returns:
+            String normalizada com zeros à esquerda
+        """
+        if pd.isna(value) or value == '':
+            return ''
+        # Remove caracteres não numéricos
+        value_str = re.sub(r'[^0-9]', '', str(value))
+        if not value_str:
+            return ''
+        # Preenche com zeros à esquerda até o tamanho desejado
+        return value_str.zfill(length)
+    
+    pagamentos = []
+
+    for index, row in df.iterrows():
+        # Trata data_pagamento (normalizada para AAAA-MM-DD)
+        data_pagamento = row.get('data_pagamento', '')
+        data_pagamento = normalize_date(data_pagamento) if pd.notna(data_pagamento) else ''
+
+        # Trata data_vencimento
+        data_vencimento = row.get('data_vencimento', '')
+        data_vencimento = normalize_date(data_vencimento) if pd.notna(data_vencimento) else ''
+
+        pagamento = {
+            'tipo_pagamento': str(row.get('tipo_pagamento', 'PIX')).strip().upper() if pd.notna(row.get('tipo_pagamento')) else 'PIX',
+            'id_pagamento': str(row.get('id_pagamento', '')).strip() if pd.notna(row.get('id_pagamento')) else '',
+            'data_pagamento': data_pagamento,
+            'valor': float(row.get('valor', 0)) if pd.notna(row.get('valor')) else 0.0,
+            'nome_favorecido': str(row.get('nome_favorecido', '')).strip() if pd.notna(row.get('nome_favorecido')) else '',
+            'tipo_pessoa': str(row.get('tipo_pessoa', 'F')).strip().upper() if pd.notna(row.get('tipo_pessoa')) else 'F',
+            'cpf_cnpj': clean_numeric(row.get('cpf_cnpj', '')),
+            # Campos PIX
+            'tipo_chave_pix': str(row.get('tipo_chave_pix', '')).strip().upper() if pd.notna(row.get('tipo_chave_pix')) else '',
+            'chave_pix': clean_numeric(row.get('chave_pix', '')),
+            'txid': str(row.get('txid', '')).strip() if pd.notna(row.get('txid')) else '',
+            # Campos TED/DOC (normalizados com zeros à esquerda)
+            'banco_favorecido': normalize_numeric_field(row.get('banco_favorecido', ''), 3),
+            'agencia_favorecido': normalize_numeric_field(row.get('agencia_favorecido', ''), 5),
+            'digito_agencia_favorecido': clean_numeric(row.get('digito_agencia_favorecido', '')),
+            'conta_favorecido': clean_numeric(row.get('conta_favorecido', '')),  # Mantém zeros à esquerda originais
+            'digito_conta_favorecido': clean_numeric(row.get('digito_conta_favorecido', '')),
+            'tipo_conta': normalize_numeric_field(row.get('tipo_conta', '1'), 1),
+            'finalidade_ted': normalize_numeric_field(row.get('finalidade_ted', '00001'), 5),
+            'aviso_favorecido': int(row.get('aviso_favorecido', 0)) if pd.notna(row.get('aviso_favorecido')) else 0,
+            # Campos adicionais
+            'conta_debito': str(row.get('conta_debito', '')).strip() if pd.notna(row.get('conta_debito')) else '',
+            'descricao_pagamento': str(row.get('descricao_pagamento', '')).strip() if pd.notna(row.get('descricao_pagamento')) else '',
+            'data_vencimento': data_vencimento,
+        }
+
+        pagamentos.append(pagamento)
+
+    return df, pagamentos
+
+
 # Upload do arquivo
 st.subheader("📁 Upload do Arquivo Excel")
 
@@ -67,167 +227,27 @@ uploaded_file = st.file_uploader(
 
 if uploaded_file is not None:
     try:
-        # Lê o arquivo Excel
-        df = pd.read_excel(uploaded_file, sheet_name=0)
-        
-        # Normaliza nomes das colunas
-        df.columns = df.columns.str.strip().str.lower()
-        
-        # Funções auxiliares para processamento
-        def clean_numeric(value):
-            """Limpa valores numéricos removendo .0 e espaços."""
-            if pd.isna(value):
-                return ''
-            value_str = str(value).replace('.0', '').strip()
-            return value_str
-        
-        def normalize_numeric_field(value, length):
-            """
-            Normaliza campo numérico preenchendo com zeros à esquerda.
-            
-            Args:
-                value: Valor a ser normalizado
-                length: Tamanho total desejado
-            
-            Returns:
-                String normalizada com zeros à esquerda
-            """
-            if pd.isna(value) or value == '':
-                return ''
-            # Remove caracteres não numéricos
-            value_str = re.sub(r'[^0-9]', '', str(value))
-            if not value_str:
-                return ''
-            # Preenche com zeros à esquerda até o tamanho desejado
-            return value_str.zfill(length)
-        
-        pagamentos = []
-
-        for index, row in df.iterrows():
-            # Trata data_pagamento
-            data_pagamento = row.get('data_pagamento', '')
-            if pd.notna(data_pagamento):
-                if isinstance(data_pagamento, datetime):
-                    data_pagamento = data_pagamento.strftime('%Y-%m-%d')
-                else:
-                    data_pagamento = str(data_pagamento).strip()
-            else:
-                data_pagamento = ''
-
-            # Trata data_vencimento
-            data_vencimento = row.get('data_vencimento', '')
-            if pd.notna(data_vencimento):
-                if isinstance(data_vencimento, datetime):
-                    data_vencimento = data_vencimento.strftime('%Y-%m-%d')
-                else:
-                    data_vencimento = str(data_vencimento).strip()
-            else:
-                data_vencimento = ''
-
-            pagamento = {
-                'tipo_pagamento': str(row.get('tipo_pagamento', 'PIX')).strip().upper() if pd.notna(row.get('tipo_pagamento')) else 'PIX',
-                'id_pagamento': str(row.get('id_pagamento', '')).strip() if pd.notna(row.get('id_pagamento')) else '',
-                'data_pagamento': data_pagamento,
-                'valor': float(row.get('valor', 0)) if pd.notna(row.get('valor')) else 0.0,
-                'nome_favorecido': str(row.get('nome_favorecido', '')).strip() if pd.notna(row.get('nome_favorecido')) else '',
-                'tipo_pessoa': str(row.get('tipo_pessoa', 'F')).strip().upper() if pd.notna(row.get('tipo_pessoa')) else 'F',
-                'cpf_cnpj': clean_numeric(row.get('cpf_cnpj', '')),
-                # Campos PIX
-                'tipo_chave_pix': str(row.get('tipo_chave_pix', '')).strip().upper() if pd.notna(row.get('tipo_chave_pix')) else '',
-                'chave_pix': clean_numeric(row.get('chave_pix', '')),
-                'txid': str(row.get('txid', '')).strip() if pd.notna(row.get('txid')) else '',
-                # Campos TED/DOC (normalizados com zeros à esquerda)
-                'banco_favorecido': normalize_numeric_field(row.get('banco_favorecido', ''), 3),
-                'agencia_favorecido': normalize_numeric_field(row.get('agencia_favorecido', ''), 5),
-                'digito_agencia_favorecido': clean_numeric(row.get('digito_agencia_favorecido', '')),
-                'conta_favorecido': clean_numeric(row.get('conta_favorecido', '')),  # Mantém zeros à esquerda originais
-                'digito_conta_favorecido': clean_numeric(row.get('digito_conta_favorecido', '')),
-                'tipo_conta': normalize_numeric_field(row.get('tipo_conta', '1'), 1),
-                'finalidade_ted': normalize_numeric_field(row.get('finalidade_ted', '00001'), 5),
-                'aviso_favorecido': int(row.get('aviso_favorecido', 0)) if pd.notna(row.get('aviso_favorecido')) else 0,
-                # Campos adicionais
-                'descricao_pagamento': str(row.get('descricao_pagamento', '')).strip() if pd.notna(row.get('descricao_pagamento')) else '',
-                'data_vencimento': data_vencimento,
-            }
-
-            pagamentos.append(pagamento)
+        conteudo = uploaded_file.getvalue()
+        df, pagamentos = _parse_upload(hashlib.sha256(conteudo).hexdigest(), conteudo)
 
         # Salva no session_state
         st.session_state.pagamentos = pagamentos
         st.session_state.pagamentos_df = df
 
-        # Validação automática ao anexar o arquivo
-        erros = []
-        avisos = []
-        validos = []
-        for index, pagamento in enumerate(pagamentos):
-            is_valid, errors = validate.validate_pagamento(pagamento, index)
-            if is_valid:
-                validos.append({
-                    'id_pagamento': pagamento.get('id_pagamento', f'#{index}'),
-                    'status': 'OK',
-                    'mensagem': 'Pagamento válido'
-                })
-            else:
-                for error in errors:
-                    if 'será truncado' in error.lower() or 'será ajustado' in error.lower():
-                        avisos.append({
-                            'id_pagamento': pagamento.get('id_pagamento', f'#{index}'),
-                            'status': 'AVISO',
-                            'mensagem': error
-                        })
-                    else:
-                        erros.append({
-                            'id_pagamento': pagamento.get('id_pagamento', f'#{index}'),
-                            'status': 'ERRO',
-                            'mensagem': error
-                        })
-
-        st.session_state.validacao_resultado = {
-            'erros': erros,
-            'avisos': avisos,
-            'validos': validos,
-            'total': len(pagamentos),
-            'total_erros': len(erros),
-            'total_avisos': len(avisos),
-            'total_validos': len(validos)
-        }
+        # Validação automática ao anexar o arquivo (incremental: só pagamentos
+        # novos ou alterados desde o último rerun passam pela validação)
+        resultado = _validation_cache().update(pagamentos)
+        st.session_state.validacao_resultado = resultado
+        erros = resultado['erros']
+        avisos = resultado['avisos']
 
         if erros:
-            st.error(f"❌ {len(erros)} erro(s) encontrado(s). Corrija o Excel e faça novo upload para liberar a geração do CNAB.")
+            st.error(f"❌ {resultado['total_erros']} erro(s) encontrado(s). Corrija o Excel e faça novo upload para liberar a geração do CNAB.")
             
             # Seção de debug com detalhes dos erros
             with st.expander("🔍 Ver Detalhes dos Erros", expanded=True):
-                st.markdown("### 📋 Erros Encontrados")
-                if erros:
-                    # Cria DataFrame para exibir erros
-                    erros_df = pd.DataFrame(erros)
-                    st.dataframe(
-                        erros_df,
-                        use_container_width=True,
-                        hide_index=True,
-                        column_config={
-                            "id_pagamento": st.column_config.TextColumn("ID Pagamento", width="small"),
-                            "status": st.column_config.TextColumn("Status", width="small"),
-                            "mensagem": st.column_config.TextColumn("Mensagem de Erro", width="large")
-                        }
-                    )
-                else:
-                    st.info("Nenhum erro encontrado.")
-                
-                if avisos:
-                    st.markdown("### ⚠️ Avisos Encontrados")
-                    avisos_df = pd.DataFrame(avisos)
-                    st.dataframe(
-                        avisos_df,
-                        use_container_width=True,
-                        hide_index=True,
-                        column_config={
-                            "id_pagamento": st.column_config.TextColumn("ID Pagamento", width="small"),
-                            "status": st.column_config.TextColumn("Status", width="small"),
-                            "mensagem": st.column_config.TextColumn("Mensagem de Aviso", width="large")
-                        }
-                    )
+                st.markdown("### 📋 Erros e Avisos Encontrados")
+                _grade_validacao(pagamentos, resultado, ['ERRO', 'AVISO'], key='erros')
                 
                 # Resumo estatístico
                 st.markdown("### 📊 Resumo da Validação")
@@ -247,23 +267,18 @@ if uploaded_file is not None:
             if avisos:
                 with st.expander("⚠️ Ver Avisos", expanded=False):
                     st.markdown("### ⚠️ Avisos Encontrados")
-                    avisos_df = pd.DataFrame(avisos)
-                    st.dataframe(
-                        avisos_df,
-                        use_container_width=True,
-                        hide_index=True,
-                        column_config={
-                            "id_pagamento": st.column_config.TextColumn("ID Pagamento", width="small"),
-                            "status": st.column_config.TextColumn("Status", width="small"),
-                            "mensagem": st.column_config.TextColumn("Mensagem de Aviso", width="large")
-                        }
-                    )
+                    _grade_validacao(pagamentos, resultado, ['AVISO'], key='avisos')
+        
+        with st.expander("📋 Pagamentos Importados", expanded=False):
+            _grade_validacao(pagamentos, resultado, [], key='pagamentos')
         
         # Botão para limpar
         if st.button("🗑️ Limpar Dados", width="stretch"):
             st.session_state.pagamentos = None
             st.session_state.pagamentos_df = None
             st.session_state.validacao_resultado = None
+            st.session_state.grade_revisao = None
+            _validation_cache().clear()
             st.rerun()
     
     except Exception as e:
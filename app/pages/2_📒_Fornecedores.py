@@ -22,7 +22,8 @@ from src.suppliers_db import (
     SUPPLIER_COLUMNS,
 )
 from src.validators import normalize_doc, validate_cpf_cnpj, validate_pix, validate_ted_fields
-from src.cnab240 import validate as cnab_validate
+from src.validation_cache import ValidationCache
+from src.cnab240 import rules
 
 
 st.title("📒 Fornecedores (Cadastro)")
@@ -242,27 +243,13 @@ if st.button("✅ Aplicar fornecedor selecionado no pagamento", width="stretch",
         st.session_state.pagamentos = st.session_state.get("pagamentos") or []
         st.session_state.pagamentos.append(pagamento)
 
-        # revalida automaticamente para liberar geração
-        erros, avisos, validos = [], [], []
-        for idx, p in enumerate(st.session_state.pagamentos):
-            is_valid, errors = cnab_validate.validate_pagamento(p, idx)
-            if is_valid:
-                validos.append({"id_pagamento": p.get("id_pagamento", f"#{idx}"), "status": "OK", "mensagem": "Pagamento válido"})
-            else:
-                for err in errors:
-                    (avisos if ("será truncado" in err.lower() or "será ajustado" in err.lower()) else erros).append(
-                        {"id_pagamento": p.get("id_pagamento", f"#{idx}"), "status": "ERRO" if err in errors else "AVISO", "mensagem": err}
-                    )
-
-        st.session_state.validacao_resultado = {
-            "erros": erros,
-            "avisos": avisos,
-            "validos": validos,
-            "total": len(st.session_state.pagamentos),
-            "total_erros": len(erros),
-            "total_avisos": len(avisos),
-            "total_validos": len(validos),
-        }
+        # revalida automaticamente para liberar geração (incremental: só o pagamento
+        # novo é validado, os demais reaproveitam o resultado em cache)
+        if "validacao_cache" not in st.session_state:
+            arquivo = (st.session_state.get('config') or {}).get('arquivo', {})
+            st.session_state.validacao_cache = ValidationCache(rules.for_config(arquivo))
+        st.session_state.validacao_resultado = st.session_state.validacao_cache.update(st.session_state.pagamentos)
+        erros = st.session_state.validacao_resultado["total_erros"]
 
         if erros:
             st.error("❌ Pagamento aplicado, mas há erros. Corrija os dados do fornecedor/pagamento.")
@@ -6,9 +6,9 @@ import streamlit as st
 from pathlib import Path
 import sys
 from datetime import datetime
-import io
+import math
+import time
 import pandas as pd
-import zipfile
 
 # Adiciona o diretório raiz ao path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -34,8 +34,11 @@ except ImportError:
 
 # Tenta importar os geradores, mas captura erros de dependências
 try:
-    from src.cnab240.bradesco_pix import BradescoPIXGenerator
-    from src.cnab240.bradesco_ted import BradescoTEDGenerator
+    from src.cnab240.accounts import CONTA_PRINCIPAL, AccountRouter, load_accounts, group_by_account
+    from src.cnab240.errors import render
+    from src.jobs import CANCELADO, JobManager
+    from src.run_cache import RunCache
+    from src.cnab240.ledger import NOME_PADRAO as LEDGER_PADRAO, Ledger
 except (ImportError, Exception) as e:
     error_msg = str(e)
     # Verifica se é erro de PyYAML
@@ -58,9 +61,198 @@ except (ImportError, Exception) as e:
         st.info("💡 Certifique-se de que todas as dependências estão instaladas: `pip install -r requirements.txt`")
     st.stop()
 
+# Registros exibidos por página na prévia dos arquivos
+LINHAS_PREVIA = 10
+
+
+@st.cache_resource
+def _job_manager() -> JobManager:
+    """Um único gerenciador de jobs por servidor (compartilhado entre sessões)."""
+    output = Path(__file__).parent.parent.parent / 'output'
+    return JobManager(output / 'jobs', cache=RunCache(output / 'cache'))
+
+
+def _mostrar_arquivos(store, arquivos):
+    """Exibe os arquivos gerados (métricas, downloads, prévia e ZIP) lendo-os do store."""
+    st.divider()
+    st.subheader("📄 Arquivos Gerados")
+    
+    # Resumo geral
+    total_arquivos = len(arquivos)
+    total_registros = sum(a['linhas'] for a in arquivos)
+    total_valor_geral = sum(a['total_valor'] for a in arquivos)
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Arquivos Gerados", total_arquivos)
+        st.metric("Total de Registros", total_registros)
+    
+    with col2:
+        st.metric("Valor Total Geral", f"R$ {total_valor_geral:,.2f}")
+    
+    with col3:
+        tipos_gerados = ', '.join(set(a['tipo'] for a in arquivos))
+        st.metric("Tipos Gerados", tipos_gerados)
+    
+    # Lista de arquivos
+    st.markdown("### 📋 Detalhes dos Arquivos")
+    
+    for idx, arquivo in enumerate(arquivos, 1):
+        with st.expander(f"📄 {arquivo['nome']} ({arquivo['tipo']})", expanded=(idx == 1)):
+            # Informações do arquivo
+            col1, col2, col3 = st.columns(3)
+        
+            with col1:
+                st.metric("Registros", arquivo['linhas'])
+                st.metric("Quantidade de Pagamentos", arquivo['quantidade'])
+        
+            with col2:
+                st.metric("Tipo", arquivo['tipo'])
+                st.metric("Valor Total", f"R$ {arquivo['total_valor']:,.2f}")
+        
+            with col3:
+                data_str = arquivo['data'].strftime('%d/%m/%Y') if isinstance(arquivo['data'], datetime) else str(arquivo['data'])
+                st.metric("Data", data_str)
+                st.metric("Sequencial", arquivo['sequencial'])
+        
+            # Download individual (lido do disco; gravado em ASCII e CRLF pelo store)
+            with store.open(arquivo['nome']) as conteudo:
+                st.download_button(
+                    label=f"📥 Baixar {arquivo['nome']}",
+                    data=conteudo,
+                    file_name=arquivo['nome'],
+                    mime="text/plain",
+                    width="stretch",
+                    key=f"download_{idx}"
+                )
+        
+            # Prévia do arquivo
+            with st.expander("👀 Prévia do Arquivo", expanded=False):
+                paginas_previa = max(math.ceil(arquivo['linhas'] / LINHAS_PREVIA), 1)
+                pagina_previa = st.number_input("Página", min_value=1, max_value=paginas_previa, value=1, step=1,
+                                                key=f"previa_{idx}")
+                inicio = (pagina_previa - 1) * LINHAS_PREVIA
+                linhas_previa = store.read_lines(arquivo['nome'], inicio, LINHAS_PREVIA)
+                st.code('\n'.join(linhas_previa), language=None)
+                st.caption(f"Linhas {inicio + 1}–{inicio + len(linhas_previa)} de {arquivo['linhas']}")
+        
+            # Informações técnicas
+            with st.expander("ℹ️ Informações Técnicas", expanded=False):
+                # Extrai layouts diretamente dos headers gravados (evita divergência com config)
+                linhas = store.read_lines(arquivo['nome'], 0, 2)
+                layout_arquivo_real = linhas[0][163:166] if len(linhas) >= 1 and len(linhas[0]) >= 166 else 'N/A'
+                layout_lote_real = linhas[1][13:16] if len(linhas) >= 2 and len(linhas[1]) >= 16 else 'N/A'
+                forma_lanc_real = linhas[1][11:13] if len(linhas) >= 2 and len(linhas[1]) >= 13 else 'N/A'
+                tipo_serv_real = linhas[1][9:11] if len(linhas) >= 2 and len(linhas[1]) >= 11 else 'N/A'
+                st.markdown(f"""
+                - **Tamanho de cada linha**: 240 caracteres
+                - **Total de linhas**: {arquivo['linhas']}
+                - **Formato**: CNAB 240
+                - **Banco**: Bradesco (237)
+                - **Layout do Arquivo (164-166)**: {layout_arquivo_real}
+                - **Header Lote (10-16)**: serviço={tipo_serv_real} forma={forma_lanc_real} layout={layout_lote_real}
+                """)
+    
+    # Botão para salvar todos os arquivos
+    st.divider()
+    st.subheader("💾 Salvar Arquivos")
+    
+    # ZIP com todos os arquivos: montado em disco uma única vez por geração
+    nome_zip = f"BRADESCO_CNAB_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        with open(store.zip_path(), 'rb') as zip_file:
+            st.download_button(
+                label="📦 Baixar Todos os Arquivos (ZIP)",
+                data=zip_file,
+                file_name=nome_zip,
+                mime="application/zip",
+                width="stretch",
+                type="primary"
+            )
+    
+    with col2:
+        if st.button("🔄 Gerar Novos Arquivos", width="stretch"):
+            # O job atual é descartado (com as remessas) quando o novo for enviado
+            st.session_state['job_substituido'] = st.query_params.pop('job', None)
+            st.rerun()
+
+
+def _mostrar_perfil(jobs, job):
+    """Funções mais custosas e download do perfil de um job perfilado."""
+    with st.expander(f"🔬 Perfil da geração ({job.perfil['engine']})"):
+        top = pd.DataFrame(job.perfil['top'])
+        if not top.empty:
+            st.dataframe(top.head(20), width="stretch", hide_index=True)
+        for nome in job.perfil['arquivos']:
+            caminho = jobs.job_dir(job.id) / nome
+            if caminho.exists():
+                with open(caminho, 'rb') as perfil:
+                    st.download_button(f"📥 Baixar {nome}", data=perfil, file_name=nome,
+                                       mime="application/octet-stream", key=f"perfil_{nome}")
+
+
+def _acompanhar_job(jobs, job):
+    """Mostra o progresso do job em execução ou o resultado do job finalizado."""
+    st.divider()
+    st.subheader("🚀 Gerar Arquivos CNAB")
+
+    if not job.finalizado:
+        st.progress(job.fracao, text=f"Gerando arquivos CNAB... {job.processados}/{job.total} pagamento(s)")
+        if st.button("⏹️ Cancelar geração", width="stretch"):
+            jobs.cancel(job.id)
+        time.sleep(0.5)
+        st.rerun()
+
+    for aviso in job.avisos:
+        st.warning(f"⚠️ {aviso}")
+    for erro in job.erros:
+        st.error(f"❌ {erro}")
+    if job.status == CANCELADO:
+        st.warning("⏹️ Geração cancelada.")
+    elif job.arquivos:
+        st.success(f"✅ {len(job.arquivos)} arquivo(s) CNAB gerado(s) com sucesso!")
+        if job.do_cache:
+            st.info("♻️ Mesmos pagamentos e configuração de uma geração anterior: arquivos reaproveitados.")
+    else:
+        st.error("❌ Nenhum arquivo foi gerado. Verifique os erros acima.")
+
+    if job.perfil:
+        _mostrar_perfil(jobs, job)
+
+    if job.arquivos:
+        # A sessão guarda só os metadados; o conteúdo fica no store do job
+        arquivos = [{**arquivo, 'data': datetime.fromisoformat(arquivo['data'])} for arquivo in job.arquivos]
+        _mostrar_arquivos(jobs.store(job.id), arquivos)
+    elif st.button("🔄 Gerar Novos Arquivos", width="stretch"):
+        st.session_state['job_substituido'] = st.query_params.pop('job', None)
+        st.rerun()
+
+
 st.title("📄 Gerar CNAB")
 st.markdown("Gere o arquivo CNAB 240 para envio ao banco.")
 
+jobs = _job_manager()
+
+with st.sidebar.expander("🛠️ Administração"):
+    st.toggle("🔁 Geração determinística", value=False, key='geracao_deterministica',
+              help="TXIDs derivados do conteúdo de cada pagamento (com a chave `arquivo.txid_chave`): "
+                   "gerar de novo a mesma planilha produz os mesmos arquivos, reaproveitados do cache "
+                   "sem nova geração. Pagamentos que já saíram em remessa repetem o TXID e são apontados "
+                   "em aviso.")
+    st.toggle("🔬 Perfilar geração", key='perfilar_geracao',
+              help="Executa a geração sob o perfilador (cProfile ou pyinstrument, se instalado) "
+                   "e salva o perfil junto das remessas.")
+# O id do job fica na URL: recarregar o navegador retoma o acompanhamento/resultado
+job_id = st.query_params.get('job')
+job = jobs.get(job_id) if job_id else None
+if job is not None:
+    _acompanhar_job(jobs, job)
+    st.stop()
+
 # Verificações prévias
 erros_preliminares = []
 
@@ -95,22 +287,32 @@ config.setdefault('arquivo', {})
 config['arquivo'].setdefault('forma_lancamento_ted', '41')
 config['arquivo'].setdefault('layout_lote_ted', 45)
 config['arquivo'].setdefault('layout_lote_doc_ted', 45)
+deterministica = st.session_state.get('geracao_deterministica', False)
+if deterministica and not config['arquivo'].get('txid_chave'):
+    st.warning("⚠️ A geração determinística exige `arquivo.txid_chave` (chave secreta dos TXIDs) em "
+               "`config/bradesco.yaml`. Os TXIDs desta geração serão aleatórios.")
+    deterministica = False
+config['arquivo']['txid_deterministico'] = deterministica
+config['arquivo'].setdefault('ledger', str(Path(__file__).parent.parent.parent / 'output' / LEDGER_PADRAO))
+
+# Valida/normaliza a config da sessão uma única vez: os geradores recebem o BankConfig
+# de cada conta diretamente e usam exatamente os parâmetros mostrados na UI (sem YAML temporário).
+try:
+    contas_debito = load_accounts(config)
+    roteador = AccountRouter.from_config(config, contas_debito)
+except ValueError as e:
+    st.error(f"❌ Configuração inválida: {e}")
+    st.info("💡 Revise os dados na página **Configuração**.")
+    st.stop()
+multi_contas = len(contas_debito) > 1
 
-# Persistir a config da sessão em um YAML temporário para garantir que os geradores
-# usem exatamente os mesmos parâmetros mostrados na UI (sem depender do YAML do disco).
-output_dir = Path(__file__).parent.parent.parent / 'output'
-output_dir.mkdir(parents=True, exist_ok=True)
-config_temp_path = output_dir / '_config_streamlit.yaml'
-with open(config_temp_path, 'w', encoding='utf-8') as f:
-    yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
-
-# Agrupa pagamentos por tipo
-tipos_pagamento = {}
-for p in pagamentos:
-    tipo = p.get('tipo_pagamento', 'PIX').upper().strip()
-    if tipo not in tipos_pagamento:
-        tipos_pagamento[tipo] = []
-    tipos_pagamento[tipo].append(p)
+# Agrupa pagamentos por (conta de débito, tipo) em uma única passada
+tipos_pagamento, erros_roteamento = group_by_account(pagamentos, roteador)
+if erros_roteamento:
+    for erros_id in erros_roteamento.values():
+        for erro in erros_id:
+            st.error(f"❌ {render(erro)}")
+    st.stop()
 
 # Informações sobre os arquivos a serem gerados
 st.subheader("📋 Resumo dos Pagamentos")
@@ -124,7 +326,7 @@ if tipos_pagamento:
     
     with col1:
         st.metric("Total de Pagamentos", quantidade_geral)
-        st.metric("Tipos de Pagamento", len(tipos_pagamento))
+        st.metric("Tipos de Pagamento", len({tipo for _, tipo in tipos_pagamento}))
     
     with col2:
         st.metric("Valor Total Geral", f"R$ {total_geral:,.2f}")
@@ -132,15 +334,19 @@ if tipos_pagamento:
     with col3:
         data_str = data_gravacao.strftime('%d/%m/%Y') if isinstance(data_gravacao, datetime) or hasattr(data_gravacao, 'strftime') else str(data_gravacao)
         st.metric("Data de Gravação", data_str)
-        sequencial = config.get('arquivo', {}).get('sequencial_inicial', 1)
-        st.metric("Sequencial Inicial", sequencial)
+        # Sequenciais seguem do ledger (contínuos entre gerações); sem ledger, do sequencial_inicial
+        sequencial = int(config.get('arquivo', {}).get('sequencial_inicial', 1))
+        with Ledger(config['arquivo']['ledger']) as ledger:
+            sequencial = ledger.next_sequence(CONTA_PRINCIPAL, sequencial)
+        st.metric("Próximo Sequencial", sequencial)
     
     # Tabela com detalhes por tipo
     st.markdown("### 📊 Detalhamento por Tipo")
     dados_tabela = []
-    for tipo, pagamentos_tipo in tipos_pagamento.items():
+    for (conta_id, tipo), pagamentos_tipo in tipos_pagamento.items():
         total_tipo = sum(p.get('valor', 0) for p in pagamentos_tipo)
         dados_tabela.append({
+            'Conta': conta_id,
             'Tipo': tipo,
             'Quantidade': len(pagamentos_tipo),
             'Valor Total': f"R$ {total_tipo:,.2f}"
@@ -157,223 +363,22 @@ st.divider()
 st.subheader("🚀 Gerar Arquivos CNAB")
 
 if st.button("▶️ Gerar Todos os Arquivos CNAB", width="stretch", type="primary"):
-    with st.spinner("Gerando arquivos CNAB..."):
+    # Prepara data
+    if isinstance(data_gravacao, datetime):
+        file_date = data_gravacao
+    elif hasattr(data_gravacao, 'strftime'):
+        file_date = datetime.combine(data_gravacao, datetime.min.time())
+    else:
+        file_date = datetime.now()
+    st.query_params['job'] = jobs.submit(tipos_pagamento, contas_debito, file_date, multi_contas,
+                                           profile=st.session_state.get('perfilar_geracao', False))
+    # Remessas da geração anterior (substituída por esta) não ficam no disco
+    substituido = st.session_state.pop('job_substituido', None)
+    if substituido:
         try:
-            # Prepara data
-            if isinstance(data_gravacao, datetime):
-                file_date = data_gravacao
-            elif hasattr(data_gravacao, 'strftime'):
-                file_date = datetime.combine(data_gravacao, datetime.min.time())
-            else:
-                file_date = datetime.now()
-            
-            sequencial = config.get('arquivo', {}).get('sequencial_inicial', 1)
-            arquivos_gerados = []
-            sequencial_atual = sequencial
-            
-            # Gera um arquivo para cada tipo de pagamento
-            for tipo, pagamentos_tipo in tipos_pagamento.items():
-                try:
-                    # Gera arquivo conforme tipo
-                    if tipo == 'PIX':
-                        generator = BradescoPIXGenerator(str(config_temp_path))
-                        lines = generator.generate_file(
-                            pagamentos_tipo,
-                            file_date=file_date,
-                            file_seq=sequencial_atual
-                        )
-                        nome_arquivo = f"BRADESCO_PIX_REMESSA_{file_date.strftime('%Y%m%d')}_{sequencial_atual:06d}.txt"
-                    elif tipo in ['TED', 'DOC']:
-                        generator = BradescoTEDGenerator(str(config_temp_path))
-                        lines = generator.generate_file(
-                            pagamentos_tipo,
-                            file_date=file_date,
-                            file_seq=sequencial_atual,
-                            tipo_servico=tipo
-                        )
-                        nome_arquivo = f"BRADESCO_{tipo}_REMESSA_{file_date.strftime('%Y%m%d')}_{sequencial_atual:06d}.txt"
-                    elif tipo == 'BOLETO':
-                        st.warning(f"⚠️ Tipo BOLETO ainda não implementado. Pulando {len(pagamentos_tipo)} pagamento(s).")
-                        continue
-                    else:
-                        st.warning(f"⚠️ Tipo de pagamento não suportado: {tipo}. Pulando {len(pagamentos_tipo)} pagamento(s).")
-                        continue
-                    
-                    # Valida linhas
-                    linhas_validas = True
-                    erros_validacao = []
-                    
-                    for i, line in enumerate(lines, 1):
-                        if len(line) != 240:
-                            linhas_validas = False
-                            erros_validacao.append(f"Linha {i}: tamanho incorreto ({len(line)} caracteres, esperado 240)")
-                    
-                    if not linhas_validas:
-                        st.error(f"❌ Erro na validação do arquivo {nome_arquivo}:")
-                        for erro in erros_validacao:
-                            st.error(erro)
-                        continue
-                    
-                    # Calcula total do tipo
-                    total_valor = sum(p.get('valor', 0) for p in pagamentos_tipo)
-                    
-                    # Salva arquivo (conteúdo para download/zip)
-                    # CNAB240 exige CRLF ao final de cada linha, incluindo a última.
-                    arquivo_conteudo = '\r\n'.join(lines) + '\r\n'
-                    arquivos_gerados.append({
-                        'nome': nome_arquivo,
-                        'conteudo': arquivo_conteudo,
-                        'linhas': len(lines),
-                        'tipo': tipo,
-                        'data': file_date,
-                        'sequencial': sequencial_atual,
-                        'total_valor': total_valor,
-                        'quantidade': len(pagamentos_tipo)
-                    })
-                    
-                    sequencial_atual += 1
-                    
-                except (ImportError, Exception) as e:
-                    error_msg = str(e)
-                    if "PyYAML" in error_msg or "yaml" in error_msg.lower() or "No module named 'yaml'" in error_msg:
-                        st.error("""
-                        ❌ **Módulo PyYAML não encontrado!**
-                        
-                        Por favor, instale as dependências executando:
-                        ```bash
-                        pip install -r requirements.txt
-                        ```
-                        """)
-                        st.stop()
-                    else:
-                        st.error(f"❌ Erro ao gerar arquivo para {tipo}: {str(e)}")
-                        continue
-            
-            if arquivos_gerados:
-                # Salva todos os arquivos no session_state
-                st.session_state.arquivos_gerados = arquivos_gerados
-                st.success(f"✅ {len(arquivos_gerados)} arquivo(s) CNAB gerado(s) com sucesso!")
-                st.rerun()
-            else:
-                st.error("❌ Nenhum arquivo foi gerado. Verifique os erros acima.")
-        
-        except Exception as e:
-            st.error(f"❌ Erro ao gerar arquivos: {str(e)}")
-            st.exception(e)
-
-# Exibe arquivos gerados
-if 'arquivos_gerados' in st.session_state and st.session_state.arquivos_gerados:
-    arquivos = st.session_state.arquivos_gerados
-    
-    st.divider()
-    st.subheader("📄 Arquivos Gerados")
-    
-    # Resumo geral
-    total_arquivos = len(arquivos)
-    total_registros = sum(a['linhas'] for a in arquivos)
-    total_valor_geral = sum(a['total_valor'] for a in arquivos)
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.metric("Arquivos Gerados", total_arquivos)
-        st.metric("Total de Registros", total_registros)
-    
-    with col2:
-        st.metric("Valor Total Geral", f"R$ {total_valor_geral:,.2f}")
-    
-    with col3:
-        tipos_gerados = ', '.join(set(a['tipo'] for a in arquivos))
-        st.metric("Tipos Gerados", tipos_gerados)
-    
-    # Lista de arquivos
-    st.markdown("### 📋 Detalhes dos Arquivos")
-    
-    for idx, arquivo in enumerate(arquivos, 1):
-        with st.expander(f"📄 {arquivo['nome']} ({arquivo['tipo']})", expanded=(idx == 1)):
-            # Informações do arquivo
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric("Registros", arquivo['linhas'])
-                st.metric("Quantidade de Pagamentos", arquivo['quantidade'])
-            
-            with col2:
-                st.metric("Tipo", arquivo['tipo'])
-                st.metric("Valor Total", f"R$ {arquivo['total_valor']:,.2f}")
-            
-            with col3:
-                data_str = arquivo['data'].strftime('%d/%m/%Y') if isinstance(arquivo['data'], datetime) else str(arquivo['data'])
-                st.metric("Data", data_str)
-                st.metric("Sequencial", arquivo['sequencial'])
-            
-            # Download individual
-            st.download_button(
-                label=f"📥 Baixar {arquivo['nome']}",
-                # CNAB deve ser ASCII (sem BOM) e com CRLF já embutido em `conteudo`
-                data=arquivo['conteudo'].encode('ascii', errors='strict'),
-                file_name=arquivo['nome'],
-                mime="text/plain",
-                width="stretch",
-                key=f"download_{idx}"
-            )
-            
-            # Prévia do arquivo
-            with st.expander("👀 Prévia do Arquivo (primeiras 10 linhas)", expanded=False):
-                linhas_previa = arquivo['conteudo'].split('\r\n')[:10]
-                st.code('\n'.join(linhas_previa), language=None)
-            
-            # Informações técnicas
-            with st.expander("ℹ️ Informações Técnicas", expanded=False):
-                # Extrai layouts diretamente do conteúdo (evita divergência com config)
-                linhas = arquivo['conteudo'].split('\r\n')
-                # remove última linha vazia se houver (por causa do CRLF final)
-                if linhas and linhas[-1] == '':
-                    linhas = linhas[:-1]
-                layout_arquivo_real = linhas[0][163:166] if len(linhas) >= 1 and len(linhas[0]) >= 166 else 'N/A'
-                layout_lote_real = linhas[1][13:16] if len(linhas) >= 2 and len(linhas[1]) >= 16 else 'N/A'
-                forma_lanc_real = linhas[1][11:13] if len(linhas) >= 2 and len(linhas[1]) >= 13 else 'N/A'
-                tipo_serv_real = linhas[1][9:11] if len(linhas) >= 2 and len(linhas[1]) >= 11 else 'N/A'
-                st.markdown(f"""
-                - **Tamanho de cada linha**: 240 caracteres
-                - **Total de linhas**: {arquivo['linhas']}
-                - **Formato**: CNAB 240
-                - **Banco**: Bradesco (237)
-                - **Layout do Arquivo (164-166)**: {layout_arquivo_real}
-                - **Header Lote (10-16)**: serviço={tipo_serv_real} forma={forma_lanc_real} layout={layout_lote_real}
-                """)
-    
-    # Botão para salvar todos os arquivos
-    st.divider()
-    st.subheader("💾 Salvar Arquivos")
-    
-    # Cria um ZIP com todos os arquivos
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for arquivo in arquivos:
-            # CNAB deve ser ASCII (sem BOM) e com CRLF já embutido em `conteudo`
-            zip_file.writestr(arquivo['nome'], arquivo['conteudo'].encode('ascii', errors='strict'))
-    
-    zip_buffer.seek(0)
-    nome_zip = f"BRADESCO_CNAB_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.download_button(
-            label="📦 Baixar Todos os Arquivos (ZIP)",
-            data=zip_buffer.getvalue(),
-            file_name=nome_zip,
-            mime="application/zip",
-            width="stretch",
-            type="primary"
-        )
-    
-    with col2:
-        if st.button("🔄 Gerar Novos Arquivos", width="stretch"):
-            st.session_state.arquivos_gerados = None
-            st.rerun()
-
-else:
-    st.info("👆 Clique no botão acima para gerar todos os arquivos CNAB necessários.")
+            jobs.discard(substituido)
+        except ValueError:
+            pass  # ainda em execução: sai na limpeza por idade/quantidade
+    st.rerun()
 
+st.info("👆 Clique no botão acima para gerar todos os arquivos CNAB necessários.")
@@ -350,6 +350,11 @@ with st.form("config_form"):
                 }
             }
             
+            # Preserva as seções de múltiplas contas (editadas diretamente no YAML)
+            for secao in ('contas', 'roteamento'):
+                if config.get(secao):
+                    nova_config[secao] = config[secao]
+            
             # Salva na memória (sempre)
             st.session_state.config = nova_config
             st.session_state.data_gravacao = data_gravacao
@@ -401,6 +406,10 @@ arquivo:
   # Default do manual (Header de Lote)
   layout_lote_doc_ted: {nova_config['arquivo']['layout_lote_doc_ted']}
 """
+                    secoes_multicontas = {k: nova_config[k] for k in ('contas', 'roteamento') if k in nova_config}
+                    if secoes_multicontas:
+                        yaml_content += "\n# Múltiplas contas de débito e roteamento (ver src/cnab240/accounts.py)\n"
+                        yaml_content += yaml.safe_dump(secoes_multicontas, allow_unicode=True, sort_keys=False)
                     
                     # Salva no arquivo
                     with open(config_path, 'w', encoding='utf-8') as f:
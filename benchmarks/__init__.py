@@ -0,0 +1,5 @@
+"""
+Suíte de benchmarks do pipeline CNAB (leitura, validação, geração e gravação).
+
+Uso: python -m benchmarks.run --help
+"""
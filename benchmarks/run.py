@@ -0,0 +1,139 @@
+"""
+Executa a suíte de benchmarks e grava o resultado em JSON.
+
+Exemplos:
+    python -m benchmarks.run                         # 1k e 100k, todas as etapas
+    python -m benchmarks.run --scales 1k,100k,1M --stages validation,generation
+    python -m benchmarks.run --compare benchmarks/results/abc1234.json
+
+O arquivo de saída é `benchmarks/results/<commit>.json`; `--compare` mostra a
+razão (atual/anterior) por etapa e escala e termina com código 1 se alguma
+etapa ficar mais lenta que o limite (`--threshold`).
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.stages import STAGES, Fixture  # noqa: E402
+
+ESCALAS = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1M': 1_000_000}
+RESULTS_DIR = ROOT / 'benchmarks' / 'results'
+
+
+def parse_scale(valor: str) -> int:
+    return ESCALAS.get(valor) or int(valor.replace('_', ''))
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def time_stage(fn, repeat: int) -> List[float]:
+    """Executa `fn` `repeat` vezes (GC desligado durante cada medição)."""
+    tempos = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            inicio = time.perf_counter()
+            fn()
+            tempos.append(time.perf_counter() - inicio)
+        finally:
+            gc.enable()
+    return tempos
+
+
+def run(scales: List[str], stages: List[str], repeat: int, seed: int) -> Dict:
+    resultados = []
+    for escala in scales:
+        fx = Fixture(parse_scale(escala), seed=seed)
+        for nome in stages:
+            fn = STAGES[nome](fx)
+            tempos = time_stage(fn, repeat)
+            melhor = min(tempos)
+            resultados.append({
+                'stage': nome,
+                'scale': escala,
+                'n': fx.n,
+                'min': melhor,
+                'median': statistics.median(tempos),
+                'mean': statistics.fmean(tempos),
+                'repeat': repeat,
+                'rows_per_s': fx.n / melhor if melhor else None,
+            })
+            print(f"{nome:>16} {escala:>5}: {melhor * 1000:10.1f} ms  ({fx.n / melhor:,.0f} pagamentos/s)")
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': seed,
+        'results': resultados,
+    }
+
+
+def compare(atual: Dict, anterior: Dict, threshold: float) -> bool:
+    """Imprime a comparação e retorna False se houver regressão acima do limite."""
+    base = {(r['stage'], r['scale']): r['min'] for r in anterior['results']}
+    ok = True
+    print(f"\nComparação com {anterior.get('commit', '?')} (limite {threshold:.0%}):")
+    for r in atual['results']:
+        chave = (r['stage'], r['scale'])
+        if chave not in base or not base[chave]:
+            continue
+        razao = r['min'] / base[chave]
+        marca = ''
+        if razao > 1 + threshold:
+            marca = '  <-- REGRESSÃO'
+            ok = False
+        print(f"{r['stage']:>16} {r['scale']:>5}: {razao:6.2f}x{marca}")
+    return ok
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks do pipeline CNAB 240')
+    parser.add_argument('--scales', default='1k,100k', help='Escalas separadas por vírgula (1k, 100k, 1M ou número)')
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"Etapas ({', '.join(STAGES)})")
+    parser.add_argument('--repeat', type=int, default=3, help='Repetições por etapa (usa o menor tempo)')
+    parser.add_argument('--seed', type=int, default=0, help='Semente da massa sintética')
+    parser.add_argument('--output', type=Path, help='Arquivo JSON de saída (padrão: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', type=Path, help='Resultado anterior para comparação')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Regressão tolerada (0.10 = 10%%)')
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    desconhecidas = [s for s in stages if s not in STAGES]
+    if desconhecidas:
+        parser.error(f"etapa(s) desconhecida(s): {', '.join(desconhecidas)}")
+
+    resultado = run([s.strip() for s in args.scales.split(',') if s.strip()], stages, args.repeat, args.seed)
+
+    destino = args.output or RESULTS_DIR / f"{resultado['commit']}.json"
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    destino.write_text(json.dumps(resultado, indent=2), encoding='utf-8')
+    print(f"\nResultado gravado em {destino}")
+
+    if args.compare:
+        anterior = json.loads(args.compare.read_text(encoding='utf-8'))
+        if not compare(resultado, anterior, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
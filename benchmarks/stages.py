@@ -0,0 +1,118 @@
+"""
+Etapas medidas pela suíte. Cada etapa recebe a massa (Fixture) e devolve a
+função a ser cronometrada; a preparação (ler fixture, gerar linhas) fica fora
+da medição.
+"""
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import cached_property
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from src.cnab240 import structure, validate
+from src.cnab240.config import BankConfig
+from src.cnab240.bradesco_pix import BradescoPIXGenerator
+from src.cnab240.bradesco_ted import BradescoTEDGenerator
+from src.cnab240 import synth
+from src.output_store import OutputStore
+
+CONFIG_BENCH = {
+    'empresa': {'tipo_inscricao': 2, 'numero_inscricao': '11222333000181', 'nome': 'EMPRESA BENCHMARK LTDA'},
+    'conta': {'codigo_convenio': '123456', 'agencia': '00134', 'conta': '000000184492', 'digito_conta': '0'},
+    'arquivo': {'sequencial_inicial': 1},
+}
+FILE_DATE = datetime(2030, 1, 2)
+
+
+@dataclass
+class Fixture:
+    """Massa de uma escala; fixtures caras (Excel) ficam em `cache_dir`."""
+    n: int
+    seed: int = 0
+    cache_dir: Path = field(default_factory=lambda: Path(tempfile.gettempdir()) / 'cnab_bench')
+
+    @cached_property
+    def frame(self):
+        return synth.generate_frame(self.n, seed=self.seed)
+
+    @cached_property
+    def pagamentos(self) -> List[Dict]:
+        return synth.to_pagamentos(self.frame)
+
+    @cached_property
+    def excel_path(self) -> Path:
+        path = self.cache_dir / f'synth_{self.n}_{self.seed}.xlsx'
+        if not path.exists():
+            synth.write_output(self.frame, path)
+        return path
+
+    @cached_property
+    def bank(self) -> BankConfig:
+        return BankConfig.from_dict(CONFIG_BENCH)
+
+    @cached_property
+    def por_tipo(self) -> Dict[str, List[Dict]]:
+        grupos: Dict[str, List[Dict]] = {}
+        for pagamento in self.pagamentos:
+            grupos.setdefault(pagamento['tipo_pagamento'], []).append(pagamento)
+        return grupos
+
+    @cached_property
+    def arquivos(self) -> Dict[str, List[str]]:
+        return generate_all(self)
+
+
+def generate_all(fx: Fixture) -> Dict[str, List[str]]:
+    arquivos = {}
+    for seq, (tipo, pagamentos) in enumerate(fx.por_tipo.items(), 1):
+        if tipo == 'PIX':
+            arquivos[tipo] = BradescoPIXGenerator(fx.bank).generate_file(pagamentos, FILE_DATE, seq)
+        else:
+            arquivos[tipo] = BradescoTEDGenerator(fx.bank).generate_file(pagamentos, FILE_DATE, seq, tipo)
+    return arquivos
+
+
+def stage_ingest(fx: Fixture) -> Callable[[], object]:
+    from main import read_excel
+    path = fx.excel_path
+    return lambda: read_excel(str(path))
+
+
+def stage_validation(fx: Fixture) -> Callable[[], object]:
+    pagamentos = fx.pagamentos
+    return lambda: validate.check_pagamentos(pagamentos)
+
+
+def stage_generation(fx: Fixture) -> Callable[[], object]:
+    fx.por_tipo
+    return lambda: generate_all(fx)
+
+
+def stage_file_validation(fx: Fixture) -> Callable[[], object]:
+    conteudos = [structure.encode_lines(lines) for lines in fx.arquivos.values()]
+
+    def run():
+        for conteudo in conteudos:
+            structure.validate_buffer(conteudo)
+    return run
+
+
+def stage_write(fx: Fixture) -> Callable[[], object]:
+    arquivos = fx.arquivos
+    destino = Path(tempfile.mkdtemp(prefix='cnab_bench_write_'))
+
+    def run():
+        store = OutputStore(destino)
+        for tipo, lines in arquivos.items():
+            store.write(f'BRADESCO_{tipo}_BENCH.txt', lines, tipo=tipo)
+    return run
+
+
+STAGES: Dict[str, Callable[[Fixture], Callable[[], object]]] = {
+    'ingest': stage_ingest,
+    'validation': stage_validation,
+    'generation': stage_generation,
+    'file_validation': stage_file_validation,
+    'write': stage_write,
+}
@@ -4,11 +4,13 @@ Gerador de REMESSA CNAB 240 para PAGAMENTO PIX via Bradesco Multipag
 """
 import sys
 import os
-import csv
+import argparse
 import logging
-from datetime import datetime
+import time
+from collections import Counter
+from datetime import date, datetime
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterator, List, Tuple
 
 try:
     import pandas as pd
@@ -19,10 +21,18 @@ except ImportError:
                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     import pandas as pd
 
-from src.cnab240.bradesco_pix import BradescoPIXGenerator
-from src.cnab240.bradesco_ted import BradescoTEDGenerator
-from src.cnab240 import validate
+from src.cnab240 import rules
+from src.cnab240.config import load_config
+from src.cnab240.dates import normalize_date
+from src.cnab240.ledger import NOME_PADRAO as LEDGER_PADRAO
+from src.cnab240.accounts import (AccountRouter, load_accounts, write_account_files)
+from src.cnab240.pipeline import run_pipeline, validate_blocks
+from src.cnab240.report import FORMATOS, ReportWriter, report_path
 from src.cnab240.fields import sanitize_text
+from src.cnab240.metrics import METRICS, timed
+from src.cnab240.profiling import ENGINES, Profiler
+from src.cnab240.scheduler import Scheduler
+from src.cnab240.txid import emitted_payments
 
 # Configuração de logging
 logging.basicConfig(
@@ -33,6 +43,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+@timed('read_excel')
 def read_excel(file_path: str) -> List[Dict]:
     """
     Lê arquivo Excel e retorna lista de pagamentos.
@@ -44,95 +55,9 @@ def read_excel(file_path: str) -> List[Dict]:
         Lista de dicionários com dados dos pagamentos
     """
     try:
-        # Lê a primeira aba
-        df = pd.read_excel(file_path, sheet_name=0)
-        
-        # Normaliza nomes das colunas (remove espaços, converte para minúsculas)
-        df.columns = df.columns.str.strip().str.lower()
-        
-        # Mapeia colunas esperadas
-        pagamentos = []
-        for index, row in df.iterrows():
-            # Trata data_pagamento (pode vir como datetime do Excel)
-            data_pagamento = row.get('data_pagamento', '')
-            if pd.notna(data_pagamento):
-                if isinstance(data_pagamento, datetime):
-                    # Se for datetime, converte para string no formato YYYY-MM-DD
-                    data_pagamento = data_pagamento.strftime('%Y-%m-%d')
-                else:
-                    data_pagamento = str(data_pagamento).strip()
-            else:
-                data_pagamento = ''
-            
-            # Trata data_vencimento (para boleto)
-            data_vencimento = row.get('data_vencimento', '')
-            if pd.notna(data_vencimento):
-                if isinstance(data_vencimento, datetime):
-                    data_vencimento = data_vencimento.strftime('%Y-%m-%d')
-                else:
-                    data_vencimento = str(data_vencimento).strip()
-            else:
-                data_vencimento = ''
-            
-            # Limpa valores numéricos que podem vir como float
-            def clean_numeric(value):
-                if pd.isna(value):
-                    return ''
-                value_str = str(value).replace('.0', '').strip()
-                return value_str
-            
-            pagamento = {
-                'tipo_pagamento': str(row.get('tipo_pagamento', 'PIX')).strip().upper() if pd.notna(row.get('tipo_pagamento')) else 'PIX',
-                'id_pagamento': str(row.get('id_pagamento', '')).strip() if pd.notna(row.get('id_pagamento')) else '',
-                'data_pagamento': data_pagamento,
-                'valor': float(row.get('valor', 0)) if pd.notna(row.get('valor')) else 0.0,
-                'nome_favorecido': str(row.get('nome_favorecido', '')).strip() if pd.notna(row.get('nome_favorecido')) else '',
-                'tipo_pessoa': str(row.get('tipo_pessoa', 'F')).strip().upper() if pd.notna(row.get('tipo_pessoa')) else 'F',
-                'cpf_cnpj': clean_numeric(row.get('cpf_cnpj', '')),
-                # Campos PIX
-                'tipo_chave_pix': str(row.get('tipo_chave_pix', '')).strip().upper() if pd.notna(row.get('tipo_chave_pix')) else '',
-                'chave_pix': clean_numeric(row.get('chave_pix', '')),
-                'txid': str(row.get('txid', '')).strip() if pd.notna(row.get('txid')) else '',
-                # Campos TED/DOC
-                'banco_favorecido': clean_numeric(row.get('banco_favorecido', '')),
-                'agencia_favorecido': clean_numeric(row.get('agencia_favorecido', '')),
-                'digito_agencia_favorecido': clean_numeric(row.get('digito_agencia_favorecido', '')),
-                'conta_favorecido': clean_numeric(row.get('conta_favorecido', '')),
-                'digito_conta_favorecido': clean_numeric(row.get('digito_conta_favorecido', '')),
-                'tipo_conta': clean_numeric(row.get('tipo_conta', '')),
-                'endereco_favorecido': str(row.get('endereco_favorecido', '')).strip() if pd.notna(row.get('endereco_favorecido')) else '',
-                'numero_endereco': str(row.get('numero_endereco', '')).strip() if pd.notna(row.get('numero_endereco')) else '',
-                'complemento_endereco': str(row.get('complemento_endereco', '')).strip() if pd.notna(row.get('complemento_endereco')) else '',
-                'bairro_favorecido': str(row.get('bairro_favorecido', '')).strip() if pd.notna(row.get('bairro_favorecido')) else '',
-                'cidade_favorecido': str(row.get('cidade_favorecido', '')).strip() if pd.notna(row.get('cidade_favorecido')) else '',
-                'cep_favorecido': clean_numeric(row.get('cep_favorecido', '')),
-                'estado_favorecido': str(row.get('estado_favorecido', '')).strip().upper() if pd.notna(row.get('estado_favorecido')) else '',
-                'finalidade_ted': clean_numeric(row.get('finalidade_ted', '')),
-                # Campos BOLETO
-                'nosso_numero': clean_numeric(row.get('nosso_numero', '')),
-                'data_vencimento': data_vencimento,
-                'valor_titulo': float(row.get('valor_titulo', row.get('valor', 0))) if pd.notna(row.get('valor_titulo', row.get('valor'))) else float(row.get('valor', 0)),
-                'valor_desconto': float(row.get('valor_desconto', 0)) if pd.notna(row.get('valor_desconto')) else 0.0,
-                'valor_multa': float(row.get('valor_multa', 0)) if pd.notna(row.get('valor_multa')) else 0.0,
-                'valor_juros': float(row.get('valor_juros', 0)) if pd.notna(row.get('valor_juros')) else 0.0,
-                'codigo_barras': str(row.get('codigo_barras', '')).strip() if pd.notna(row.get('codigo_barras')) else '',
-                'linha_digitavel': str(row.get('linha_digitavel', '')).strip() if pd.notna(row.get('linha_digitavel')) else '',
-                'sacado_nome': str(row.get('sacado_nome', '')).strip() if pd.notna(row.get('sacado_nome')) else '',
-                'sacado_tipo_pessoa': str(row.get('sacado_tipo_pessoa', 'F')).strip().upper() if pd.notna(row.get('sacado_tipo_pessoa')) else 'F',
-                'sacado_cpf_cnpj': clean_numeric(row.get('sacado_cpf_cnpj', '')),
-                'sacado_endereco': str(row.get('sacado_endereco', '')).strip() if pd.notna(row.get('sacado_endereco')) else '',
-                'sacado_cidade': str(row.get('sacado_cidade', '')).strip() if pd.notna(row.get('sacado_cidade')) else '',
-                'sacado_cep': clean_numeric(row.get('sacado_cep', '')),
-                'sacado_estado': str(row.get('sacado_estado', '')).strip().upper() if pd.notna(row.get('sacado_estado')) else '',
-                'instrucoes': str(row.get('instrucoes', '')).strip() if pd.notna(row.get('instrucoes')) else '',
-                'especie_titulo': str(row.get('especie_titulo', '')).strip() if pd.notna(row.get('especie_titulo')) else '',
-                # Campos comuns
-                'descricao_pagamento': str(row.get('descricao_pagamento', '')).strip() if pd.notna(row.get('descricao_pagamento')) else '',
-                'aviso_favorecido': int(row.get('aviso_favorecido', 0)) if pd.notna(row.get('aviso_favorecido')) else 0,
-            }
-            pagamentos.append(pagamento)
-        
+        pagamentos = list(iter_excel(file_path))
         logger.info(f"Lidos {len(pagamentos)} pagamentos do arquivo Excel")
+        METRICS.incr('pagamentos_lidos', len(pagamentos))
         return pagamentos
     
     except Exception as e:
@@ -140,6 +65,95 @@ def read_excel(file_path: str) -> List[Dict]:
         raise
 
 
+def iter_excel(file_path: str) -> Iterator[Dict]:
+    """
+    Lê arquivo Excel e produz os pagamentos um a um (usado pelo modo --stream).
+    
+    Args:
+        file_path: Caminho para o arquivo Excel
+    
+    Yields:
+        Dicionário com os dados de cada pagamento
+    """
+    # Lê a primeira aba sem inferir tipos: células de texto como '00123' (CPF,
+    # banco, agência) mantêm os zeros à esquerda; células numéricas seguem números
+    df = pd.read_excel(file_path, sheet_name=0, dtype=object)
+    
+    # Normaliza nomes das colunas (remove espaços, converte para minúsculas)
+    df.columns = df.columns.str.strip().str.lower()
+    
+    # Mapeia colunas esperadas
+    for index, row in df.iterrows():
+        # Trata data_pagamento (pode vir como datetime do Excel): normalizada para
+        # AAAA-MM-DD, assim a geração não precisa testar formatos por pagamento
+        data_pagamento = row.get('data_pagamento', '')
+        data_pagamento = normalize_date(data_pagamento) if pd.notna(data_pagamento) else ''
+
+        # Trata data_vencimento (para boleto)
+        data_vencimento = row.get('data_vencimento', '')
+        data_vencimento = normalize_date(data_vencimento) if pd.notna(data_vencimento) else ''
+
+        # Limpa valores numéricos que podem vir como float
+        def clean_numeric(value):
+            if pd.isna(value):
+                return ''
+            value_str = str(value).replace('.0', '').strip()
+            return value_str
+
+        pagamento = {
+            'tipo_pagamento': str(row.get('tipo_pagamento', 'PIX')).strip().upper() if pd.notna(row.get('tipo_pagamento')) else 'PIX',
+            'id_pagamento': str(row.get('id_pagamento', '')).strip() if pd.notna(row.get('id_pagamento')) else '',
+            'data_pagamento': data_pagamento,
+            'valor': float(row.get('valor', 0)) if pd.notna(row.get('valor')) else 0.0,
+            'nome_favorecido': str(row.get('nome_favorecido', '')).strip() if pd.notna(row.get('nome_favorecido')) else '',
+            'tipo_pessoa': str(row.get('tipo_pessoa', 'F')).strip().upper() if pd.notna(row.get('tipo_pessoa')) else 'F',
+            'cpf_cnpj': clean_numeric(row.get('cpf_cnpj', '')),
+            # Campos PIX
+            'tipo_chave_pix': str(row.get('tipo_chave_pix', '')).strip().upper() if pd.notna(row.get('tipo_chave_pix')) else '',
+            'chave_pix': clean_numeric(row.get('chave_pix', '')),
+            'txid': str(row.get('txid', '')).strip() if pd.notna(row.get('txid')) else '',
+            # Campos TED/DOC
+            'banco_favorecido': clean_numeric(row.get('banco_favorecido', '')),
+            'agencia_favorecido': clean_numeric(row.get('agencia_favorecido', '')),
+            'digito_agencia_favorecido': clean_numeric(row.get('digito_agencia_favorecido', '')),
+            'conta_favorecido': clean_numeric(row.get('conta_favorecido', '')),
+            'digito_conta_favorecido': clean_numeric(row.get('digito_conta_favorecido', '')),
+            'tipo_conta': clean_numeric(row.get('tipo_conta', '')),
+            'endereco_favorecido': str(row.get('endereco_favorecido', '')).strip() if pd.notna(row.get('endereco_favorecido')) else '',
+            'numero_endereco': str(row.get('numero_endereco', '')).strip() if pd.notna(row.get('numero_endereco')) else '',
+            'complemento_endereco': str(row.get('complemento_endereco', '')).strip() if pd.notna(row.get('complemento_endereco')) else '',
+            'bairro_favorecido': str(row.get('bairro_favorecido', '')).strip() if pd.notna(row.get('bairro_favorecido')) else '',
+            'cidade_favorecido': str(row.get('cidade_favorecido', '')).strip() if pd.notna(row.get('cidade_favorecido')) else '',
+            'cep_favorecido': clean_numeric(row.get('cep_favorecido', '')),
+            'estado_favorecido': str(row.get('estado_favorecido', '')).strip().upper() if pd.notna(row.get('estado_favorecido')) else '',
+            'finalidade_ted': clean_numeric(row.get('finalidade_ted', '')),
+            # Campos BOLETO
+            'nosso_numero': clean_numeric(row.get('nosso_numero', '')),
+            'data_vencimento': data_vencimento,
+            'valor_titulo': float(row.get('valor_titulo', row.get('valor', 0))) if pd.notna(row.get('valor_titulo', row.get('valor'))) else float(row.get('valor', 0)),
+            'valor_desconto': float(row.get('valor_desconto', 0)) if pd.notna(row.get('valor_desconto')) else 0.0,
+            'valor_multa': float(row.get('valor_multa', 0)) if pd.notna(row.get('valor_multa')) else 0.0,
+            'valor_juros': float(row.get('valor_juros', 0)) if pd.notna(row.get('valor_juros')) else 0.0,
+            'codigo_barras': str(row.get('codigo_barras', '')).strip() if pd.notna(row.get('codigo_barras')) else '',
+            'linha_digitavel': str(row.get('linha_digitavel', '')).strip() if pd.notna(row.get('linha_digitavel')) else '',
+            'sacado_nome': str(row.get('sacado_nome', '')).strip() if pd.notna(row.get('sacado_nome')) else '',
+            'sacado_tipo_pessoa': str(row.get('sacado_tipo_pessoa', 'F')).strip().upper() if pd.notna(row.get('sacado_tipo_pessoa')) else 'F',
+            'sacado_cpf_cnpj': clean_numeric(row.get('sacado_cpf_cnpj', '')),
+            'sacado_endereco': str(row.get('sacado_endereco', '')).strip() if pd.notna(row.get('sacado_endereco')) else '',
+            'sacado_cidade': str(row.get('sacado_cidade', '')).strip() if pd.notna(row.get('sacado_cidade')) else '',
+            'sacado_cep': clean_numeric(row.get('sacado_cep', '')),
+            'sacado_estado': str(row.get('sacado_estado', '')).strip().upper() if pd.notna(row.get('sacado_estado')) else '',
+            'instrucoes': str(row.get('instrucoes', '')).strip() if pd.notna(row.get('instrucoes')) else '',
+            'especie_titulo': str(row.get('especie_titulo', '')).strip() if pd.notna(row.get('especie_titulo')) else '',
+            # Campos comuns
+            'conta_debito': str(row.get('conta_debito', '')).strip() if pd.notna(row.get('conta_debito')) else '',
+            'descricao_pagamento': str(row.get('descricao_pagamento', '')).strip() if pd.notna(row.get('descricao_pagamento')) else '',
+            'aviso_favorecido': int(row.get('aviso_favorecido', 0)) if pd.notna(row.get('aviso_favorecido')) else 0,
+        }
+        yield pagamento
+
+
+@timed('truncate_fields')
 def truncate_fields(pagamentos: List[Dict]) -> List[Dict]:
     """
     Trunca campos que excedem o tamanho permitido e registra no log.
@@ -151,63 +165,151 @@ def truncate_fields(pagamentos: List[Dict]) -> List[Dict]:
         Lista de pagamentos com campos truncados
     """
     for pagamento in pagamentos:
-        id_pag = pagamento.get('id_pagamento', '')
-        
-        # Trunca nome_favorecido (máximo 30 caracteres)
-        nome = pagamento.get('nome_favorecido', '')
-        if len(nome) > 30:
-            nome_original = nome
-            nome = nome[:30]
-            pagamento['nome_favorecido'] = nome
-            logger.warning(f"{id_pag}: nome_favorecido truncado de {len(nome_original)} para 30 caracteres")
-        
-        # Trunca chave_pix (máximo 100 caracteres - 5 campos de 20 no Segmento J-52)
-        chave = pagamento.get('chave_pix', '')
-        if len(chave) > 100:
-            chave_original = chave
-            chave = chave[:100]
-            pagamento['chave_pix'] = chave
-            logger.warning(f"{id_pag}: chave_pix truncada de {len(chave_original)} para 100 caracteres")
+        truncate_pagamento(pagamento)
     
     return pagamentos
 
 
-def generate_report(pagamentos: List[Dict], errors_by_id: Dict[str, List[str]], 
-                   output_dir: Path) -> str:
-    """
-    Gera relatório de validação em CSV.
+def truncate_pagamento(pagamento: Dict) -> None:
+    """Trunca (no próprio dicionário) os campos de um pagamento que excedem o tamanho."""
+    id_pag = pagamento.get('id_pagamento', '')
+    
+    # Trunca nome_favorecido (máximo 30 caracteres)
+    nome = pagamento.get('nome_favorecido', '')
+    if len(nome) > 30:
+        nome_original = nome
+        nome = nome[:30]
+        pagamento['nome_favorecido'] = nome
+        logger.warning(f"{id_pag}: nome_favorecido truncado de {len(nome_original)} para 30 caracteres")
     
+    # Trunca chave_pix (máximo 100 caracteres - 5 campos de 20 no Segmento J-52)
+    chave = pagamento.get('chave_pix', '')
+    if len(chave) > 100:
+        chave_original = chave
+        chave = chave[:100]
+        pagamento['chave_pix'] = chave
+        logger.warning(f"{id_pag}: chave_pix truncada de {len(chave_original)} para 100 caracteres")
+
+
+@timed('validate_pagamentos')
+def validate_and_report(pagamentos: List[Dict], router: AccountRouter, regras: rules.RuleSet,
+                        output_dir: Path, formato: str = 'csv') -> Tuple[Dict[Tuple[str, str], List[Dict]], int]:
+    """
+    Valida e roteia os pagamentos em blocos, escrevendo o relatório de validação
+    (CSV, JSON Lines ou Parquet) à medida que cada bloco é concluído.
+
+    Como no fluxo em lote a planilha inteira já está em memória, todas as
+    ocorrências de um id_pagamento repetido ficam fora da remessa.
+
     Args:
         pagamentos: Lista de pagamentos
-        errors_by_id: Dicionário com erros por id_pagamento
+        router: Roteador de contas
+        regras: Regras de validação (ver rules.for_config)
         output_dir: Diretório de saída
-    
+        formato: 'csv', 'jsonl' ou 'parquet'
+
     Returns:
-        Caminho do arquivo de relatório gerado
+        Tupla (pagamentos válidos agrupados por (conta, tipo), quantidade de inválidos)
     """
-    report_path = output_dir / 'relatorio_validacao.csv'
-    
-    with open(report_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f, delimiter=';')
-        writer.writerow(['id_pagamento', 'status', 'erros'])
-        
-        for pagamento in pagamentos:
-            id_pag = str(pagamento.get('id_pagamento', ''))
-            if id_pag in errors_by_id:
-                status = 'ERRO'
-                erros = ' | '.join(errors_by_id[id_pag])
-            else:
-                status = 'OK'
-                erros = ''
-            
-            writer.writerow([id_pag, status, erros])
-    
-    logger.info(f"Relatório de validação salvo em: {report_path}")
-    return str(report_path)
+    contagem = Counter(str(p.get('id_pagamento', f'#{i}')) for i, p in enumerate(pagamentos))
+    duplicados = {id_pag for id_pag, n in contagem.items() if n > 1}
+
+    grupos: Dict[Tuple[str, str], List[Dict]] = {}
+    invalidos = 0
+    with ReportWriter(report_path(output_dir, formato)) as report:
+        for bloco in validate_blocks(pagamentos, router, regras, duplicados=duplicados):
+            for validado in bloco:
+                report.write(validado.id_pagamento, validado.status, validado.erros, validado.index)
+                if validado.conta_id is None:
+                    invalidos += 1
+                    continue
+                tipo = str(validado.pagamento.get('tipo_pagamento', 'PIX')).upper().strip()
+                grupos.setdefault((validado.conta_id, tipo), []).append(validado.pagamento)
+
+    METRICS.incr('pagamentos_validados', len(pagamentos))
+    METRICS.incr('pagamentos_invalidos', invalidos)
+    logger.info(f"Relatório de validação salvo em: {report.path}")
+    return grupos, invalidos
 
 
-def main():
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    """Argumentos de linha de comando."""
+    parser = argparse.ArgumentParser(description='Gera remessas CNAB 240 Bradesco a partir de Pagamentos_Excel.xlsx')
+    parser.add_argument('--metrics-json', metavar='ARQUIVO',
+                        help='Grava relatório de métricas (tempos por etapa e contadores) em JSON')
+    parser.add_argument('--metrics-prom', metavar='ARQUIVO',
+                        help='Grava as métricas no formato texto do Prometheus')
+    parser.add_argument('--stream', action='store_true',
+                        help='Processa cada pagamento em uma única passada (validação, roteamento e '
+                             'gravação), sem manter a planilha validada em memória')
+    parser.add_argument('--report-format', choices=FORMATOS, default='csv',
+                        help='Formato do relatório de validação: csv, jsonl ou parquet (padrão: csv)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Perfila a execução e salva o perfil em output/ (geração sem paralelismo)')
+    parser.add_argument('--profile-engine', choices=ENGINES, default='auto',
+                        help='Perfilador: pyinstrument (se instalado) ou cProfile (padrão: auto)')
+    parser.add_argument('--profile-top', type=int, default=20, metavar='N',
+                        help='Quantidade de funções exibidas no resumo do perfil (padrão: 20)')
+    parser.add_argument('--agendar', action='store_true',
+                        help='Valida a planilha e agenda os pagamentos no ledger, um dia útil por '
+                             'data_pagamento, em vez de gerar as remessas agora (ver --emitir)')
+    parser.add_argument('--emitir', nargs='?', const='hoje', metavar='AAAA-MM-DD',
+                        help='Emite as remessas dos pagamentos agendados para o dia (padrão: hoje)')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Emite as remessas agendadas a cada dia útil, até ser interrompido')
+    parser.add_argument('--intervalo', type=int, default=3600, metavar='SEGUNDOS',
+                        help='Intervalo entre verificações do --daemon (padrão: 3600)')
+    args = parser.parse_args(argv)
+    if args.emitir not in (None, 'hoje'):
+        try:
+            args.emitir = datetime.strptime(args.emitir, '%Y-%m-%d').date()
+        except ValueError:
+            parser.error(f"--emitir: data inválida (use AAAA-MM-DD): {args.emitir}")
+    return args
+
+
+def main(argv: List[str] | None = None):
     """Função principal"""
+    args = parse_args(argv)
+    if args.metrics_json or args.metrics_prom:
+        METRICS.enable()
+    try:
+        if args.profile:
+            output_dir = Path(__file__).parent / 'output'
+            nome = f"perfil_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            # Processos do pool não são perfilados: gera tudo no processo principal
+            profiler = Profiler(output_dir, nome, engine=args.profile_engine, top=args.profile_top)
+            try:
+                with profiler:
+                    run(max_workers=1, stream=args.stream, report_format=args.report_format)
+            finally:
+                if profiler.result is not None:
+                    logger.info(f"\nPerfil ({profiler.result.engine}) salvo em: "
+                                f"{', '.join(map(str, profiler.result.arquivos))}")
+                    logger.info("Funções com maior tempo próprio:\n" + profiler.result.summary(args.profile_top))
+        elif args.daemon:
+            run_daemon(args.intervalo)
+        elif args.emitir:
+            run_scheduled(None if args.emitir == 'hoje' else args.emitir)
+        else:
+            run(stream=args.stream, report_format=args.report_format, agendar=args.agendar)
+    finally:
+        if args.metrics_json:
+            logger.info(f"Métricas salvas em: {METRICS.write_json(args.metrics_json)}")
+        if args.metrics_prom:
+            logger.info(f"Métricas (Prometheus) salvas em: {METRICS.write_prometheus(args.metrics_prom)}")
+
+
+def run(max_workers: int | None = None, stream: bool = False, report_format: str = 'csv', agendar: bool = False):
+    """
+    Executa o pipeline: leitura, validação, geração e gravação das remessas.
+
+    Args:
+        max_workers: Processos para a geração (None = padrão; 1 = sem paralelismo)
+        stream: Usa o pipeline de passada única (run_pipeline)
+        report_format: Formato do relatório de validação ('csv', 'jsonl' ou 'parquet')
+        agendar: Agenda os pagamentos válidos no ledger em vez de gerar as remessas
+    """
     # Configura caminhos
     base_dir = Path(__file__).parent
     excel_path = base_dir / 'Pagamentos_Excel.xlsx'
@@ -228,6 +330,10 @@ def main():
         logger.error("Por favor, crie o arquivo config/bradesco.yaml com os dados da empresa e conta")
         sys.exit(1)
     
+    if stream and not agendar:
+        run_stream(excel_path, config_path, output_dir, report_format)
+        return
+    
     try:
         # Lê pagamentos do Excel
         logger.info(f"Lendo arquivo Excel: {excel_path}")
@@ -240,102 +346,80 @@ def main():
         # Trunca campos que excedem tamanho
         pagamentos = truncate_fields(pagamentos)
         
-        # Valida pagamentos
-        logger.info("Validando pagamentos...")
-        all_valid, errors_by_id = validate.validate_pagamentos(pagamentos)
+        config = load_config(str(config_path))
+        # TXIDs e sequenciais de arquivo ficam no ledger local (nunca se repetem entre remessas)
+        config.setdefault('arquivo', {}).setdefault('ledger', str(output_dir / LEDGER_PADRAO))
+        
+        # Contas de débito (uma ou várias) e roteamento de cada pagamento
+        accounts = load_accounts(config)
+        router = AccountRouter.from_config(config, accounts)
+        multi_contas = len(accounts) > 1
         
-        # Gera relatório de validação
-        generate_report(pagamentos, errors_by_id, output_dir)
+        # Valida (com `arquivo.dia_nao_util: rejeitar`, também o dia útil), roteia e
+        # agrupa por (conta, tipo); o relatório é escrito a cada bloco validado.
+        # Avisos (ex.: banco fora do diretório) vão para o relatório sem bloquear o pagamento
+        logger.info("Validando pagamentos...")
+        pagamentos_por_grupo, invalidos = validate_and_report(
+            pagamentos, router, rules.for_config(config['arquivo']), output_dir, report_format)
         
-        if not all_valid:
+        if invalidos:
             logger.warning("Foram encontrados erros na validação. Verifique o relatório.")
             logger.warning("O arquivo CNAB será gerado apenas com os pagamentos válidos.")
-            # Filtra apenas pagamentos válidos
-            pagamentos = [p for p in pagamentos if str(p.get('id_pagamento', '')) not in errors_by_id]
         
-        if not pagamentos:
+        if not pagamentos_por_grupo:
             logger.error("Nenhum pagamento válido para processar")
             sys.exit(1)
         
-        # Agrupa pagamentos por tipo
-        pagamentos_por_tipo = {}
-        for pagamento in pagamentos:
-            tipo = pagamento.get('tipo_pagamento', 'PIX').upper().strip()
-            if tipo not in pagamentos_por_tipo:
-                pagamentos_por_tipo[tipo] = []
-            pagamentos_por_tipo[tipo].append(pagamento)
-        
-        logger.info(f"Pagamentos agrupados por tipo: {dict((k, len(v)) for k, v in pagamentos_por_tipo.items())}")
+        logger.info(f"Pagamentos agrupados por conta/tipo: {dict(('/'.join(k), len(v)) for k, v in pagamentos_por_grupo.items())}")
+        for (conta_id, tipo), pagamentos_grupo in pagamentos_por_grupo.items():
+            repetidos = emitted_payments(accounts[conta_id], pagamentos_grupo) if tipo == 'PIX' else []
+            if repetidos:
+                logger.warning(f"{len(repetidos)} pagamento(s) PIX da conta {conta_id} já saíram em remessa anterior "
+                               f"com o mesmo TXID ({', '.join(repetidos[:5])}): confira antes de enviar de novo.")
+        if agendar:
+            schedule_payments(pagamentos_por_grupo, config, accounts, output_dir)
+            return
+        for (conta_id, tipo), pagamentos_grupo in pagamentos_por_grupo.items():
+            if tipo not in ('PIX', 'TED', 'DOC'):
+                logger.warning(f"Tipo de pagamento '{tipo}' ainda não implementado. Pulando {len(pagamentos_grupo)} pagamento(s) da conta {conta_id}...")
         
         file_date = datetime.now()
         arquivos_gerados = []
         
-        # Processa cada tipo de pagamento
-        for tipo, pagamentos_tipo in pagamentos_por_tipo.items():
-            logger.info(f"\nProcessando {len(pagamentos_tipo)} pagamento(s) do tipo {tipo}...")
+        # Gera e grava um arquivo por (conta, tipo): cada arquivo é pré-alocado com o
+        # tamanho final e as faixas de pagamentos são gravadas direto na sua posição,
+        # em paralelo. A estrutura (tipos de registro, lotes, sequenciais, pares de
+        # segmentos, campos numéricos e trailers recalculados dos detalhes) é validada
+        # antes do rename para o nome final; arquivos inválidos não são publicados.
+        for gerado in write_account_files(pagamentos_por_grupo, accounts, file_date, output_dir, multi_contas,
+                                          max_workers=max_workers):
+            tipo = gerado.tipo
+            total_pagamentos_tipo = gerado.pagamentos
+            total_valor_tipo = gerado.valor
+            registros = 2 * total_pagamentos_tipo + 4
+            logger.info(f"\nProcessando {total_pagamentos_tipo} pagamento(s) do tipo {tipo} (conta {gerado.conta_id})...")
             
-            if tipo == 'PIX':
-                # Gera arquivo PIX
-                generator = BradescoPIXGenerator(str(config_path))
-                file_seq = generator.config.get('arquivo', {}).get('sequencial_inicial', 1)
-                lines = generator.generate_file(pagamentos_tipo, file_date, file_seq)
-                tipo_arquivo = 'PIX'
-            
-            elif tipo in ['TED', 'DOC']:
-                # Gera arquivo TED/DOC
-                generator = BradescoTEDGenerator(str(config_path))
-                file_seq = generator.config.get('arquivo', {}).get('sequencial_inicial', 1)
-                lines = generator.generate_file(pagamentos_tipo, file_date, file_seq, tipo)
-                tipo_arquivo = tipo
-            
-            else:
-                logger.warning(f"Tipo de pagamento '{tipo}' ainda não implementado. Pulando...")
-                continue
-            
-            # Valida arquivo gerado
-            logger.info(f"Validando arquivo CNAB 240 para {tipo}...")
-            file_valid, file_errors = validate.validate_cnab_file(lines)
-            
-            if not file_valid:
+            if gerado.erros:
                 logger.error(f"Erros na validação do arquivo CNAB para {tipo}:")
-                for error in file_errors:
+                for error in gerado.erros:
                     logger.error(f"  - {error}")
                 continue
             
-            # Valida trailers
-            total_pagamentos_tipo = len(pagamentos_tipo)
-            total_valor_tipo = sum(float(p.get('valor', 0)) for p in pagamentos_tipo)
-            
-            trailers_valid, trailer_errors = validate.validate_trailers(lines, total_pagamentos_tipo, total_valor_tipo)
-            
-            if not trailers_valid:
-                logger.error(f"Erros na validação dos trailers para {tipo}:")
-                for error in trailer_errors:
-                    logger.error(f"  - {error}")
-                continue
-            
-            # Salva arquivo
-            filename = f"BRADESCO_{tipo_arquivo}_REMESSA_{file_date.strftime('%Y%m%d')}_{file_seq:06d}.txt"
-            file_path = output_dir / filename
-            
-            # Salva arquivo em modo binário para garantir exatamente CRLF (\r\n),
-            # sem duplicar \r por conversões automáticas de newline do Python.
-            # O CNAB240 deve ter CRLF no final de cada linha, incluindo a última.
-            with open(file_path, 'wb') as f:
-                for line in lines:
-                    f.write(line.encode('ascii', errors='strict'))
-                    f.write(b'\r\n')
+            file_path = gerado.path
+            METRICS.incr('bytes_gravados', file_path.stat().st_size, tipo=tipo)
+            METRICS.incr('arquivos_gerados', tipo=tipo)
             
             arquivos_gerados.append({
                 'tipo': tipo,
+                'conta': gerado.conta_id,
                 'arquivo': file_path,
                 'pagamentos': total_pagamentos_tipo,
-                'registros': len(lines),
+                'registros': registros,
                 'valor': total_valor_tipo
             })
             
             logger.info(f"✅ Arquivo {tipo} gerado: {file_path}")
-            logger.info(f"   Pagamentos: {total_pagamentos_tipo}, Registros: {len(lines)}, Valor: R$ {total_valor_tipo:,.2f}")
+            logger.info(f"   Pagamentos: {total_pagamentos_tipo}, Registros: {registros}, Valor: R$ {total_valor_tipo:,.2f}")
         
         # Log de resumo final
         logger.info("\n" + "=" * 60)
@@ -343,7 +427,7 @@ def main():
         logger.info("=" * 60)
         logger.info(f"Total de arquivos gerados: {len(arquivos_gerados)}")
         for info in arquivos_gerados:
-            logger.info(f"  - {info['tipo']}: {info['arquivo'].name}")
+            logger.info(f"  - {info['tipo']} ({info['conta']}): {info['arquivo'].name}")
             logger.info(f"    {info['pagamentos']} pagamento(s), {info['registros']} registro(s), R$ {info['valor']:,.2f}")
         logger.info("=" * 60)
         
@@ -352,6 +436,130 @@ def main():
         sys.exit(1)
 
 
+
+def schedule_payments(pagamentos_por_grupo: Dict, config: Dict, accounts: Dict, output_dir: Path):
+    """Agenda os pagamentos válidos no ledger (modo --agendar)."""
+    with Scheduler(config['arquivo']['ledger'], accounts, output_dir) as scheduler:
+        resultado = scheduler.schedule(pagamentos_por_grupo)
+        pendentes = scheduler.ledger.pending()
+    for (conta_id, tipo), quantidade in resultado.ignorados.items():
+        logger.warning(f"Tipo de pagamento '{tipo}' ainda não implementado. Pulando {quantidade} pagamento(s) da conta {conta_id}...")
+    if resultado.ja_emitidos:
+        logger.warning(f"{len(resultado.ja_emitidos)} pagamento(s) já emitidos em remessa não foram reagendados: "
+                       f"{', '.join(resultado.ja_emitidos[:10])}")
+    logger.info(f"{resultado.agendados} pagamento(s) agendados ({pendentes} pendente(s) no ledger)")
+    for dia, quantidade in sorted(resultado.por_dia.items()):
+        logger.info(f"  - {dia}: {quantidade} pagamento(s)")
+
+
+def run_scheduled(dia: date | None = None, max_workers: int | None = None) -> int:
+    """
+    Emite as remessas dos pagamentos agendados para o dia (modo --emitir).
+
+    Returns:
+        Quantidade de remessas gravadas
+    """
+    base_dir = Path(__file__).parent
+    config_path = base_dir / 'config' / 'bradesco.yaml'
+    output_dir = base_dir / 'output'
+    output_dir.mkdir(exist_ok=True)
+
+    config = load_config(str(config_path))
+    config.setdefault('arquivo', {}).setdefault('ledger', str(output_dir / LEDGER_PADRAO))
+    accounts = load_accounts(config)
+    dia = dia or date.today()
+    with Scheduler(config['arquivo']['ledger'], accounts, output_dir) as scheduler:
+        if not scheduler.calendario.is_business_day(dia):
+            logger.info(f"{dia.isoformat()} não é dia útil: nenhuma remessa emitida")
+            return 0
+        gerados = scheduler.run_day(dia, max_workers=max_workers)
+        pendentes = scheduler.ledger.pending()
+
+    gravados = 0
+    for gerado in gerados:
+        if gerado.erros:
+            logger.error(f"Erros na validação do arquivo CNAB para {gerado.tipo} (conta {gerado.conta_id}); "
+                         f"os pagamentos continuam agendados:")
+            for error in gerado.erros:
+                logger.error(f"  - {error}")
+            continue
+        gravados += 1
+        METRICS.incr('bytes_gravados', gerado.path.stat().st_size, tipo=gerado.tipo)
+        METRICS.incr('arquivos_gerados', tipo=gerado.tipo)
+        logger.info(f"✅ Arquivo {gerado.tipo} gerado: {gerado.path}")
+        logger.info(f"   Pagamentos: {gerado.pagamentos}, Valor: R$ {gerado.valor:,.2f}")
+    logger.info(f"{dia.isoformat()}: {gravados} remessa(s) emitida(s), {pendentes} pagamento(s) ainda agendado(s)")
+    return gravados
+
+
+def run_daemon(intervalo: int = 3600):
+    """
+    Modo --daemon: emite as remessas agendadas de cada dia útil.
+
+    A cada `intervalo` segundos emite o que estiver pendente para o dia (os
+    pagamentos emitidos ficam marcados no ledger, então cada verificação só
+    emite o que foi agendado depois da anterior). Interrompa com Ctrl+C.
+    """
+    logger.info(f"Agenda de remessas iniciada (verificação a cada {intervalo} s)")
+    try:
+        while True:
+            try:
+                run_scheduled()
+            except Exception as e:
+                # Falha em um ciclo (ex.: ledger ocupado) não derruba o daemon
+                logger.error(f"Erro ao emitir remessas agendadas: {e}", exc_info=True)
+            time.sleep(intervalo)
+    except KeyboardInterrupt:
+        logger.info("Agenda de remessas encerrada")
+
+
+def run_stream(excel_path: Path, config_path: Path, output_dir: Path, report_format: str = 'csv'):
+    """
+    Modo --stream: lê, normaliza, valida, roteia e grava cada pagamento em uma
+    única passada. O relatório de validação é escrito à medida que os
+    pagamentos são processados.
+    """
+    try:
+        config = load_config(str(config_path))
+        # TXIDs e sequenciais de arquivo ficam no ledger local (nunca se repetem entre remessas)
+        config.setdefault('arquivo', {}).setdefault('ledger', str(output_dir / LEDGER_PADRAO))
+        accounts = load_accounts(config)
+        router = AccountRouter.from_config(config, accounts)
+        file_date = datetime.now()
+        
+        logger.info(f"Processando arquivo Excel em passada única: {excel_path}")
+        with ReportWriter(report_path(output_dir, report_format)) as report:
+            resultado = run_pipeline(
+                iter_excel(str(excel_path)), accounts, router, file_date, output_dir,
+                normalize=truncate_pagamento,
+                report=report.write,
+                regras=rules.for_config(config['arquivo']),
+            )
+        METRICS.incr('pagamentos_lidos', resultado.total)
+        logger.info(f"Relatório de validação salvo em: {report.path}")
+        
+        if resultado.erros:
+            logger.warning(f"{len(resultado.erros)} pagamento(s) com erro ficaram fora das remessas. Verifique o relatório.")
+        for (conta_id, tipo), quantidade in resultado.ignorados.items():
+            logger.warning(f"Tipo de pagamento '{tipo}' ainda não implementado. Pulando {quantidade} pagamento(s) da conta {conta_id}...")
+        if not resultado.validos:
+            logger.error("Nenhum pagamento válido para processar")
+            sys.exit(1)
+        
+        logger.info("\n" + "=" * 60)
+        logger.info("PROCESSAMENTO CONCLUÍDO")
+        logger.info("=" * 60)
+        logger.info(f"Total de arquivos gerados: {len(resultado.arquivos)}")
+        for info in resultado.arquivos:
+            logger.info(f"  - {info.tipo} ({info.conta_id}): {info.path.name}")
+            logger.info(f"    {info.pagamentos} pagamento(s), {info.registros} registro(s), R$ {info.valor:,.2f}")
+        logger.info("=" * 60)
+        
+    except Exception as e:
+        logger.error(f"Erro ao processar: {e}", exc_info=True)
+        sys.exit(1)
+
+
 if __name__ == '__main__':
     main()
 
@@ -5,8 +5,14 @@ from .bradesco_pix import BradescoPIXGenerator
 from . import fields
 from . import validate
 from . import config
+from .config import BankConfig, load_bank_config
 
-__all__ = ['BradescoPIXGenerator', 'fields', 'validate', 'config']
+# Versão da saída dos geradores: incrementar sempre que uma mudança alterar o
+# conteúdo das remessas geradas (invalida o cache de execuções, ver src/run_cache.py)
+GENERATOR_VERSION = 2
+
+__all__ = ['BradescoPIXGenerator', 'BankConfig', 'load_bank_config', 'fields', 'validate', 'config',
+           'GENERATOR_VERSION']
 
 
 
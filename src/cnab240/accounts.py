@@ -0,0 +1,353 @@
+"""
+Múltiplas contas de débito / empresas em uma única execução.
+
+Configuração (opcional) em `config/bradesco.yaml`:
+
+    contas:
+      - id: filial_sp
+        empresa:            # opcional, herda `empresa` da raiz
+          numero_inscricao: "11222333000181"
+          nome: "FILIAL SP LTDA"
+        conta:
+          agencia: "01234"
+          conta: "000000012345"
+          digito_conta: "6"
+        arquivo:            # opcional, sobrescreve chaves de `arquivo` da raiz
+          sequencial_inicial: 1
+
+    roteamento:
+      coluna: conta_debito  # coluna da planilha com o id da conta
+      regras:               # avaliadas em ordem quando a coluna está vazia
+        - campo: tipo_pagamento
+          valor: TED
+          conta: filial_sp
+      padrao: principal     # conta usada quando nada casar
+
+A seção `conta` da raiz (se existir) continua valendo como a conta `principal`.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+
+from .config import BankConfig
+from .errors import CONTA_DESCONHECIDA, ErrorRecord, record
+from .ledger import Ledger
+from .metrics import METRICS
+
+CONTA_PRINCIPAL = 'principal'
+COLUNA_CONTA_PADRAO = 'conta_debito'
+
+
+def load_accounts(config: Mapping[str, Any]) -> Dict[str, BankConfig]:
+    """
+    Monta o índice de contas de débito a partir da configuração.
+
+    Args:
+        config: Dicionário de configuração (YAML ou session_state)
+
+    Returns:
+        Dicionário id_conta -> BankConfig (na ordem da configuração)
+
+    Raises:
+        ValueError: Se nenhuma conta for configurada, ids se repetirem ou
+            alguma conta estiver incompleta
+    """
+    accounts: Dict[str, BankConfig] = {}
+    empresa_base = dict(config.get('empresa') or {})
+    arquivo_base = dict(config.get('arquivo') or {})
+
+    if config.get('conta'):
+        accounts[CONTA_PRINCIPAL] = BankConfig.from_dict(config, CONTA_PRINCIPAL)
+
+    for index, item in enumerate(config.get('contas') or []):
+        conta_id = str(item.get('id') or '').strip()
+        if not conta_id:
+            raise ValueError(f"contas[{index}]: id não informado")
+        if conta_id in accounts:
+            raise ValueError(f"contas[{index}]: id duplicado: {conta_id}")
+        merged = {
+            'empresa': {**empresa_base, **(item.get('empresa') or {})},
+            'conta': dict(item.get('conta') or {}),
+            'arquivo': {**arquivo_base, **(item.get('arquivo') or {})},
+        }
+        try:
+            accounts[conta_id] = BankConfig.from_dict(merged, conta_id)
+        except ValueError as e:
+            raise ValueError(f"contas[{index}] ({conta_id}): {e}")
+
+    if not accounts:
+        raise ValueError("Nenhuma conta de débito configurada (seção `conta` ou `contas`)")
+    return accounts
+
+
+@dataclass
+class AccountRouter:
+    """Decide a conta de débito de cada pagamento (coluna, regras ou padrão)."""
+    accounts: Dict[str, BankConfig]
+    coluna: str = COLUNA_CONTA_PADRAO
+    regras: List[Tuple[str, str, str]] = field(default_factory=list)
+    padrao: str | None = None
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any], accounts: Dict[str, BankConfig] | None = None) -> 'AccountRouter':
+        """
+        Cria o roteador a partir da seção `roteamento` da configuração.
+
+        Args:
+            config: Dicionário de configuração
+            accounts: Contas já carregadas (carrega de `config` se None)
+
+        Returns:
+            AccountRouter configurado
+        """
+        if accounts is None:
+            accounts = load_accounts(config)
+        roteamento = config.get('roteamento') or {}
+        regras = []
+        for index, regra in enumerate(roteamento.get('regras') or []):
+            conta = str(regra.get('conta', '')).strip()
+            if conta not in accounts:
+                raise ValueError(f"roteamento.regras[{index}]: conta desconhecida: {conta}")
+            regras.append((str(regra.get('campo', '')).strip(), str(regra.get('valor', '')).strip().upper(), conta))
+        padrao = roteamento.get('padrao')
+        if padrao is None:
+            padrao = CONTA_PRINCIPAL if CONTA_PRINCIPAL in accounts else next(iter(accounts))
+        if padrao not in accounts:
+            raise ValueError(f"roteamento.padrao: conta desconhecida: {padrao}")
+        return cls(
+            accounts=accounts,
+            coluna=str(roteamento.get('coluna', COLUNA_CONTA_PADRAO)),
+            regras=regras,
+            padrao=str(padrao),
+        )
+
+    def route(self, pagamento: Mapping[str, Any]) -> str:
+        """
+        Retorna o id da conta de débito do pagamento.
+
+        Raises:
+            ValueError: Se a coluna de roteamento indicar uma conta desconhecida
+        """
+        conta_id = str(pagamento.get(self.coluna) or '').strip()
+        if conta_id:
+            if conta_id not in self.accounts:
+                raise ValueError(f"{self.coluna} desconhecida: {conta_id}")
+            return conta_id
+        for campo, valor, conta in self.regras:
+            if str(pagamento.get(campo, '')).strip().upper() == valor:
+                return conta
+        return self.padrao or next(iter(self.accounts))
+
+
+def group_by_account(pagamentos: List[Dict], router: AccountRouter
+                     ) -> Tuple[Dict[Tuple[str, str], List[Dict]], Dict[str, List[ErrorRecord]]]:
+    """
+    Agrupa os pagamentos por (conta de débito, tipo de pagamento) em uma única passada.
+
+    Args:
+        pagamentos: Lista de pagamentos
+        router: Roteador de contas
+
+    Returns:
+        Tupla (grupos, erros_por_id) - pagamentos com conta desconhecida
+        ficam fora dos grupos e são reportados em erros_por_id
+    """
+    grupos: Dict[Tuple[str, str], List[Dict]] = {}
+    errors_by_id: Dict[str, List[ErrorRecord]] = {}
+    for index, pagamento in enumerate(pagamentos):
+        try:
+            conta_id = router.route(pagamento)
+        except ValueError as e:
+            id_pag = str(pagamento.get('id_pagamento', f'#{index}'))
+            errors_by_id.setdefault(id_pag, []).append(
+                record(CONTA_DESCONHECIDA, router.coluna, index, id_pag, str(e)))
+            continue
+        tipo = str(pagamento.get('tipo_pagamento', 'PIX')).upper().strip()
+        grupos.setdefault((conta_id, tipo), []).append(pagamento)
+    return grupos, errors_by_id
+
+
+@dataclass
+class AccountFile:
+    """Arquivo gerado para um grupo (conta, tipo)."""
+    conta_id: str
+    tipo: str
+    file_seq: int
+    pagamentos: int
+    valor: float
+    lines: List[str] = field(default_factory=list, repr=False)
+    path: Path | None = None  # preenchido por write_account_files
+    erros: List[str] = field(default_factory=list)  # estrutura inválida (arquivo não publicado)
+
+
+def render_account_file(bank: BankConfig, tipo: str, pagamentos: List[Dict], file_date: datetime,
+                        file_seq: int, progress: Callable[[int], None] | None = None) -> AccountFile:
+    """
+    Gera as linhas de um grupo (conta, tipo).
+
+    Args:
+        bank: Conta de débito
+        tipo: 'PIX', 'TED' ou 'DOC'
+        pagamentos: Pagamentos do grupo
+        file_date: Data de geração
+        file_seq: Sequencial do arquivo
+        progress: Callback repassado ao gerador (pagamentos já renderizados)
+
+    Returns:
+        AccountFile com as linhas geradas
+    """
+    from .bradesco_pix import BradescoPIXGenerator
+    from .bradesco_ted import BradescoTEDGenerator
+
+    if tipo == 'PIX':
+        lines = BradescoPIXGenerator(bank).generate_file(pagamentos, file_date, file_seq, progress=progress)
+    else:
+        lines = BradescoTEDGenerator(bank).generate_file(pagamentos, file_date, file_seq, tipo, progress=progress)
+    valor = sum(float(p.get('valor', 0)) for p in pagamentos)
+    return AccountFile(bank.conta_id, tipo, file_seq, len(pagamentos), valor, lines)
+
+
+def _render_with_metrics(*args) -> Tuple[AccountFile, Dict[str, Any]]:
+    """render_account_file em um processo do pool, devolvendo também as métricas."""
+    METRICS.reset()
+    METRICS.enable()
+    gerado = render_account_file(*args)
+    return gerado, METRICS.snapshot()
+
+
+def remessa_filename(tipo: str, conta_id: str, file_date: datetime, file_seq: int, multi_contas: bool) -> str:
+    """Nome do arquivo de remessa (sufixo da conta só quando há várias contas)."""
+    sufixo_conta = f"_{conta_id}" if multi_contas else ""
+    return f"BRADESCO_{tipo}{sufixo_conta}_REMESSA_{file_date.strftime('%Y%m%d')}_{file_seq:06d}.txt"
+
+
+def reserve_file_sequences(bank: BankConfig, quantidade: int) -> int:
+    """
+    Primeiro de `quantidade` sequenciais de arquivo consecutivos da conta.
+
+    Com `arquivo.ledger` os sequenciais são reservados no ledger e seguem
+    crescendo entre execuções (linha de comando, interface e agenda usam a mesma
+    numeração); sem ledger, toda execução começa em `arquivo.sequencial_inicial`.
+
+    Args:
+        bank: Conta de débito
+        quantidade: Quantidade de arquivos
+
+    Returns:
+        Primeiro sequencial
+    """
+    inicial = int(bank.arquivo.get('sequencial_inicial', 1))
+    if not bank.arquivo.get('ledger'):
+        return inicial
+    with Ledger(bank.arquivo['ledger']) as ledger:
+        return ledger.reserve_sequences(bank.conta_id, quantidade, inicial)
+
+
+def plan_account_files(grupos: Dict[Tuple[str, str], List[Dict]], accounts: Dict[str, BankConfig],
+                       tipos_suportados: Tuple[str, ...] = ('PIX', 'TED', 'DOC')
+                       ) -> List[Tuple[BankConfig, str, List[Dict], int]]:
+    """
+    Define os arquivos a gerar e o sequencial de cada um.
+
+    O sequencial de arquivo é controlado por conta: os arquivos da conta recebem
+    sequenciais consecutivos reservados por reserve_file_sequences.
+
+    Args:
+        grupos: Saída de group_by_account
+        accounts: Contas de débito
+        tipos_suportados: Tipos com gerador implementado (demais são ignorados)
+
+    Returns:
+        Lista de tuplas (conta, tipo, pagamentos, sequencial) na ordem dos grupos
+    """
+    selecionados = [(conta_id, tipo, pagamentos) for (conta_id, tipo), pagamentos in grupos.items()
+                    if tipo in tipos_suportados and pagamentos]
+    por_conta: Dict[str, int] = {}
+    for conta_id, _, _ in selecionados:
+        por_conta[conta_id] = por_conta.get(conta_id, 0) + 1
+    proximo_seq = {conta_id: reserve_file_sequences(accounts[conta_id], quantidade)
+                   for conta_id, quantidade in por_conta.items()}
+
+    tarefas = []
+    for conta_id, tipo, pagamentos in selecionados:
+        seq = proximo_seq[conta_id]
+        proximo_seq[conta_id] = seq + 1
+        tarefas.append((accounts[conta_id], tipo, pagamentos, seq))
+    return tarefas
+
+
+def generate_account_files(grupos: Dict[Tuple[str, str], List[Dict]], accounts: Dict[str, BankConfig],
+                           file_date: datetime, max_workers: int | None = None,
+                           tipos_suportados: Tuple[str, ...] = ('PIX', 'TED', 'DOC')) -> List[AccountFile]:
+    """
+    Gera um arquivo por (conta, tipo), em paralelo (um processo por grupo).
+
+    Args:
+        grupos: Saída de group_by_account
+        accounts: Contas de débito
+        file_date: Data de geração
+        max_workers: Número máximo de processos (1 = gera sem paralelismo)
+        tipos_suportados: Tipos com gerador implementado (demais são ignorados)
+
+    Returns:
+        Lista de AccountFile na ordem dos grupos
+    """
+    tarefas = [(bank, tipo, pagamentos, file_date, seq)
+               for bank, tipo, pagamentos, seq in plan_account_files(grupos, accounts, tipos_suportados)]
+
+    if max_workers == 1 or len(tarefas) <= 1:
+        return [render_account_file(*t) for t in tarefas]
+
+    if not METRICS.enabled:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(render_account_file, *t) for t in tarefas]
+            return [f.result() for f in futures]
+
+    # Métricas registradas nos processos do pool voltam como snapshot
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_render_with_metrics, *t) for t in tarefas]
+        resultados = [f.result() for f in futures]
+    for _, snapshot in resultados:
+        METRICS.merge(snapshot)
+    return [gerado for gerado, _ in resultados]
+
+
+def write_account_files(grupos: Dict[Tuple[str, str], List[Dict]], accounts: Dict[str, BankConfig],
+                        file_date: datetime, output_dir: Path, multi_contas: bool, max_workers: int | None = None,
+                        tipos_suportados: Tuple[str, ...] = ('PIX', 'TED', 'DOC')) -> List[AccountFile]:
+    """
+    Gera e grava um arquivo por (conta, tipo) direto em disco (ver remessa_file).
+
+    Cada arquivo é pré-alocado com o tamanho final e as faixas de pagamentos são
+    renderizadas em paralelo, cada uma na sua região do arquivo; a estrutura é
+    validada antes do rename atômico para o nome final.
+
+    Args:
+        grupos: Saída de group_by_account
+        accounts: Contas de débito
+        file_date: Data de geração
+        output_dir: Diretório de saída
+        multi_contas: Inclui o id da conta no nome do arquivo
+        max_workers: Número máximo de processos (1 = gera sem paralelismo)
+        tipos_suportados: Tipos com gerador implementado (demais são ignorados)
+
+    Returns:
+        Lista de AccountFile (sem linhas) na ordem dos grupos; `path` é None e
+        `erros` é preenchido quando a estrutura gerada é inválida
+    """
+    from .remessa_file import write_remessas
+
+    planejados = plan_account_files(grupos, accounts, tipos_suportados)
+    tarefas = [(Path(output_dir) / remessa_filename(tipo, bank.conta_id, file_date, seq, multi_contas),
+                bank, tipo, pagamentos, seq)
+               for bank, tipo, pagamentos, seq in planejados]
+    relatorios = write_remessas(tarefas, file_date, max_workers=max_workers)
+
+    gerados = []
+    for (path, bank, tipo, pagamentos, seq), relatorio in zip(tarefas, relatorios):
+        valor = sum(float(p.get('valor', 0)) for p in pagamentos)
+        gerados.append(AccountFile(bank.conta_id, tipo, seq, len(pagamentos), valor,
+                                   path=path if relatorio.valido else None, erros=list(relatorio.erros)))
+    return gerados
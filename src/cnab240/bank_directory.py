@@ -0,0 +1,175 @@
+"""
+Diretório de bancos (código COMPE, ISPB, nome, participação em TED/PIX e câmara).
+
+O arquivo `data/bancos.csv` é carregado uma vez por processo em vetores
+indexados pelo código COMPE (0-999): conferir se um lote inteiro de
+`banco_favorecido` existe ou participa de TED é uma consulta por índice, e o
+gerador TED/DOC obtém a câmara de cada pagamento da coluna `camara` da mesma
+tabela (bancos fora do diretório saem pela câmara de TED).
+
+Configuração (opcional) em `config/bradesco.yaml`:
+
+    arquivo:
+      bancos: data/bancos.csv     # padrão
+      validar_bancos: true        # rejeita banco_favorecido fora do diretório
+                                  # (padrão: aviso; false desliga)
+"""
+import csv
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Mapping, NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .business_days import file_state
+
+BANCO_BRADESCO = 237
+# Código da Câmara Centralizadora no Segmento A
+CAMARA_BRADESCO = '000'   # crédito em conta Bradesco
+CAMARA_TED = '018'        # TED (STR)
+
+_CODIGOS = 1000
+
+
+def _diretorio_padrao() -> Path:
+    return Path(__file__).parent.parent.parent / 'data' / 'bancos.csv'
+
+
+class Bank(NamedTuple):
+    """Participante do diretório."""
+    compe: str
+    ispb: str
+    nome: str
+    ted: bool
+    pix: bool
+    camara: str = ''   # Câmara do Segmento A (vazio = CAMARA_TED)
+
+
+def _flag(valor: Any) -> bool:
+    return str(valor or '').strip().lower() in ('1', 's', 'sim', 'true')
+
+
+def _codigo(banco: Any) -> int | None:
+    codigo = str(banco).strip()
+    return int(codigo) if codigo.isascii() and codigo.isdigit() and len(codigo) <= 3 else None
+
+
+def codes(valores: Any) -> np.ndarray:
+    """
+    Códigos COMPE como inteiros (-1 onde o valor não é um código de 1 a 3 dígitos).
+
+    Args:
+        valores: Série, array ou lista de códigos (texto ou número)
+    """
+    texto = pd.Series(valores, dtype=object).astype(str).str.strip()
+    validos = texto.str.fullmatch(r'[0-9]{1,3}').to_numpy(dtype=bool)
+    resultado = np.full(len(texto), -1, dtype=np.int64)
+    resultado[validos] = texto[validos].astype(int).to_numpy()
+    return resultado
+
+
+class BankDirectory:
+    """
+    Índice em memória dos bancos, por código COMPE.
+
+    Args:
+        bancos: Participantes do diretório
+    """
+
+    def __init__(self, bancos: Mapping[int, Bank]) -> None:
+        self.bancos = dict(bancos)
+        self._conhecido = np.zeros(_CODIGOS, dtype=bool)
+        self._ted = np.zeros(_CODIGOS, dtype=bool)
+        self._pix = np.zeros(_CODIGOS, dtype=bool)
+        self._camara = np.full(_CODIGOS, CAMARA_TED, dtype=object)
+        for codigo, banco in self.bancos.items():
+            self._conhecido[codigo] = True
+            self._ted[codigo] = banco.ted
+            self._pix[codigo] = banco.pix
+            self._camara[codigo] = banco.camara or CAMARA_TED
+
+    @classmethod
+    def load(cls, path: str | Path) -> 'BankDirectory':
+        """
+        Lê o diretório (CSV com cabeçalho `compe,ispb,nome,ted,pix,camara`; linhas iniciadas por `#` são ignoradas).
+
+        Raises:
+            ValueError: Se um código COMPE ou de câmara for inválido
+        """
+        bancos: Dict[int, Bank] = {}
+        with open(path, newline='', encoding='utf-8') as f:
+            linhas = (linha for linha in f if linha.strip() and not linha.lstrip().startswith('#'))
+            for row in csv.DictReader(linhas):
+                compe = str(row.get('compe') or '').strip()
+                codigo = _codigo(compe)
+                if codigo is None:
+                    raise ValueError(f"{path}: código COMPE inválido: {compe!r}")
+                camara = str(row.get('camara') or '').strip()
+                if camara and _codigo(camara) is None:
+                    raise ValueError(f"{path}: câmara inválida para o banco {compe}: {camara!r}")
+                bancos[codigo] = Bank(compe.zfill(3), str(row.get('ispb') or '').strip().zfill(8),
+                                      str(row.get('nome') or '').strip(), _flag(row.get('ted')),
+                                      _flag(row.get('pix')), camara.zfill(3) if camara else '')
+        return cls(bancos)
+
+    @classmethod
+    def from_config(cls, arquivo: Mapping[str, Any]) -> 'BankDirectory':
+        """
+        Diretório de `arquivo.bancos` (padrão: data/bancos.csv; sem ele, só o Bradesco), carregado uma vez por processo.
+
+        Raises:
+            FileNotFoundError: Se o arquivo configurado em `arquivo.bancos` não existir
+        """
+        path = arquivo.get('bancos')
+        path = str(path) if path else None
+        return _directory(path, file_state(Path(path) if path else _diretorio_padrao()))
+
+    def digest(self) -> str:
+        """SHA-256 do conteúdo do diretório."""
+        conteudo = json.dumps(sorted(self.bancos.items()), ensure_ascii=False)
+        return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+    def _lookup(self, tabela: np.ndarray, valores: Any) -> np.ndarray:
+        codigos = codes(valores)
+        validos = codigos >= 0
+        resultado = np.zeros(len(codigos), dtype=bool)
+        resultado[validos] = tabela[codigos[validos]]
+        return resultado
+
+    def known(self, valores: Any) -> np.ndarray:
+        """Máscara dos códigos presentes no diretório."""
+        return self._lookup(self._conhecido, valores)
+
+    def ted(self, valores: Any) -> np.ndarray:
+        """Máscara dos códigos de participantes de TED."""
+        return self._lookup(self._ted, valores)
+
+    def pix(self, valores: Any) -> np.ndarray:
+        """Máscara dos códigos de participantes do PIX."""
+        return self._lookup(self._pix, valores)
+
+    def camara(self, banco: Any) -> str:
+        """Código da Câmara do Segmento A para o banco favorecido (coluna `camara`; padrão 018 = TED)."""
+        codigo = _codigo(banco)
+        return CAMARA_TED if codigo is None else self._camara[codigo]
+
+    def get(self, banco: Any) -> Bank | None:
+        """Participante pelo código COMPE (texto ou número), ou None."""
+        codigo = _codigo(banco)
+        return None if codigo is None else self.bancos.get(codigo)
+
+
+@lru_cache(maxsize=8)
+def _directory(path: str | None, estado: Tuple[int, int] | None = None) -> BankDirectory:
+    """Diretório carregado uma vez por versão do arquivo (por processo)."""
+    if path is None:
+        padrao = _diretorio_padrao()
+        if padrao.exists():
+            return BankDirectory.load(padrao)
+        # Instalação sem o arquivo distribuído: crédito em conta Bradesco continua na câmara 000
+        return BankDirectory({BANCO_BRADESCO: Bank('237', '60746948', 'BANCO BRADESCO S.A.', True, True,
+                                                   CAMARA_BRADESCO)})
+    return BankDirectory.load(path)
@@ -2,11 +2,13 @@
 Geração de arquivo CNAB 240 para PIX Bradesco Multipag
 Utiliza Segmento J e J-52 (não Segmento A/B)
 """
-import uuid
 from datetime import datetime
-from typing import List, Dict
-from . import fields
-from .config import load_config
+from decimal import Decimal
+from typing import Callable, List, Dict
+from . import business_days, fields, pix_keys
+from .config import BankConfig, resolve_bank_config
+from .metrics import METRICS, timed
+from .txid import TxidProvider
 
 
 # Mapeamento de tipos de chave PIX
@@ -22,14 +24,20 @@ PIX_KEY_TYPE_MAP = {
 class BradescoPIXGenerator:
     """Gerador de arquivo CNAB 240 para PIX Bradesco"""
     
-    def __init__(self, config_path: str | None = None):
+    def __init__(self, config_path: 'str | BankConfig | dict | None' = None):
         """
         Inicializa o gerador com a configuração.
         
         Args:
-            config_path: Caminho para o arquivo de configuração
+            config_path: Caminho para o arquivo de configuração, dicionário de
+                configuração ou BankConfig já carregado (reaproveitado sem reler o YAML)
         """
-        self.config = load_config(config_path)
+        self.bank = resolve_bank_config(config_path)
+        self.config = self.bank.raw
+        self.txids = TxidProvider.from_config(self.bank)
+        # Calendário de dias úteis quando `arquivo.dia_nao_util: ajustar`
+        self.calendario = business_days.adjuster(self.bank.arquivo)
+        self._datas: Dict = {}
         self.records = []
         self.sequence = 0
         self.detail_count = 0
@@ -40,6 +48,30 @@ class BradescoPIXGenerator:
         self.sequence += 1
         return self.sequence
     
+    def _data_pagamento(self, value) -> str:
+        """
+        Data do Pagamento (AAAAMMDD), no próximo dia útil se houver calendário.
+
+        Calculada uma vez por valor distinto de data.
+        """
+        if self.calendario is None:
+            return fields.format_date(value)
+        try:
+            return self._datas[value]
+        except KeyError:
+            pass
+        except TypeError:  # valor não hashable: calcula sem guardar
+            return self._ajustar_data(value)
+        resultado = self._datas[value] = self._ajustar_data(value)
+        return resultado
+
+    def _ajustar_data(self, value) -> str:
+        formatada = fields.format_date(value)
+        dia = business_days.to_date(value)
+        if dia is None or formatada == '0' * 8 or not self.calendario.contains(dia):
+            return formatada
+        return self.calendario.next_business_day(dia).strftime('%Y%m%d')
+
     def _reset_sequence(self):
         """Reseta o contador sequencial"""
         self.sequence = 0
@@ -55,9 +87,7 @@ class BradescoPIXGenerator:
         Returns:
             Linha do header arquivo (240 caracteres)
         """
-        empresa = self.config['empresa']
-        conta = self.config['conta']
-        arquivo_config = self.config.get('arquivo', {})
+        bank = self.bank
         # Layout do Arquivo para PIX Multipag: 089 (conforme especificação)
         # O sistema Bradesco Multipag exige 089 para arquivos de pagamento
         # SEMPRE usar 089 para Multipag, independente do config
@@ -68,15 +98,11 @@ class BradescoPIXGenerator:
         line += fields.format_numeric(0, 4)  # Lote de Serviço (0000)
         line += fields.format_numeric(0, 1)  # Tipo de Registro
         line += fields.format_alphanumeric('', 9)  # Filler
-        line += fields.format_numeric(empresa['tipo_inscricao'], 1)  # Tipo de Inscrição
-        line += fields.format_numeric(empresa['numero_inscricao'], 14)  # Número de Inscrição
-        line += fields.format_alphanumeric(conta['codigo_convenio'], 20)  # Código do Convênio
-        line += fields.format_numeric(conta['agencia'], 5)  # Agência Mantenedora
-        line += fields.format_alphanumeric(conta['digito_agencia'], 1)  # Dígito da Agência
-        line += fields.format_numeric(conta['conta'], 12)  # Conta Corrente
-        line += fields.format_alphanumeric(conta['digito_conta'], 1)  # Dígito da Conta
-        line += fields.format_alphanumeric(conta.get('digito_verificador', ''), 1)  # DV Ag/Conta
-        line += fields.format_alphanumeric(empresa['nome'], 30)  # Nome da Empresa
+        line += bank.tipo_inscricao  # Tipo de Inscrição
+        line += bank.numero_inscricao  # Número de Inscrição
+        line += bank.codigo_convenio  # Código do Convênio
+        line += bank.agencia_conta  # Agência/Conta/Dígitos (20 posições)
+        line += bank.nome  # Nome da Empresa
         line += fields.format_alphanumeric('BRADESCO', 30)  # Nome do Banco
         line += fields.format_alphanumeric('', 10)  # Filler
         line += fields.format_numeric(1, 1)  # Código Remessa/Retorno (1=Remessa)
@@ -103,10 +129,8 @@ class BradescoPIXGenerator:
         Returns:
             Linha do header lote (240 caracteres)
         """
-        empresa = self.config['empresa']
-        conta = self.config['conta']
-        arquivo_config = self.config.get('arquivo', {})
-        layout_lote = arquivo_config.get('layout_lote', 12)  # Padrão 012
+        bank = self.bank
+        layout_lote = bank.arquivo.get('layout_lote', 12)  # Padrão 012
         # Garante que seja tratado como número (pode vir como string do YAML)
         if isinstance(layout_lote, str):
             layout_lote = int(layout_lote)
@@ -120,15 +144,11 @@ class BradescoPIXGenerator:
         line += fields.format_numeric(41, 2)  # Forma de Lançamento (41=PIX)
         line += fields.format_numeric(layout_lote, 3)  # Layout do Lote (012)
         line += fields.format_alphanumeric('', 1)  # Filler
-        line += fields.format_numeric(empresa['tipo_inscricao'], 1)  # Tipo de Inscrição
-        line += fields.format_numeric(empresa['numero_inscricao'], 14)  # Número de Inscrição
-        line += fields.format_alphanumeric(conta['codigo_convenio'], 20)  # Código do Convênio
-        line += fields.format_numeric(conta['agencia'], 5)  # Agência Mantenedora
-        line += fields.format_alphanumeric(conta['digito_agencia'], 1)  # Dígito da Agência
-        line += fields.format_numeric(conta['conta'], 12)  # Conta Corrente
-        line += fields.format_alphanumeric(conta['digito_conta'], 1)  # Dígito da Conta
-        line += fields.format_alphanumeric(conta.get('digito_verificador', ''), 1)  # DV Ag/Conta
-        line += fields.format_alphanumeric(empresa['nome'], 30)  # Nome da Empresa
+        line += bank.tipo_inscricao  # Tipo de Inscrição
+        line += bank.numero_inscricao  # Número de Inscrição
+        line += bank.codigo_convenio  # Código do Convênio
+        line += bank.agencia_conta  # Agência/Conta/Dígitos (20 posições)
+        line += bank.nome  # Nome da Empresa
         line += fields.format_alphanumeric('', 40)  # Mensagem 1
         line += fields.format_alphanumeric('', 40)  # Mensagem 2
         line += fields.format_numeric(remessa_seq, 9)  # Número Remessa/Retorno
@@ -160,12 +180,13 @@ class BradescoPIXGenerator:
         line += fields.format_alphanumeric('BRL', 3)  # Tipo da Moeda
         line += fields.format_numeric(0, 15)  # Quantidade de Moeda
         line += fields.format_amount(pagamento.get('valor'), 15)  # Valor do Pagamento
-        line += fields.format_date(pagamento.get('data_pagamento'))  # Data do Vencimento
+        data_pagamento = self._data_pagamento(pagamento.get('data_pagamento'))
+        line += data_pagamento  # Data do Vencimento
         line += fields.format_amount(pagamento.get('valor'), 15)  # Valor do Documento
         line += fields.format_numeric(0, 15)  # Valor do Desconto
         line += fields.format_numeric(0, 15)  # Valor da Multa
         line += fields.format_numeric(0, 15)  # Valor do Juros
-        line += fields.format_date(pagamento.get('data_pagamento'))  # Data de Pagamento
+        line += data_pagamento  # Data de Pagamento
         line += fields.format_numeric(0, 15)  # Quantidade de Moeda
         line += fields.format_alphanumeric(str(pagamento.get('id_pagamento', '')), 20)  # Número do Documento
         line += fields.format_alphanumeric('', 20)  # Número do Documento Atribuído
@@ -188,7 +209,7 @@ class BradescoPIXGenerator:
         Returns:
             Linha do segmento J-52 (240 caracteres)
         """
-        empresa = self.config['empresa']
+        bank = self.bank
         
         # Mapeia tipo de pessoa do favorecido
         tipo_pessoa = pagamento.get('tipo_pessoa', 'F').upper()
@@ -200,20 +221,22 @@ class BradescoPIXGenerator:
         
         # Chave PIX (posições 132-210, 79 caracteres)
         chave_pix = pagamento.get('chave_pix', '')
+        tipo_chave = str(pagamento.get('tipo_chave_pix') or '').strip().upper()
+        if tipo_chave == 'TELEFONE' or (not tipo_chave and pix_keys.is_phone(chave_pix)
+                                         and pix_keys.infer_type(chave_pix) == 'TELEFONE'):
+            chave_pix = pix_keys.format_phone(chave_pix)  # 55 + DDD + número
         if len(chave_pix) > 79:
             chave_pix = chave_pix[:79]
         
-        # Gera TXID (posições 211-240, 30 caracteres)
+        # TXID (posições 211-240, 30 caracteres): informado ou gerado já no formato do campo
         txid = pagamento.get('txid', '')
-        if not txid:
-            # Gera UUID sem hífens, maiúsculo, limitado a 30 caracteres
-            txid = str(uuid.uuid4()).replace('-', '').upper()[:30]
+        if txid:
+            txid = fields.format_alphanumeric(str(txid).strip()[:30], 30)
         else:
-            txid = str(txid).strip()[:30]
+            txid = self.txids.txid(pagamento)
         
         # Código do movimento remessa (parametrizável, padrão 01)
-        arquivo_config = self.config.get('arquivo', {})
-        codigo_movimento = arquivo_config.get('codigo_movimento_remessa', 1)
+        codigo_movimento = bank.arquivo.get('codigo_movimento_remessa', 1)
         
         line = ''
         line += fields.format_numeric(237, 3)  # 1-3: Código do Banco
@@ -226,10 +249,9 @@ class BradescoPIXGenerator:
         line += fields.format_numeric(52, 2)  # 18-19: Identificação do Registro Opcional (52)
         
         # Devedor (empresa pagadora)
-        line += fields.format_numeric(empresa['tipo_inscricao'], 1)  # 20-20: Devedor - Tipo de Inscrição
-        devedor_inscricao = ''.join(filter(str.isdigit, str(empresa['numero_inscricao'])))
-        line += fields.format_numeric(devedor_inscricao, 15)  # 21-35: Devedor - Número de Inscrição (15 posições)
-        line += fields.format_alphanumeric(empresa['nome'], 40)  # 36-75: Devedor - Nome (40 posições)
+        line += bank.tipo_inscricao  # 20-20: Devedor - Tipo de Inscrição
+        line += '0' + bank.numero_inscricao  # 21-35: Devedor - Número de Inscrição (15 posições)
+        line += bank.nome_devedor  # 36-75: Devedor - Nome (40 posições)
         
         # Favorecido
         line += fields.format_numeric(tipo_inscricao_fav, 1)  # 76-76: Favorecido - Tipo de Inscrição
@@ -241,11 +263,11 @@ class BradescoPIXGenerator:
         
         # Chave PIX e TXID
         line += fields.format_alphanumeric(chave_pix, 79)  # 132-210: URL/Chave de Endereçamento (79 posições)
-        line += fields.format_alphanumeric(txid, 30)  # 211-240: TXID (30 posições)
+        line += txid  # 211-240: TXID (30 posições)
         
         return fields.ensure_length_240(line)
     
-    def generate_trailer_lote(self, total_registros: int, total_titulos: int, total_valor: float) -> str:
+    def generate_trailer_lote(self, total_registros: int, total_titulos: int, total_valor: float | Decimal) -> str:
         """
         Gera registro Trailer Lote (Registro 5).
         
@@ -290,63 +312,109 @@ class BradescoPIXGenerator:
         
         return fields.ensure_length_240(line)
     
-    def generate_file(self, pagamentos: List[Dict], file_date: datetime | None = None, 
-                     file_seq: int = 1) -> List[str]:
+    def begin_file(self, file_date: datetime, file_seq: int) -> List[str]:
         """
-        Gera arquivo CNAB 240 completo usando Segmento J e J-52 para PIX.
+        Inicia um arquivo: zera os contadores e gera os headers de arquivo e de lote.
+        
+        Junto com render_payment e finish_file permite gerar o arquivo de forma
+        incremental (streaming), sem manter todos os pagamentos em memória.
         
         Args:
-            pagamentos: Lista de dicionários com dados dos pagamentos
-            file_date: Data de geração (usa data atual se None)
+            file_date: Data de geração
             file_seq: Número sequencial do arquivo
         
         Returns:
-            Lista de linhas do arquivo (cada linha com 240 caracteres)
+            [Header Arquivo, Header Lote]
         """
-        if file_date is None:
-            file_date = datetime.now()
-        
         self._reset_sequence()
         self.detail_count = 0
         self.total_amount = 0.0
-        lines = []
+        self.total_cents = 0
+        self._seq_detail = 1
+        return [
+            self.generate_header_arquivo(file_date, file_seq),
+            self.generate_header_lote(file_date, file_seq),
+        ]
+    
+    def render_payment(self, pagamento: Dict) -> List[str]:
+        """
+        Gera os registros de detalhe de um pagamento e atualiza os totais do lote.
         
-        # Header Arquivo
-        lines.append(self.generate_header_arquivo(file_date, file_seq))
+        Returns:
+            [Segmento J, Segmento J-52]
+        """
+        seq_j = self._seq_detail
+        lines = [
+            self.generate_segmento_j(pagamento, seq_j),
+            # Segmento J-52 (OBRIGATÓRIO para PIX)
+            self.generate_segmento_j52(pagamento, seq_j + 1),
+        ]
+        self._seq_detail += 2
+        self.detail_count += 1
+        self.total_amount += float(pagamento.get('valor', 0))
+        # Total do trailer = soma dos valores já formatados nos detalhes (sem erro de float)
+        self.total_cents += int(fields.format_amount(pagamento.get('valor')))
+        return lines
+    
+    def seek_payment(self, indice: int) -> None:
+        """
+        Posiciona o sequencial dos detalhes no pagamento `indice` (0-based).
         
-        # Header Lote
-        lines.append(self.generate_header_lote(file_date, file_seq))
+        Permite renderizar uma faixa de pagamentos de forma independente (ex.: em
+        processos paralelos que preenchem regiões distintas do mesmo arquivo); os
+        totais da faixa ficam em detail_count, total_cents e total_amount.
+        """
+        self._seq_detail = 2 * indice + 1
+    
+    def add_totals(self, pagamentos: int, total_cents: int, total_amount: float) -> None:
+        """Soma aos totais do lote os de uma faixa renderizada por outro gerador."""
+        self.detail_count += pagamentos
+        self.total_cents += total_cents
+        self.total_amount += total_amount
+    
+    def finish_file(self) -> List[str]:
+        """
+        Gera os trailers com os totais acumulados por render_payment.
         
-        # Detalhes (Segmento J + Segmento J-52 para cada pagamento PIX)
-        seq_detail = 1
-        for pagamento in pagamentos:
-            # Segmento J
-            seq_j = seq_detail
-            lines.append(self.generate_segmento_j(pagamento, seq_j))
-            seq_detail += 1
-            
-            # Segmento J-52 (OBRIGATÓRIO para PIX)
-            seq_j52 = seq_detail
-            lines.append(self.generate_segmento_j52(pagamento, seq_j52))
-            seq_detail += 1
-            
-            # Atualiza contadores
-            self.detail_count += 1
-            valor = float(pagamento.get('valor', 0))
-            self.total_amount += valor
-        
-        # Trailer Lote
+        Returns:
+            [Trailer Lote, Trailer Arquivo]
+        """
         # Total de registros no lote: Header Lote (1) + Detalhes (2 por pagamento: J + J-52) + Trailer Lote (1)
         total_registros_lote = 1 + (self.detail_count * 2) + 1
-        lines.append(self.generate_trailer_lote(
-            total_registros_lote,
-            self.detail_count,
-            self.total_amount
-        ))
-        
-        # Trailer Arquivo
         # Total de registros no arquivo: Header Arquivo (1) + registros do lote + Trailer Arquivo (1)
         total_registros_arquivo = 1 + total_registros_lote + 1
-        lines.append(self.generate_trailer_arquivo(total_registros_arquivo))
+        self.txids.close()
+        return [
+            self.generate_trailer_lote(total_registros_lote, self.detail_count, Decimal(self.total_cents) / 100),
+            self.generate_trailer_arquivo(total_registros_arquivo),
+        ]
+    
+    @timed('generate_file')
+    def generate_file(self, pagamentos: List[Dict], file_date: datetime | None = None, 
+                     file_seq: int = 1, progress: Callable[[int], None] | None = None) -> List[str]:
+        """
+        Gera arquivo CNAB 240 completo usando Segmento J e J-52 para PIX.
+        
+        Args:
+            pagamentos: Lista de dicionários com dados dos pagamentos
+            file_date: Data de geração (usa data atual se None)
+            file_seq: Número sequencial do arquivo
+            progress: Callback opcional chamado após cada pagamento com a quantidade
+                já renderizada (pode lançar exceção para interromper a geração)
+        
+        Returns:
+            Lista de linhas do arquivo (cada linha com 240 caracteres)
+        """
+        if file_date is None:
+            file_date = datetime.now()
+        
+        lines = self.begin_file(file_date, file_seq)
+        for pagamento in pagamentos:
+            lines.extend(self.render_payment(pagamento))
+            if progress is not None:
+                progress(self.detail_count)
+        lines.extend(self.finish_file())
+        
+        METRICS.incr('pagamentos_renderizados', self.detail_count, tipo='PIX')
         
         return lines
@@ -3,25 +3,36 @@ Geração de arquivo CNAB 240 para TED/DOC Bradesco Multipag
 Utiliza Segmento A + Segmento B (não Segmento J)
 """
 from datetime import datetime
-from typing import List, Dict
-from . import fields
-from .config import load_config
+from decimal import Decimal
+from typing import Callable, List, Dict
+from . import business_days, fields
+from .bank_directory import BankDirectory
+from .config import BankConfig, resolve_bank_config
+from .dates import DateContext, format_ddmmyyyy
+from .metrics import METRICS, timed
 
 
 class BradescoTEDGenerator:
     """Gerador de arquivo CNAB 240 para TED/DOC Bradesco"""
     
-    def __init__(self, config_path: str | None = None):
+    def __init__(self, config_path: 'str | BankConfig | dict | None' = None):
         """
         Inicializa o gerador com a configuração.
         
         Args:
-            config_path: Caminho para o arquivo de configuração
+            config_path: Caminho para o arquivo de configuração, dicionário de
+                configuração ou BankConfig já carregado (reaproveitado sem reler o YAML)
         """
-        self.config = load_config(config_path)
+        self.bank = resolve_bank_config(config_path)
+        self.config = self.bank.raw
         self.sequence = 0
         self.detail_count = 0
         self.total_amount = 0.0
+        self._dates: DateContext | None = None
+        # Calendário de dias úteis quando `arquivo.dia_nao_util: ajustar`
+        self.calendario = business_days.adjuster(self.bank.arquivo)
+        # Diretório de bancos (câmara de cada pagamento), carregado uma vez por processo
+        self.bancos = BankDirectory.from_config(self.bank.arquivo)
     
     @staticmethod
     def fmt_date_ddmmyyyy(value: str | datetime | None) -> str:
@@ -34,43 +45,15 @@ class BradescoTEDGenerator:
         Returns:
             String formatada como DDMMAAAA (8 caracteres) ou data atual se inválida
         """
-        if value is None or (isinstance(value, str) and value.strip() == ''):
-            return datetime.now().strftime('%d%m%Y')
-        
-        try:
-            if isinstance(value, datetime):
-                return value.strftime('%d%m%Y')
-            
-            if isinstance(value, str):
-                # Tenta vários formatos comuns
-                formats = [
-                    '%Y-%m-%d',
-                    '%d/%m/%Y',
-                    '%d-%m-%Y',
-                    '%Y%m%d',
-                    '%d/%m/%y',
-                    '%d%m%Y',
-                ]
-                
-                for fmt in formats:
-                    try:
-                        dt = datetime.strptime(value.strip(), fmt)
-                        return dt.strftime('%d%m%Y')
-                    except ValueError:
-                        continue
-                
-                # Se nenhum formato funcionou, tenta parsear como YYYYMMDD
-                if len(value.strip()) == 8 and value.strip().isdigit():
-                    try:
-                        dt = datetime.strptime(value.strip(), '%Y%m%d')
-                        return dt.strftime('%d%m%Y')
-                    except ValueError:
-                        pass
-        except Exception:
-            pass
-        
-        # Fallback: retorna data atual
-        return datetime.now().strftime('%d%m%Y')
+        return format_ddmmyyyy(value, datetime.now().date())
+    
+    def _date_context(self, file_date: datetime | None) -> DateContext:
+        """Contexto de datas do arquivo (o do begin_file, ou um novo para outra data de gravação)."""
+        if file_date is None:
+            file_date = datetime.now()
+        if self._dates is None or self._dates.file_date != file_date:
+            self._dates = DateContext(file_date, calendario=self.calendario)
+        return self._dates
         
     def _reset_sequence(self):
         """Reseta o contador sequencial"""
@@ -78,9 +61,7 @@ class BradescoTEDGenerator:
     
     def generate_header_arquivo(self, file_date: datetime, file_seq: int) -> str:
         """Gera registro Header Arquivo (Registro 0)"""
-        empresa = self.config['empresa']
-        conta = self.config['conta']
-        arquivo_config = self.config.get('arquivo', {})
+        bank = self.bank
         # Layout do Arquivo para TED/DOC Multipag: 089 (conforme erro de validação)
         # O sistema Bradesco Multipag exige 089 para arquivos de pagamento
         # SEMPRE usar 089 para Multipag, independente do config
@@ -98,29 +79,15 @@ class BradescoTEDGenerator:
         line += fields.format_numeric(0, 4)  # Lote de Serviço (0000)
         line += fields.format_numeric(0, 1)  # Tipo de Registro
         line += fields.format_alphanumeric('', 9)  # CNAB Reservado
-        line += fields.format_numeric(empresa['tipo_inscricao'], 1)  # Tipo de Inscrição
+        line += bank.tipo_inscricao  # Tipo de Inscrição
         # CNPJ: apenas números, zero-fill à esquerda até 14 posições
-        cnpj_clean = ''.join(filter(str.isdigit, str(empresa['numero_inscricao'])))
-        line += fields.format_numeric(cnpj_clean, 14)  # Número de Inscrição (14 posições)
+        line += bank.numero_inscricao  # Número de Inscrição (14 posições)
         # Código do Convênio: alinhar à esquerda
         # 033-038: 6 caracteres alinhados à esquerda (ou espaços se vazio)
         # 039-052: 14 caracteres em branco (espaços)
-        codigo_conv = str(conta.get('codigo_convenio', '')).strip()
-        if codigo_conv:
-            # Se tiver código, usa primeiros 6 caracteres alinhados à esquerda
-            parte1 = codigo_conv[:6].ljust(6)  # 033-038: alinha à esquerda
-        else:
-            # Se não tiver código, deixa em branco (6 espaços)
-            parte1 = ' ' * 6  # 033-038: espaços
-        # 039-052: sempre em branco (14 espaços)
-        parte2 = ' ' * 14
-        line += parte1 + parte2
-        line += fields.format_numeric(conta['agencia'], 5)  # Agência Mantenedora
-        line += fields.format_alphanumeric(conta['digito_agencia'], 1)  # Dígito da Agência
-        line += fields.format_numeric(conta['conta'], 12)  # Conta Corrente
-        line += fields.format_alphanumeric(conta['digito_conta'], 1)  # Dígito da Conta
-        line += fields.format_alphanumeric(conta.get('digito_verificador', ''), 1)  # DV Ag/Conta
-        line += fields.format_alphanumeric(empresa['nome'], 30)  # Nome da Empresa
+        line += bank.convenio_ted
+        line += bank.agencia_conta  # Agência/Conta/Dígitos (53-72)
+        line += bank.nome  # Nome da Empresa
         line += fields.format_alphanumeric('BRADESCO', 30)  # Nome do Banco
         line += fields.format_alphanumeric('', 10)  # CNAB Reservado
         line += fields.format_numeric(1, 1)  # Código Remessa/Retorno (1=Remessa)
@@ -138,9 +105,8 @@ class BradescoTEDGenerator:
     
     def generate_header_lote(self, file_date: datetime, remessa_seq: int, tipo_servico: str = 'TED') -> str:
         """Gera registro Header Lote (Registro 1)"""
-        empresa = self.config['empresa']
-        conta = self.config['conta']
-        arquivo_config = self.config.get('arquivo', {})
+        bank = self.bank
+        arquivo_config = bank.arquivo
         # IMPORTANTE (Bradesco Multipag):
         # - O validador do banco tem rejeitado "Tipo de Serviço = 30" como se fosse "Pagamento Salários".
         # - Para pagamentos TED/DOC (Segmentos A/B), use "Tipo de Serviço = 20" (Pagamentos/Fornecedor).
@@ -197,20 +163,11 @@ class BradescoTEDGenerator:
         line += fields.format_numeric(forma_lancamento, 2)  # 12-13 Forma de Lançamento
         line += fields.format_numeric(layout_lote, 3)  # 14-16 Layout do Lote
         line += fields.format_alphanumeric('', 1)  # 17 CNAB
-        line += fields.format_numeric(empresa['tipo_inscricao'], 1)  # 18 Tipo inscrição empresa
-        cnpj_clean = ''.join(filter(str.isdigit, str(empresa['numero_inscricao'])))
-        line += fields.format_numeric(cnpj_clean, 14)  # 19-32 Número inscrição empresa
-        # 33-52 Convênio (6 à esquerda + 14 espaços)
-        codigo_conv = str(conta.get('codigo_convenio', '')).strip()
-        parte1 = codigo_conv[:6].ljust(6) if codigo_conv else (' ' * 6)
-        parte2 = ' ' * 14
-        line += parte1 + parte2
-        line += fields.format_numeric(conta['agencia'], 5)  # 53-57 Agência
-        line += fields.format_alphanumeric(conta['digito_agencia'], 1)  # 58 DV Agência
-        line += fields.format_numeric(conta['conta'], 12)  # 59-70 Conta
-        line += fields.format_alphanumeric(conta['digito_conta'], 1)  # 71 DV Conta
-        line += fields.format_alphanumeric(conta.get('digito_verificador', ''), 1)  # 72 DV Ag/Conta
-        line += fields.format_alphanumeric(empresa['nome'], 30)  # 73-102 Nome Empresa
+        line += bank.tipo_inscricao  # 18 Tipo inscrição empresa
+        line += bank.numero_inscricao  # 19-32 Número inscrição empresa
+        line += bank.convenio_ted  # 33-52 Convênio (6 à esquerda + 14 espaços)
+        line += bank.agencia_conta  # 53-72 Agência, DV, Conta, DV, DV Ag/Conta
+        line += bank.nome  # 73-102 Nome Empresa
         line += fields.format_alphanumeric('', 40)  # 103-142 Informação 1 (Mensagem)
         # 143-222 Dados de endereço (não utilizados): preencher conforme manual
         line += fields.format_alphanumeric('', 30)  # 143-172 Logradouro
@@ -229,14 +186,12 @@ class BradescoTEDGenerator:
     def generate_segmento_a(self, pagamento: Dict, seq: int, file_date: datetime = None) -> str:
         """Gera registro Segmento A (Detalhe) para TED/DOC"""
         banco_favorecido = pagamento.get('banco_favorecido', '0')
-        # Código da Câmara: 000 só é válido para banco 237 (Bradesco)
-        # Para outros bancos, usar código apropriado (ex: 018 para TED)
-        codigo_camara = '000' if banco_favorecido == '237' else '018'
+        # Código da Câmara pelo diretório de bancos: 000 só é válido para banco 237
+        # (Bradesco); para os demais, 018 (TED)
+        codigo_camara = self.bancos.camara(banco_favorecido)
         
-        # Data de gravação do arquivo (para validação)
-        if file_date is None:
-            file_date = datetime.now()
-        data_gravacao_arquivo = file_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        # Datas do arquivo (gravação, hoje) calculadas uma vez por arquivo
+        dates = self._date_context(file_date)
         
         line = ''
         line += fields.format_numeric(237, 3)  # Código do Banco
@@ -256,36 +211,9 @@ class BradescoTEDGenerator:
         line += fields.format_alphanumeric(pagamento.get('nome_favorecido', ''), 30)  # Nome do Favorecido
         line += fields.format_alphanumeric(str(pagamento.get('id_pagamento', '')), 20)  # Número do Documento
         
-        # Data de pagamento: validar e garantir formato DDMMAAAA
-        # REGRA: Data de pagamento deve ser >= data de gravação do arquivo e não pode ser futura
-        data_pagamento = pagamento.get('data_pagamento', '')
-        data_formatada = None
-        
-        if data_pagamento and data_pagamento.strip():
-            # Formata para DDMMAAAA
-            data_formatada = self.fmt_date_ddmmyyyy(data_pagamento)
-            
-            # Valida se a data formatada é válida e >= data de gravação
-            try:
-                # Parseia a data formatada (DDMMAAAA)
-                data_pag_obj = datetime.strptime(data_formatada, '%d%m%Y')
-                data_pag_obj = data_pag_obj.replace(hour=0, minute=0, second=0, microsecond=0)
-                
-                # Valida: não pode ser futura
-                data_atual = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                if data_pag_obj > data_atual:
-                    # Data futura: usar data de gravação do arquivo
-                    data_formatada = data_gravacao_arquivo.strftime('%d%m%Y')
-                # Valida: deve ser >= data de gravação do arquivo
-                elif data_pag_obj < data_gravacao_arquivo:
-                    # Data anterior à gravação: usar data de gravação do arquivo
-                    data_formatada = data_gravacao_arquivo.strftime('%d%m%Y')
-            except ValueError:
-                # Data inválida: usar data de gravação do arquivo
-                data_formatada = data_gravacao_arquivo.strftime('%d%m%Y')
-        else:
-            # Se não informada, usar data de gravação do arquivo
-            data_formatada = data_gravacao_arquivo.strftime('%d%m%Y')
+        # Data de pagamento (DDMMAAAA): deve ser >= data de gravação do arquivo e não pode
+        # ser futura; vazia, inválida ou fora desse intervalo, usa a data de gravação
+        data_formatada = dates.data_pagamento(pagamento.get('data_pagamento', ''))
         
         line += data_formatada  # Data do Pagamento (col 094-101, 8 posições, DDMMAAAA)
         line += fields.format_alphanumeric('BRL', 3)  # Tipo da Moeda
@@ -326,30 +254,15 @@ class BradescoTEDGenerator:
     
     def generate_segmento_b(self, pagamento: Dict, seq: int, file_date: datetime = None) -> str:
         """Gera registro Segmento B (Detalhe) para TED/DOC"""
-        # Data de gravação do arquivo (para usar como fallback)
-        if file_date is None:
-            file_date = datetime.now()
-        data_gravacao_arquivo = file_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        dates = self._date_context(file_date)
         
         # Mapeia tipo de pessoa
         tipo_pessoa = pagamento.get('tipo_pessoa', 'F').upper()
         tipo_inscricao = '1' if tipo_pessoa == 'F' else '2'
         
         # Data de vencimento: usar data_pagamento se data_vencimento não informada
-        # Formato: DDMMAAAA (mesmo padrão do Segmento A)
-        data_vencimento = pagamento.get('data_vencimento') or pagamento.get('data_pagamento')
-        if not data_vencimento or str(data_vencimento).strip() == '':
-            # Se não informada, usar data de gravação do arquivo
-            data_venc_formatada = data_gravacao_arquivo.strftime('%d%m%Y')
-        else:
-            # Formata para DDMMAAAA
-            data_venc_formatada = self.fmt_date_ddmmyyyy(data_vencimento)
-            # Valida se a data formatada é válida
-            try:
-                datetime.strptime(data_venc_formatada, '%d%m%Y')
-            except ValueError:
-                # Se data inválida, usar data de gravação do arquivo
-                data_venc_formatada = data_gravacao_arquivo.strftime('%d%m%Y')
+        # Formato: DDMMAAAA (mesmo padrão do Segmento A); vazia, usa a data de gravação
+        data_venc_formatada = dates.data_vencimento(pagamento.get('data_vencimento') or pagamento.get('data_pagamento'))
         
         line = ''
         line += fields.format_numeric(237, 3)  # Código do Banco
@@ -386,7 +299,7 @@ class BradescoTEDGenerator:
         
         return fields.ensure_length_240(line)
     
-    def generate_trailer_lote(self, total_registros: int, total_titulos: int, total_valor: float) -> str:
+    def generate_trailer_lote(self, total_registros: int, total_titulos: int, total_valor: float | Decimal) -> str:
         """Gera registro Trailer Lote (Registro 5)"""
         line = ''
         line += fields.format_numeric(237, 3)  # Código do Banco
@@ -415,8 +328,87 @@ class BradescoTEDGenerator:
         
         return fields.ensure_length_240(line)
     
+    def begin_file(self, file_date: datetime, file_seq: int, tipo_servico: str = 'TED') -> List[str]:
+        """
+        Inicia um arquivo: zera os contadores e gera os headers de arquivo e de lote.
+        
+        Junto com render_payment e finish_file permite gerar o arquivo de forma
+        incremental (streaming), sem manter todos os pagamentos em memória.
+        
+        Args:
+            file_date: Data de geração
+            file_seq: Número sequencial do arquivo
+            tipo_servico: 'TED' ou 'DOC'
+        
+        Returns:
+            [Header Arquivo, Header Lote]
+        """
+        self._reset_sequence()
+        self.detail_count = 0
+        self.total_amount = 0.0
+        self.total_cents = 0
+        self._seq_detail = 1
+        self._file_date = file_date
+        self._dates = DateContext(file_date, calendario=self.calendario)
+        return [
+            self.generate_header_arquivo(file_date, file_seq),
+            self.generate_header_lote(file_date, file_seq, tipo_servico),
+        ]
+    
+    def render_payment(self, pagamento: Dict) -> List[str]:
+        """
+        Gera os registros de detalhe de um pagamento e atualiza os totais do lote.
+        
+        Returns:
+            [Segmento A, Segmento B]
+        """
+        seq_a = self._seq_detail
+        # Segmentos recebem file_date para validação/consistência das datas
+        lines = [
+            self.generate_segmento_a(pagamento, seq_a, self._file_date),
+            self.generate_segmento_b(pagamento, seq_a + 1, self._file_date),
+        ]
+        self._seq_detail += 2
+        self.detail_count += 1
+        self.total_amount += float(pagamento.get('valor', 0))
+        # Total do trailer = soma dos valores já formatados nos detalhes (sem erro de float)
+        self.total_cents += int(fields.format_amount(pagamento.get('valor')))
+        return lines
+    
+    def seek_payment(self, indice: int) -> None:
+        """
+        Posiciona o sequencial dos detalhes no pagamento `indice` (0-based).
+        
+        Permite renderizar uma faixa de pagamentos de forma independente (ex.: em
+        processos paralelos que preenchem regiões distintas do mesmo arquivo); os
+        totais da faixa ficam em detail_count, total_cents e total_amount.
+        """
+        self._seq_detail = 2 * indice + 1
+    
+    def add_totals(self, pagamentos: int, total_cents: int, total_amount: float) -> None:
+        """Soma aos totais do lote os de uma faixa renderizada por outro gerador."""
+        self.detail_count += pagamentos
+        self.total_cents += total_cents
+        self.total_amount += total_amount
+    
+    def finish_file(self) -> List[str]:
+        """
+        Gera os trailers com os totais acumulados por render_payment.
+        
+        Returns:
+            [Trailer Lote, Trailer Arquivo]
+        """
+        total_registros_lote = 1 + (self.detail_count * 2) + 1
+        total_registros_arquivo = 1 + total_registros_lote + 1
+        return [
+            self.generate_trailer_lote(total_registros_lote, self.detail_count, Decimal(self.total_cents) / 100),
+            self.generate_trailer_arquivo(total_registros_arquivo),
+        ]
+    
+    @timed('generate_file')
     def generate_file(self, pagamentos: List[Dict], file_date: datetime | None = None, 
-                     file_seq: int = 1, tipo_servico: str = 'TED') -> List[str]:
+                     file_seq: int = 1, tipo_servico: str = 'TED',
+                     progress: Callable[[int], None] | None = None) -> List[str]:
         """
         Gera arquivo CNAB 240 completo usando Segmento A e B para TED/DOC.
         
@@ -425,6 +417,8 @@ class BradescoTEDGenerator:
             file_date: Data de geração (usa data atual se None)
             file_seq: Número sequencial do arquivo
             tipo_servico: 'TED' ou 'DOC'
+            progress: Callback opcional chamado após cada pagamento com a quantidade
+                já renderizada (pode lançar exceção para interromper a geração)
         
         Returns:
             Lista de linhas do arquivo (cada linha com 240 caracteres)
@@ -432,46 +426,14 @@ class BradescoTEDGenerator:
         if file_date is None:
             file_date = datetime.now()
         
-        self._reset_sequence()
-        self.detail_count = 0
-        self.total_amount = 0.0
-        lines = []
-        
-        # Header Arquivo
-        lines.append(self.generate_header_arquivo(file_date, file_seq))
-        
-        # Header Lote
-        lines.append(self.generate_header_lote(file_date, file_seq, tipo_servico))
-        
-        # Detalhes (Segmento A + Segmento B para cada pagamento TED/DOC)
-        seq_detail = 1
+        lines = self.begin_file(file_date, file_seq, tipo_servico)
         for pagamento in pagamentos:
-            # Segmento A (passa file_date para validação da data de pagamento)
-            seq_a = seq_detail
-            lines.append(self.generate_segmento_a(pagamento, seq_a, file_date))
-            seq_detail += 1
-            
-            # Segmento B (passa file_date para garantir consistência de datas)
-            seq_b = seq_detail
-            lines.append(self.generate_segmento_b(pagamento, seq_b, file_date))
-            seq_detail += 1
-            
-            # Atualiza contadores
-            self.detail_count += 1
-            valor = float(pagamento.get('valor', 0))
-            self.total_amount += valor
+            lines.extend(self.render_payment(pagamento))
+            if progress is not None:
+                progress(self.detail_count)
+        lines.extend(self.finish_file())
         
-        # Trailer Lote
-        total_registros_lote = 1 + (self.detail_count * 2) + 1
-        lines.append(self.generate_trailer_lote(
-            total_registros_lote,
-            self.detail_count,
-            self.total_amount
-        ))
-        
-        # Trailer Arquivo
-        total_registros_arquivo = 1 + total_registros_lote + 1
-        lines.append(self.generate_trailer_arquivo(total_registros_arquivo))
+        METRICS.incr('pagamentos_renderizados', self.detail_count, tipo=tipo_servico)
         
         return lines
 
@@ -0,0 +1,267 @@
+"""
+Calendário de dias úteis bancários.
+
+Os feriados nacionais são calculados (fixos e móveis, a partir da Páscoa) e
+podem ser complementados por um arquivo local (`config/feriados.csv`): feriados
+municipais/estaduais ou dias que o banco declare úteis. O calendário é montado
+uma vez para um intervalo de anos como um vetor de dias: "é dia útil" e
+"próximo dia útil" são consultas por índice, também sobre um lote inteiro de
+datas (`numpy.datetime64`).
+
+Tratamento de datas de pagamento em dia não útil, em `config/bradesco.yaml`:
+
+    arquivo:
+      dia_nao_util: ajustar       # ajustar (próximo dia útil) ou rejeitar
+      feriados: config/feriados.csv  # opcional (padrão: config/feriados.csv, se existir)
+
+Sem `dia_nao_util` as datas são gravadas como informadas.
+"""
+import csv
+import hashlib
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Mapping, Tuple
+
+import numpy as np
+
+from .dates import parse_date
+
+AJUSTAR = 'ajustar'
+REJEITAR = 'rejeitar'
+POLITICAS = (AJUSTAR, REJEITAR)
+
+# Intervalo padrão do índice (36.525 dias)
+ANO_INICIAL = 2000
+ANO_FINAL = 2099
+
+FERIADOS_FIXOS = (
+    (1, 1, 'Confraternização Universal'),
+    (4, 21, 'Tiradentes'),
+    (5, 1, 'Dia do Trabalho'),
+    (9, 7, 'Independência'),
+    (10, 12, 'Nossa Senhora Aparecida'),
+    (11, 2, 'Finados'),
+    (11, 15, 'Proclamação da República'),
+    (12, 25, 'Natal'),
+)
+# Dias sem expediente bancário contados a partir do Domingo de Páscoa
+FERIADOS_MOVEIS = (
+    (-48, 'Carnaval (segunda-feira)'),
+    (-47, 'Carnaval (terça-feira)'),
+    (-2, 'Sexta-feira Santa'),
+    (60, 'Corpus Christi'),
+)
+# Consciência Negra é feriado nacional a partir de 2024 (Lei 14.759/2023)
+_CONSCIENCIA_NEGRA = 2024
+
+
+def _feriados_padrao() -> Path:
+    return Path(__file__).parent.parent.parent / 'config' / 'feriados.csv'
+
+
+def easter(ano: int) -> date:
+    """Domingo de Páscoa do ano (calendário gregoriano, algoritmo de Meeus/Jones/Butcher)."""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def national_holidays(ano: int) -> Dict[date, str]:
+    """
+    Feriados nacionais bancários do ano.
+
+    Returns:
+        Dicionário data -> descrição
+    """
+    feriados = {date(ano, mes, dia): nome for mes, dia, nome in FERIADOS_FIXOS}
+    if ano >= _CONSCIENCIA_NEGRA:
+        feriados[date(ano, 11, 20)] = 'Consciência Negra'
+    pascoa = easter(ano)
+    for dias, nome in FERIADOS_MOVEIS:
+        feriados[pascoa + timedelta(days=dias)] = nome
+    return feriados
+
+
+def load_overrides(path: str | Path) -> Dict[date, bool]:
+    """
+    Lê o arquivo local de feriados.
+
+    CSV com cabeçalho `data,tipo,descricao`; `tipo` é `feriado` (padrão) ou
+    `util` (dia útil mesmo sendo feriado nacional ou fim de semana). Linhas
+    iniciadas por `#` são ignoradas.
+
+    Returns:
+        Dicionário data -> é dia útil
+
+    Raises:
+        ValueError: Se uma data ou tipo for inválido
+    """
+    overrides: Dict[date, bool] = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        linhas = (linha for linha in f if linha.strip() and not linha.lstrip().startswith('#'))
+        for num, row in enumerate(csv.DictReader(linhas), start=2):
+            dia = parse_date(str(row.get('data') or '').strip())
+            tipo = str(row.get('tipo') or 'feriado').strip().lower()
+            if dia is None or tipo not in ('feriado', 'util'):
+                raise ValueError(f"{path}: linha {num} inválida: {row}")
+            overrides[dia] = tipo == 'util'
+    return overrides
+
+
+def _dias(valores: Any) -> np.ndarray:
+    return np.asarray(valores, dtype='datetime64[D]')
+
+
+class BusinessCalendar:
+    """
+    Índice de dias úteis de um intervalo de anos.
+
+    Args:
+        inicio: Primeiro ano do índice
+        fim: Último ano do índice
+        overrides: Dias marcados como feriado (False) ou útil (True), com
+            precedência sobre fins de semana e feriados nacionais
+    """
+
+    def __init__(self, inicio: int = ANO_INICIAL, fim: int = ANO_FINAL,
+                 overrides: Mapping[date, bool] | None = None) -> None:
+        self.inicio = inicio
+        self.fim = fim
+        self.base = np.datetime64(f'{inicio:04d}-01-01', 'D')
+        total = int((np.datetime64(f'{fim + 1:04d}-01-01', 'D') - self.base).astype(int))
+
+        # 1970-01-01 foi uma quinta-feira: dia da semana 0 = segunda
+        semana = (np.arange(total) + (self.base.astype(int) + 3)) % 7
+        util = semana < 5
+        feriados = {d for ano in range(inicio, fim + 1) for d in national_holidays(ano)}
+        util[self._posicoes(sorted(feriados))] = False
+        for dia, e_util in (overrides or {}).items():
+            if inicio <= dia.year <= fim:
+                util[self._posicoes([dia])] = e_util
+        self.util = util
+
+        # Posição do primeiro dia útil em cada dia ou depois dele (total = nenhum no intervalo)
+        uteis = np.flatnonzero(util)
+        seguinte = np.searchsorted(uteis, np.arange(total))
+        self._proximo = np.append(uteis, total)[seguinte]
+
+    @classmethod
+    def from_config(cls, arquivo: Mapping[str, Any]) -> 'BusinessCalendar':
+        """Calendário com o arquivo de feriados de `arquivo.feriados` (ou o padrão, se existir)."""
+        path = arquivo.get('feriados')
+        path = str(path) if path else None
+        return _calendar(path, file_state(Path(path) if path else _feriados_padrao()))
+
+    def digest(self) -> str:
+        """SHA-256 dos dias úteis do índice (muda com o arquivo de feriados)."""
+        return hashlib.sha256(f'{self.inicio}:{self.fim}:'.encode() + self.util.tobytes()).hexdigest()
+
+    def _posicoes(self, dias: Any) -> np.ndarray:
+        return (_dias(dias) - self.base).astype(int)
+
+    def contains(self, dias: Any) -> np.ndarray:
+        """Máscara das datas dentro do intervalo do índice."""
+        pos = self._posicoes(dias)
+        return (pos >= 0) & (pos < len(self.util))
+
+    def _indices(self, dias: Any) -> np.ndarray:
+        pos = self._posicoes(dias)
+        if ((pos < 0) | (pos >= len(self.util))).any():
+            raise ValueError(f"Data fora do calendário de dias úteis ({self.inicio}-{self.fim})")
+        return pos
+
+    def is_business_day(self, dias: Any) -> Any:
+        """
+        Indica se as datas são dias úteis.
+
+        Args:
+            dias: date, datetime64 ou sequência/array deles
+
+        Returns:
+            bool (data única) ou array de bool
+
+        Raises:
+            ValueError: Se alguma data estiver fora do intervalo do índice
+        """
+        resultado = self.util[self._indices(dias)]
+        return bool(resultado) if resultado.ndim == 0 else resultado
+
+    def next_business_day(self, dias: Any) -> Any:
+        """
+        Primeiro dia útil em cada data ou depois dela (a própria data, se útil).
+
+        Returns:
+            date (data única) ou array datetime64[D]
+
+        Raises:
+            ValueError: Se alguma data (ou o dia útil seguinte) estiver fora do intervalo
+        """
+        proximo = self._proximo[self._indices(dias)]
+        if (proximo >= len(self.util)).any():
+            raise ValueError(f"Sem dia útil até o fim do calendário ({self.fim})")
+        resultado = self.base + proximo
+        return resultado.item() if resultado.ndim == 0 else resultado
+
+
+def file_state(path: Path) -> Tuple[int, int] | None:
+    """mtime e tamanho do arquivo (None se não existir): recarrega o cache quando o arquivo muda."""
+    try:
+        estado = path.stat()
+    except FileNotFoundError:
+        return None
+    return estado.st_mtime_ns, estado.st_size
+
+
+@lru_cache(maxsize=8)
+def _calendar(path: str | None, estado: Tuple[int, int] | None = None) -> BusinessCalendar:
+    """Calendário montado uma vez por versão do arquivo de feriados (por processo)."""
+    if path is None:
+        padrao = _feriados_padrao()
+        overrides = load_overrides(padrao) if padrao.exists() else {}
+    else:
+        overrides = load_overrides(path)
+    return BusinessCalendar(overrides=overrides)
+
+
+def policy(arquivo: Mapping[str, Any]) -> str | None:
+    """
+    Tratamento configurado para datas em dia não útil (`arquivo.dia_nao_util`).
+
+    Returns:
+        AJUSTAR, REJEITAR ou None (datas gravadas como informadas)
+
+    Raises:
+        ValueError: Se o valor configurado não for reconhecido
+    """
+    valor = str(arquivo.get('dia_nao_util') or '').strip().lower()
+    if not valor:
+        return None
+    if valor not in POLITICAS:
+        raise ValueError(f"arquivo.dia_nao_util deve ser {' ou '.join(POLITICAS)}: {valor}")
+    return valor
+
+
+def adjuster(arquivo: Mapping[str, Any]) -> BusinessCalendar | None:
+    """Calendário usado pelos geradores para ajustar datas, ou None se `dia_nao_util` não for `ajustar`."""
+    return BusinessCalendar.from_config(arquivo) if policy(arquivo) == AJUSTAR else None
+
+
+def to_date(value: Any) -> date | None:
+    """Data de pagamento nos formatos aceitos pela validação (hora ignorada); None se inválida."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if value is None:
+        return None
+    texto = str(value).strip()
+    return parse_date(texto.split(' ')[0]) if texto else None
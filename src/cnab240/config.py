@@ -2,7 +2,17 @@
 Carregamento de configuração do arquivo YAML
 """
 import os
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, Dict, Mapping, Tuple
+
+from . import fields
+
+
+def _default_config_path() -> Path:
+    """Retorna o caminho padrão `config/bradesco.yaml` na raiz do projeto."""
+    base_dir = Path(__file__).parent.parent.parent
+    return base_dir / 'config' / 'bradesco.yaml'
 
 
 def load_config(config_path: str | None = None) -> dict:
@@ -30,8 +40,7 @@ def load_config(config_path: str | None = None) -> dict:
     
     if config_path is None:
         # Tenta encontrar o arquivo de config no diretório config/
-        base_dir = Path(__file__).parent.parent.parent
-        config_path = base_dir / 'config' / 'bradesco.yaml'
+        config_path = _default_config_path()
     
     config_path = Path(config_path)
     
@@ -44,5 +53,135 @@ def load_config(config_path: str | None = None) -> dict:
     return config
 
 
+@dataclass(frozen=True)
+class BankConfig:
+    """
+    Configuração bancária validada e com os campos constantes já formatados
+    nas larguras do CNAB 240 (agência/conta com zeros, nome sanitizado etc.).
+
+    Os geradores aceitam uma instância diretamente, evitando reler o YAML e
+    reformatar os mesmos campos a cada arquivo gerado.
+    """
+    tipo_inscricao: str           # 1 posição
+    numero_inscricao: str         # 14 posições (apenas dígitos, zeros à esquerda)
+    nome: str                     # 30 posições (sanitizado)
+    nome_devedor: str             # 40 posições (sanitizado, Segmento J-52)
+    codigo_convenio: str          # 20 posições (alinhado à esquerda)
+    convenio_ted: str             # 20 posições (6 à esquerda + 14 brancos)
+    agencia: str                  # 5 posições
+    digito_agencia: str           # 1 posição
+    conta: str                    # 12 posições
+    digito_conta: str             # 1 posição
+    digito_verificador: str       # 1 posição
+    conta_id: str = 'principal'   # Identificador da conta de débito (multi-contas)
+    arquivo: Dict[str, Any] = field(default_factory=dict, hash=False)
+    raw: Dict[str, Any] = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def from_dict(cls, config: Mapping[str, Any], conta_id: str = 'principal') -> 'BankConfig':
+        """
+        Valida e normaliza um dicionário de configuração (YAML ou session_state).
+
+        Args:
+            config: Dicionário com as seções `empresa`, `conta` e `arquivo`
+            conta_id: Identificador da conta de débito
+
+        Returns:
+            BankConfig imutável
+
+        Raises:
+            ValueError: Se faltar alguma seção/campo obrigatório
+        """
+        if not isinstance(config, Mapping):
+            raise ValueError("Configuração inválida: esperado um dicionário")
+
+        empresa = config.get('empresa') or {}
+        conta = config.get('conta') or {}
+        arquivo = dict(config.get('arquivo') or {})
+
+        faltando = [f"empresa.{k}" for k in ('tipo_inscricao', 'numero_inscricao', 'nome') if k not in empresa]
+        faltando += [f"conta.{k}" for k in ('agencia', 'conta', 'digito_conta') if k not in conta]
+        if faltando:
+            raise ValueError(f"Configuração incompleta, campos ausentes: {', '.join(faltando)}")
+
+        inscricao = ''.join(filter(str.isdigit, str(empresa['numero_inscricao'])))
+        if not inscricao:
+            raise ValueError("empresa.numero_inscricao deve conter dígitos")
+
+        codigo_conv = str(conta.get('codigo_convenio', '') or '').strip()
+        convenio_ted = (codigo_conv[:6].ljust(6) if codigo_conv else ' ' * 6) + ' ' * 14
+
+        return cls(
+            tipo_inscricao=fields.format_numeric(empresa['tipo_inscricao'], 1),
+            numero_inscricao=fields.format_numeric(inscricao, 14),
+            nome=fields.format_alphanumeric(empresa['nome'], 30),
+            nome_devedor=fields.format_alphanumeric(empresa['nome'], 40),
+            codigo_convenio=fields.format_alphanumeric(conta.get('codigo_convenio', ''), 20),
+            convenio_ted=convenio_ted,
+            agencia=fields.format_numeric(conta['agencia'], 5),
+            digito_agencia=fields.format_alphanumeric(conta.get('digito_agencia', ''), 1),
+            conta=fields.format_numeric(conta['conta'], 12),
+            digito_conta=fields.format_alphanumeric(conta['digito_conta'], 1),
+            digito_verificador=fields.format_alphanumeric(conta.get('digito_verificador', ''), 1),
+            conta_id=str(conta_id),
+            arquivo=arquivo,
+            raw=dict(config),
+        )
+
+    @property
+    def agencia_conta(self) -> str:
+        """Bloco Agência/Conta (posições 53-72 dos headers, 20 posições)."""
+        return self.agencia + self.digito_agencia + self.conta + self.digito_conta + self.digito_verificador
+
+
+# Cache por caminho: (mtime_ns, tamanho) -> BankConfig
+_BANK_CONFIG_CACHE: Dict[str, Tuple[Tuple[int, int], BankConfig]] = {}
+
 
+def load_bank_config(config_path: str | os.PathLike | None = None) -> BankConfig:
+    """
+    Carrega a configuração como BankConfig, reaproveitando o resultado
+    enquanto o arquivo YAML não for alterado (cache pela data de modificação).
+
+    Args:
+        config_path: Caminho para o arquivo de configuração
+
+    Returns:
+        BankConfig validado
+
+    Raises:
+        FileNotFoundError: Se o arquivo de configuração não for encontrado
+        ValueError: Se a configuração estiver incompleta
+    """
+    path = Path(config_path) if config_path is not None else _default_config_path()
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Arquivo de configuração não encontrado: {path}")
+
+    key = str(path.resolve())
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _BANK_CONFIG_CACHE.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    bank = BankConfig.from_dict(load_config(str(path)))
+    _BANK_CONFIG_CACHE[key] = (stamp, bank)
+    return bank
+
+
+def resolve_bank_config(config: 'BankConfig | Mapping[str, Any] | str | os.PathLike | None') -> BankConfig:
+    """
+    Converte o argumento aceito pelos geradores em BankConfig.
+
+    Args:
+        config: BankConfig, dicionário de configuração ou caminho do YAML
 
+    Returns:
+        BankConfig correspondente
+    """
+    if isinstance(config, BankConfig):
+        return config
+    if isinstance(config, Mapping):
+        return BankConfig.from_dict(config)
+    return load_bank_config(config)
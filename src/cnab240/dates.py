@@ -0,0 +1,147 @@
+"""
+Datas dos pagamentos: normalização na leitura e contexto de datas por arquivo.
+
+Na leitura da planilha as datas aceitas pela validação são gravadas como
+AAAA-MM-DD (normalize_date), de modo que a renderização não precisa tentar
+vários formatos por pagamento. Na geração, o DateContext calcula uma vez por
+arquivo a data de gravação, a data atual e suas formatações, e guarda o
+resultado de cada valor distinto de data: no laço de renderização a data de
+um pagamento é uma consulta a dicionário.
+"""
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+# Formatos aceitos na entrada, na ordem em que são tentados (mesma ordem da validação)
+FORMATOS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y%m%d', '%d/%m/%y')
+# O gerador TED/DOC aceita também DDMMAAAA
+FORMATOS_TED = FORMATOS + ('%d%m%Y',)
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value: str, formatos: Tuple[str, ...] = FORMATOS) -> date | None:
+    """
+    Converte texto em data tentando `formatos` em ordem.
+
+    Returns:
+        date, ou None se nenhum formato casar
+    """
+    for fmt in formatos:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def normalize_date(value: Any) -> str:
+    """
+    Normaliza uma data lida da planilha para AAAA-MM-DD.
+
+    Valores que a validação não aceita como data são devolvidos como texto
+    (sem espaços nas pontas), para que o erro seja reportado com o valor original.
+
+    Args:
+        value: Data como datetime, texto ou vazio
+    """
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    if value is None:
+        return ''
+    texto = str(value).strip()
+    # Hora é ignorada (formato "AAAA-MM-DD HH:MM:SS"), como na validação
+    parsed = parse_date(texto.split(' ')[0]) if texto else None
+    return parsed.strftime('%Y-%m-%d') if parsed is not None else texto
+
+
+def _day(value: Any, today: date) -> date:
+    """Data de um valor no gerador TED/DOC; a data atual quando inválida."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str) and value.strip():
+        return parse_date(value.strip(), FORMATOS_TED) or today
+    return today
+
+
+def format_ddmmyyyy(value: Any, today: date) -> str:
+    """
+    Formata data como DDMMAAAA (padrão Bradesco Multipag TED/DOC).
+
+    Args:
+        value: Data como texto (vários formatos), datetime ou vazio
+        today: Data usada quando o valor é vazio ou inválido
+
+    Returns:
+        String DDMMAAAA
+    """
+    return _day(value, today).strftime('%d%m%Y')
+
+
+def _vazio(value: Any) -> bool:
+    return not value or str(value).strip() == ''
+
+
+class DateContext:
+    """
+    Datas de um arquivo TED/DOC, calculadas uma vez por arquivo.
+
+    Args:
+        file_date: Data de gravação
+        today: Data atual (padrão: hoje)
+        calendario: business_days.BusinessCalendar; quando informado, a Data do
+            Pagamento em dia não útil passa para o próximo dia útil
+    """
+
+    def __init__(self, file_date: datetime, today: date | None = None, calendario: Any = None) -> None:
+        self.file_date = file_date
+        self.file_day = file_date.date()
+        self.today = today or date.today()
+        self.calendario = calendario
+        self.file_ddmmyyyy = self.file_day.strftime('%d%m%Y')
+        self._pagamento: Dict[Any, str] = {}
+        self._vencimento: Dict[Any, str] = {}
+
+    def _ddmmyyyy(self, day: date) -> str:
+        # Ano com menos de 4 dígitos não cabe em DDMMAAAA: vale a data de gravação
+        return day.strftime('%d%m%Y') if day.year >= 1000 else self.file_ddmmyyyy
+
+    def data_pagamento(self, value: Any) -> str:
+        """
+        Data do Pagamento do Segmento A (DDMMAAAA).
+
+        Vale a data informada se estiver entre a data de gravação e hoje; vazia,
+        inválida, futura ou anterior à gravação, vale a data de gravação. Com
+        calendário, a data resultante em dia não útil vai para o próximo dia útil.
+        """
+        try:
+            return self._pagamento[value]
+        except KeyError:
+            pass
+        except TypeError:  # valor não hashable: calcula sem guardar
+            return self._data_pagamento(value)
+        resultado = self._pagamento[value] = self._data_pagamento(value)
+        return resultado
+
+    def _data_pagamento(self, value: Any) -> str:
+        day = self.file_day if _vazio(value) else _day(value, self.today)
+        if day > self.today or day < self.file_day:
+            day = self.file_day
+        if self.calendario is not None and self.calendario.contains(day):
+            day = self.calendario.next_business_day(day)
+        return self._ddmmyyyy(day)
+
+    def data_vencimento(self, value: Any) -> str:
+        """Data de Vencimento do Segmento B (DDMMAAAA): a informada, ou a de gravação se vazia."""
+        try:
+            return self._vencimento[value]
+        except KeyError:
+            pass
+        except TypeError:
+            return self._data_vencimento(value)
+        resultado = self._vencimento[value] = self._data_vencimento(value)
+        return resultado
+
+    def _data_vencimento(self, value: Any) -> str:
+        if _vazio(value):
+            return self.file_ddmmyyyy
+        return self._ddmmyyyy(_day(value, self.today))
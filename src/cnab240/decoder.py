@@ -0,0 +1,239 @@
+"""
+Leitura de remessas CNAB 240 geradas (auditoria).
+
+Lê um arquivo de `output/` por mapeamento em memória (np.memmap) e o trata como
+uma matriz (n, 242) de bytes. Cada campo dos layouts (`layouts`) vira uma
+coluna por fatiamento da matriz: campos numéricos como inteiros (int64) e
+alfanuméricos como texto sem os brancos de preenchimento à direita. O resultado
+é uma tabela (DataFrame) por tipo de registro/segmento, com a coluna `linha`
+(posição 0-based do registro no arquivo).
+
+A leitura é sem perdas: `encode_tables` reconstrói exatamente as linhas do
+arquivo a partir das tabelas. `pagamentos` junta os pares de segmentos
+(J + J-52, A + B) em uma linha por pagamento, para conferência com a planilha
+de origem.
+"""
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from . import layouts, structure
+from .layouts import Campo, Layout
+
+# Tabelas devolvidas por decode_*, na ordem em que os registros aparecem no arquivo
+TABELAS: Dict[str, Layout] = {
+    'header_arquivo': layouts.HEADER_ARQUIVO,
+    'header_lote_pix': layouts.HEADER_LOTE_PIX,
+    'header_lote_ted': layouts.HEADER_LOTE_TED,
+    'segmento_j': layouts.SEGMENTO_J,
+    'segmento_j52': layouts.SEGMENTO_J52,
+    'segmento_a': layouts.SEGMENTO_A,
+    'segmento_b': layouts.SEGMENTO_B,
+    'trailer_lote_pix': layouts.TRAILER_LOTE_PIX,
+    'trailer_lote_ted': layouts.TRAILER_LOTE_TED,
+    'trailer_arquivo': layouts.TRAILER_ARQUIVO,
+}
+_NOMES = list(TABELAS)
+_CODIGO = {nome: i for i, nome in enumerate(_NOMES)}
+
+_POTENCIAS = 10 ** np.arange(18, -1, -1, dtype=np.int64)
+
+
+def _tabela_por_linha(matriz: np.ndarray) -> np.ndarray:
+    """Código (índice em TABELAS) de cada registro de uma remessa estruturalmente válida."""
+    tipos = matriz[:, 7]
+    segmento = matriz[:, 13]
+    detalhe = tipos == ord('3')
+    codigos = np.empty(len(matriz), dtype=np.int8)
+    codigos[tipos == ord('0')] = _CODIGO['header_arquivo']
+    codigos[tipos == ord('9')] = _CODIGO['trailer_arquivo']
+    codigos[detalhe & (segmento == ord('J'))] = _CODIGO['segmento_j']
+    codigos[detalhe & (segmento == ord('J')) & (matriz[:, 17] == ord('5')) & (matriz[:, 18] == ord('2'))] = \
+        _CODIGO['segmento_j52']
+    codigos[detalhe & (segmento == ord('A'))] = _CODIGO['segmento_a']
+    codigos[detalhe & (segmento == ord('B'))] = _CODIGO['segmento_b']
+
+    # Header/trailer de lote: TED/DOC se o lote tem segmento A, senão PIX
+    lote = np.cumsum(tipos == ord('1'))
+    ted = np.bincount(lote[detalhe & (segmento == ord('A'))], minlength=lote[-1] + 1) > 0
+    for tipo, pix, ted_ in ((ord('1'), 'header_lote_pix', 'header_lote_ted'),
+                            (ord('5'), 'trailer_lote_pix', 'trailer_lote_ted')):
+        linhas = np.flatnonzero(tipos == tipo)
+        codigos[linhas] = np.where(ted[lote[linhas]], _CODIGO[ted_], _CODIGO[pix])
+    return codigos
+
+
+def _coluna(matriz: np.ndarray, linhas: np.ndarray, campo: Campo) -> np.ndarray:
+    """Valores de um campo nas linhas dadas (int64 se numérico, texto sem brancos à direita)."""
+    bytes_campo = np.ascontiguousarray(matriz[linhas, campo.fatia])
+    if len(bytes_campo) > 1 and (bytes_campo == bytes_campo[0]).all():
+        # Campo constante (zeros e brancos de reserva, moeda...): converte uma vez só
+        return np.repeat(_coluna(bytes_campo, np.array([0]), campo._replace(inicio=1, fim=campo.tamanho)),
+                         len(bytes_campo))
+    if campo.tipo == layouts.NUMERICO:
+        return (bytes_campo.astype(np.int64) - ord('0')) @ _POTENCIAS[-campo.tamanho:]
+    valores = bytes_campo.view(f'S{campo.tamanho}').ravel()
+    return np.strings.rstrip(valores, b' ').astype(str).astype(object)
+
+
+def decode_buffer(buffer: 'bytes | bytearray | memoryview | np.ndarray',
+                  validar: bool = True) -> Dict[str, pd.DataFrame]:
+    """
+    Decodifica uma remessa CNAB 240 em memória.
+
+    Args:
+        buffer: Conteúdo do arquivo (bytes ou vetor uint8)
+        validar: Confere a estrutura antes (structure.validate_buffer); a
+            decodificação supõe registros bem formados
+
+    Returns:
+        Dicionário nome da tabela (ver TABELAS) -> DataFrame com a coluna `linha`
+        e uma coluna por campo do layout; só tabelas com registros
+
+    Raises:
+        ValueError: Estrutura inválida
+    """
+    dados = buffer if isinstance(buffer, np.ndarray) else np.frombuffer(buffer, dtype=np.uint8)
+    if validar:
+        relatorio = structure.validate_buffer(dados)
+        if not relatorio.valido:
+            raise ValueError(f"Estrutura CNAB inválida: {'; '.join(relatorio.erros)}")
+    elif len(dados) % structure.TAMANHO_LINHA:
+        raise ValueError(f"Tamanho do arquivo ({len(dados)} bytes) não é múltiplo de {structure.TAMANHO_LINHA}")
+    if not len(dados):
+        return {}
+
+    matriz = dados.reshape(-1, structure.TAMANHO_LINHA)
+    codigos = _tabela_por_linha(matriz)
+    tabelas = {}
+    for codigo in np.unique(codigos):
+        nome = _NOMES[codigo]
+        linhas = np.flatnonzero(codigos == codigo)
+        colunas = {'linha': linhas}
+        colunas.update((campo.nome, _coluna(matriz, linhas, campo)) for campo in TABELAS[nome].campos)
+        tabelas[nome] = pd.DataFrame(colunas)
+    return {nome: tabelas[nome] for nome in _NOMES if nome in tabelas}
+
+
+def decode_file(path: str | os.PathLike, validar: bool = True) -> Dict[str, pd.DataFrame]:
+    """
+    Decodifica uma remessa CNAB 240 gravada em disco (mapeada em memória).
+
+    Args:
+        path: Caminho do arquivo
+        validar: Confere a estrutura antes (ver decode_buffer)
+
+    Returns:
+        Dicionário nome da tabela -> DataFrame (ver decode_buffer)
+    """
+    if os.path.getsize(path) == 0:
+        return decode_buffer(b'', validar)
+    return decode_buffer(np.memmap(path, dtype=np.uint8, mode='r').view(np.ndarray), validar)
+
+
+def decode_files(paths: Iterable[str | os.PathLike], validar: bool = True) -> Dict[str, pd.DataFrame]:
+    """
+    Decodifica várias remessas (ex.: um ano de arquivos diários) em tabelas únicas.
+
+    Args:
+        paths: Caminhos dos arquivos
+        validar: Confere a estrutura de cada arquivo (ver decode_buffer)
+
+    Returns:
+        Dicionário nome da tabela -> DataFrame, com a coluna `arquivo` (nome do arquivo)
+    """
+    partes: Dict[str, List[pd.DataFrame]] = {}
+    for path in paths:
+        for nome, tabela in decode_file(path, validar).items():
+            tabela.insert(0, 'arquivo', Path(path).name)
+            partes.setdefault(nome, []).append(tabela)
+    return {nome: pd.concat(partes[nome], ignore_index=True) for nome in _NOMES if nome in partes}
+
+
+def encode_tables(tabelas: Dict[str, pd.DataFrame]) -> List[str]:
+    """
+    Reconstrói as linhas de uma remessa a partir das tabelas de decode_buffer/decode_file.
+
+    Args:
+        tabelas: Tabelas de um único arquivo
+
+    Returns:
+        Linhas de 240 caracteres, na ordem da coluna `linha`
+    """
+    n = sum(len(tabela) for tabela in tabelas.values())
+    matriz = np.empty((n, layouts.TAMANHO_REGISTRO), dtype=np.uint8)
+    for nome, tabela in tabelas.items():
+        if 'arquivo' in tabela and tabela['arquivo'].nunique() > 1:
+            raise ValueError("encode_tables reconstrói um arquivo por vez (filtre pela coluna 'arquivo')")
+        linhas = tabela['linha'].to_numpy()
+        for campo in TABELAS[nome].campos:
+            valores = tabela[campo.nome].to_numpy()
+            if campo.tipo == layouts.NUMERICO:
+                # Dígitos com zeros à esquerda
+                bytes_campo = (valores.astype(np.int64)[:, None] // _POTENCIAS[-campo.tamanho:]) % 10 + ord('0')
+            else:
+                # Texto com brancos à direita ('S' completa com NUL)
+                bytes_campo = np.array(valores, dtype=f'S{campo.tamanho}').view(np.uint8)
+                bytes_campo = bytes_campo.reshape(-1, campo.tamanho).copy()
+                bytes_campo[bytes_campo == 0] = ord(' ')
+            matriz[linhas, campo.fatia] = bytes_campo
+    texto = matriz.tobytes().decode('ascii')
+    return [texto[i:i + layouts.TAMANHO_REGISTRO] for i in range(0, len(texto), layouts.TAMANHO_REGISTRO)]
+
+
+def pagamentos(tabelas: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Uma linha por pagamento (par de segmentos), para conferência com a planilha de origem.
+
+    Args:
+        tabelas: Tabelas de decode_file/decode_files
+
+    Returns:
+        DataFrame com tipo ('PIX' ou 'TED/DOC'), id_pagamento, valor (reais),
+        data_pagamento, nome_favorecido, cpf_cnpj e os campos de destino
+        (chave_pix/txid ou banco/agência/conta), além de `arquivo` (se houver) e `linha`
+    """
+    def pares(principal: str, complemento: str) -> pd.DataFrame:
+        # O complemento é sempre o registro seguinte ao segmento principal
+        chaves = ['arquivo'] if 'arquivo' in tabelas[principal] else []
+        segundo = tabelas[complemento].assign(linha=tabelas[complemento]['linha'] - 1)
+        return tabelas[principal].merge(segundo, on=chaves + ['linha'], suffixes=('', '_2'))
+
+    def documento(tipo: pd.Series, inscricao: pd.Series) -> pd.Series:
+        return inscricao.astype(str).str.zfill(15).str[-14:].where(tipo == 2, inscricao.astype(str).str.zfill(11))
+
+    frames = []
+    if {'segmento_j', 'segmento_j52'} <= tabelas.keys():
+        pix = pares('segmento_j', 'segmento_j52')
+        frames.append(pd.DataFrame({
+            'tipo': 'PIX',
+            'id_pagamento': pix['documento'],
+            'valor': pix['valor'] / 100,
+            'data_pagamento': pd.to_datetime(pix['data_pagamento'].astype(str).str.zfill(8),
+                                             format='%Y%m%d', errors='coerce'),
+            'nome_favorecido': pix['favorecido_nome'],
+            'cpf_cnpj': documento(pix['favorecido_tipo_inscricao'], pix['favorecido_inscricao']),
+            'chave_pix': pix['chave_pix'],
+            'txid': pix['txid'],
+        }).join(pix[[c for c in ('arquivo', 'linha') if c in pix]]))
+    if {'segmento_a', 'segmento_b'} <= tabelas.keys():
+        ted = pares('segmento_a', 'segmento_b')
+        frames.append(pd.DataFrame({
+            'tipo': 'TED/DOC',
+            'id_pagamento': ted['documento'],
+            'valor': ted['valor'] / 100,
+            'data_pagamento': pd.to_datetime(ted['data_pagamento'].astype(str).str.zfill(8),
+                                             format='%d%m%Y', errors='coerce'),
+            'nome_favorecido': ted['nome_favorecido'],
+            'cpf_cnpj': documento(ted['tipo_inscricao'], ted['inscricao']),
+            'banco_favorecido': ted['banco_favorecido'].astype(str).str.zfill(3),
+            'agencia_favorecido': ted['agencia'].astype(str).str.zfill(5),
+            'conta_favorecido': ted['conta'].astype(str),
+            'digito_conta_favorecido': ted['digito_conta'],
+        }).join(ted[[c for c in ('arquivo', 'linha') if c in ted]]))
+    if not frames:
+        return pd.DataFrame(columns=['tipo', 'id_pagamento', 'valor', 'data_pagamento'])
+    return pd.concat(frames, ignore_index=True)
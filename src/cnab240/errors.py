@@ -0,0 +1,108 @@
+"""
+Erros de validação estruturados.
+
+Os validadores emitem registros compactos (código, campo, severidade, linha,
+id e parâmetros) em vez de mensagens formatadas; o texto em português só é
+montado quando for exibido (`render`). Assim contagens, agregações por código e
+a separação de erros/avisos não dependem de busca em strings.
+"""
+from typing import List, NamedTuple, Tuple
+
+ERRO = 'ERRO'
+AVISO = 'AVISO'
+
+# Códigos
+ID_AUSENTE = 'ID_AUSENTE'
+ID_DUPLICADO = 'ID_DUPLICADO'
+DATA_AUSENTE = 'DATA_AUSENTE'
+DATA_INVALIDA = 'DATA_INVALIDA'
+DATA_ANTERIOR = 'DATA_ANTERIOR'
+DATA_NAO_UTIL = 'DATA_NAO_UTIL'
+VALOR_NAO_POSITIVO = 'VALOR_NAO_POSITIVO'
+VALOR_DECIMAIS = 'VALOR_DECIMAIS'
+VALOR_INVALIDO = 'VALOR_INVALIDO'
+CAMPO_AUSENTE = 'CAMPO_AUSENTE'
+CAMPO_OBRIGATORIO = 'CAMPO_OBRIGATORIO'          # obrigatório para o tipo de pagamento
+CHAVE_PIX_AUSENTE = 'CHAVE_PIX_AUSENTE'
+CHAVE_PIX_INVALIDA = 'CHAVE_PIX_INVALIDA'
+TAMANHO_EXCEDIDO = 'TAMANHO_EXCEDIDO'
+OPCAO_INVALIDA = 'OPCAO_INVALIDA'
+QUANTIDADE_DIGITOS = 'QUANTIDADE_DIGITOS'
+DOCUMENTO_INVALIDO = 'DOCUMENTO_INVALIDO'
+TIPO_PAGAMENTO_INVALIDO = 'TIPO_PAGAMENTO_INVALIDO'
+CONTA_DESCONHECIDA = 'CONTA_DESCONHECIDA'
+BANCO_DESCONHECIDO = 'BANCO_DESCONHECIDO'
+BANCO_SEM_TED = 'BANCO_SEM_TED'
+BANCO_NAO_LISTADO = 'BANCO_NAO_LISTADO'      # aviso: fora do diretório (sem validar_bancos)
+
+# Modelo da mensagem de cada código ({id}, {campo} e parâmetros posicionais)
+MENSAGENS = {
+    ID_AUSENTE: "{id}: id_pagamento não informado",
+    ID_DUPLICADO: "id_pagamento duplicado: {id}",
+    DATA_AUSENTE: "{id}: Data não informada",
+    DATA_INVALIDA: "{id}: Data inválida: {0}",
+    DATA_ANTERIOR: "{id}: Data deve ser >= {0}",
+    DATA_NAO_UTIL: "{id}: Data {0} não é dia útil (próximo dia útil: {1})",
+    VALOR_NAO_POSITIVO: "{id}: valor deve ser > 0",
+    VALOR_DECIMAIS: "{id}: valor deve ter no máximo 2 decimais",
+    VALOR_INVALIDO: "{id}: valor inválido",
+    CAMPO_AUSENTE: "{id}: {campo} não informado",
+    CAMPO_OBRIGATORIO: "{id}: {campo} não informado (obrigatório para {0})",
+    CHAVE_PIX_AUSENTE: "{id}: chave_pix não informada (obrigatório para PIX)",
+    CHAVE_PIX_INVALIDA: "{id}: chave_pix inválida para o tipo {0}",
+    TAMANHO_EXCEDIDO: "{id}: {campo} excede {0} caracteres (será truncado)",
+    OPCAO_INVALIDA: "{id}: {campo} deve ser {0}",
+    QUANTIDADE_DIGITOS: "{id}: {0} deve ter {1} dígitos",
+    DOCUMENTO_INVALIDO: "{id}: {0} inválido",
+    TIPO_PAGAMENTO_INVALIDO: "{id}: tipo_pagamento inválido: {0} (deve ser PIX, TED, DOC ou BOLETO)",
+    CONTA_DESCONHECIDA: "{id}: {0}",
+    BANCO_DESCONHECIDO: "{id}: banco_favorecido {0} não consta no diretório de bancos",
+    BANCO_SEM_TED: "{id}: banco_favorecido {0} ({1}) não participa de TED",
+    BANCO_NAO_LISTADO: "{id}: banco_favorecido {0} não consta no diretório de bancos (confira antes do envio)",
+}
+
+# Códigos que não bloqueiam a geração (o valor é ajustado automaticamente ou só deve ser conferido)
+AVISOS = frozenset({TAMANHO_EXCEDIDO, BANCO_NAO_LISTADO})
+
+
+class ErrorRecord(NamedTuple):
+    """Erro de validação de um pagamento."""
+    codigo: str
+    campo: str
+    severidade: str
+    linha: int                # índice do pagamento na entrada
+    id_pagamento: str
+    params: Tuple = ()
+
+    @property
+    def mensagem(self) -> str:
+        return render(self)
+
+
+def record(codigo: str, campo: str, linha: int, id_pagamento: str, *params) -> ErrorRecord:
+    """Cria um ErrorRecord com a severidade do código."""
+    return ErrorRecord(codigo, campo, AVISO if codigo in AVISOS else ERRO, linha, id_pagamento, params)
+
+
+def register(codigo: str, mensagem: str, aviso: bool = False) -> None:
+    """
+    Registra um código de erro adicional (ex.: regra específica de um banco em `rules`).
+
+    Args:
+        codigo: Código do erro
+        mensagem: Modelo da mensagem ({id}, {campo} e parâmetros posicionais)
+        aviso: True se o erro não bloqueia a geração
+    """
+    global AVISOS
+    MENSAGENS[codigo] = mensagem
+    AVISOS = AVISOS | {codigo} if aviso else AVISOS - {codigo}
+
+
+def blocking(erros: List[ErrorRecord]) -> List[ErrorRecord]:
+    """Só os erros que impedem o pagamento de entrar na remessa (sem os avisos)."""
+    return [e for e in erros if e.severidade == ERRO]
+
+
+def render(erro: ErrorRecord) -> str:
+    """Mensagem em português do erro (mesmo texto das versões anteriores)."""
+    return MENSAGENS[erro.codigo].format(*erro.params, id=erro.id_pagamento, campo=erro.campo)
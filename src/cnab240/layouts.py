@@ -0,0 +1,185 @@
+"""
+Layouts dos registros CNAB 240 gerados por BradescoPIXGenerator e BradescoTEDGenerator.
+
+Cada registro é uma sequência de campos com posições 1-based e inclusivas (como
+nos manuais e nos comentários dos geradores) e tipo 'N' (numérico, zeros à
+esquerda) ou 'A' (alfanumérico, brancos à direita). Os layouts são conferidos ao
+importar o módulo: os campos devem cobrir as posições 1 a 240 sem buracos.
+
+Usados pelo validador estrutural (`structure`) para saber quais colunas devem
+ser só dígitos e onde ficam valores e contadores.
+"""
+from typing import Dict, NamedTuple, Tuple
+
+TAMANHO_REGISTRO = 240
+
+NUMERICO = 'N'
+ALFANUMERICO = 'A'
+
+
+class Campo(NamedTuple):
+    """Campo de um registro (posições 1-based, inclusivas)."""
+    nome: str
+    inicio: int
+    fim: int
+    tipo: str = NUMERICO
+
+    @property
+    def tamanho(self) -> int:
+        return self.fim - self.inicio + 1
+
+    @property
+    def fatia(self) -> slice:
+        """Fatia 0-based do campo na linha."""
+        return slice(self.inicio - 1, self.fim)
+
+
+class Layout(NamedTuple):
+    """Layout de um tipo de registro/segmento."""
+    nome: str
+    campos: Tuple[Campo, ...]
+
+    def campo(self, nome: str) -> Campo:
+        for campo in self.campos:
+            if campo.nome == nome:
+                return campo
+        raise KeyError(f"{self.nome}: campo desconhecido: {nome}")
+
+    @property
+    def numericos(self) -> Tuple[Campo, ...]:
+        return tuple(c for c in self.campos if c.tipo == NUMERICO)
+
+
+def _layout(nome: str, *campos: Tuple) -> Layout:
+    """Monta o layout conferindo que os campos são contíguos e cobrem o registro inteiro."""
+    layout = Layout(nome, tuple(Campo(*c) for c in campos))
+    posicao = 1
+    for campo in layout.campos:
+        if campo.inicio != posicao or campo.fim < campo.inicio:
+            raise ValueError(f"Layout {nome}: campo {campo.nome} começa em {campo.inicio} (esperado {posicao})")
+        posicao = campo.fim + 1
+    if posicao != TAMANHO_REGISTRO + 1:
+        raise ValueError(f"Layout {nome}: cobre {posicao - 1} posições (esperado {TAMANHO_REGISTRO})")
+    return layout
+
+
+# Controle comum aos registros de detalhe (posições 1-14)
+_CONTROLE_DETALHE = (
+    ('banco', 1, 3), ('lote', 4, 7), ('registro', 8, 8), ('sequencial', 9, 13), ('segmento', 14, 14, ALFANUMERICO),
+)
+
+HEADER_ARQUIVO = _layout(
+    'Header de Arquivo',
+    ('banco', 1, 3), ('lote', 4, 7), ('registro', 8, 8), ('cnab_1', 9, 17, ALFANUMERICO),
+    ('tipo_inscricao', 18, 18), ('numero_inscricao', 19, 32), ('convenio', 33, 52, ALFANUMERICO),
+    ('agencia_conta', 53, 72, ALFANUMERICO), ('nome_empresa', 73, 102, ALFANUMERICO),
+    ('nome_banco', 103, 132, ALFANUMERICO), ('cnab_2', 133, 142, ALFANUMERICO), ('remessa_retorno', 143, 143),
+    ('data_geracao', 144, 151), ('hora_geracao', 152, 157), ('sequencial_arquivo', 158, 163),
+    ('layout_arquivo', 164, 166), ('densidade', 167, 171), ('reservado_banco', 172, 191, ALFANUMERICO),
+    ('reservado_empresa', 192, 211, ALFANUMERICO), ('versao_aplicativo', 212, 217, ALFANUMERICO),
+    ('cnab_3', 218, 240, ALFANUMERICO),
+)
+
+_HEADER_LOTE_INICIO = (
+    ('banco', 1, 3), ('lote', 4, 7), ('registro', 8, 8), ('operacao', 9, 9, ALFANUMERICO),
+    ('tipo_servico', 10, 11), ('forma_lancamento', 12, 13), ('layout_lote', 14, 16),
+    ('cnab_1', 17, 17, ALFANUMERICO), ('tipo_inscricao', 18, 18), ('numero_inscricao', 19, 32),
+    ('convenio', 33, 52, ALFANUMERICO), ('agencia_conta', 53, 72, ALFANUMERICO),
+    ('nome_empresa', 73, 102, ALFANUMERICO), ('mensagem_1', 103, 142, ALFANUMERICO),
+)
+
+HEADER_LOTE_PIX = _layout(
+    'Header de Lote PIX', *_HEADER_LOTE_INICIO,
+    ('mensagem_2', 143, 182, ALFANUMERICO), ('numero_remessa', 183, 191), ('data_gravacao', 192, 199),
+    ('data_credito', 200, 207, ALFANUMERICO), ('cnab_2', 208, 240, ALFANUMERICO),
+)
+
+HEADER_LOTE_TED = _layout(
+    'Header de Lote TED/DOC', *_HEADER_LOTE_INICIO,
+    ('logradouro', 143, 172, ALFANUMERICO), ('numero', 173, 177), ('complemento', 178, 192, ALFANUMERICO),
+    ('cidade', 193, 212, ALFANUMERICO), ('cep', 213, 217), ('complemento_cep', 218, 220, ALFANUMERICO),
+    ('estado', 221, 222, ALFANUMERICO), ('forma_pagamento_servico', 223, 224), ('cnab_2', 225, 230, ALFANUMERICO),
+    ('ocorrencias', 231, 240, ALFANUMERICO),
+)
+
+SEGMENTO_J = _layout(
+    'Segmento J', *_CONTROLE_DETALHE,
+    ('movimento', 15, 15), ('instrucao', 16, 17), ('moeda', 18, 20, ALFANUMERICO),
+    ('quantidade_moeda', 21, 35), ('valor', 36, 50), ('data_vencimento', 51, 58), ('valor_documento', 59, 73),
+    ('desconto', 74, 88), ('multa', 89, 103), ('juros', 104, 118), ('data_pagamento', 119, 126),
+    ('quantidade_moeda_2', 127, 141), ('documento', 142, 161, ALFANUMERICO),
+    ('documento_banco', 162, 181, ALFANUMERICO), ('nosso_numero', 182, 201, ALFANUMERICO),
+    ('codigo_barras', 202, 234, ALFANUMERICO), ('cnab', 235, 240, ALFANUMERICO),
+)
+
+SEGMENTO_J52 = _layout(
+    'Segmento J-52', *_CONTROLE_DETALHE,
+    ('cnab', 15, 15, ALFANUMERICO), ('movimento', 16, 17), ('registro_opcional', 18, 19),
+    ('devedor_tipo_inscricao', 20, 20), ('devedor_inscricao', 21, 35), ('devedor_nome', 36, 75, ALFANUMERICO),
+    ('favorecido_tipo_inscricao', 76, 76), ('favorecido_inscricao', 77, 91),
+    ('favorecido_nome', 92, 131, ALFANUMERICO), ('chave_pix', 132, 210, ALFANUMERICO),
+    ('txid', 211, 240, ALFANUMERICO),
+)
+
+SEGMENTO_A = _layout(
+    'Segmento A', *_CONTROLE_DETALHE,
+    ('movimento', 15, 15), ('instrucao', 16, 17), ('camara', 18, 20), ('banco_favorecido', 21, 23),
+    ('agencia', 24, 28), ('digito_agencia', 29, 29, ALFANUMERICO), ('conta', 30, 41),
+    ('digito_conta', 42, 42, ALFANUMERICO), ('digito_agencia_conta', 43, 43, ALFANUMERICO),
+    ('nome_favorecido', 44, 73, ALFANUMERICO), ('documento', 74, 93, ALFANUMERICO), ('data_pagamento', 94, 101),
+    ('moeda', 102, 104, ALFANUMERICO), ('quantidade_moeda', 105, 119), ('valor', 120, 134),
+    ('documento_banco', 135, 154, ALFANUMERICO), ('data_real', 155, 162), ('valor_real', 163, 177),
+    ('informacao_2', 178, 217, ALFANUMERICO), ('finalidade_doc', 218, 219), ('finalidade_ted', 220, 224),
+    ('finalidade_complementar', 225, 226, ALFANUMERICO), ('cnab_1', 227, 229, ALFANUMERICO), ('aviso', 230, 230),
+    ('ocorrencias', 231, 236, ALFANUMERICO), ('cnab_2', 237, 240, ALFANUMERICO),
+)
+
+SEGMENTO_B = _layout(
+    'Segmento B', *_CONTROLE_DETALHE,
+    ('cnab_1', 15, 17, ALFANUMERICO), ('tipo_inscricao', 18, 18), ('inscricao', 19, 32),
+    ('endereco', 33, 62, ALFANUMERICO), ('numero', 63, 67, ALFANUMERICO), ('complemento', 68, 82, ALFANUMERICO),
+    ('bairro', 83, 97, ALFANUMERICO), ('cidade', 98, 117, ALFANUMERICO), ('cep', 118, 125),
+    ('estado', 126, 127, ALFANUMERICO), ('data_vencimento', 128, 135), ('valor_documento', 136, 150),
+    ('abatimento', 151, 165), ('desconto', 166, 180), ('mora', 181, 195), ('multa', 196, 210),
+    ('tipo_chave_pix', 211, 211, ALFANUMERICO), ('chave_pix', 212, 225, ALFANUMERICO), ('aviso', 226, 226),
+    ('cnab_2', 227, 240, ALFANUMERICO),
+)
+
+_TRAILER_LOTE_INICIO = (
+    ('banco', 1, 3), ('lote', 4, 7), ('registro', 8, 8), ('cnab_1', 9, 17, ALFANUMERICO),
+    ('quantidade_registros', 18, 23), ('valor_total', 24, 41),
+)
+
+TRAILER_LOTE_PIX = _layout('Trailer de Lote PIX', *_TRAILER_LOTE_INICIO, ('cnab_2', 42, 240, ALFANUMERICO))
+
+TRAILER_LOTE_TED = _layout(
+    'Trailer de Lote TED/DOC', *_TRAILER_LOTE_INICIO,
+    ('quantidade_moeda', 42, 59), ('aviso_debito', 60, 65), ('cnab_2', 66, 240, ALFANUMERICO),
+)
+
+TRAILER_ARQUIVO = _layout(
+    'Trailer de Arquivo',
+    ('banco', 1, 3), ('lote', 4, 7), ('registro', 8, 8), ('cnab_1', 9, 17, ALFANUMERICO),
+    ('quantidade_lotes', 18, 23), ('quantidade_registros', 24, 29), ('quantidade_contas', 30, 35),
+    ('cnab_2', 36, 240, ALFANUMERICO),
+)
+
+
+class LayoutRemessa(NamedTuple):
+    """Layouts de uma remessa de um tipo de pagamento (um par de segmentos por pagamento)."""
+    header_lote: Layout
+    segmento: Layout              # registro com o valor do pagamento (J ou A)
+    complemento: Layout           # segundo registro do par (J-52 ou B)
+    trailer_lote: Layout
+    codigos: Tuple[str, str]      # código de segmento (posição 14) de cada registro do par
+
+
+REMESSAS: Dict[str, LayoutRemessa] = {
+    'PIX': LayoutRemessa(HEADER_LOTE_PIX, SEGMENTO_J, SEGMENTO_J52, TRAILER_LOTE_PIX, ('J', 'J')),
+    'TED': LayoutRemessa(HEADER_LOTE_TED, SEGMENTO_A, SEGMENTO_B, TRAILER_LOTE_TED, ('A', 'B')),
+    'DOC': LayoutRemessa(HEADER_LOTE_TED, SEGMENTO_A, SEGMENTO_B, TRAILER_LOTE_TED, ('A', 'B')),
+}
+
+# Remessa de cada lote pelo código de segmento do primeiro detalhe (a forma de
+# lançamento não serve: PIX e TED usam 41 por padrão)
+POR_SEGMENTO: Dict[str, LayoutRemessa] = {'J': REMESSAS['PIX'], 'A': REMESSAS['TED']}
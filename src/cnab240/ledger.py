@@ -0,0 +1,182 @@
+"""
+Registro local (SQLite) do que já foi emitido em remessas.
+
+Guarda os TXIDs usados nos Segmentos J-52, para que um TXID gerado nunca se
+repita entre remessas, os pagamentos agendados para remessas futuras (ver
+scheduler) e o próximo sequencial de arquivo de cada conta. O arquivo é
+compartilhado entre processos (geração em paralelo): cada conexão usa WAL e
+espera o lock em vez de falhar.
+
+Configuração (opcional) em `config/bradesco.yaml`:
+
+    arquivo:
+      ledger: output/ledger.sqlite3   # padrão da linha de comando e da interface
+"""
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Set, Tuple
+
+# Nome do ledger no diretório de saída quando `arquivo.ledger` não é configurado
+NOME_PADRAO = 'ledger.sqlite3'
+# Parâmetros por consulta IN (...) (limite do SQLite é 999 em versões antigas)
+_LOTE_CONSULTA = 500
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS txids (
+    txid TEXT PRIMARY KEY,
+    id_pagamento TEXT NOT NULL,
+    emitido_em TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS agendados (
+    id_pagamento TEXT PRIMARY KEY,
+    conta_id TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    data_pagamento TEXT NOT NULL,   -- dia útil da remessa (AAAA-MM-DD)
+    pagamento TEXT NOT NULL,        -- pagamento original (JSON)
+    agendado_em TEXT NOT NULL,
+    remessa TEXT,                   -- arquivo em que foi emitido (NULL = pendente)
+    emitido_em TEXT
+);
+CREATE INDEX IF NOT EXISTS agendados_pendentes ON agendados (data_pagamento) WHERE remessa IS NULL;
+CREATE TABLE IF NOT EXISTS sequenciais (
+    conta_id TEXT PRIMARY KEY,
+    proximo INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Pagamento agendado: (id_pagamento, conta_id, tipo, data_pagamento, pagamento em JSON)
+Agendado = Tuple[str, str, str, str, str]
+
+
+class Ledger:
+    """Conexão com o registro local de emissões."""
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_ESQUEMA)
+
+    def existing_txids(self, txids: Iterable[str]) -> Set[str]:
+        """Retorna os TXIDs de `txids` que já foram emitidos."""
+        txids = list(txids)
+        encontrados: Set[str] = set()
+        for inicio in range(0, len(txids), _LOTE_CONSULTA):
+            lote = txids[inicio:inicio + _LOTE_CONSULTA]
+            marcadores = ','.join('?' * len(lote))
+            cursor = self.conn.execute(f"SELECT txid FROM txids WHERE txid IN ({marcadores})", lote)
+            encontrados.update(row[0] for row in cursor)
+        return encontrados
+
+    def record_txids(self, emitidos: Iterable[Tuple[str, str]]) -> None:
+        """
+        Registra TXIDs emitidos (uma transação para o lote inteiro).
+
+        Args:
+            emitidos: Pares (txid, id_pagamento); TXIDs já registrados são mantidos
+                (geração determinística repetida emite o mesmo TXID)
+        """
+        agora = datetime.now().isoformat(timespec='seconds')
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO txids (txid, id_pagamento, emitido_em) VALUES (?, ?, ?)",
+                                  ((txid, id_pagamento, agora) for txid, id_pagamento in emitidos))
+
+    def schedule(self, agendados: Iterable[Agendado]) -> int:
+        """
+        Agenda pagamentos (uma transação para o lote inteiro).
+
+        Um id já agendado e ainda pendente é substituído (planilha reenviada);
+        ids já emitidos em remessa são mantidos como estão.
+
+        Returns:
+            Quantidade de pagamentos agendados ou substituídos
+        """
+        agora = datetime.now().isoformat(timespec='seconds')
+        with self.conn:
+            antes = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT INTO agendados (id_pagamento, conta_id, tipo, data_pagamento, pagamento, agendado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id_pagamento) DO UPDATE SET conta_id = excluded.conta_id, tipo = excluded.tipo, "
+                "data_pagamento = excluded.data_pagamento, pagamento = excluded.pagamento, "
+                "agendado_em = excluded.agendado_em WHERE remessa IS NULL",
+                (agendado + (agora,) for agendado in agendados))
+            return self.conn.total_changes - antes
+
+    def emitted(self, ids: Iterable[str]) -> Set[str]:
+        """Retorna os ids de `ids` agendados e já emitidos em remessa."""
+        ids = list(ids)
+        encontrados: Set[str] = set()
+        for inicio in range(0, len(ids), _LOTE_CONSULTA):
+            lote = ids[inicio:inicio + _LOTE_CONSULTA]
+            marcadores = ','.join('?' * len(lote))
+            cursor = self.conn.execute(
+                f"SELECT id_pagamento FROM agendados WHERE remessa IS NOT NULL AND id_pagamento IN ({marcadores})",
+                lote)
+            encontrados.update(row[0] for row in cursor)
+        return encontrados
+
+    def due(self, dia: str) -> List[Agendado]:
+        """
+        Pagamentos pendentes com data até `dia` (AAAA-MM-DD), inclusive os de dias anteriores não emitidos.
+
+        Returns:
+            Agendados ordenados por conta, tipo, data e id
+        """
+        cursor = self.conn.execute(
+            "SELECT id_pagamento, conta_id, tipo, data_pagamento, pagamento FROM agendados "
+            "WHERE remessa IS NULL AND data_pagamento <= ? "
+            "ORDER BY conta_id, tipo, data_pagamento, id_pagamento", (dia,))
+        return cursor.fetchall()
+
+    def pending(self) -> int:
+        """Quantidade de pagamentos agendados ainda não emitidos."""
+        return self.conn.execute("SELECT COUNT(*) FROM agendados WHERE remessa IS NULL").fetchone()[0]
+
+    def mark_emitted(self, ids: Iterable[str], remessa: str) -> None:
+        """Registra em que remessa os pagamentos agendados foram emitidos."""
+        agora = datetime.now().isoformat(timespec='seconds')
+        with self.conn:
+            self.conn.executemany("UPDATE agendados SET remessa = ?, emitido_em = ? WHERE id_pagamento = ?",
+                                  ((remessa, agora, id_pagamento) for id_pagamento in ids))
+
+    def next_sequence(self, conta_id: str, inicial: int = 1) -> int:
+        """Próximo sequencial de arquivo da conta, sem reservá-lo."""
+        row = self.conn.execute("SELECT proximo FROM sequenciais WHERE conta_id = ?", (conta_id,)).fetchone()
+        return max(inicial, row[0]) if row else inicial
+
+    def reserve_sequences(self, conta_id: str, quantidade: int, inicial: int = 1) -> int:
+        """
+        Reserva sequenciais de arquivo consecutivos para a conta.
+
+        Args:
+            conta_id: Conta de débito
+            quantidade: Quantidade de arquivos
+            inicial: Primeiro sequencial quando a conta ainda não tem registro
+                (`arquivo.sequencial_inicial`)
+
+        Returns:
+            Primeiro sequencial reservado
+        """
+        with self.conn:
+            # Lock de escrita antes da leitura: dois processos não reservam o mesmo sequencial
+            self.conn.execute("BEGIN IMMEDIATE")
+            row = self.conn.execute("SELECT proximo FROM sequenciais WHERE conta_id = ?", (conta_id,)).fetchone()
+            primeiro = max(inicial, row[0]) if row else inicial
+            self.conn.execute("INSERT INTO sequenciais (conta_id, proximo) VALUES (?, ?) "
+                              "ON CONFLICT (conta_id) DO UPDATE SET proximo = excluded.proximo",
+                              (conta_id, primeiro + quantidade))
+        return primeiro
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> 'Ledger':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,228 @@
+"""
+Instrumentação leve do pipeline: timers, contadores e histogramas.
+
+Desligada por padrão. Enquanto `METRICS.enabled` é False, `timer()` devolve um
+context manager nulo compartilhado e `incr()`/`observe()` retornam de imediato,
+então o custo nas funções instrumentadas é uma checagem de atributo.
+
+Uso:
+    from src.cnab240.metrics import METRICS, timed
+
+    METRICS.enable()
+    with METRICS.timer('write_file', tipo='PIX'):
+        ...
+    METRICS.incr('pagamentos_lidos', 100)
+    METRICS.write_json('output/metrics.json')
+    METRICS.write_prometheus('output/metrics.prom')
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
+
+# Limites (segundos) dos buckets dos histogramas de duração
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+PREFIXO_PROMETHEUS = 'cnab'
+
+_NULL_TIMER = nullcontext()
+F = TypeVar('F', bound=Callable[..., Any])
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Histogram:
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        for i, limite in enumerate(BUCKETS):
+            if value <= limite:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        self.count += data['count']
+        self.total += data['total']
+        self.min = min(self.min, data['min'])
+        self.max = max(self.max, data['max'])
+        self.buckets = [a + b for a, b in zip(self.buckets, data['buckets'])]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'count': self.count, 'total': self.total, 'min': self.min if self.count else 0.0,
+                'max': self.max, 'buckets': list(self.buckets)}
+
+
+class _Timer:
+    __slots__ = ('metrics', 'key', 'inicio')
+
+    def __init__(self, metrics: 'Metrics', key: Tuple[str, Labels]) -> None:
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self) -> '_Timer':
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.metrics._add_histogram(self.key, time.perf_counter() - self.inicio)
+
+
+class Metrics:
+    """Registro de métricas de uma execução."""
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+        self.started_at = datetime.now()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Descarta tudo o que foi registrado."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+        self.started_at = datetime.now()
+
+    def timer(self, name: str, **labels: Any):
+        """Context manager que registra a duração do bloco (segundos) em `name`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, (name, _labels(labels)))
+
+    def incr(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Incrementa o contador `name`."""
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Registra um valor no histograma `name`."""
+        if not self.enabled:
+            return
+        self._add_histogram((name, _labels(labels)), value)
+
+    def _add_histogram(self, key: Tuple[str, Labels], value: float) -> None:
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram()
+            hist.add(value)
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Estado atual serializável (também usado para juntar métricas de subprocessos)."""
+        with self._lock:
+            return {
+                'counters': [{'name': n, 'labels': dict(l), 'value': v} for (n, l), v in self._counters.items()],
+                'histograms': [{'name': n, 'labels': dict(l), **h.to_dict()}
+                               for (n, l), h in self._histograms.items()],
+            }
+
+    def merge(self, snapshot: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Soma ao registro um snapshot (ex.: vindo de um processo do pool)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            for item in snapshot.get('counters', []):
+                key = (item['name'], _labels(item['labels']))
+                self._counters[key] = self._counters.get(key, 0) + item['value']
+            for item in snapshot.get('histograms', []):
+                key = (item['name'], _labels(item['labels']))
+                self._histograms.setdefault(key, _Histogram()).merge(item)
+
+    def report(self) -> Dict[str, Any]:
+        """Relatório da execução (JSON)."""
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'buckets': list(BUCKETS),
+            **self.snapshot(),
+        }
+
+    def write_json(self, path: str | os.PathLike) -> Path:
+        path = Path(path)
+        path.write_text(json.dumps(self.report(), indent=2, ensure_ascii=False), encoding='utf-8')
+        return path
+
+    def to_prometheus(self) -> str:
+        """Métricas no formato texto do Prometheus (node_exporter textfile)."""
+        def fmt_labels(labels: Dict[str, str], extra: Dict[str, str] | None = None) -> str:
+            todos = {**labels, **(extra or {})}
+            if not todos:
+                return ''
+            return '{' + ','.join(f'{k}="{v}"' for k, v in todos.items()) + '}'
+
+        snap = self.snapshot()
+        linhas: List[str] = []
+        tipos_declarados = set()
+        # Linhas de uma mesma métrica precisam ficar agrupadas
+        for item in sorted(snap['counters'], key=lambda i: i['name']):
+            nome = f"{PREFIXO_PROMETHEUS}_{item['name']}_total"
+            if nome not in tipos_declarados:
+                linhas.append(f'# TYPE {nome} counter')
+                tipos_declarados.add(nome)
+            linhas.append(f"{nome}{fmt_labels(item['labels'])} {item['value']}")
+        for item in sorted(snap['histograms'], key=lambda i: i['name']):
+            nome = f"{PREFIXO_PROMETHEUS}_{item['name']}_seconds"
+            if nome not in tipos_declarados:
+                linhas.append(f'# TYPE {nome} histogram')
+                tipos_declarados.add(nome)
+            acumulado = 0
+            for limite, qtd in zip(BUCKETS, item['buckets']):
+                acumulado += qtd
+                linhas.append(f"{nome}_bucket{fmt_labels(item['labels'], {'le': str(limite)})} {acumulado}")
+            linhas.append(f"{nome}_bucket{fmt_labels(item['labels'], {'le': '+Inf'})} {item['count']}")
+            linhas.append(f"{nome}_sum{fmt_labels(item['labels'])} {item['total']}")
+            linhas.append(f"{nome}_count{fmt_labels(item['labels'])} {item['count']}")
+        return '\n'.join(linhas) + '\n'
+
+    def write_prometheus(self, path: str | os.PathLike) -> Path:
+        path = Path(path)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_text(self.to_prometheus(), encoding='utf-8')
+        os.replace(tmp, path)
+        return path
+
+
+# Registro global do processo
+METRICS = Metrics()
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorador: registra a duração de cada chamada em METRICS quando habilitado."""
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return fn(*args, **kwargs)
+            with METRICS.timer(name):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
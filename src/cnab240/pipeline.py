@@ -0,0 +1,251 @@
+"""
+Pipeline em uma única passada: normaliza, valida, roteia e grava cada pagamento.
+
+O fluxo tradicional percorre a lista de pagamentos várias vezes (truncamento,
+validação, filtro dos inválidos, agrupamento, geração e a soma dos valores para
+conferir os trailers). Aqui cada pagamento é visitado uma vez:
+
+    pagamento -> normalize -> regras (rules) -> AccountRouter -> gravador da (conta, tipo)
+
+A entrada é consumida em blocos de `tamanho_lote` pagamentos, validados juntos
+(cada regra roda uma vez por bloco). Os registros de detalhe vão direto para o
+arquivo (`.part`) de sua conta/tipo e os totais dos trailers são acumulados
+durante a própria gravação, então a entrada pode ser um iterador (streaming) e
+só o bloco em trânsito fica em memória. Ao final, cada `.part` passa pela
+validação estrutural (`structure`) antes de ser publicado. Pagamentos inválidos são desviados para
+o relatório.
+
+Diferenças em relação ao fluxo em lote:
+- `id_pagamento` repetido: a primeira ocorrência é gravada e as seguintes são
+  desviadas (no fluxo em lote todas as ocorrências ficam fora da remessa);
+- o sequencial de cada arquivo é definido na ordem em que a (conta, tipo)
+  recebe o primeiro pagamento válido.
+"""
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Set, Tuple
+
+from . import errors
+from .accounts import AccountRouter, remessa_filename, reserve_file_sequences
+from .config import BankConfig
+from .metrics import METRICS, timed
+from .rules import REGRAS, RuleSet
+from .structure import validate_file
+
+TIPOS_SUPORTADOS = ('PIX', 'TED', 'DOC')
+# Pagamentos validados juntos a cada bloco da entrada
+TAMANHO_LOTE = 1000
+
+# (id_pagamento, status, erros, índice na entrada) - ex.: ReportWriter.write
+ReportCallback = Callable[[str, str, List[errors.ErrorRecord], int], None]
+
+
+@dataclass
+class StreamedFile:
+    """Arquivo de remessa gravado pelo pipeline."""
+    conta_id: str
+    tipo: str
+    file_seq: int
+    path: Path
+    pagamentos: int = 0
+    valor: float = 0.0
+    registros: int = 0
+
+
+@dataclass
+class PipelineResult:
+    """Resumo de uma execução do pipeline."""
+    arquivos: List[StreamedFile] = field(default_factory=list)
+    total: int = 0
+    validos: int = 0
+    erros: Dict[str, List[errors.ErrorRecord]] = field(default_factory=dict)
+    ignorados: Dict[Tuple[str, str], int] = field(default_factory=dict)  # (conta, tipo) sem gerador
+
+
+class _RemessaWriter:
+    """Grava uma remessa incrementalmente em `<nome>.part` e a publica ao final."""
+
+    def __init__(self, bank: BankConfig, tipo: str, file_date: datetime, file_seq: int, path: Path) -> None:
+        from .bradesco_pix import BradescoPIXGenerator
+        from .bradesco_ted import BradescoTEDGenerator
+
+        self.info = StreamedFile(bank.conta_id, tipo, file_seq, path)
+        self.tmp = path.with_name(path.name + '.part')
+        self.generator = BradescoPIXGenerator(bank) if tipo == 'PIX' else BradescoTEDGenerator(bank)
+        self.file = open(self.tmp, 'wb')
+        if tipo == 'PIX':
+            self._write(self.generator.begin_file(file_date, file_seq))
+        else:
+            self._write(self.generator.begin_file(file_date, file_seq, tipo))
+
+    def _write(self, lines: List[str]) -> None:
+        for line in lines:
+            if len(line) != 240:
+                raise ValueError(f"{self.info.path.name}: registro {self.info.registros + 1} com "
+                                 f"{len(line)} caracteres (esperado 240)")
+            # CRLF explícito em modo binário (inclusive na última linha)
+            self.file.write(line.encode('ascii', errors='strict'))
+            self.file.write(b'\r\n')
+            self.info.registros += 1
+
+    def add(self, pagamento: Dict) -> None:
+        self._write(self.generator.render_payment(pagamento))
+
+    def close(self) -> StreamedFile:
+        self._write(self.generator.finish_file())
+        self.file.close()
+        # Só publica a remessa se a estrutura do arquivo gravado estiver íntegra
+        estrutura = validate_file(self.tmp)
+        if not estrutura.valido:
+            raise ValueError(f"{self.info.path.name}: estrutura CNAB inválida: {'; '.join(estrutura.erros)}")
+        os.replace(self.tmp, self.info.path)
+        self.info.pagamentos = self.generator.detail_count
+        self.info.valor = self.generator.total_amount
+        METRICS.incr('pagamentos_renderizados', self.info.pagamentos, tipo=self.info.tipo)
+        METRICS.incr('bytes_gravados', self.info.registros * 242, tipo=self.info.tipo)
+        METRICS.incr('arquivos_gerados', tipo=self.info.tipo)
+        return self.info
+
+    def abort(self) -> None:
+        self.file.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+class Validated(NamedTuple):
+    """Pagamento validado e roteado (conta_id é None quando há erro bloqueante)."""
+    index: int
+    pagamento: Dict
+    id_pagamento: str
+    erros: List[errors.ErrorRecord]
+    conta_id: str | None
+
+    @property
+    def status(self) -> str:
+        """'ERRO' (fora da remessa), 'AVISO' (entra, com avisos) ou 'OK'."""
+        return 'ERRO' if self.conta_id is None else errors.AVISO if self.erros else 'OK'
+
+
+def validate_blocks(pagamentos: Iterable[Dict], router: AccountRouter, regras: RuleSet | None = None,
+                    normalize: Callable[[Dict], None] | None = None, tamanho_lote: int = TAMANHO_LOTE,
+                    duplicados: Set[str] | None = None) -> Iterator[List[Validated]]:
+    """
+    Normaliza, valida e roteia os pagamentos em blocos de `tamanho_lote`.
+
+    Cada bloco é entregue assim que validado, de modo que o relatório pode ser
+    escrito enquanto a entrada ainda está sendo lida.
+
+    Args:
+        pagamentos: Pagamentos (lista ou iterador, consumido uma única vez)
+        router: Roteador de contas
+        regras: Regras de validação (padrão: rules.REGRAS)
+        normalize: Ajuste aplicado a cada pagamento antes da validação (ex.: truncamento)
+        tamanho_lote: Pagamentos validados por bloco
+        duplicados: Ids repetidos já conhecidos (fluxo em lote): todas as ocorrências
+            recebem ID_DUPLICADO; sem eles, só as ocorrências a partir da segunda
+
+    Yields:
+        Lista de Validated por bloco, na ordem da entrada
+    """
+    regras = regras or REGRAS
+    duplicados = duplicados or set()
+    ids_seen = set()
+    entrada = enumerate(pagamentos)
+    while bloco := list(islice(entrada, tamanho_lote)):
+        if normalize is not None:
+            for _, pagamento in bloco:
+                normalize(pagamento)
+        encontrados = regras.check([p for _, p in bloco], [i for i, _ in bloco])
+        validados = []
+        for (index, pagamento), erros in zip(bloco, encontrados):
+            id_pagamento = str(pagamento.get('id_pagamento', f'#{index}'))
+            if id_pagamento in ids_seen or id_pagamento in duplicados:
+                erros.insert(0, errors.record(errors.ID_DUPLICADO, 'id_pagamento', index, id_pagamento))
+            ids_seen.add(id_pagamento)
+
+            conta_id = None
+            if not errors.blocking(erros):
+                try:
+                    conta_id = router.route(pagamento)
+                except ValueError as e:
+                    erros.append(errors.record(errors.CONTA_DESCONHECIDA, router.coluna, index, id_pagamento, str(e)))
+            validados.append(Validated(index, pagamento, id_pagamento, erros, conta_id))
+        yield validados
+
+
+@timed('pipeline')
+def run_pipeline(pagamentos: Iterable[Dict], accounts: Dict[str, BankConfig], router: AccountRouter,
+                 file_date: datetime, output_dir: str | os.PathLike,
+                 normalize: Callable[[Dict], None] | None = None,
+                 report: ReportCallback | None = None,
+                 tipos_suportados: Tuple[str, ...] = TIPOS_SUPORTADOS,
+                 regras: RuleSet | None = None, tamanho_lote: int = TAMANHO_LOTE) -> PipelineResult:
+    """
+    Processa os pagamentos em uma única passada, gravando uma remessa por (conta, tipo).
+
+    Args:
+        pagamentos: Pagamentos (lista ou iterador, consumido uma única vez)
+        accounts: Contas de débito
+        router: Roteador de contas
+        file_date: Data de geração
+        output_dir: Diretório das remessas
+        normalize: Ajuste aplicado a cada pagamento antes da validação (ex.: truncamento)
+        report: Chamado uma vez por pagamento com (id, status, erros, índice); status
+            'OK', 'AVISO' (gerado, com avisos) ou 'ERRO' (ex.: ReportWriter.write)
+        tipos_suportados: Tipos com gerador implementado (demais são contados em `ignorados`)
+        regras: Regras de validação (padrão: rules.REGRAS)
+        tamanho_lote: Pagamentos lidos e validados por bloco
+
+    Returns:
+        PipelineResult com os arquivos gravados, erros por id e pagamentos ignorados
+    """
+    output_dir = Path(output_dir)
+    multi_contas = len(accounts) > 1
+    resultado = PipelineResult()
+    writers: Dict[Tuple[str, str], _RemessaWriter] = {}
+    proximo_seq: Dict[str, int] = {}
+
+    try:
+        for bloco in validate_blocks(pagamentos, router, regras, normalize, tamanho_lote):
+            for validado in bloco:
+                index, pagamento, id_pagamento, erros, conta_id = validado
+                resultado.total += 1
+                if report is not None:
+                    report(id_pagamento, validado.status, erros, index)
+                if conta_id is None:
+                    resultado.erros.setdefault(id_pagamento, []).extend(erros)
+                    continue
+
+                # Avisos não bloqueiam: o pagamento segue para a remessa
+                resultado.validos += 1
+                tipo = str(pagamento.get('tipo_pagamento', 'PIX')).upper().strip()
+                chave = (conta_id, tipo)
+                if tipo not in tipos_suportados:
+                    resultado.ignorados[chave] = resultado.ignorados.get(chave, 0) + 1
+                    continue
+
+                writer = writers.get(chave)
+                if writer is None:
+                    bank = accounts[conta_id]
+                    # Com ledger, cada arquivo reserva o seu sequencial (numeração contínua entre execuções)
+                    if conta_id not in proximo_seq or bank.arquivo.get('ledger'):
+                        proximo_seq[conta_id] = reserve_file_sequences(bank, 1)
+                    seq = proximo_seq[conta_id]
+                    proximo_seq[conta_id] = seq + 1
+                    path = output_dir / remessa_filename(tipo, conta_id, file_date, seq, multi_contas)
+                    writer = writers[chave] = _RemessaWriter(bank, tipo, file_date, seq, path)
+                writer.add(pagamento)
+
+        for chave in list(writers):
+            resultado.arquivos.append(writers[chave].close())
+            del writers[chave]
+    finally:
+        # Falha no meio da passada: nenhuma remessa parcial fica no diretório
+        for writer in writers.values():
+            writer.abort()
+
+    METRICS.incr('pagamentos_validados', resultado.total)
+    METRICS.incr('pagamentos_invalidos', len(resultado.erros))
+    return resultado
@@ -0,0 +1,273 @@
+"""
+Validação vetorizada de chaves PIX e inferência do tipo da chave.
+
+Valida uma coluna inteira de chaves contra o `tipo_chave_pix` de cada linha com
+operações de string do pandas e expressões regulares compiladas (CPF/CNPJ têm os
+dígitos verificadores conferidos com NumPy). É a única implementação das regras
+de chave PIX: `validate.validate_pix_key`, as regras de `rules` e o cadastro de
+fornecedores (`src/validators.py`) usam este módulo. `validate_key` e
+`infer_type` são as mesmas regras para uma chave só, em Python puro (sem
+montar Series), com as mesmas expressões regulares.
+
+Quando `tipo_chave_pix` não é informado, o tipo é inferido pela chave:
+
+- e-mail e chave aleatória (EVP/UUID) pelo formato;
+- só dígitos e pontuação: CPF ou CNPJ quando os dígitos verificadores conferem;
+  caso contrário telefone, se tiver formato de telefone (10 dígitos fixo,
+  11 dígitos celular com 9 após o DDD, ou +55/55 na frente);
+- um CPF válido que também tenha formato de celular é tratado como CPF.
+
+O formato de telefone é um só (TELEFONE_RE) para validação, inferência e para
+o gerador PIX, que grava a chave como 55 (DDI) seguido de DDD e número.
+"""
+import re
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+# Tipos de chave PIX aceitos em tipo_chave_pix
+TIPOS_CHAVE_PIX = ['CPF', 'CNPJ', 'EMAIL', 'TELEFONE', 'ALEATORIA']
+
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+UUID_RE = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
+_NAO_DIGITO = re.compile(r'[^0-9]')
+_SEPARADORES_TELEFONE = re.compile(r'[+ \-()]')
+_NUMERICA = re.compile(r'\+?[0-9 ().\-/]+')
+# Telefone sem separadores: DDD + número (10 ou 11 dígitos), com 55 (DDI) opcional na frente
+TELEFONE_RE = re.compile(r'(?:55(?=[0-9]{10,11}\Z))?([0-9]{10,11})')
+
+_PESOS_CPF_1 = np.arange(10, 1, -1)
+_PESOS_CPF_2 = np.arange(11, 1, -1)
+_PESOS_CNPJ_1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+_PESOS_CNPJ_2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
+
+def _digitos_verificadores_ok(digitos: pd.Series, pesos_1: np.ndarray, pesos_2: np.ndarray) -> np.ndarray:
+    """Confere os dois dígitos verificadores de documentos com o mesmo número de dígitos."""
+    tamanho = len(pesos_2) + 1
+    if not len(digitos):
+        return np.zeros(0, dtype=bool)
+    matriz = (np.frombuffer(''.join(digitos).encode('ascii'), dtype=np.uint8)
+              .reshape(-1, tamanho).astype(np.int64) - ord('0'))
+    iguais = (matriz == matriz[:, :1]).all(axis=1)
+    resto_1 = (matriz[:, :len(pesos_1)] * pesos_1).sum(axis=1) % 11
+    resto_2 = (matriz[:, :len(pesos_2)] * pesos_2).sum(axis=1) % 11
+    dv_1 = np.where(resto_1 < 2, 0, 11 - resto_1)
+    dv_2 = np.where(resto_2 < 2, 0, 11 - resto_2)
+    return ~iguais & (matriz[:, -2] == dv_1) & (matriz[:, -1] == dv_2)
+
+
+def cpfs_validos(digitos: pd.Series) -> np.ndarray:
+    """Valida CPFs com 11 dígitos (sem máscara)."""
+    return _digitos_verificadores_ok(digitos, _PESOS_CPF_1, _PESOS_CPF_2)
+
+
+def cnpjs_validos(digitos: pd.Series) -> np.ndarray:
+    """Valida CNPJs com 14 dígitos (sem máscara)."""
+    return _digitos_verificadores_ok(digitos, _PESOS_CNPJ_1, _PESOS_CNPJ_2)
+
+
+def _texto(valores: pd.Series) -> pd.Series:
+    """Valores como texto ('' para None/NaN)."""
+    valores = pd.Series(valores, dtype=object)
+    return valores.where(valores.notna(), '').astype(str).reset_index(drop=True)
+
+
+def _documentos(chaves: pd.Series, tamanho: int, valida: Callable[[pd.Series], np.ndarray]) -> np.ndarray:
+    digitos = chaves.str.replace(_NAO_DIGITO, '', regex=True)
+    validos = (digitos.str.len() == tamanho).to_numpy(copy=True)
+    validos[validos] = valida(digitos[validos])
+    return validos
+
+
+def _cpf(chaves: pd.Series) -> np.ndarray:
+    return _documentos(chaves, 11, cpfs_validos)
+
+
+def _cnpj(chaves: pd.Series) -> np.ndarray:
+    return _documentos(chaves, 14, cnpjs_validos)
+
+
+def _email(chaves: pd.Series) -> np.ndarray:
+    return chaves.str.match(EMAIL_RE).to_numpy(dtype=bool)
+
+
+def _numeros_telefone(chaves: pd.Series) -> pd.Series:
+    """DDD + número de cada chave em formato de telefone (NaN nas demais)."""
+    limpo = chaves.str.replace(_SEPARADORES_TELEFONE, '', regex=True)
+    return limpo.str.extract(f'^{TELEFONE_RE.pattern}\\Z', expand=False)
+
+
+def _telefone(chaves: pd.Series) -> np.ndarray:
+    # Formato: +5511999999999, 5511999999999 ou 11999999999 (após remover + ( ) - e espaços)
+    return _numeros_telefone(chaves).notna().to_numpy(dtype=bool)
+
+
+def _aleatoria(chaves: pd.Series) -> np.ndarray:
+    return chaves.str.lower().str.match(UUID_RE).to_numpy(dtype=bool)
+
+
+_VALIDADORES: Dict[str, Callable[[pd.Series], np.ndarray]] = {
+    'CPF': _cpf,
+    'CNPJ': _cnpj,
+    'EMAIL': _email,
+    'TELEFONE': _telefone,
+    'ALEATORIA': _aleatoria,
+}
+
+
+def validate_keys(chaves: pd.Series, tipos: pd.Series) -> np.ndarray:
+    """
+    Valida chaves PIX em lote.
+
+    Args:
+        chaves: Chaves PIX
+        tipos: Tipo de cada chave (CPF, CNPJ, EMAIL, TELEFONE, ALEATORIA; maiúsculas ou não)
+
+    Returns:
+        Máscara das chaves válidas (chave vazia ou tipo desconhecido: inválida)
+    """
+    chaves = _texto(chaves)
+    tipos = _texto(tipos).str.upper()
+    validas = np.zeros(len(chaves), dtype=bool)
+    preenchidas = (chaves != '').to_numpy()
+    for tipo, valida in _VALIDADORES.items():
+        linhas = preenchidas & (tipos == tipo).to_numpy()
+        if linhas.any():
+            validas[linhas] = valida(chaves[linhas])
+    return validas
+
+
+def infer_types(chaves: pd.Series) -> pd.Series:
+    """
+    Infere o tipo de cada chave PIX pelo formato.
+
+    Args:
+        chaves: Chaves PIX
+
+    Returns:
+        Tipo de cada chave ('' quando não é possível inferir)
+    """
+    chaves = _texto(chaves).str.strip()
+    tipos = np.full(len(chaves), '', dtype=object)
+
+    # Só dígitos e pontuação: CPF, CNPJ ou telefone; demais: e-mail ou chave aleatória
+    numericas = chaves.str.fullmatch(_NUMERICA).to_numpy(dtype=bool)
+    outras = ~numericas & (chaves != '').to_numpy()
+    tipos[np.flatnonzero(outras)[_email(chaves[outras])]] = 'EMAIL'
+    tipos[np.flatnonzero(outras)[_aleatoria(chaves[outras])]] = 'ALEATORIA'
+
+    linhas = np.flatnonzero(numericas)
+    chaves = chaves[numericas]
+    digitos = chaves.str.replace(_NAO_DIGITO, '', regex=True)
+    tamanho = digitos.str.len().to_numpy()
+    # "+" ou DDD entre parênteses: é telefone mesmo que os dígitos formem um CPF válido
+    com_ddi = (chaves.str.startswith('+') | chaves.str.contains('(', regex=False)).to_numpy(dtype=bool)
+
+    cpf = ~com_ddi & (tamanho == 11)
+    cpf[cpf] = cpfs_validos(digitos[cpf])
+    cnpj = ~com_ddi & (tamanho == 14)
+    cnpj[cnpj] = cnpjs_validos(digitos[cnpj])
+
+    # Telefone: mesmo formato aceito na validação (_telefone), e DDD sem 0 e celular com 9
+    numero = _numeros_telefone(chaves).fillna('')
+    tamanho_numero = numero.str.len().to_numpy()
+    primeiro = numero.str[:1].to_numpy(dtype=object)
+    terceiro = numero.str[2:3].to_numpy(dtype=object)
+    telefone = ~cpf & ~cnpj & (primeiro != '0') & (
+        (tamanho_numero == 10) | ((tamanho_numero == 11) & (terceiro == '9'))
+    )
+
+    tipos[linhas[cpf]] = 'CPF'
+    tipos[linhas[cnpj]] = 'CNPJ'
+    tipos[linhas[telefone]] = 'TELEFONE'
+    return pd.Series(tipos, dtype=object)
+
+
+# --- Uma chave (mesmas regras de validate_keys/infer_types, sem Series) ------
+
+def _valor(valor) -> str:
+    """Valor como texto ('' para None/NaN), como _texto."""
+    return '' if valor is None or (pd.api.types.is_scalar(valor) and pd.isna(valor)) else str(valor)
+
+
+def _digitos_verificadores(digitos: str, pesos_1: np.ndarray, pesos_2: np.ndarray) -> bool:
+    if digitos == digitos[0] * len(digitos):
+        return False
+    numeros = [int(d) for d in digitos]
+    for pesos, posicao in ((pesos_1, -2), (pesos_2, -1)):
+        resto = sum(n * int(p) for n, p in zip(numeros, pesos)) % 11
+        if numeros[posicao] != (0 if resto < 2 else 11 - resto):
+            return False
+    return True
+
+
+def _cpf_valido(chave: str) -> bool:
+    digitos = _NAO_DIGITO.sub('', chave)
+    return len(digitos) == 11 and _digitos_verificadores(digitos, _PESOS_CPF_1, _PESOS_CPF_2)
+
+
+def _cnpj_valido(chave: str) -> bool:
+    digitos = _NAO_DIGITO.sub('', chave)
+    return len(digitos) == 14 and _digitos_verificadores(digitos, _PESOS_CNPJ_1, _PESOS_CNPJ_2)
+
+
+def _numero_telefone(chave: str) -> str | None:
+    numero = TELEFONE_RE.fullmatch(_SEPARADORES_TELEFONE.sub('', chave))
+    return numero.group(1) if numero else None
+
+
+_VALIDADORES_CHAVE: Dict[str, Callable[[str], bool]] = {
+    'CPF': _cpf_valido,
+    'CNPJ': _cnpj_valido,
+    'EMAIL': lambda chave: EMAIL_RE.match(chave) is not None,
+    'TELEFONE': lambda chave: _numero_telefone(chave) is not None,
+    'ALEATORIA': lambda chave: UUID_RE.match(chave.lower()) is not None,
+}
+
+
+def validate_key(chave: str, tipo: str) -> bool:
+    """Valida uma chave PIX (mesmas regras de validate_keys)."""
+    chave = _valor(chave)
+    valida = _VALIDADORES_CHAVE.get(_valor(tipo).upper())
+    return bool(chave) and valida is not None and valida(chave)
+
+
+def infer_type(chave: str) -> str:
+    """Infere o tipo de uma chave PIX (mesmas regras de infer_types; '' quando não é possível inferir)."""
+    chave = _valor(chave).strip()
+    if not chave:
+        return ''
+    if not _NUMERICA.fullmatch(chave):
+        if EMAIL_RE.match(chave):
+            return 'EMAIL'
+        return 'ALEATORIA' if UUID_RE.match(chave.lower()) else ''
+    com_ddi = chave.startswith('+') or '(' in chave
+    if not com_ddi and _cpf_valido(chave):
+        return 'CPF'
+    if not com_ddi and _cnpj_valido(chave):
+        return 'CNPJ'
+    numero = _numero_telefone(chave) or ''
+    if numero[:1] not in ('', '0') and (len(numero) == 10 or numero[2:3] == '9'):
+        return 'TELEFONE'
+    return ''
+
+
+def is_phone(chave: str) -> bool:
+    """Indica se a chave tem formato de telefone (TELEFONE_RE, ignorando + ( ) - e espaços)."""
+    return TELEFONE_RE.fullmatch(_SEPARADORES_TELEFONE.sub('', str(chave or '').strip())) is not None
+
+
+def format_phone(chave: str) -> str:
+    """
+    Chave de telefone no formato gravado na remessa: só dígitos, 55 (DDI), DDD e número.
+
+    Args:
+        chave: Chave em formato de telefone (com ou sem +55, separadores)
+
+    Returns:
+        Chave formatada, ou a própria chave quando não tem formato de telefone
+    """
+    numero = TELEFONE_RE.fullmatch(_SEPARADORES_TELEFONE.sub('', str(chave or '').strip()))
+    return '55' + numero.group(1) if numero else chave
@@ -0,0 +1,127 @@
+"""
+Perfilamento opcional do pipeline (CLI `--profile` e opção na interface).
+
+Usa o pyinstrument (amostragem, baixo overhead) quando instalado e o cProfile da
+biblioteca padrão caso contrário. O perfil é salvo ao lado das remessas:
+
+- cProfile: `<nome>.prof` (abrir com `snakeviz` ou `python -m pstats`)
+- pyinstrument: `<nome>.speedscope.json` (abrir em https://www.speedscope.app)
+
+As funções com maior tempo próprio (normalmente `fields.format_*`,
+`sanitize_text` e `strptime`) ficam em `ProfileResult.top`.
+"""
+import cProfile
+import os
+import pstats
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+ENGINES = ('auto', 'cprofile', 'pyinstrument')
+
+
+@dataclass
+class ProfileResult:
+    """Resultado de uma execução perfilada."""
+    engine: str
+    arquivos: List[Path] = field(default_factory=list)
+    top: List[Dict] = field(default_factory=list)  # funcao, chamadas, tempo_proprio, tempo_total
+
+    def summary(self, limit: int = 15) -> str:
+        """Tabela de texto com as funções mais custosas."""
+        linhas = [f"{'tempo próprio':>14} {'tempo total':>12} {'chamadas':>10}  função"]
+        for item in self.top[:limit]:
+            chamadas = '' if item['chamadas'] is None else item['chamadas']
+            linhas.append(f"{item['tempo_proprio']:>13.3f}s {item['tempo_total']:>11.3f}s {chamadas:>10}  {item['funcao']}")
+        return '\n'.join(linhas)
+
+
+def _pyinstrument_available() -> bool:
+    try:
+        import pyinstrument  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _short_path(path: str) -> str:
+    partes = Path(path).parts
+    return '/'.join(partes[-2:]) if len(partes) > 1 else path
+
+
+class Profiler:
+    """
+    Context manager que perfila o bloco e grava o resultado em `output_dir`.
+
+    Args:
+        output_dir: Diretório do perfil (o mesmo das remessas)
+        nome: Nome base dos arquivos
+        engine: 'auto' (pyinstrument se instalado), 'cprofile' ou 'pyinstrument'
+        top: Quantidade de funções no resumo
+    """
+
+    def __init__(self, output_dir: str | os.PathLike, nome: str = 'perfil', engine: str = 'auto',
+                 top: int = 25) -> None:
+        if engine not in ENGINES:
+            raise ValueError(f"engine deve ser um de: {', '.join(ENGINES)}")
+        if engine == 'auto':
+            engine = 'pyinstrument' if _pyinstrument_available() else 'cprofile'
+        elif engine == 'pyinstrument' and not _pyinstrument_available():
+            raise ImportError("pyinstrument não instalado. Instale com: pip install pyinstrument")
+        self.output_dir = Path(output_dir)
+        self.nome = nome
+        self.engine = engine
+        self.limit = top
+        self.result: ProfileResult | None = None
+        self._profiler = None
+
+    def __enter__(self) -> 'Profiler':
+        if self.engine == 'pyinstrument':
+            from pyinstrument import Profiler as SamplingProfiler
+            self._profiler = SamplingProfiler()
+            self._profiler.start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self.engine == 'pyinstrument':
+            self._profiler.stop()
+            self.result = self._save_pyinstrument()
+        else:
+            self._profiler.disable()
+            self.result = self._save_cprofile()
+
+    def _save_cprofile(self) -> ProfileResult:
+        destino = self.output_dir / f'{self.nome}.prof'
+        self._profiler.dump_stats(str(destino))
+        stats = pstats.Stats(self._profiler)
+        top = []
+        for (arquivo, linha, funcao), (_, chamadas, proprio, total, _) in sorted(
+                stats.stats.items(), key=lambda kv: kv[1][2], reverse=True)[:self.limit]:
+            nome = funcao if arquivo == '~' else f'{funcao} ({_short_path(arquivo)}:{linha})'
+            top.append({'funcao': nome, 'chamadas': chamadas, 'tempo_proprio': proprio, 'tempo_total': total})
+        return ProfileResult('cprofile', [destino], top)
+
+    def _save_pyinstrument(self) -> ProfileResult:
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        session = self._profiler.last_session
+        destino = self.output_dir / f'{self.nome}.speedscope.json'
+        destino.write_text(SpeedscopeRenderer().render(session), encoding='utf-8')
+
+        # Soma o tempo próprio por função percorrendo a árvore de amostras
+        acumulado: Dict[str, List[float]] = {}
+        pilha = [session.root_frame()] if session.root_frame() else []
+        while pilha:
+            frame = pilha.pop()
+            chave = f'{frame.function} ({_short_path(frame.file_path or "?")}:{frame.line_no})'
+            proprio_total = acumulado.setdefault(chave, [0.0, 0.0])
+            proprio_total[0] += frame.total_self_time
+            proprio_total[1] += frame.time
+            pilha.extend(frame.children)
+        top = [{'funcao': k, 'chamadas': None, 'tempo_proprio': v[0], 'tempo_total': v[1]}
+               for k, v in sorted(acumulado.items(), key=lambda kv: kv[1][0], reverse=True)[:self.limit]]
+        return ProfileResult('pyinstrument', [destino], top)
@@ -0,0 +1,245 @@
+"""
+Remessa pré-alocada em disco, com cada registro gravado direto na sua posição.
+
+O tamanho de uma remessa é conhecido antes da geração: header de arquivo, header
+de lote, dois registros por pagamento (J + J-52 ou A + B), trailer de lote e
+trailer de arquivo, cada um com 240 posições + CRLF:
+
+    (2 * pagamentos + 4) * 242 bytes
+
+O arquivo `<nome>.part` é criado já com esse tamanho e mapeado em memória; o
+registro `r` (0 = header de arquivo) ocupa os bytes `r * 242` a `r * 242 + 241`.
+Cada pagamento tem posição fixa (registros 2 + 2i e 3 + 2i), então faixas de
+pagamentos podem ser renderizadas por processos diferentes, cada um gravando na
+sua região do mesmo arquivo, sem lista de linhas nem concatenação intermediária.
+Ao final o conteúdo é sincronizado em disco (fsync), conferido pela validação
+estrutural e publicado com rename atômico.
+"""
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from .config import BankConfig
+from .metrics import METRICS
+from .structure import StructureReport, TAMANHO_LINHA, validate_file
+
+# Pagamentos por faixa renderizada em um processo
+TAMANHO_FAIXA = 20000
+
+
+def file_size(pagamentos: int) -> int:
+    """Tamanho em bytes de uma remessa com `pagamentos` pagamentos."""
+    return (2 * pagamentos + 4) * TAMANHO_LINHA
+
+
+def payment_record(indice: int) -> int:
+    """Registro (0-based) do primeiro segmento do pagamento `indice`."""
+    return 2 + 2 * indice
+
+
+class RemessaFile:
+    """Arquivo `<nome>.part` pré-alocado e mapeado em memória."""
+
+    def __init__(self, path: str | os.PathLike, pagamentos: int, _criar: bool = True) -> None:
+        self.path = Path(path)
+        self.pagamentos = pagamentos
+        self.tmp = self.path.with_name(self.path.name + '.part')
+        self.file = open(self.tmp, 'w+b' if _criar else 'r+b')
+        try:
+            if _criar:
+                self.file.truncate(file_size(pagamentos))
+            self.buffer = mmap.mmap(self.file.fileno(), file_size(pagamentos))
+        except BaseException:
+            self.file.close()
+            raise
+
+    @classmethod
+    def attach(cls, path: str | os.PathLike, pagamentos: int) -> 'RemessaFile':
+        """Abre o `.part` já criado por outro processo, para gravar uma faixa de registros."""
+        return cls(path, pagamentos, _criar=False)
+
+    def write(self, registro: int, lines: List[str]) -> None:
+        """
+        Grava registros consecutivos a partir do registro `registro` (0-based).
+
+        Args:
+            registro: Posição do primeiro registro (0 = header de arquivo)
+            lines: Linhas de 240 caracteres (sem terminador)
+        """
+        inicio = registro * TAMANHO_LINHA
+        for line in lines:
+            if len(line) != 240:
+                raise ValueError(f"{self.path.name}: registro {inicio // TAMANHO_LINHA + 1} com "
+                                 f"{len(line)} caracteres (esperado 240)")
+            fim = inicio + 240
+            self.buffer[inicio:fim] = line.encode('ascii', errors='strict')
+            self.buffer[fim:fim + 2] = b'\r\n'
+            inicio = fim + 2
+
+    def close(self) -> None:
+        """Grava as páginas alteradas e fecha o mapeamento (sem publicar)."""
+        if not self.buffer.closed:
+            self.buffer.flush()
+            self.buffer.close()
+        self.file.close()
+
+    def commit(self) -> StructureReport:
+        """
+        Sincroniza o arquivo em disco, valida a estrutura e publica com rename atômico.
+
+        Returns:
+            StructureReport; se inválido, o `.part` é removido e nada é publicado
+        """
+        self.buffer.flush()
+        os.fsync(self.file.fileno())
+        self.close()
+        relatorio = validate_file(self.tmp)
+        if relatorio.valido and relatorio.pagamentos != self.pagamentos:
+            relatorio.erros.append(f"Arquivo com {relatorio.pagamentos} pagamento(s), esperado {self.pagamentos}")
+        if not relatorio.valido:
+            self.tmp.unlink(missing_ok=True)
+            return relatorio
+        os.replace(self.tmp, self.path)
+        _fsync_dir(self.path.parent)
+        return relatorio
+
+    def abort(self) -> None:
+        """Descarta o arquivo parcial."""
+        self.close()
+        self.tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> 'RemessaFile':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Torna o rename durável (POSIX); sem efeito onde diretórios não podem ser abertos."""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _generator(bank: BankConfig, tipo: str):
+    from .bradesco_pix import BradescoPIXGenerator
+    from .bradesco_ted import BradescoTEDGenerator
+
+    return BradescoPIXGenerator(bank) if tipo == 'PIX' else BradescoTEDGenerator(bank)
+
+
+def _begin(gerador, tipo: str, file_date: datetime, file_seq: int) -> List[str]:
+    if tipo == 'PIX':
+        return gerador.begin_file(file_date, file_seq)
+    return gerador.begin_file(file_date, file_seq, tipo)
+
+
+def render_range(path: str | os.PathLike, total: int, bank: BankConfig, tipo: str, pagamentos: List[Dict],
+                 inicio: int, file_date: datetime, file_seq: int) -> Tuple[int, int, float]:
+    """
+    Renderiza uma faixa de pagamentos direto na sua região do `.part` (pode rodar em outro processo).
+
+    Args:
+        path: Caminho final da remessa (o `.part` já deve existir)
+        total: Total de pagamentos do arquivo
+        bank: Conta de débito
+        tipo: 'PIX', 'TED' ou 'DOC'
+        pagamentos: Pagamentos da faixa
+        inicio: Índice (0-based, no arquivo) do primeiro pagamento da faixa
+        file_date: Data de geração
+        file_seq: Sequencial do arquivo
+
+    Returns:
+        Tupla (pagamentos, total em centavos, total em reais) da faixa
+    """
+    gerador = _generator(bank, tipo)
+    _begin(gerador, tipo, file_date, file_seq)
+    gerador.seek_payment(inicio)
+    with RemessaFile.attach(path, total) as arquivo:
+        for indice, pagamento in enumerate(pagamentos, inicio):
+            arquivo.write(payment_record(indice), gerador.render_payment(pagamento))
+    if tipo == 'PIX':
+        gerador.txids.close()  # a faixa não passa por finish_file
+    return gerador.detail_count, gerador.total_cents, gerador.total_amount
+
+
+def _render_range_with_metrics(*args) -> Tuple[Tuple[int, int, float], Dict[str, Any]]:
+    """render_range em um processo do pool, devolvendo também as métricas."""
+    METRICS.reset()
+    METRICS.enable()
+    totais = render_range(*args)
+    return totais, METRICS.snapshot()
+
+
+def write_remessas(tarefas: List[Tuple[Path, BankConfig, str, List[Dict], int]], file_date: datetime,
+                   max_workers: int | None = None,
+                   tamanho_faixa: int = TAMANHO_FAIXA) -> List[StructureReport]:
+    """
+    Gera e grava remessas pré-alocadas, com as faixas de pagamentos renderizadas em paralelo.
+
+    Cada arquivo é dividido em faixas de `tamanho_faixa` pagamentos e todas as
+    faixas (de todos os arquivos) vão para o mesmo pool de processos; cada
+    processo grava direto na região da sua faixa. Headers e trailers são
+    gravados no processo principal com os totais somados das faixas.
+
+    Args:
+        tarefas: (caminho, conta, tipo, pagamentos, sequencial) de cada remessa
+        file_date: Data de geração
+        max_workers: Número máximo de processos (1 = sem paralelismo)
+        tamanho_faixa: Pagamentos por faixa
+
+    Returns:
+        StructureReport de cada remessa, na ordem das tarefas (inválidas não são publicadas)
+    """
+    arquivos = [RemessaFile(path, len(pagamentos)) for path, _, _, pagamentos, _ in tarefas]
+    try:
+        faixas = []
+        for arquivo, (path, bank, tipo, pagamentos, seq) in zip(arquivos, tarefas):
+            arquivo.close()  # as faixas reabrem o .part (attach)
+            for inicio in range(0, len(pagamentos), tamanho_faixa):
+                faixas.append((arquivo, (path, len(pagamentos), bank, tipo, pagamentos[inicio:inicio + tamanho_faixa],
+                                         inicio, file_date, seq)))
+
+        if max_workers == 1 or len(faixas) <= 1:
+            totais = [render_range(*args) for _, args in faixas]
+        elif not METRICS.enabled:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(render_range, *args) for _, args in faixas]
+                totais = [f.result() for f in futures]
+        else:
+            # Métricas registradas nos processos do pool voltam como snapshot
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(_render_range_with_metrics, *args) for _, args in faixas]
+                resultados = [f.result() for f in futures]
+            for _, snapshot in resultados:
+                METRICS.merge(snapshot)
+            totais = [t for t, _ in resultados]
+
+        relatorios = []
+        for arquivo, (path, bank, tipo, pagamentos, seq) in zip(arquivos, tarefas):
+            gerador = _generator(bank, tipo)
+            headers = _begin(gerador, tipo, file_date, seq)
+            for (dono, _), faixa in zip(faixas, totais):
+                if dono is arquivo:
+                    gerador.add_totals(*faixa)
+            METRICS.incr('pagamentos_renderizados', gerador.detail_count, tipo=tipo)
+            with METRICS.timer('write_file', tipo=tipo), RemessaFile.attach(path, len(pagamentos)) as final:
+                final.write(0, headers)
+                final.write(payment_record(len(pagamentos)), gerador.finish_file())
+                relatorios.append(final.commit())
+        return relatorios
+    finally:
+        # Remessas não publicadas (erro ou estrutura inválida) não deixam .part no diretório
+        for arquivo in arquivos:
+            arquivo.tmp.unlink(missing_ok=True)
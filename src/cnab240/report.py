@@ -0,0 +1,156 @@
+"""
+Relatório de validação gravado de forma incremental.
+
+Cada pagamento é escrito assim que é validado (não é preciso manter o
+resultado inteiro em memória) em um dos formatos:
+
+- csv: `id_pagamento;status;erros` (layout histórico) + `codigos;campos`
+- jsonl: um objeto por pagamento, com a lista de erros estruturados
+- parquet: uma linha por erro (pagamentos OK ocupam uma linha sem código),
+  gravado em row groups; requer o pyarrow
+
+Os códigos e campos (ver `errors`) permitem agregar milhões de linhas (ex.:
+contagem por código com pandas/duckdb) sem interpretar as mensagens em português.
+
+Uso:
+    with ReportWriter('output/relatorio_validacao.jsonl') as report:
+        report.write('001', 'ERRO', validate.check_pagamento(pagamento, 0), linha=0)
+"""
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from .errors import ErrorRecord, render
+
+FORMATOS = ('csv', 'jsonl', 'parquet')
+EXTENSOES = {'csv': '.csv', 'jsonl': '.jsonl', 'parquet': '.parquet'}
+# Linhas acumuladas antes de gravar um row group Parquet
+TAMANHO_LOTE_PARQUET = 50_000
+
+class ReportWriter:
+    """
+    Grava o relatório de validação linha a linha.
+
+    Args:
+        path: Arquivo de saída
+        formato: 'csv', 'jsonl' ou 'parquet' (padrão: pela extensão de `path`)
+
+    Raises:
+        ValueError: Formato desconhecido
+        ImportError: Parquet sem o pyarrow instalado
+    """
+
+    def __init__(self, path: str | os.PathLike, formato: str | None = None) -> None:
+        self.path = Path(path)
+        self.formato = formato or self.path.suffix.lstrip('.').lower()
+        if self.formato not in FORMATOS:
+            raise ValueError(f"Formato de relatório desconhecido: {self.formato} (use {', '.join(FORMATOS)})")
+        self.total = 0
+        self.com_erro = 0
+        self._tmp = self.path.with_name(self.path.name + '.part')
+        self._buffer: Dict[str, List[Any]] = {}
+        self._parquet = None
+        if self.formato == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError("Relatório em Parquet requer o pyarrow. Instale com: pip install pyarrow")
+            self._file = None
+            self._limpar_buffer()
+        elif self.formato == 'csv':
+            self._file = open(self._tmp, 'w', newline='', encoding='utf-8')
+            self._csv = csv.writer(self._file, delimiter=';')
+            self._csv.writerow(['id_pagamento', 'status', 'erros', 'codigos', 'campos'])
+        else:
+            self._file = open(self._tmp, 'w', encoding='utf-8')
+
+    def __enter__(self) -> 'ReportWriter':
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, id_pagamento: str, status: str, erros: Sequence[ErrorRecord],
+              linha: int | None = None) -> None:
+        """
+        Registra o resultado de um pagamento.
+
+        Args:
+            id_pagamento: Id do pagamento
+            status: 'OK', 'AVISO' ou 'ERRO'
+            erros: Erros e avisos de validação (vazio quando OK)
+            linha: Índice do pagamento na entrada (0 = primeira linha de dados)
+        """
+        self.total += 1
+        if status == 'ERRO':
+            self.com_erro += 1
+        if self.formato == 'csv':
+            self._csv.writerow([
+                id_pagamento, status, ' | '.join(render(e) for e in erros),
+                '|'.join(e.codigo for e in erros),
+                '|'.join(e.campo for e in erros),
+            ])
+        elif self.formato == 'jsonl':
+            estruturados = [{'codigo': e.codigo, 'campo': e.campo, 'severidade': e.severidade,
+                             'mensagem': render(e)} for e in erros]
+            self._file.write(json.dumps({'linha': linha, 'id_pagamento': id_pagamento, 'status': status,
+                                         'erros': estruturados}, ensure_ascii=False))
+            self._file.write('\n')
+        else:
+            buffer = self._buffer
+            for erro in erros or (None,):
+                buffer['linha'].append(linha)
+                buffer['id_pagamento'].append(id_pagamento)
+                buffer['status'].append(status)
+                buffer['codigo'].append(erro.codigo if erro else '')
+                buffer['campo'].append(erro.campo if erro else '')
+                buffer['severidade'].append(erro.severidade if erro else '')
+                buffer['mensagem'].append(render(erro) if erro else '')
+            if len(self._buffer['linha']) >= TAMANHO_LOTE_PARQUET:
+                self._flush_parquet()
+
+    def _limpar_buffer(self) -> None:
+        self._buffer = {c: [] for c in ('linha', 'id_pagamento', 'status', 'codigo', 'campo', 'severidade', 'mensagem')}
+
+    def _flush_parquet(self) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tabela = pa.table({
+            'linha': pa.array(self._buffer['linha'], type=pa.int64()),
+            **{c: pa.array(v, type=pa.string()) for c, v in self._buffer.items() if c != 'linha'},
+        })
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self._tmp, tabela.schema)
+        self._parquet.write_table(tabela)
+        self._limpar_buffer()
+
+    def close(self) -> Path:
+        """Finaliza o arquivo e o publica em `path`."""
+        if self.formato == 'parquet':
+            if self._buffer['linha'] or self._parquet is None:
+                self._flush_parquet()
+            self._parquet.close()
+        else:
+            self._file.close()
+        os.replace(self._tmp, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        """Descarta o relatório parcial."""
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._file is not None:
+            self._file.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+def report_path(output_dir: str | os.PathLike, formato: str = 'csv') -> Path:
+    """Caminho padrão do relatório de validação para o formato."""
+    return Path(output_dir) / f'relatorio_validacao{EXTENSOES[formato]}'
+
@@ -0,0 +1,517 @@
+"""
+Motor de validação declarativo.
+
+Cada regra é um dado: código do erro, campo, tipos de pagamento a que se aplica
+e um predicado vetorizado que recebe as colunas de um lote (`Batch`) e devolve a
+máscara das linhas que violam a regra. A severidade vem do código (`errors.AVISOS`).
+
+`RuleSet.check` separa o lote por tipo de pagamento e roda, para cada tipo, só as
+regras compiladas para ele (PIX não avalia regras de TED/BOLETO); cada regra é
+avaliada uma vez por coluna, não uma vez por linha. Os erros de cada pagamento
+saem na ordem em que as regras foram declaradas.
+
+Regras específicas de banco entram sem alterar o núcleo:
+
+    errors.register('DESCRICAO_LONGA', '{id}: {campo} excede {0} caracteres no Banco X')
+    regras = rules.REGRAS.copy()
+    regras.add(rules.Rule('DESCRICAO_LONGA', 'descricao_pagamento',
+                          lambda b: b.texto('descricao_pagamento').str.len() > 40,
+                          tipos={'TED'}, params=(40,)))
+    validate.check_pagamentos(pagamentos, regras=regras)
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import errors
+from .bank_directory import BankDirectory
+from .business_days import REJEITAR, BusinessCalendar, policy, to_date
+from .pix_keys import TIPOS_CHAVE_PIX, cnpjs_validos, cpfs_validos, infer_types, validate_keys
+
+TIPOS_PAGAMENTO = ('PIX', 'TED', 'DOC', 'BOLETO')
+# Marca, em `Rule.tipos`, as regras para tipos fora de TIPOS_PAGAMENTO
+OUTROS = '*'
+
+
+class _Ausente:
+    """Campo não presente no dicionário do pagamento (difere de None e de NaN)."""
+    def __repr__(self) -> str:
+        return '<ausente>'
+
+
+AUSENTE = _Ausente()
+
+
+class Batch:
+    """
+    Colunas de um lote de pagamentos do mesmo tipo.
+
+    As colunas são montadas sob demanda e reaproveitadas entre as regras. Os
+    acessores reproduzem `pagamento.get(campo, padrão)`: campo ausente assume o
+    padrão, None e NaN são mantidos.
+
+    Args:
+        pagamentos: Pagamentos do lote
+        tipo: Tipo de pagamento (normalizado) das linhas
+        min_date: Data mínima das regras de data
+    """
+
+    def __init__(self, pagamentos: Sequence[Dict], tipo: str, min_date: datetime) -> None:
+        self.pagamentos = pagamentos
+        self.tipo = tipo
+        self.min_date = min_date
+        self._cache: Dict[Tuple, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.pagamentos)
+
+    def _memo(self, chave: Tuple, calcular: Callable[[], Any]) -> Any:
+        if chave not in self._cache:
+            self._cache[chave] = calcular()
+        return self._cache[chave]
+
+    def raw(self, campo: str) -> np.ndarray:
+        """Valores originais (objetos); AUSENTE onde o campo não existe."""
+        def calcular():
+            valores = np.empty(len(self.pagamentos), dtype=object)
+            valores[:] = [p.get(campo, AUSENTE) for p in self.pagamentos]
+            return valores
+        return self._memo(('raw', campo), calcular)
+
+    def ausente(self, campo: str) -> np.ndarray:
+        return self._memo(('ausente', campo), lambda: self.raw(campo) == AUSENTE)
+
+    def vazio(self, campo: str) -> np.ndarray:
+        """Equivale a `not pagamento.get(campo)`."""
+        return self._memo(('vazio', campo),
+                          lambda: self.ausente(campo) | ~self.raw(campo).astype(bool))
+
+    def texto(self, campo: str, padrao: str = '') -> pd.Series:
+        """Equivale a `str(pagamento.get(campo, padrao))`."""
+        def calcular():
+            valores = pd.Series(self.raw(campo), dtype=object).astype(str)
+            # astype(str) leva None/NaN a <NA>; str() dá 'None'/'nan'
+            faltantes = valores.isna().to_numpy()
+            if faltantes.any():
+                valores.iloc[np.flatnonzero(faltantes)] = [str(v) for v in self.raw(campo)[faltantes]]
+            valores[self.ausente(campo)] = padrao
+            return valores
+        return self._memo(('texto', campo, padrao), calcular)
+
+    def upper(self, campo: str) -> pd.Series:
+        return self._memo(('upper', campo), lambda: self.texto(campo).str.upper())
+
+    def digitos(self, campo: str) -> pd.Series:
+        """Só os dígitos do campo (CPF/CNPJ sem máscara)."""
+        return self._memo(('digitos', campo),
+                          lambda: self.texto(campo).str.strip().str.replace(r'[^0-9]', '', regex=True))
+
+    def numero(self, campo: str) -> pd.Series:
+        """`float(pagamento.get(campo, 0))`; NaN onde a conversão falha."""
+        def calcular():
+            valores = self.raw(campo).copy()
+            valores[self.ausente(campo)] = 0
+            return pd.to_numeric(pd.Series(valores, dtype=object), errors='coerce').astype(float)
+        return self._memo(('numero', campo), calcular)
+
+    def nan(self, campo: str) -> np.ndarray:
+        """Valores NaN presentes no pagamento (não contam como ausentes)."""
+        return self._memo(('nan', campo),
+                          lambda: pd.isna(self.raw(campo)) & ~np.equal(self.raw(campo), None))
+
+    def data(self, campo: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Resultado de `validate.check_date` por linha, calculado uma vez por valor distinto.
+
+        Returns:
+            (códigos de erro ou None, parâmetros das mensagens)
+        """
+        def calcular():
+            from .validate import check_date
+
+            valores = self.raw(campo).copy()
+            valores[self.ausente(campo) | np.equal(valores, None)] = AUSENTE
+            codigos_unicos, unicos = pd.factorize(valores, use_na_sentinel=False)
+            resultados = [check_date(None if v is AUSENTE else v, self.min_date) for v in unicos]
+            codigos = np.array([r[0] if r else None for r in resultados] + [None], dtype=object)
+            params = np.empty(len(resultados) + 1, dtype=object)
+            params[:] = [r[1] if r else () for r in resultados] + [()]
+            return codigos[codigos_unicos], params[codigos_unicos]
+        return self._memo(('data', campo), calcular)
+
+    def dia(self, campo: str) -> np.ndarray:
+        """Datas do campo como datetime64[D] (NaT onde vazia ou inválida), convertidas uma vez por valor distinto."""
+        def calcular():
+            valores = self.raw(campo).copy()
+            valores[self.ausente(campo) | np.equal(valores, None)] = ''
+            codigos_unicos, unicos = pd.factorize(valores, use_na_sentinel=False)
+            dias = np.array([to_date(v) or 'NaT' for v in unicos] + ['NaT'], dtype='datetime64[D]')
+            return dias[codigos_unicos]
+        return self._memo(('dia', campo), calcular)
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    Regra de validação declarativa.
+
+    Args:
+        codigo: Código do erro (ver errors; a severidade vem do código)
+        campo: Campo validado
+        check: Predicado vetorizado: recebe o Batch e devolve a máscara das violações
+        tipos: Tipos de pagamento a que se aplica (None = todos; OUTROS = desconhecidos)
+        params: Parâmetros da mensagem; cada item é um valor fixo ou uma função do
+            Batch que devolve um valor único ou um valor por linha
+    """
+    codigo: str
+    campo: str
+    check: Callable[[Batch], Any]
+    tipos: FrozenSet[str] | None = None
+    params: Tuple = ()
+
+    def __post_init__(self) -> None:
+        if self.tipos is not None:
+            object.__setattr__(self, 'tipos', frozenset(self.tipos))
+
+    def aplica(self, tipo: str) -> bool:
+        """Indica se a regra vale para o tipo de pagamento."""
+        if self.tipos is None or tipo in self.tipos:
+            return True
+        return OUTROS in self.tipos and tipo not in TIPOS_PAGAMENTO
+
+
+class RuleSet:
+    """
+    Conjunto ordenado de regras, compilado por tipo de pagamento.
+
+    Args:
+        regras: Regras iniciais
+    """
+
+    def __init__(self, regras: Iterable[Rule] = ()) -> None:
+        self._regras: List[Rule] = list(regras)
+        self._compiladas: Dict[str, Tuple[Rule, ...]] = {}
+
+    @property
+    def regras(self) -> Tuple[Rule, ...]:
+        return tuple(self._regras)
+
+    def add(self, regra: Rule) -> None:
+        """Acrescenta uma regra ao final do conjunto."""
+        self._regras.append(regra)
+        self._compiladas.clear()
+
+    def extend(self, regras: Iterable[Rule]) -> None:
+        for regra in regras:
+            self.add(regra)
+
+    def copy(self) -> 'RuleSet':
+        return RuleSet(self._regras)
+
+    def compile(self, tipo: str) -> Tuple[Rule, ...]:
+        """Regras aplicáveis ao tipo de pagamento, na ordem de declaração."""
+        compiladas = self._compiladas.get(tipo)
+        if compiladas is None:
+            compiladas = self._compiladas[tipo] = tuple(r for r in self._regras if r.aplica(tipo))
+        return compiladas
+
+    def check(self, pagamentos: Sequence[Dict], indices: Sequence[int] | None = None,
+              min_date: datetime | None = None) -> List[List[errors.ErrorRecord]]:
+        """
+        Valida um lote de pagamentos.
+
+        Args:
+            pagamentos: Pagamentos do lote
+            indices: Índice de cada pagamento na entrada (padrão: 0..n-1)
+            min_date: Data mínima das regras de data (padrão: hoje)
+
+        Returns:
+            Erros de cada pagamento, na ordem da entrada (lista vazia se válido)
+        """
+        resultado: List[List[errors.ErrorRecord]] = [[] for _ in pagamentos]
+        if not pagamentos:
+            return resultado
+        if indices is None:
+            indices = range(len(pagamentos))
+        if min_date is None:
+            min_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        tipos = Batch(pagamentos, '', min_date).texto('tipo_pagamento', 'PIX').str.upper().str.strip()
+        for tipo, posicoes in tipos.groupby(tipos, sort=False).indices.items():
+            lote = Batch([pagamentos[i] for i in posicoes], tipo, min_date)
+            for regra in self.compile(tipo):
+                violacoes = np.flatnonzero(np.asarray(regra.check(lote), dtype=bool))
+                if not len(violacoes):
+                    continue
+                params = [p(lote) if callable(p) else p for p in regra.params]
+                params = [p.to_numpy() if isinstance(p, pd.Series) else p for p in params]
+                for linha in violacoes:
+                    pos = posicoes[linha]
+                    index = indices[pos]
+                    id_pagamento = pagamentos[pos].get('id_pagamento', f'#{index}')
+                    valores = [p[linha] if isinstance(p, np.ndarray) else p for p in params]
+                    resultado[pos].append(errors.record(regra.codigo, regra.campo, index, id_pagamento, *valores))
+        return resultado
+
+
+# --- Predicados vetorizados ---------------------------------------------------
+
+def _tipo(lote: Batch) -> str:
+    return lote.tipo
+
+
+def _data(campo: str, codigo: str) -> Callable[[Batch], np.ndarray]:
+    return lambda b: b.data(campo)[0] == codigo
+
+
+def _param_data(campo: str) -> Callable[[Batch], np.ndarray]:
+    return lambda b: np.array([p[0] if p else None for p in b.data(campo)[1]], dtype=object)
+
+
+def _valor_nao_positivo(b: Batch) -> np.ndarray:
+    return (b.numero('valor') <= 0).to_numpy()
+
+
+def _valor_decimais(b: Batch) -> np.ndarray:
+    valor = b.numero('valor').to_numpy()
+    # float('nan') é aceito por float() mas não é igual ao próprio arredondamento
+    return (np.round(valor, 2) != valor) & (~np.isnan(valor) | b.nan('valor'))
+
+
+def _valor_invalido(b: Batch) -> np.ndarray:
+    return b.numero('valor').isna().to_numpy() & ~b.nan('valor')
+
+
+def _nome_ausente(b: Batch) -> np.ndarray:
+    return b.vazio('nome_favorecido') | (b.texto('nome_favorecido').str.strip() == '').to_numpy()
+
+
+def _nome_longo(b: Batch) -> np.ndarray:
+    return ~_nome_ausente(b) & (b.texto('nome_favorecido').str.len() > 30).to_numpy()
+
+
+def _documento(campo_tipo: str, campo: str, pessoa: str, tamanho: int,
+               obrigatorio: bool = False) -> Callable[[Batch], np.ndarray]:
+    """Quantidade de dígitos do documento diferente da esperada para o tipo de pessoa."""
+    def check(b: Batch) -> np.ndarray:
+        mask = ((b.upper(campo_tipo) == pessoa) & (b.digitos(campo).str.len() != tamanho)).to_numpy()
+        return mask & ~b.vazio(campo) if obrigatorio else mask
+    return check
+
+
+def _documento_invalido(pessoa: str, tamanho: int, valida: Callable[[pd.Series], np.ndarray]):
+    def check(b: Batch) -> np.ndarray:
+        digitos = b.digitos('cpf_cnpj')
+        mask = ((b.upper('tipo_pessoa') == pessoa) & (digitos.str.len() == tamanho)).to_numpy(copy=True)
+        mask[mask] = ~valida(digitos[mask])
+        return mask
+    return check
+
+
+def _fora_de(campo: str, opcoes: Sequence[str]) -> Callable[[Batch], np.ndarray]:
+    return lambda b: ~b.upper(campo).isin(opcoes).to_numpy()
+
+
+def _chave_pix_longa(b: Batch) -> np.ndarray:
+    return ~b.vazio('chave_pix') & (b.texto('chave_pix').str.len() > 100).to_numpy()
+
+
+def _tipo_chave_pix(b: Batch) -> pd.Series:
+    """tipo_chave_pix informado ou, quando vazio, inferido pela chave."""
+    def calcular():
+        tipos = b.upper('tipo_chave_pix').copy()
+        vazios = (tipos == '').to_numpy()
+        if vazios.any():
+            tipos[vazios] = infer_types(b.texto('chave_pix')[vazios]).to_numpy()
+        return tipos
+    return b._memo(('tipo_chave_pix',), calcular)
+
+
+def _tipo_chave_invalido(b: Batch) -> np.ndarray:
+    return ~_tipo_chave_pix(b).isin(TIPOS_CHAVE_PIX).to_numpy()
+
+
+def _chave_pix_invalida(b: Batch) -> np.ndarray:
+    mask = ~b.vazio('chave_pix') & ~_chave_pix_longa(b)
+    mask[mask] = ~validate_keys(b.texto('chave_pix')[mask], _tipo_chave_pix(b)[mask])
+    return mask
+
+
+def _banco_tamanho(b: Batch) -> np.ndarray:
+    return ~b.vazio('banco_favorecido') & (b.texto('banco_favorecido').str.strip().str.len() != 3).to_numpy()
+
+
+def _tipo_conta_vazio(b: Batch) -> np.ndarray:
+    return (b.texto('tipo_conta').str.strip() == '').to_numpy()
+
+
+def _tipo_conta_invalido(b: Batch) -> np.ndarray:
+    tipo_conta = b.texto('tipo_conta').str.strip()
+    return ((tipo_conta != '') & ~tipo_conta.isin(['1', '2', '3'])).to_numpy()
+
+
+def _aviso_invalido(b: Batch) -> np.ndarray:
+    return ~(b.ausente('aviso_favorecido') | pd.Series(b.raw('aviso_favorecido')).isin([0, 1]).to_numpy())
+
+
+def _obrigatorio(campo: str, tipos: Iterable[str]) -> Rule:
+    return Rule(errors.CAMPO_OBRIGATORIO, campo, lambda b: b.vazio(campo), frozenset(tipos), (_tipo,))
+
+
+_TED_DOC = frozenset({'TED', 'DOC'})
+
+# Mesmas regras (e mesma ordem das mensagens) da antiga cadeia if/elif de validate_pagamento;
+# tipo_chave_pix vazio é inferido pela chave (pix_keys). validate._check_padrao é a versão
+# escalar destas regras (um pagamento, sem Series): alterações aqui vão para lá também
+# (tests/test_rules.py confere que as duas emitem os mesmos erros)
+REGRAS_PADRAO: Tuple[Rule, ...] = (
+    Rule(errors.ID_AUSENTE, 'id_pagamento', lambda b: b.vazio('id_pagamento')),
+    Rule(errors.DATA_AUSENTE, 'data_pagamento', _data('data_pagamento', errors.DATA_AUSENTE)),
+    Rule(errors.DATA_INVALIDA, 'data_pagamento', _data('data_pagamento', errors.DATA_INVALIDA),
+         params=(_param_data('data_pagamento'),)),
+    Rule(errors.DATA_ANTERIOR, 'data_pagamento', _data('data_pagamento', errors.DATA_ANTERIOR),
+         params=(lambda b: b.min_date.strftime('%d/%m/%Y'),)),
+    Rule(errors.VALOR_NAO_POSITIVO, 'valor', _valor_nao_positivo),
+    Rule(errors.VALOR_DECIMAIS, 'valor', _valor_decimais),
+    Rule(errors.VALOR_INVALIDO, 'valor', _valor_invalido),
+    Rule(errors.CAMPO_AUSENTE, 'nome_favorecido', _nome_ausente),
+    Rule(errors.TAMANHO_EXCEDIDO, 'nome_favorecido', _nome_longo, params=(30,)),
+    Rule(errors.OPCAO_INVALIDA, 'tipo_pessoa', _fora_de('tipo_pessoa', ['F', 'J']), params=('F ou J',)),
+    Rule(errors.QUANTIDADE_DIGITOS, 'cpf_cnpj', _documento('tipo_pessoa', 'cpf_cnpj', 'F', 11), params=('CPF', 11)),
+    Rule(errors.DOCUMENTO_INVALIDO, 'cpf_cnpj', _documento_invalido('F', 11, cpfs_validos), params=('CPF',)),
+    Rule(errors.QUANTIDADE_DIGITOS, 'cpf_cnpj', _documento('tipo_pessoa', 'cpf_cnpj', 'J', 14), params=('CNPJ', 14)),
+    Rule(errors.DOCUMENTO_INVALIDO, 'cpf_cnpj', _documento_invalido('J', 14, cnpjs_validos), params=('CNPJ',)),
+    # PIX
+    Rule(errors.OPCAO_INVALIDA, 'tipo_chave_pix', _tipo_chave_invalido, {'PIX'},
+         (f"um de: {', '.join(TIPOS_CHAVE_PIX)}",)),
+    Rule(errors.CHAVE_PIX_AUSENTE, 'chave_pix', lambda b: b.vazio('chave_pix'), {'PIX'}),
+    Rule(errors.TAMANHO_EXCEDIDO, 'chave_pix', _chave_pix_longa, {'PIX'}, (100,)),  # 79 caracteres no Segmento J-52
+    Rule(errors.CHAVE_PIX_INVALIDA, 'chave_pix', _chave_pix_invalida, {'PIX'}, (_tipo_chave_pix,)),
+    # TED/DOC
+    _obrigatorio('banco_favorecido', _TED_DOC),
+    Rule(errors.QUANTIDADE_DIGITOS, 'banco_favorecido', _banco_tamanho, _TED_DOC, ('banco_favorecido', 3)),
+    _obrigatorio('agencia_favorecido', _TED_DOC),
+    _obrigatorio('conta_favorecido', _TED_DOC),
+    _obrigatorio('digito_conta_favorecido', _TED_DOC),
+    Rule(errors.CAMPO_OBRIGATORIO, 'tipo_conta', _tipo_conta_vazio, _TED_DOC, (_tipo,)),
+    Rule(errors.OPCAO_INVALIDA, 'tipo_conta', _tipo_conta_invalido, _TED_DOC,
+         ('1 (Corrente), 2 (Poupança) ou 3 (Salário)',)),
+    # BOLETO
+    _obrigatorio('nosso_numero', {'BOLETO'}),
+    _obrigatorio('data_vencimento', {'BOLETO'}),
+    Rule(errors.DATA_INVALIDA, 'data_vencimento', _data('data_vencimento', errors.DATA_INVALIDA), {'BOLETO'},
+         (_param_data('data_vencimento'),)),
+    Rule(errors.DATA_ANTERIOR, 'data_vencimento', _data('data_vencimento', errors.DATA_ANTERIOR), {'BOLETO'},
+         (lambda b: b.min_date.strftime('%d/%m/%Y'),)),
+    _obrigatorio('sacado_nome', {'BOLETO'}),
+    Rule(errors.OPCAO_INVALIDA, 'sacado_tipo_pessoa', _fora_de('sacado_tipo_pessoa', ['F', 'J']), {'BOLETO'},
+         ('F ou J (obrigatório para BOLETO)',)),
+    _obrigatorio('sacado_cpf_cnpj', {'BOLETO'}),
+    Rule(errors.QUANTIDADE_DIGITOS, 'sacado_cpf_cnpj',
+         _documento('sacado_tipo_pessoa', 'sacado_cpf_cnpj', 'F', 11, obrigatorio=True), {'BOLETO'},
+         ('sacado_cpf_cnpj (CPF)', 11)),
+    Rule(errors.QUANTIDADE_DIGITOS, 'sacado_cpf_cnpj',
+         _documento('sacado_tipo_pessoa', 'sacado_cpf_cnpj', 'J', 14, obrigatorio=True), {'BOLETO'},
+         ('sacado_cpf_cnpj (CNPJ)', 14)),
+    # Demais tipos
+    Rule(errors.TIPO_PAGAMENTO_INVALIDO, 'tipo_pagamento', lambda b: np.ones(len(b), dtype=bool), {OUTROS},
+         (_tipo,)),
+    Rule(errors.OPCAO_INVALIDA, 'aviso_favorecido', _aviso_invalido, params=('0 ou 1',)),
+)
+
+# Conjunto usado por validate.check_pagamento(s) quando nenhum outro é informado
+REGRAS = RuleSet(REGRAS_PADRAO)
+
+
+def _dia_nao_util(calendario: BusinessCalendar, campo: str) -> Callable[[Batch], np.ndarray]:
+    """Data válida (sem outro erro de data), dentro do calendário e em dia não útil."""
+    def check(b: Batch) -> np.ndarray:
+        def calcular():
+            dias = b.dia(campo)
+            mask = np.equal(b.data(campo)[0], None) & ~np.isnat(dias) & calendario.contains(dias)
+            mask[mask] = ~calendario.is_business_day(dias[mask])
+            return mask
+        return b._memo(('dia_nao_util', campo, id(calendario)), calcular)
+    return check
+
+
+def _param_dias(calendario: BusinessCalendar, campo: str, proximo: bool) -> Callable[[Batch], np.ndarray]:
+    """Data (ou o próximo dia útil) em DD/MM/AAAA nas linhas em dia não útil."""
+    def param(b: Batch) -> np.ndarray:
+        mask = _dia_nao_util(calendario, campo)(b)
+        dias = b.dia(campo)[mask]
+        if proximo:
+            dias = calendario.next_business_day(dias)
+        valores = np.full(len(b), None, dtype=object)
+        valores[mask] = pd.to_datetime(dias).strftime('%d/%m/%Y')
+        return valores
+    return param
+
+
+def calendar_rule(calendario: BusinessCalendar, campo: str = 'data_pagamento') -> Rule:
+    """Regra que rejeita datas de pagamento em dia não útil (ver business_days)."""
+    return Rule(errors.DATA_NAO_UTIL, campo, _dia_nao_util(calendario, campo),
+                params=(_param_dias(calendario, campo, False), _param_dias(calendario, campo, True)))
+
+
+def _banco_fora_do_diretorio(diretorio: BankDirectory) -> Callable[[Batch], np.ndarray]:
+    def check(b: Batch) -> np.ndarray:
+        banco = b.texto('banco_favorecido').str.strip()
+        return ~_banco_tamanho(b) & ~b.vazio('banco_favorecido') & ~diretorio.known(banco)
+    return check
+
+
+def _banco_sem_ted(diretorio: BankDirectory) -> Callable[[Batch], np.ndarray]:
+    def check(b: Batch) -> np.ndarray:
+        banco = b.texto('banco_favorecido').str.strip()
+        return ~_banco_tamanho(b) & ~b.vazio('banco_favorecido') & diretorio.known(banco) & ~diretorio.ted(banco)
+    return check
+
+
+def _nome_banco(diretorio: BankDirectory) -> Callable[[Batch], np.ndarray]:
+    def param(b: Batch) -> np.ndarray:
+        nomes = np.empty(len(b), dtype=object)
+        nomes[:] = [getattr(diretorio.get(banco), 'nome', '') for banco in b.texto('banco_favorecido')]
+        return nomes
+    return param
+
+
+def bank_rules(diretorio: BankDirectory, rejeitar: bool = True) -> Tuple[Rule, ...]:
+    """
+    Regras do diretório para banco_favorecido (TED/DOC).
+
+    Banco listado sem participação em TED é sempre rejeitado; banco fora do
+    diretório é rejeitado (BANCO_DESCONHECIDO) ou só gera aviso (BANCO_NAO_LISTADO).
+    """
+    banco = lambda b: b.texto('banco_favorecido').str.strip()
+    return (
+        Rule(errors.BANCO_DESCONHECIDO if rejeitar else errors.BANCO_NAO_LISTADO, 'banco_favorecido',
+             _banco_fora_do_diretorio(diretorio), _TED_DOC, (banco,)),
+        Rule(errors.BANCO_SEM_TED, 'banco_favorecido', _banco_sem_ted(diretorio), _TED_DOC,
+             (banco, _nome_banco(diretorio))),
+    )
+
+
+def for_config(arquivo: Dict[str, Any]) -> RuleSet:
+    """
+    Regras conforme a seção `arquivo` da configuração.
+
+    Acrescenta às regras padrão a regra de dia útil com `dia_nao_util: rejeitar`
+    (com `ajustar` as datas são tratadas na geração) e as do diretório de bancos:
+    com `validar_bancos: true` bancos fora do diretório são rejeitados, sem a
+    opção só geram aviso e com `validar_bancos: false` não são conferidos.
+    """
+    extras: List[Rule] = []
+    if policy(arquivo) == REJEITAR:
+        extras.append(calendar_rule(BusinessCalendar.from_config(arquivo)))
+    validar_bancos = arquivo.get('validar_bancos')
+    if validar_bancos is None or validar_bancos:
+        extras.extend(bank_rules(BankDirectory.from_config(arquivo), rejeitar=bool(validar_bancos)))
+    if not extras:
+        return REGRAS
+    regras = REGRAS.copy()
+    regras.extend(extras)
+    return regras
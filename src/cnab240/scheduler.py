@@ -0,0 +1,188 @@
+"""
+Agenda de pagamentos: remessas diárias a partir de pagamentos com data futura.
+
+A planilha do mês inteiro é validada e roteada uma vez e os pagamentos ficam
+no ledger local (`Scheduler.schedule`), cada um no dia útil em que deve entrar
+em remessa (data informada, ou hoje se vazia/passada, ajustada pelo calendário
+de dias úteis). A cada dia útil, `Scheduler.run_day` emite só o que vence no
+dia (e o que ficou pendente de dias anteriores): uma remessa por conta e tipo,
+com os pagamentos ordenados por data e id e divididos em arquivos de até
+`arquivo.pagamentos_por_remessa` pagamentos. Os pagamentos emitidos são
+marcados no ledger com o nome da remessa, de modo que rodar de novo no mesmo
+dia só emite o que foi agendado depois.
+
+O sequencial de arquivo de cada conta também fica no ledger e segue
+crescendo entre os dias (começa em `arquivo.sequencial_inicial`).
+"""
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .accounts import AccountFile, remessa_filename
+from .business_days import BusinessCalendar, to_date
+from .config import BankConfig
+from .ledger import Agendado, Ledger
+from .metrics import METRICS, timed
+
+TIPOS_AGENDAVEIS = ('PIX', 'TED', 'DOC')
+# Detalhes do lote têm sequencial de 5 dígitos e cada pagamento ocupa dois registros
+MAX_PAGAMENTOS = 49999
+
+
+@dataclass
+class ScheduleResult:
+    """Resultado do agendamento de uma planilha."""
+    agendados: int = 0
+    por_dia: Dict[str, int] = field(default_factory=dict)    # AAAA-MM-DD -> pagamentos
+    ja_emitidos: List[str] = field(default_factory=list)      # ids já emitidos em remessa (mantidos)
+    ignorados: Dict[Tuple[str, str], int] = field(default_factory=dict)  # (conta, tipo) sem gerador
+
+
+class Scheduler:
+    """
+    Agenda e emite remessas por dia útil.
+
+    Args:
+        ledger: Ledger (ou caminho) onde ficam os agendados e os sequenciais
+        accounts: Contas de débito
+        output_dir: Diretório das remessas
+        calendario: Calendário de dias úteis (padrão: o da conta principal)
+    """
+
+    def __init__(self, ledger: 'Ledger | str', accounts: Dict[str, BankConfig], output_dir: str | Path,
+                 calendario: BusinessCalendar | None = None) -> None:
+        self.ledger = ledger if isinstance(ledger, Ledger) else Ledger(ledger)
+        self.accounts = accounts
+        self.output_dir = Path(output_dir)
+        principal = next(iter(accounts.values()))
+        self.calendario = calendario or BusinessCalendar.from_config(principal.arquivo)
+
+    def due_date(self, pagamento: Dict, hoje: date) -> date:
+        """Dia útil em que o pagamento entra em remessa (não antes de hoje)."""
+        dia = max(to_date(pagamento.get('data_pagamento')) or hoje, hoje)
+        return self.calendario.next_business_day(dia)
+
+    @timed('agendar')
+    def schedule(self, grupos: Dict[Tuple[str, str], List[Dict]], hoje: date | None = None) -> ScheduleResult:
+        """
+        Grava no ledger os pagamentos (já validados) de cada grupo.
+
+        Args:
+            grupos: Saída de accounts.group_by_account
+            hoje: Data de referência (padrão: hoje)
+
+        Returns:
+            ScheduleResult com as quantidades por dia
+        """
+        hoje = hoje or date.today()
+        resultado = ScheduleResult()
+        agendados: List[Agendado] = []
+        for (conta_id, tipo), pagamentos in grupos.items():
+            if tipo not in TIPOS_AGENDAVEIS:
+                if pagamentos:
+                    resultado.ignorados[(conta_id, tipo)] = len(pagamentos)
+                continue
+            for pagamento in pagamentos:
+                dia = self.due_date(pagamento, hoje).isoformat()
+                agendados.append((str(pagamento.get('id_pagamento', '')), conta_id, tipo, dia,
+                                  json.dumps(pagamento, ensure_ascii=False, default=str)))
+
+        emitidos = self.ledger.emitted(a[0] for a in agendados)
+        if emitidos:
+            resultado.ja_emitidos = sorted(emitidos)
+            agendados = [a for a in agendados if a[0] not in emitidos]
+        for agendado in agendados:
+            resultado.por_dia[agendado[3]] = resultado.por_dia.get(agendado[3], 0) + 1
+        resultado.agendados = self.ledger.schedule(agendados)
+        METRICS.incr('pagamentos_agendados', resultado.agendados)
+        return resultado
+
+    def plan_day(self, dia: date, max_pagamentos: int | None = None
+                 ) -> List[Tuple[BankConfig, str, List[Dict], List[str]]]:
+        """
+        Remessas a emitir no dia.
+
+        Returns:
+            Lista de (conta, tipo, pagamentos, ids) por arquivo, sem sequencial
+        """
+        dia_iso = dia.isoformat()
+        arquivos = []
+        for (conta_id, tipo), linhas in groupby(self.ledger.due(dia_iso), key=lambda a: (a[1], a[2])):
+            linhas = list(linhas)
+            bank = self.accounts[conta_id]
+            limite = max_pagamentos or int(bank.arquivo.get('pagamentos_por_remessa') or MAX_PAGAMENTOS)
+            limite = min(limite, MAX_PAGAMENTOS)
+            for inicio in range(0, len(linhas), limite):
+                faixa = linhas[inicio:inicio + limite]
+                pagamentos = []
+                for _, _, _, _, texto in faixa:
+                    pagamento = json.loads(texto)
+                    # Data ajustada ao dia útil (e pendências de dias anteriores saem no dia)
+                    pagamento['data_pagamento'] = dia_iso
+                    pagamentos.append(pagamento)
+                arquivos.append((bank, tipo, pagamentos, [a[0] for a in faixa]))
+        return arquivos
+
+    @timed('emitir_agendados')
+    def run_day(self, dia: date | None = None, file_date: datetime | None = None,
+                max_workers: int | None = None, max_pagamentos: int | None = None) -> List[AccountFile]:
+        """
+        Emite as remessas do dia e marca os pagamentos emitidos no ledger.
+
+        Em dia não útil nada é emitido (os pagamentos já foram agendados para
+        o dia útil seguinte).
+
+        Args:
+            dia: Dia das remessas (padrão: hoje)
+            file_date: Data de geração (padrão: agora)
+            max_workers: Processos da gravação (1 = sem paralelismo)
+            max_pagamentos: Pagamentos por arquivo (padrão: `arquivo.pagamentos_por_remessa`)
+
+        Returns:
+            AccountFile de cada remessa; `path` é None e `erros` é preenchido quando
+            a estrutura gerada é inválida (os pagamentos continuam pendentes)
+        """
+        from .remessa_file import write_remessas
+
+        dia = dia or date.today()
+        if not self.calendario.is_business_day(dia):
+            return []
+        file_date = file_date or datetime.now()
+        multi_contas = len(self.accounts) > 1
+
+        planejados = self.plan_day(dia, max_pagamentos)
+        por_conta: Dict[str, int] = {}
+        for bank, *_ in planejados:
+            por_conta[bank.conta_id] = por_conta.get(bank.conta_id, 0) + 1
+        proximo_seq = {conta_id: self.ledger.reserve_sequences(
+                           conta_id, quantidade, int(self.accounts[conta_id].arquivo.get('sequencial_inicial', 1)))
+                       for conta_id, quantidade in por_conta.items()}
+
+        tarefas = []
+        for bank, tipo, pagamentos, _ in planejados:
+            seq = proximo_seq[bank.conta_id]
+            proximo_seq[bank.conta_id] = seq + 1
+            path = self.output_dir / remessa_filename(tipo, bank.conta_id, file_date, seq, multi_contas)
+            tarefas.append((path, bank, tipo, pagamentos, seq))
+        relatorios = write_remessas(tarefas, file_date, max_workers=max_workers) if tarefas else []
+
+        gerados = []
+        for (path, bank, tipo, pagamentos, seq), (_, _, _, ids), relatorio in zip(tarefas, planejados, relatorios):
+            if relatorio.valido:
+                self.ledger.mark_emitted(ids, path.name)
+            valor = sum(float(p.get('valor', 0)) for p in pagamentos)
+            gerados.append(AccountFile(bank.conta_id, tipo, seq, len(pagamentos), valor,
+                                       path=path if relatorio.valido else None, erros=list(relatorio.erros)))
+        return gerados
+
+    def close(self) -> None:
+        self.ledger.close()
+
+    def __enter__(self) -> 'Scheduler':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
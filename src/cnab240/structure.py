@@ -0,0 +1,299 @@
+"""
+Validação estrutural completa de remessas CNAB 240 em uma passada vetorizada.
+
+O arquivo é lido como bytes e visto como uma matriz (n, 242) de uint8 (240
+posições + CRLF), sem decodificar linha a linha. Cada verificação é uma
+operação NumPy sobre colunas da matriz:
+
+- terminador CRLF em todas as linhas;
+- sequência dos tipos de registro: 0 (1 3* 5)+ 9;
+- código do banco igual ao do header de arquivo em todos os registros;
+- números de lote (0000 no header de arquivo, 1..k nos lotes, 9999 no trailer);
+- sequencial dos detalhes contíguo (1..m) em cada lote;
+- pares de segmentos por pagamento (J -> J-52 no PIX, A -> B no TED/DOC);
+- campos numéricos (conforme `layouts`) só com dígitos;
+- trailers de lote (quantidade de registros e soma dos valores, recalculada
+  dos detalhes em centavos inteiros) e trailer de arquivo (lotes e registros).
+
+Erros da mesma verificação são agregados em uma mensagem ("Linhas 3, 7, 9
+(e mais 120): ..."), para que um arquivo muito corrompido não gere milhões de
+mensagens. Se a sequência dos tipos de registro estiver errada, as verificações
+que dependem dos limites dos lotes não são feitas.
+"""
+import os
+import re
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Iterable, List
+
+import numpy as np
+
+from . import layouts
+from .layouts import Campo, Layout
+from .metrics import timed
+
+TAMANHO_LINHA = layouts.TAMANHO_REGISTRO + 2  # + CRLF
+# Linhas listadas por mensagem de erro
+MAX_LINHAS = 5
+# Linhas por bloco na verificação dos campos numéricos (limita a memória temporária)
+BLOCO = 1 << 16
+
+_ESTRUTURA_RE = re.compile(rb'0(?:13*5)+9')
+_ZERO = ord('0')
+
+# Transições válidas entre tipos de registro consecutivos
+_TRANSICOES = np.zeros((256, 256), dtype=bool)
+for _anterior, _atual in ('01', '13', '15', '33', '35', '51', '59'):
+    _TRANSICOES[ord(_anterior), ord(_atual)] = True
+
+# Layouts por código (índice em _NUMERICOS); DESCONHECIDO não tem campos verificados
+(HEADER_ARQUIVO, HEADER_LOTE_PIX, HEADER_LOTE_TED, SEGMENTO_J, SEGMENTO_J52, SEGMENTO_A, SEGMENTO_B,
+ TRAILER_LOTE_PIX, TRAILER_LOTE_TED, TRAILER_ARQUIVO, DESCONHECIDO) = range(11)
+_LAYOUTS: List[Layout] = [
+    layouts.HEADER_ARQUIVO, layouts.HEADER_LOTE_PIX, layouts.HEADER_LOTE_TED, layouts.SEGMENTO_J,
+    layouts.SEGMENTO_J52, layouts.SEGMENTO_A, layouts.SEGMENTO_B, layouts.TRAILER_LOTE_PIX,
+    layouts.TRAILER_LOTE_TED, layouts.TRAILER_ARQUIVO,
+]
+
+
+def _mascara_numerica(layout: Layout) -> np.ndarray:
+    mascara = np.zeros(TAMANHO_LINHA, dtype=bool)
+    for campo in layout.numericos:
+        mascara[campo.fatia] = True
+    return mascara
+
+
+# (layout, coluna) -> a coluna deve conter só dígitos
+_NUMERICOS = np.vstack([_mascara_numerica(l) for l in _LAYOUTS] + [np.zeros(TAMANHO_LINHA, dtype=bool)])
+# Coluna -> campo, por layout (para nomear o campo inválido nas mensagens)
+_CAMPOS = [{i: c for c in l.campos for i in range(c.inicio - 1, c.fim)} for l in _LAYOUTS]
+
+_POTENCIAS = 10 ** np.arange(18, -1, -1, dtype=np.int64)
+
+_BANCO = layouts.HEADER_ARQUIVO.campo('banco').fatia
+_SEQUENCIAL = layouts.SEGMENTO_J.campo('sequencial')
+_QTD_REGISTROS_LOTE = layouts.TRAILER_LOTE_PIX.campo('quantidade_registros')
+_VALOR_TOTAL_LOTE = layouts.TRAILER_LOTE_PIX.campo('valor_total')
+_QTD_LOTES = layouts.TRAILER_ARQUIVO.campo('quantidade_lotes')
+_QTD_REGISTROS_ARQUIVO = layouts.TRAILER_ARQUIVO.campo('quantidade_registros')
+
+
+@dataclass
+class StructureReport:
+    """Resultado da validação estrutural de uma remessa."""
+    registros: int = 0
+    lotes: int = 0
+    pagamentos: int = 0
+    valor_centavos: int = 0
+    erros: List[str] = field(default_factory=list)
+
+    @property
+    def valido(self) -> bool:
+        return not self.erros
+
+    @property
+    def valor(self) -> Decimal:
+        """Soma dos valores dos detalhes, em reais."""
+        return Decimal(self.valor_centavos) / 100
+
+
+def _linhas(indices: np.ndarray) -> str:
+    """'Linha 3' / 'Linhas 3, 7 (e mais N)' a partir de índices 0-based."""
+    indices = np.asarray(indices)
+    texto = ', '.join(str(i + 1) for i in indices[:MAX_LINHAS])
+    if len(indices) > MAX_LINHAS:
+        texto += f' (e mais {len(indices) - MAX_LINHAS})'
+    return ('Linha ' if len(indices) == 1 else 'Linhas ') + texto
+
+
+def _inteiros(matriz: np.ndarray, linhas: np.ndarray, campo: Campo) -> np.ndarray:
+    """Valor de um campo numérico (até 18 dígitos) nas linhas dadas."""
+    digitos = matriz[linhas, campo.fatia].astype(np.int64) - _ZERO
+    return digitos @ _POTENCIAS[-campo.tamanho:]
+
+
+def _campo_nao_numerico(linha: np.ndarray, layout: int) -> str:
+    """'<layout>: <campo>' do primeiro campo numérico com caractere não numérico na linha."""
+    coluna = int(np.argmax(_NUMERICOS[layout] & ((linha - np.uint8(_ZERO)) > 9)))
+    return f"{_LAYOUTS[layout].nome}: {_CAMPOS[layout][coluna].nome}"
+
+
+def load(origem: 'str | os.PathLike | bytes | bytearray | memoryview') -> np.ndarray:
+    """
+    Carrega uma remessa como vetor de bytes.
+
+    Args:
+        origem: Caminho do arquivo ou conteúdo já em memória
+
+    Returns:
+        Vetor uint8 (sem cópia quando a origem já é um buffer)
+    """
+    if isinstance(origem, (bytes, bytearray, memoryview)):
+        return np.frombuffer(origem, dtype=np.uint8)
+    return np.fromfile(origem, dtype=np.uint8)
+
+
+def encode_lines(lines: Iterable[str]) -> bytes:
+    """Conteúdo do arquivo (ASCII, CRLF após cada linha, inclusive a última)."""
+    return b''.join(line.encode('ascii', errors='strict') + b'\r\n' for line in lines)
+
+
+@timed('validate_structure')
+def validate_buffer(buffer: 'bytes | bytearray | memoryview | np.ndarray') -> StructureReport:
+    """
+    Valida a estrutura de uma remessa CNAB 240 em memória.
+
+    Args:
+        buffer: Conteúdo do arquivo (bytes ou vetor uint8)
+
+    Returns:
+        StructureReport com contadores e erros (vazio se a remessa é válida)
+    """
+    dados = buffer if isinstance(buffer, np.ndarray) else load(buffer)
+    relatorio = StructureReport()
+    erros = relatorio.erros
+
+    if not len(dados):
+        erros.append("Arquivo vazio")
+        return relatorio
+    if len(dados) % TAMANHO_LINHA:
+        erros.append(f"Tamanho do arquivo ({len(dados)} bytes) não é múltiplo de {TAMANHO_LINHA} "
+                     f"(240 posições + CRLF por registro)")
+        return relatorio
+
+    matriz = dados.reshape(-1, TAMANHO_LINHA)
+    n = relatorio.registros = len(matriz)
+
+    sem_crlf = np.flatnonzero((matriz[:, 240] != 13) | (matriz[:, 241] != 10))
+    if len(sem_crlf):
+        erros.append(f"{_linhas(sem_crlf)}: registro sem terminador CRLF")
+
+    banco = matriz[:, _BANCO]
+    banco_diferente = np.flatnonzero((banco != banco[0]).any(axis=1))
+    if len(banco_diferente):
+        erros.append(f"{_linhas(banco_diferente)}: código do banco diferente do header de arquivo "
+                     f"({bytes(banco[0]).decode('ascii', errors='replace')})")
+
+    # Sequência dos tipos de registro (posição 8)
+    tipos = matriz[:, 7]
+    if not _ESTRUTURA_RE.fullmatch(tipos.tobytes()):
+        fora = np.flatnonzero(~_TRANSICOES[tipos[:-1], tipos[1:]]) + 1
+        if tipos[0] != ord('0'):
+            fora = np.concatenate(([0], fora))
+        if tipos[-1] != ord('9'):
+            fora = np.concatenate((fora, [n - 1]))
+        erros.append(f"{_linhas(fora)}: tipo de registro fora da sequência "
+                     f"Header Arquivo (0), Lotes (1, 3..., 5), Trailer Arquivo (9)")
+        return relatorio
+
+    headers = np.flatnonzero(tipos == ord('1'))
+    trailers = np.flatnonzero(tipos == ord('5'))
+    detalhes = np.flatnonzero(tipos == ord('3'))
+    relatorio.lotes = len(headers)
+
+    # Lote de cada registro (1..k; 0 no header e no trailer de arquivo)
+    lote = np.cumsum(tipos == ord('1'))
+    lote[-1] = 9999
+    lote_errado = np.flatnonzero(_inteiros(matriz, slice(None), layouts.HEADER_ARQUIVO.campo('lote')) != lote)
+    if len(lote_errado):
+        erros.append(f"{_linhas(lote_errado)}: número do lote incorreto")
+
+    # Posição de cada detalhe dentro do lote (0-based) e tipo de remessa de cada lote
+    lote_detalhe = lote[detalhes] - 1
+    posicao = np.arange(len(detalhes)) - np.searchsorted(detalhes, headers)[lote_detalhe]
+    por_lote = np.bincount(lote_detalhe, minlength=len(headers))
+
+    seq_errado = np.flatnonzero(_inteiros(matriz, detalhes, _SEQUENCIAL) != posicao + 1)
+    if len(seq_errado):
+        erros.append(f"{_linhas(detalhes[seq_errado])}: número sequencial do registro no lote "
+                     f"fora da ordem (esperado contíguo a partir de 1)")
+
+    segmento = matriz[detalhes, 13]
+    j52 = (segmento == ord('J')) & (matriz[detalhes, 17] == ord('5')) & (matriz[detalhes, 18] == ord('2'))
+    codigo = np.full(len(detalhes), DESCONHECIDO, dtype=np.int8)
+    codigo[segmento == ord('J')] = SEGMENTO_J
+    codigo[j52] = SEGMENTO_J52
+    codigo[segmento == ord('A')] = SEGMENTO_A
+    codigo[segmento == ord('B')] = SEGMENTO_B
+
+    # Lote PIX se o primeiro detalhe é J, TED/DOC se é A (lote vazio: PIX)
+    primeiro = np.minimum(np.searchsorted(detalhes, headers), max(len(detalhes) - 1, 0))
+    ted = np.zeros(len(headers), dtype=bool)
+    if len(detalhes):
+        ted = (por_lote > 0) & (codigo[primeiro] == SEGMENTO_A)
+
+    esperado = np.where(ted[lote_detalhe], SEGMENTO_A, SEGMENTO_J) + posicao % 2
+    fora_do_par = np.flatnonzero(codigo != esperado)
+    if len(fora_do_par):
+        nomes = np.array([l.nome for l in _LAYOUTS])[esperado[fora_do_par[:MAX_LINHAS]]]
+        erros.append(f"{_linhas(detalhes[fora_do_par])}: segmento fora do par por pagamento "
+                     f"(esperado {', '.join(dict.fromkeys(nomes))})")
+    impares = np.flatnonzero(por_lote % 2)
+    if len(impares):
+        erros.append(f"{_linhas(trailers[impares])}: lote com pagamento sem o segundo segmento "
+                     f"(J-52 ou B)")
+
+    # Campos numéricos: cada linha usa a máscara de colunas do seu layout
+    layout = np.full(n, DESCONHECIDO, dtype=np.int8)
+    layout[0] = HEADER_ARQUIVO
+    layout[-1] = TRAILER_ARQUIVO
+    layout[headers] = np.where(ted, HEADER_LOTE_TED, HEADER_LOTE_PIX)
+    layout[trailers] = np.where(ted, TRAILER_LOTE_TED, TRAILER_LOTE_PIX)
+    layout[detalhes] = codigo
+    nao_numericos = []
+    for inicio in range(0, n, BLOCO):
+        bloco = matriz[inicio:inicio + BLOCO]
+        invalido = _NUMERICOS[layout[inicio:inicio + BLOCO]] & ((bloco - np.uint8(_ZERO)) > 9)
+        nao_numericos.extend(np.flatnonzero(invalido.any(axis=1)) + inicio)
+    if nao_numericos:
+        campos = dict.fromkeys(_campo_nao_numerico(matriz[i], layout[i]) for i in nao_numericos[:MAX_LINHAS])
+        erros.append(f"{_linhas(np.array(nao_numericos))}: campo numérico com caracteres não numéricos "
+                     f"({'; '.join(campos)})")
+
+    # Trailers de lote: recalculados dos detalhes (valor do segmento J ou A, em centavos)
+    principais = np.flatnonzero((codigo == SEGMENTO_J) | (codigo == SEGMENTO_A))
+    valores = np.zeros(len(principais), dtype=np.int64)
+    for codigo_segmento in (SEGMENTO_J, SEGMENTO_A):
+        selecao = codigo[principais] == codigo_segmento
+        if selecao.any():
+            valores[selecao] = _inteiros(matriz, detalhes[principais[selecao]],
+                                         _LAYOUTS[codigo_segmento].campo('valor'))
+    acumulado = np.concatenate(([0], np.cumsum(valores)))
+    limites = np.searchsorted(lote_detalhe[principais], np.arange(len(headers) + 1))
+    soma_lote = acumulado[limites[1:]] - acumulado[limites[:-1]]
+    relatorio.pagamentos = len(principais)
+    relatorio.valor_centavos = int(acumulado[-1])
+
+    registros_lote = _inteiros(matriz, trailers, _QTD_REGISTROS_LOTE)
+    for i in np.flatnonzero(registros_lote != por_lote + 2)[:MAX_LINHAS]:
+        erros.append(f"Linha {trailers[i] + 1}: Trailer Lote {i + 1}: quantidade de registros incorreta "
+                     f"(esperado {por_lote[i] + 2}, encontrado {registros_lote[i]})")
+    valor_lote = _inteiros(matriz, trailers, _VALOR_TOTAL_LOTE)
+    for i in np.flatnonzero(valor_lote != soma_lote)[:MAX_LINHAS]:
+        erros.append(f"Linha {trailers[i] + 1}: Trailer Lote {i + 1}: valor total incorreto "
+                     f"(soma dos detalhes {Decimal(int(soma_lote[i])) / 100:.2f}, "
+                     f"encontrado {Decimal(int(valor_lote[i])) / 100:.2f})")
+
+    ultimo = np.array([n - 1])
+    lotes_arquivo = int(_inteiros(matriz, ultimo, _QTD_LOTES)[0])
+    if lotes_arquivo != len(headers):
+        erros.append(f"Trailer Arquivo: quantidade de lotes incorreta "
+                     f"(esperado {len(headers)}, encontrado {lotes_arquivo})")
+    registros_arquivo = int(_inteiros(matriz, ultimo, _QTD_REGISTROS_ARQUIVO)[0])
+    if registros_arquivo != n:
+        erros.append(f"Trailer Arquivo: quantidade de registros incorreta "
+                     f"(esperado {n}, encontrado {registros_arquivo})")
+    return relatorio
+
+
+def validate_file(path: str | os.PathLike) -> StructureReport:
+    """
+    Valida a estrutura de uma remessa CNAB 240 gravada em disco.
+
+    Args:
+        path: Caminho do arquivo
+
+    Returns:
+        StructureReport (ver validate_buffer)
+    """
+    return validate_buffer(load(path))
@@ -0,0 +1,267 @@
+"""
+Gerador de lotes sintéticos de pagamentos para testes de carga e benchmarks.
+
+Os dados são determinísticos pela semente e gerados de forma vetorizada (NumPy),
+de modo que 1 milhão de linhas sai em poucos segundos:
+
+- CPF/CNPJ com dígitos verificadores corretos
+- chaves PIX de todos os tipos de PIX_KEY_TYPE_MAP (CPF, CNPJ, e-mail,
+  telefone e aleatória/UUID)
+- banco/agência/conta para TED/DOC
+- nomes acentuados (exercitam `sanitize_text`)
+
+Uso:
+    python -m src.cnab240.synth -n 100000 --seed 42 -o pagamentos.xlsx
+    python -m src.cnab240.synth -n 1000000 --mix PIX=0.7,TED=0.2,DOC=0.1 -o lote.parquet
+"""
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from .bradesco_pix import PIX_KEY_TYPE_MAP
+
+MIX_PADRAO = {'PIX': 0.6, 'TED': 0.3, 'DOC': 0.1}
+PROPORCAO_PJ = 0.2
+
+PRIMEIROS_NOMES = np.array([
+    'José', 'João', 'Maria', 'Ana', 'Antônio', 'Francisco', 'Conceição', 'Luís',
+    'Márcia', 'Sebastião', 'Inês', 'Mônica', 'Cecília', 'Fábio', 'Vânia', 'Raí',
+])
+SOBRENOMES = np.array([
+    'da Silva', 'Araújo', 'Gonçalves', 'Brandão', 'Simões', 'Magalhães', 'Conceição',
+    'Falcão', 'Patrício', 'Damião', 'Guimarães', 'Estêvão', 'Assunção', 'Lírio',
+])
+RAZOES = np.array([
+    'Comércio São Jorge', 'Panificadora Pão Dourado', 'Distribuidora Ipê', 'Açougue Boi Bom',
+    'Farmácia Saúde Já', 'Construções Três Irmãos', 'Gráfica União', 'Tecelagem Paraíba',
+])
+SUFIXOS_PJ = np.array([' Ltda', ' ME', ' S.A.', ' EIRELI'])
+EMAILS_USUARIO = np.array(['contato', 'financeiro', 'joao', 'maria', 'ana', 'pagamentos', 'jose', 'vendas'])
+EMAILS_DOMINIO = np.array(['@exemplo.com.br', '@empresa.com', '@mail.com.br', '@teste.org'])
+BANCOS = np.array(['001', '033', '041', '077', '104', '237', '260', '336', '341', '748', '756'])
+DDDS = np.array(['11', '21', '31', '41', '48', '51', '61', '71', '81', '85', '91'])
+
+COLUNAS = [
+    'tipo_pagamento', 'id_pagamento', 'data_pagamento', 'valor', 'nome_favorecido', 'tipo_pessoa',
+    'cpf_cnpj', 'tipo_chave_pix', 'chave_pix', 'banco_favorecido', 'agencia_favorecido',
+    'digito_agencia_favorecido', 'conta_favorecido', 'digito_conta_favorecido', 'tipo_conta',
+    'finalidade_ted', 'descricao_pagamento', 'aviso_favorecido',
+]
+# Colunas gravadas como texto no .xlsx (zeros à esquerda de CPF/CNPJ, banco, agência...)
+COLUNAS_TEXTO = [
+    'cpf_cnpj', 'chave_pix', 'banco_favorecido', 'agencia_favorecido', 'digito_agencia_favorecido',
+    'conta_favorecido', 'digito_conta_favorecido', 'tipo_conta', 'finalidade_ted',
+]
+
+_PESOS_CPF_1 = np.arange(10, 1, -1)
+_PESOS_CPF_2 = np.arange(11, 1, -1)
+_PESOS_CNPJ_1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+_PESOS_CNPJ_2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+_HEX = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+
+
+def _digits_to_str(digits: np.ndarray) -> np.ndarray:
+    """Converte uma matriz (n, k) de dígitos 0-9 em um vetor de strings de k caracteres."""
+    ascii_ = np.ascontiguousarray(digits.astype(np.uint8) + ord('0'))
+    return ascii_.view(f'S{digits.shape[1]}').ravel().astype(str)
+
+
+def _check_digit(digits: np.ndarray, pesos: np.ndarray) -> np.ndarray:
+    resto = (digits * pesos).sum(axis=1) % 11
+    return np.where(resto < 2, 0, 11 - resto)
+
+
+def _random_digits(rng: np.random.Generator, n: int, k: int) -> np.ndarray:
+    digits = rng.integers(0, 10, size=(n, k))
+    # Evita sequências repetidas (111.111.111-11 é inválido)
+    iguais = (digits == digits[:, :1]).all(axis=1)
+    digits[iguais, 0] = (digits[iguais, 0] + 1) % 10
+    return digits
+
+
+def make_cpfs(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Gera `n` CPFs válidos (11 dígitos, sem máscara)."""
+    digits = _random_digits(rng, n, 9)
+    digits = np.column_stack([digits, _check_digit(digits, _PESOS_CPF_1)])
+    digits = np.column_stack([digits, _check_digit(digits, _PESOS_CPF_2)])
+    return _digits_to_str(digits)
+
+
+def make_cnpjs(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Gera `n` CNPJs válidos de matriz (14 dígitos, sem máscara)."""
+    raiz = _random_digits(rng, n, 8)
+    digits = np.column_stack([raiz, np.tile([0, 0, 0, 1], (n, 1))])
+    digits = np.column_stack([digits, _check_digit(digits, _PESOS_CNPJ_1)])
+    digits = np.column_stack([digits, _check_digit(digits, _PESOS_CNPJ_2)])
+    return _digits_to_str(digits)
+
+
+def make_uuids(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Gera `n` chaves aleatórias no formato UUID v4 (minúsculas)."""
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    nibbles = np.empty((n, 32), dtype=np.uint8)
+    nibbles[:, 0::2] = raw >> 4
+    nibbles[:, 1::2] = raw & 0x0F
+    chars = _HEX[nibbles]
+    hifen = np.full((n, 1), ord('-'), dtype=np.uint8)
+    chars = np.hstack([chars[:, :8], hifen, chars[:, 8:12], hifen, chars[:, 12:16], hifen,
+                       chars[:, 16:20], hifen, chars[:, 20:]])
+    return np.ascontiguousarray(chars).view('S36').ravel().astype(str)
+
+
+def _number_strings(values: np.ndarray, width: int) -> np.ndarray:
+    """Inteiros não negativos como strings com zeros à esquerda."""
+    potencias = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    return _digits_to_str((values.astype(np.int64)[:, None] // potencias) % 10)
+
+
+def generate_frame(n: int, seed: int = 0, mix: Dict[str, float] | None = None,
+                   data_pagamento: str | None = None) -> pd.DataFrame:
+    """
+    Gera um lote sintético de pagamentos válidos.
+
+    Args:
+        n: Quantidade de pagamentos
+        seed: Semente (mesma semente e parâmetros geram o mesmo lote)
+        mix: Proporção por tipo de pagamento (padrão MIX_PADRAO)
+        data_pagamento: Data 'YYYY-MM-DD' dos pagamentos (padrão: hoje)
+
+    Returns:
+        DataFrame com as colunas da planilha de entrada (COLUNAS)
+    """
+    mix = mix or MIX_PADRAO
+    tipos_mix = np.array(list(mix))
+    pesos = np.array(list(mix.values()), dtype=float)
+    if n < 0 or (pesos < 0).any() or pesos.sum() <= 0:
+        raise ValueError("n deve ser >= 0 e o mix deve ter proporções positivas")
+    if data_pagamento is None:
+        data_pagamento = datetime.now().strftime('%Y-%m-%d')
+
+    rng = np.random.default_rng(seed)
+    tipo = tipos_mix[rng.choice(len(tipos_mix), size=n, p=pesos / pesos.sum())]
+    pj = rng.random(n) < PROPORCAO_PJ
+
+    # Favorecido: nomes acentuados (PF) ou razão social (PJ), até 30 caracteres
+    nome_pf = np.char.add(np.char.add(PRIMEIROS_NOMES[rng.integers(0, len(PRIMEIROS_NOMES), n)], ' '),
+                          SOBRENOMES[rng.integers(0, len(SOBRENOMES), n)])
+    nome_pj = np.char.add(RAZOES[rng.integers(0, len(RAZOES), n)], SUFIXOS_PJ[rng.integers(0, len(SUFIXOS_PJ), n)])
+    nome = np.char.rstrip(np.where(pj, nome_pj, nome_pf).astype('<U30'))
+
+    cpfs = make_cpfs(rng, n)
+    cnpjs = make_cnpjs(rng, n)
+    documento = np.where(pj, cnpjs, cpfs)
+
+    # Chave PIX (todos os tipos de PIX_KEY_TYPE_MAP)
+    tipos_chave = np.array(list(PIX_KEY_TYPE_MAP))
+    tipo_chave = tipos_chave[rng.integers(0, len(tipos_chave), n)]
+    tipo_chave = np.where(pj & (tipo_chave == 'CPF'), 'CNPJ', tipo_chave)
+    tipo_chave = np.where(~pj & (tipo_chave == 'CNPJ'), 'CPF', tipo_chave)
+    email = np.char.add(np.char.add(EMAILS_USUARIO[rng.integers(0, len(EMAILS_USUARIO), n)],
+                                    _number_strings(rng.integers(0, 10_000, n), 4)),
+                        EMAILS_DOMINIO[rng.integers(0, len(EMAILS_DOMINIO), n)])
+    telefone = np.char.add(np.char.add(DDDS[rng.integers(0, len(DDDS), n)], '9'),
+                           _number_strings(rng.integers(0, 100_000_000, n), 8))
+    chave = np.select(
+        [tipo_chave == 'CPF', tipo_chave == 'CNPJ', tipo_chave == 'EMAIL', tipo_chave == 'TELEFONE'],
+        [documento, documento, email, telefone],
+        default=make_uuids(rng, n),
+    )
+
+    eh_pix = tipo == 'PIX'
+    vazio = np.full(n, '', dtype='<U1')
+    contas = rng.integers(1, 10 ** 8, n)
+    df = pd.DataFrame({
+        'tipo_pagamento': tipo,
+        'id_pagamento': np.char.add('S', _number_strings(np.arange(1, n + 1), 9)),
+        'data_pagamento': data_pagamento,
+        'valor': rng.integers(1, 5_000_000, n) / 100,
+        'nome_favorecido': nome,
+        'tipo_pessoa': np.where(pj, 'J', 'F'),
+        'cpf_cnpj': documento,
+        'tipo_chave_pix': np.where(eh_pix, tipo_chave, vazio),
+        'chave_pix': np.where(eh_pix, chave, vazio),
+        'banco_favorecido': np.where(eh_pix, vazio, BANCOS[rng.integers(0, len(BANCOS), n)]),
+        'agencia_favorecido': np.where(eh_pix, vazio, _number_strings(rng.integers(1, 10_000, n), 5)),
+        'digito_agencia_favorecido': np.where(eh_pix, vazio, _number_strings(rng.integers(0, 10, n), 1)),
+        'conta_favorecido': np.where(eh_pix, vazio, np.char.lstrip(_number_strings(contas, 8), '0')),
+        'digito_conta_favorecido': np.where(eh_pix, vazio, _number_strings(rng.integers(0, 10, n), 1)),
+        'tipo_conta': np.where(eh_pix, vazio, '1'),
+        'finalidade_ted': np.where(eh_pix, vazio, '00001'),
+        'descricao_pagamento': 'Pagamento sintético',
+        'aviso_favorecido': 0,
+    }, columns=COLUNAS)
+    return df
+
+
+def to_pagamentos(df: pd.DataFrame) -> List[Dict]:
+    """Converte o lote em lista de pagamentos (formato de main.read_excel)."""
+    return df.to_dict('records')
+
+
+def write_output(df: pd.DataFrame, path: str | Path) -> Path:
+    """
+    Grava o lote conforme a extensão: .xlsx, .csv ou .parquet.
+
+    No .xlsx as colunas de COLUNAS_TEXTO saem como células de texto (formato `@`),
+    e `main.read_excel` lê a planilha de volta com os zeros à esquerda.
+
+    Raises:
+        ValueError: Para extensões não suportadas
+        ImportError: Se o pyarrow não estiver instalado (Parquet)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    sufixo = path.suffix.lower()
+    if sufixo == '.xlsx':
+        with pd.ExcelWriter(path, engine='openpyxl') as writer:
+            df.to_excel(writer, index=False)
+            planilha = next(iter(writer.sheets.values()))
+            for coluna in COLUNAS_TEXTO:
+                if coluna in df.columns:
+                    indice = df.columns.get_loc(coluna) + 1
+                    for (celula,) in planilha.iter_rows(min_row=2, min_col=indice, max_col=indice):
+                        celula.number_format = '@'
+    elif sufixo == '.csv':
+        df.to_csv(path, index=False)
+    elif sufixo == '.parquet':
+        try:
+            df.to_parquet(path, index=False)
+        except ImportError:
+            raise ImportError("Gravação em Parquet requer o pyarrow. Instale com: pip install pyarrow")
+    else:
+        raise ValueError(f"Extensão não suportada: {path.suffix} (use .xlsx, .csv ou .parquet)")
+    return path
+
+
+def _parse_mix(valor: str) -> Dict[str, float]:
+    mix = {}
+    for parte in valor.split(','):
+        tipo, _, peso = parte.partition('=')
+        mix[tipo.strip().upper()] = float(peso)
+    return mix
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Gera lote sintético de pagamentos')
+    parser.add_argument('-n', type=int, required=True, help='Quantidade de pagamentos')
+    parser.add_argument('-o', '--output', required=True, help='Arquivo de saída (.xlsx, .csv ou .parquet)')
+    parser.add_argument('--seed', type=int, default=0, help='Semente (padrão: 0)')
+    parser.add_argument('--mix', type=_parse_mix, default=None, help='Proporções, ex.: PIX=0.6,TED=0.3,DOC=0.1')
+    parser.add_argument('--data', default=None, help='Data de pagamento YYYY-MM-DD (padrão: hoje)')
+    args = parser.parse_args(argv)
+
+    df = generate_frame(args.n, seed=args.seed, mix=args.mix, data_pagamento=args.data)
+    destino = write_output(df, args.output)
+    print(f"{len(df)} pagamento(s) gravado(s) em {destino}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
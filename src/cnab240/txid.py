@@ -0,0 +1,140 @@
+"""
+Geração de TXIDs para o Segmento J-52 (posições 211-240).
+
+O TxidProvider entrega TXIDs já no formato do campo (30 caracteres
+hexadecimais maiúsculos, sem formatação adicional):
+
+- aleatórios: tirados de um bloco único de `os.urandom` (um bloco por
+  `bloco` pagamentos, em vez de um uuid4 por pagamento);
+- determinísticos (`arquivo.txid_deterministico`): hash com chave
+  (`arquivo.txid_chave`, obrigatória) do conteúdo do pagamento, de modo que
+  gerar de novo a mesma planilha reproduz o arquivo.
+
+Com `arquivo.ledger` configurado, os TXIDs aleatórios já emitidos são
+descartados ao preencher o bloco e os TXIDs usados são registrados no ledger.
+Um TXID determinístico repete o de uma remessa anterior quando o mesmo
+pagamento é gerado de novo: `emitted_payments` aponta esses pagamentos antes
+da geração, para que o reenvio seja conferido.
+"""
+import hashlib
+import os
+from typing import Dict, Iterable, List, Tuple
+
+from .config import BankConfig
+from .ledger import Ledger
+
+TAMANHO_TXID = 30
+# TXIDs aleatórios sorteados por chamada a os.urandom (e emissões por gravação no ledger)
+BLOCO = 1024
+
+
+def _key(chave: str) -> bytes:
+    """Chave do BLAKE2b (até 64 bytes) derivada do texto configurado."""
+    return hashlib.blake2b(chave.encode('utf-8'), digest_size=32).digest() if chave else b''
+
+
+def deterministic_txid(pagamento: Dict, chave: bytes = b'') -> str:
+    """
+    TXID derivado do conteúdo do pagamento (30 caracteres hexadecimais maiúsculos).
+
+    Args:
+        pagamento: Pagamento (o próprio campo `txid` é ignorado)
+        chave: Chave do hash (ver _key)
+    """
+    payload = repr(sorted((k, v) for k, v in pagamento.items() if k != 'txid'))
+    return hashlib.blake2b(payload.encode('utf-8', 'surrogatepass'), key=chave,
+                           digest_size=TAMANHO_TXID // 2).hexdigest().upper()
+
+
+class TxidProvider:
+    """
+    Fonte de TXIDs de um gerador PIX.
+
+    Raises:
+        ValueError: TXID determinístico sem chave (o TXID seria um hash sem
+            segredo dos dados do favorecido)
+    """
+
+    def __init__(self, deterministic: bool = False, chave: str = '', ledger: 'Ledger | str | None' = None,
+                 bloco: int = BLOCO) -> None:
+        if deterministic and not chave:
+            raise ValueError("TXID determinístico exige arquivo.txid_chave")
+        self.deterministic = deterministic
+        self.chave = _key(chave)
+        self.bloco = bloco
+        self._ledger = ledger
+        self._pool: List[str] = []
+        self._emitidos: List[Tuple[str, str]] = []
+
+    @classmethod
+    def from_config(cls, bank: BankConfig) -> 'TxidProvider':
+        """Provider conforme `arquivo.txid_deterministico`, `arquivo.txid_chave` e `arquivo.ledger`."""
+        arquivo = bank.arquivo
+        return cls(bool(arquivo.get('txid_deterministico')), str(arquivo.get('txid_chave') or ''),
+                   arquivo.get('ledger') or None)
+
+    @property
+    def ledger(self) -> Ledger | None:
+        """Ledger aberto na primeira utilização (cada processo abre a sua conexão)."""
+        if self._ledger is not None and not isinstance(self._ledger, Ledger):
+            self._ledger = Ledger(self._ledger)
+        return self._ledger
+
+    def _refill(self) -> None:
+        dados = os.urandom(TAMANHO_TXID // 2 * self.bloco).hex().upper()
+        novos = [dados[i:i + TAMANHO_TXID] for i in range(0, len(dados), TAMANHO_TXID)]
+        if self.ledger is not None:
+            emitidos = self.ledger.existing_txids(novos)
+            novos = [txid for txid in novos if txid not in emitidos]
+        novos.reverse()
+        self._pool = novos
+
+    def txid(self, pagamento: Dict) -> str:
+        """TXID para um pagamento sem `txid` informado (30 caracteres)."""
+        if self.deterministic:
+            txid = deterministic_txid(pagamento, self.chave)
+        else:
+            if not self._pool:
+                self._refill()
+            txid = self._pool.pop()
+        if self._ledger is not None:
+            self._emitidos.append((txid, str(pagamento.get('id_pagamento', ''))))
+            if len(self._emitidos) >= self.bloco:
+                self.flush()
+        return txid
+
+    def flush(self) -> None:
+        """Registra no ledger os TXIDs emitidos desde a última gravação."""
+        if self._emitidos and self.ledger is not None:
+            self.ledger.record_txids(self._emitidos)
+            self._emitidos = []
+
+    def close(self) -> None:
+        """Registra as emissões pendentes e fecha o ledger (reaberto se o provider for usado de novo)."""
+        self.flush()
+        if isinstance(self._ledger, Ledger):
+            self._ledger.close()
+            self._ledger = self._ledger.path
+
+
+def emitted_payments(bank: BankConfig, pagamentos: Iterable[Dict]) -> List[str]:
+    """
+    Pagamentos PIX cujo TXID determinístico já consta do ledger (emitidos em remessa anterior).
+
+    Args:
+        bank: Conta de débito
+        pagamentos: Pagamentos PIX a gerar
+
+    Returns:
+        Ids dos pagamentos (vazio se a conta não usa TXID determinístico ou não tem ledger)
+    """
+    provider = TxidProvider.from_config(bank)
+    if not provider.deterministic or provider.ledger is None:
+        return []
+    try:
+        por_txid = {deterministic_txid(p, provider.chave): str(p.get('id_pagamento', ''))
+                    for p in pagamentos if not p.get('txid')}
+        emitidos = provider.ledger.existing_txids(por_txid)
+    finally:
+        provider.close()
+    return [id_pagamento for txid, id_pagamento in por_txid.items() if txid in emitidos]
@@ -6,6 +6,14 @@ from datetime import datetime
 from decimal import Decimal
 from typing import List, Dict, Tuple
 
+import numpy as np
+import pandas as pd
+
+from . import errors, pix_keys
+from .metrics import METRICS, timed
+from .pix_keys import TIPOS_CHAVE_PIX  # noqa: F401 (reexportado)
+from .rules import REGRAS, REGRAS_PADRAO, TIPOS_PAGAMENTO, RuleSet
+
 
 def validate_cpf(cpf: str) -> bool:
     """
@@ -121,14 +129,8 @@ def validate_phone(phone: str) -> bool:
     if not phone:
         return False
     
-    # Remove caracteres não numéricos exceto +
-    phone_clean = phone.replace('+', '').replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
-    
-    # Deve ter 10 ou 11 dígitos (com DDD)
-    if len(phone_clean) < 10 or len(phone_clean) > 11:
-        return False
-    
-    return phone_clean.isdigit()
+    # Mesmo formato da chave PIX TELEFONE: DDD + 8/9 dígitos, com +55 opcional
+    return pix_keys.is_phone(phone)
 
 
 def validate_pix_key(key: str, key_type: str) -> bool:
@@ -142,28 +144,10 @@ def validate_pix_key(key: str, key_type: str) -> bool:
     Returns:
         True se válido, False caso contrário
     """
-    if not key:
-        return False
-    
-    key_type = key_type.upper()
-    
-    if key_type == 'CPF':
-        return validate_cpf(key)
-    elif key_type == 'CNPJ':
-        return validate_cnpj(key)
-    elif key_type == 'EMAIL':
-        return validate_email(key)
-    elif key_type == 'TELEFONE':
-        return validate_phone(key)
-    elif key_type == 'ALEATORIA':
-        # Chave aleatória (UUID) deve ter formato válido
-        uuid_pattern = r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
-        return bool(re.match(uuid_pattern, key.lower()))
-    else:
-        return False
+    return pix_keys.validate_key(key, key_type)
 
 
-def validate_date(date_str: str | datetime, min_date: datetime | None = None) -> Tuple[bool, str]:
+def check_date(date_str: str | datetime, min_date: datetime | None = None) -> Tuple[str, Tuple] | None:
     """
     Valida data.
     
@@ -172,10 +156,10 @@ def validate_date(date_str: str | datetime, min_date: datetime | None = None) ->
         min_date: Data mínima permitida (padrão: hoje)
     
     Returns:
-        Tupla (é_válida, mensagem_erro)
+        None se válida, ou (código do erro, parâmetros da mensagem)
     """
     if not date_str:
-        return False, "Data não informada"
+        return errors.DATA_AUSENTE, ()
     
     if min_date is None:
         min_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
@@ -209,189 +193,241 @@ def validate_date(date_str: str | datetime, min_date: datetime | None = None) ->
                 continue
         
         if date_obj is None:
-            return False, f"Data inválida: {date_str}"
+            return errors.DATA_INVALIDA, (date_str,)
     
     if date_obj < min_date:
-        return False, f"Data deve ser >= {min_date.strftime('%d/%m/%Y')}"
+        return errors.DATA_ANTERIOR, (min_date.strftime('%d/%m/%Y'),)
     
-    return True, ""
+    return None
 
 
-def validate_pagamento(pagamento: Dict, index: int = 0) -> Tuple[bool, List[str]]:
+def validate_date(date_str: str | datetime, min_date: datetime | None = None) -> Tuple[bool, str]:
     """
-    Valida um pagamento.
+    Valida data.
     
     Args:
-        pagamento: Dicionário com dados do pagamento
-        index: Índice do pagamento (para mensagens de erro)
+        date_str: Data como string ou datetime
+        min_date: Data mínima permitida (padrão: hoje)
     
     Returns:
-        Tupla (é_válido, lista_de_erros)
+        Tupla (é_válida, mensagem_erro)
     """
-    errors = []
-    id_pagamento = pagamento.get('id_pagamento', f'#{index}')
+    erro = check_date(date_str, min_date)
+    if erro is None:
+        return True, ""
+    codigo, params = erro
+    # Mensagem sem o prefixo "<id>: "
+    return False, errors.MENSAGENS[codigo].format(*params, id='', campo='')[2:]
+
+
+def check_pagamento(pagamento: Dict, index: int = 0, regras: RuleSet | None = None) -> List[errors.ErrorRecord]:
+    """
+    Valida um pagamento, emitindo registros de erro estruturados.
     
-    # Valida id_pagamento
-    if not pagamento.get('id_pagamento'):
-        errors.append(f"{id_pagamento}: id_pagamento não informado")
+    As regras são declaradas em `rules` (REGRAS_PADRAO). Com as regras padrão o
+    pagamento é validado em Python puro (_check_padrao, mesmas regras e mesma
+    ordem dos erros), sem o custo de montar um lote; outros conjuntos de regras
+    passam por RuleSet.check. Para validar muitos pagamentos use `check_pagamentos`.
+    Nenhuma mensagem é formatada aqui: use errors.render (ou .mensagem) na exibição.
     
-    # Valida data_pagamento
-    data_ok, data_msg = validate_date(pagamento.get('data_pagamento'))
-    if not data_ok:
-        errors.append(f"{id_pagamento}: {data_msg}")
+    Args:
+        pagamento: Dicionário com dados do pagamento
+        index: Índice do pagamento na entrada
+        regras: Conjunto de regras (padrão: rules.REGRAS)
     
-    # Valida valor
-    try:
-        valor = float(pagamento.get('valor', 0))
-        if valor <= 0:
-            errors.append(f"{id_pagamento}: valor deve ser > 0")
-        # Verifica se tem no máximo 2 decimais
-        if round(valor, 2) != valor:
-            errors.append(f"{id_pagamento}: valor deve ter no máximo 2 decimais")
-    except (ValueError, TypeError):
-        errors.append(f"{id_pagamento}: valor inválido")
-    
-    # Valida nome_favorecido
-    nome = pagamento.get('nome_favorecido', '')
-    if not nome or len(nome.strip()) == 0:
-        errors.append(f"{id_pagamento}: nome_favorecido não informado")
+    Returns:
+        Lista de ErrorRecord (vazia se válido)
+    """
+    regras = regras or REGRAS
+    if regras.regras == REGRAS_PADRAO:
+        return _check_padrao(pagamento, index)
+    return regras.check([pagamento], [index])[0]
+
+
+def _texto(pagamento: Dict, campo: str, padrao: str = '') -> str:
+    """Equivale a `str(pagamento.get(campo, padrao))` (rules.Batch.texto)."""
+    return str(pagamento[campo]) if campo in pagamento else padrao
+
+
+def _numero(pagamento: Dict, campo: str) -> float:
+    """`float(pagamento.get(campo, 0))`; NaN onde a conversão falha (rules.Batch.numero)."""
+    return float(pd.to_numeric(pagamento.get(campo, 0), errors='coerce'))
+
+
+def _data(pagamento: Dict, campo: str):
+    """Valor da data para check_date; NaN/NA/NaT como float('nan') (rules.Batch.data)."""
+    valor = pagamento.get(campo)
+    return float('nan') if valor is not None and pd.api.types.is_scalar(valor) and pd.isna(valor) else valor
+
+
+def _documento_ok(digitos: str, tamanho: int) -> bool:
+    return (validate_cpf if tamanho == 11 else validate_cnpj)(digitos)
+
+
+def _check_padrao(pagamento: Dict, index: int) -> List[errors.ErrorRecord]:
+    """REGRAS_PADRAO para um pagamento, sem Series (mesma ordem de rules.REGRAS_PADRAO)."""
+    found = []
+    get = pagamento.get
+    id_pagamento = get('id_pagamento', f'#{index}')
+
+    def add(codigo, campo, *params):
+        found.append(errors.record(codigo, campo, index, id_pagamento, *params))
+
+    if not get('id_pagamento'):
+        add(errors.ID_AUSENTE, 'id_pagamento')
+
+    erro_data = check_date(_data(pagamento, 'data_pagamento'))
+    if erro_data is not None:
+        add(erro_data[0], 'data_pagamento', *erro_data[1])
+
+    valor = _numero(pagamento, 'valor')
+    valor_nan = 'valor' in pagamento and pagamento['valor'] is not None and pd.api.types.is_scalar(
+        pagamento['valor']) and pd.isna(pagamento['valor'])
+    if valor <= 0:
+        add(errors.VALOR_NAO_POSITIVO, 'valor')
+    if np.round(valor, 2) != valor and (valor == valor or valor_nan):
+        add(errors.VALOR_DECIMAIS, 'valor')
+    if valor != valor and not valor_nan:
+        add(errors.VALOR_INVALIDO, 'valor')
+
+    nome = _texto(pagamento, 'nome_favorecido')
+    if not get('nome_favorecido') or not nome.strip():
+        add(errors.CAMPO_AUSENTE, 'nome_favorecido')
     elif len(nome) > 30:
-        errors.append(f"{id_pagamento}: nome_favorecido excede 30 caracteres (será truncado)")
-    
-    # Valida tipo_pessoa
-    tipo_pessoa = pagamento.get('tipo_pessoa', '').upper()
-    if tipo_pessoa not in ['F', 'J']:
-        errors.append(f"{id_pagamento}: tipo_pessoa deve ser F ou J")
-    
-    # Valida cpf_cnpj
-    cpf_cnpj = str(pagamento.get('cpf_cnpj', '')).strip()
-    cpf_cnpj_clean = re.sub(r'[^0-9]', '', cpf_cnpj)
-    
-    if tipo_pessoa == 'F':
-        if len(cpf_cnpj_clean) != 11:
-            errors.append(f"{id_pagamento}: CPF deve ter 11 dígitos")
-        elif not validate_cpf(cpf_cnpj):
-            errors.append(f"{id_pagamento}: CPF inválido")
-    elif tipo_pessoa == 'J':
-        if len(cpf_cnpj_clean) != 14:
-            errors.append(f"{id_pagamento}: CNPJ deve ter 14 dígitos")
-        elif not validate_cnpj(cpf_cnpj):
-            errors.append(f"{id_pagamento}: CNPJ inválido")
-    
-    # Valida conforme tipo de pagamento
-    tipo_pagamento = pagamento.get('tipo_pagamento', 'PIX').upper().strip()
-    
-    if tipo_pagamento == 'PIX':
-        # Validações específicas PIX
-        tipo_chave_pix = pagamento.get('tipo_chave_pix', '').upper()
-        tipos_validos = ['CPF', 'CNPJ', 'EMAIL', 'TELEFONE', 'ALEATORIA']
-        if not tipo_chave_pix or tipo_chave_pix not in tipos_validos:
-            errors.append(f"{id_pagamento}: tipo_chave_pix deve ser um de: {', '.join(tipos_validos)}")
-        
-        chave_pix = pagamento.get('chave_pix', '')
-        if not chave_pix:
-            errors.append(f"{id_pagamento}: chave_pix não informada (obrigatório para PIX)")
-        elif len(chave_pix) > 100:  # 79 caracteres no Segmento J-52
-            errors.append(f"{id_pagamento}: chave_pix excede 100 caracteres (será truncado)")
-        elif not validate_pix_key(chave_pix, tipo_chave_pix):
-            errors.append(f"{id_pagamento}: chave_pix inválida para o tipo {tipo_chave_pix}")
-    
-    elif tipo_pagamento in ['TED', 'DOC']:
-        # Validações específicas TED/DOC
-        if not pagamento.get('banco_favorecido'):
-            errors.append(f"{id_pagamento}: banco_favorecido não informado (obrigatório para {tipo_pagamento})")
-        elif len(str(pagamento.get('banco_favorecido', '')).strip()) != 3:
-            errors.append(f"{id_pagamento}: banco_favorecido deve ter 3 dígitos")
-        
-        if not pagamento.get('agencia_favorecido'):
-            errors.append(f"{id_pagamento}: agencia_favorecido não informado (obrigatório para {tipo_pagamento})")
-        
-        if not pagamento.get('conta_favorecido'):
-            errors.append(f"{id_pagamento}: conta_favorecido não informado (obrigatório para {tipo_pagamento})")
-        
-        if not pagamento.get('digito_conta_favorecido'):
-            errors.append(f"{id_pagamento}: digito_conta_favorecido não informado (obrigatório para {tipo_pagamento})")
-        
-        tipo_conta = str(pagamento.get('tipo_conta', '')).strip()
+        add(errors.TAMANHO_EXCEDIDO, 'nome_favorecido', 30)
+
+    tipo_pessoa = _texto(pagamento, 'tipo_pessoa').upper()
+    if tipo_pessoa not in ('F', 'J'):
+        add(errors.OPCAO_INVALIDA, 'tipo_pessoa', 'F ou J')
+
+    digitos = re.sub(r'[^0-9]', '', _texto(pagamento, 'cpf_cnpj').strip())
+    for pessoa, documento, tamanho in (('F', 'CPF', 11), ('J', 'CNPJ', 14)):
+        if tipo_pessoa == pessoa and len(digitos) != tamanho:
+            add(errors.QUANTIDADE_DIGITOS, 'cpf_cnpj', documento, tamanho)
+        elif tipo_pessoa == pessoa and not _documento_ok(digitos, tamanho):
+            add(errors.DOCUMENTO_INVALIDO, 'cpf_cnpj', documento)
+
+    tipo = _texto(pagamento, 'tipo_pagamento', 'PIX').upper().strip()
+    if tipo == 'PIX':
+        chave = _texto(pagamento, 'chave_pix')
+        tipo_chave = _texto(pagamento, 'tipo_chave_pix').upper() or pix_keys.infer_type(chave)
+        if tipo_chave not in TIPOS_CHAVE_PIX:
+            add(errors.OPCAO_INVALIDA, 'tipo_chave_pix', f"um de: {', '.join(TIPOS_CHAVE_PIX)}")
+        if not get('chave_pix'):
+            add(errors.CHAVE_PIX_AUSENTE, 'chave_pix')
+        elif len(chave) > 100:  # 79 caracteres no Segmento J-52
+            add(errors.TAMANHO_EXCEDIDO, 'chave_pix', 100)
+        elif not pix_keys.validate_key(chave, tipo_chave):
+            add(errors.CHAVE_PIX_INVALIDA, 'chave_pix', tipo_chave)
+
+    elif tipo in ('TED', 'DOC'):
+        if not get('banco_favorecido'):
+            add(errors.CAMPO_OBRIGATORIO, 'banco_favorecido', tipo)
+        elif len(_texto(pagamento, 'banco_favorecido').strip()) != 3:
+            add(errors.QUANTIDADE_DIGITOS, 'banco_favorecido', 'banco_favorecido', 3)
+        for campo in ('agencia_favorecido', 'conta_favorecido', 'digito_conta_favorecido'):
+            if not get(campo):
+                add(errors.CAMPO_OBRIGATORIO, campo, tipo)
+        tipo_conta = _texto(pagamento, 'tipo_conta').strip()
         if not tipo_conta:
-            errors.append(f"{id_pagamento}: tipo_conta não informado (obrigatório para {tipo_pagamento})")
-        elif tipo_conta not in ['1', '2', '3']:
-            errors.append(f"{id_pagamento}: tipo_conta deve ser 1 (Corrente), 2 (Poupança) ou 3 (Salário)")
-    
-    elif tipo_pagamento == 'BOLETO':
-        # Validações específicas BOLETO
-        if not pagamento.get('nosso_numero'):
-            errors.append(f"{id_pagamento}: nosso_numero não informado (obrigatório para BOLETO)")
-        
-        if not pagamento.get('data_vencimento'):
-            errors.append(f"{id_pagamento}: data_vencimento não informado (obrigatório para BOLETO)")
-        else:
-            data_venc_ok, data_venc_msg = validate_date(pagamento.get('data_vencimento'))
-            if not data_venc_ok:
-                errors.append(f"{id_pagamento}: {data_venc_msg}")
-        
-        if not pagamento.get('sacado_nome'):
-            errors.append(f"{id_pagamento}: sacado_nome não informado (obrigatório para BOLETO)")
-        
-        sacado_tipo = pagamento.get('sacado_tipo_pessoa', '').upper()
-        if sacado_tipo not in ['F', 'J']:
-            errors.append(f"{id_pagamento}: sacado_tipo_pessoa deve ser F ou J (obrigatório para BOLETO)")
-        
-        if not pagamento.get('sacado_cpf_cnpj'):
-            errors.append(f"{id_pagamento}: sacado_cpf_cnpj não informado (obrigatório para BOLETO)")
+            add(errors.CAMPO_OBRIGATORIO, 'tipo_conta', tipo)
+        elif tipo_conta not in ('1', '2', '3'):
+            add(errors.OPCAO_INVALIDA, 'tipo_conta', '1 (Corrente), 2 (Poupança) ou 3 (Salário)')
+
+    elif tipo == 'BOLETO':
+        if not get('nosso_numero'):
+            add(errors.CAMPO_OBRIGATORIO, 'nosso_numero', 'BOLETO')
+        if not get('data_vencimento'):
+            add(errors.CAMPO_OBRIGATORIO, 'data_vencimento', 'BOLETO')
+        erro_venc = check_date(_data(pagamento, 'data_vencimento'))
+        if erro_venc is not None and erro_venc[0] in (errors.DATA_INVALIDA, errors.DATA_ANTERIOR):
+            add(erro_venc[0], 'data_vencimento', *erro_venc[1])
+        if not get('sacado_nome'):
+            add(errors.CAMPO_OBRIGATORIO, 'sacado_nome', 'BOLETO')
+        sacado_tipo = _texto(pagamento, 'sacado_tipo_pessoa').upper()
+        if sacado_tipo not in ('F', 'J'):
+            add(errors.OPCAO_INVALIDA, 'sacado_tipo_pessoa', 'F ou J (obrigatório para BOLETO)')
+        if not get('sacado_cpf_cnpj'):
+            add(errors.CAMPO_OBRIGATORIO, 'sacado_cpf_cnpj', 'BOLETO')
         else:
-            sacado_cpf_cnpj = str(pagamento.get('sacado_cpf_cnpj', '')).strip()
-            sacado_cpf_cnpj_clean = re.sub(r'[^0-9]', '', sacado_cpf_cnpj)
-            if sacado_tipo == 'F' and len(sacado_cpf_cnpj_clean) != 11:
-                errors.append(f"{id_pagamento}: sacado_cpf_cnpj (CPF) deve ter 11 dígitos")
-            elif sacado_tipo == 'J' and len(sacado_cpf_cnpj_clean) != 14:
-                errors.append(f"{id_pagamento}: sacado_cpf_cnpj (CNPJ) deve ter 14 dígitos")
-    
-    else:
-        errors.append(f"{id_pagamento}: tipo_pagamento inválido: {tipo_pagamento} (deve ser PIX, TED, DOC ou BOLETO)")
+            sacado_digitos = re.sub(r'[^0-9]', '', _texto(pagamento, 'sacado_cpf_cnpj').strip())
+            for pessoa, documento, tamanho in (('F', 'CPF', 11), ('J', 'CNPJ', 14)):
+                if sacado_tipo == pessoa and len(sacado_digitos) != tamanho:
+                    add(errors.QUANTIDADE_DIGITOS, 'sacado_cpf_cnpj', f'sacado_cpf_cnpj ({documento})', tamanho)
+
+    elif tipo not in TIPOS_PAGAMENTO:
+        add(errors.TIPO_PAGAMENTO_INVALIDO, 'tipo_pagamento', tipo)
+
+    if 'aviso_favorecido' in pagamento and pagamento['aviso_favorecido'] not in (0, 1):
+        add(errors.OPCAO_INVALIDA, 'aviso_favorecido', '0 ou 1')
+
+    return found
+
+
+def validate_pagamento(pagamento: Dict, index: int = 0) -> Tuple[bool, List[str]]:
+    """
+    Valida um pagamento.
     
-    # Valida aviso_favorecido (comum a todos)
-    aviso = pagamento.get('aviso_favorecido', 0)
-    if aviso not in [0, 1]:
-        errors.append(f"{id_pagamento}: aviso_favorecido deve ser 0 ou 1")
+    Args:
+        pagamento: Dicionário com dados do pagamento
+        index: Índice do pagamento (para mensagens de erro)
     
-    return len(errors) == 0, errors
+    Returns:
+        Tupla (é_válido, lista_de_erros)
+    """
+    found = check_pagamento(pagamento, index)
+    return len(found) == 0, [errors.render(e) for e in found]
 
 
-def validate_pagamentos(pagamentos: List[Dict]) -> Tuple[bool, Dict[str, List[str]]]:
+@timed('validate_pagamentos')
+def check_pagamentos(pagamentos: List[Dict], regras: RuleSet | None = None) -> Dict[str, List[errors.ErrorRecord]]:
     """
     Valida lista de pagamentos.
     
     Args:
         pagamentos: Lista de dicionários com dados dos pagamentos
+        regras: Conjunto de regras (padrão: rules.REGRAS)
     
     Returns:
-        Tupla (todos_válidos, dicionário_erros_por_id)
+        Dicionário id_pagamento -> erros estruturados (só pagamentos com erro)
     """
-    all_valid = True
     errors_by_id = {}
     ids_seen = set()
+    found_by_index = (regras or REGRAS).check(pagamentos)
     
     for index, pagamento in enumerate(pagamentos):
         id_pagamento = str(pagamento.get('id_pagamento', f'#{index}'))
         
         # Verifica duplicação de id_pagamento
         if id_pagamento in ids_seen:
-            all_valid = False
-            if id_pagamento not in errors_by_id:
-                errors_by_id[id_pagamento] = []
-            errors_by_id[id_pagamento].append(f"id_pagamento duplicado: {id_pagamento}")
+            errors_by_id.setdefault(id_pagamento, []).append(
+                errors.record(errors.ID_DUPLICADO, 'id_pagamento', index, id_pagamento))
         ids_seen.add(id_pagamento)
         
-        # Valida pagamento
-        is_valid, errors = validate_pagamento(pagamento, index)
-        if not is_valid:
-            all_valid = False
-            errors_by_id[id_pagamento] = errors
+        found = found_by_index[index]
+        if found:
+            errors_by_id[id_pagamento] = found
+    
+    METRICS.incr('pagamentos_validados', len(pagamentos))
+    METRICS.incr('pagamentos_invalidos', len(errors_by_id))
+    return errors_by_id
+
+
+def validate_pagamentos(pagamentos: List[Dict]) -> Tuple[bool, Dict[str, List[str]]]:
+    """
+    Valida lista de pagamentos.
     
-    return all_valid, errors_by_id
+    Args:
+        pagamentos: Lista de dicionários com dados dos pagamentos
+    
+    Returns:
+        Tupla (todos_válidos, dicionário_erros_por_id)
+    """
+    errors_by_id = check_pagamentos(pagamentos)
+    return not errors_by_id, {id_pag: [errors.render(e) for e in found] for id_pag, found in errors_by_id.items()}
 
 
+@timed('validate_cnab_file')
 def validate_cnab_file(lines: List[str]) -> Tuple[bool, List[str]]:
     """
     Valida arquivo CNAB 240 gerado.
@@ -436,6 +472,7 @@ def validate_cnab_file(lines: List[str]) -> Tuple[bool, List[str]]:
     return len(errors) == 0, errors
 
 
+@timed('validate_trailers')
 def validate_trailers(lines: List[str], expected_pagamentos: int, expected_total: float) -> Tuple[bool, List[str]]:
     """
     Valida trailers do arquivo CNAB.
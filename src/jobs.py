@@ -0,0 +1,344 @@
+"""
+Geração de arquivos CNAB em segundo plano.
+
+A página Gerar CNAB envia a geração para um JobManager e apenas acompanha o
+progresso (pagamentos renderizados), podendo cancelar o job. As remessas (em um
+OutputStore) e o estado do job são gravados em `output/jobs/<id>/`, de modo que
+recarregar o navegador (ou reiniciar a sessão) não perde o resultado. Cada
+remessa passa pela mesma validação estrutural do CLI (`structure.validate_buffer`)
+e só é publicada se estiver íntegra.
+
+Com um RunCache, uma geração determinística idêntica a outra já concluída não
+é executada de novo: o job nasce concluído com as remessas copiadas do cache.
+
+Jobs finalizados não ficam no disco para sempre: ao criar o gerenciador e a
+cada novo job são removidos os mais antigos que `max_age` e os que excedem
+`max_jobs` (ver JobManager.prune).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from .cnab240 import structure
+from .cnab240.accounts import plan_account_files, remessa_filename, render_account_file
+from .cnab240.config import BankConfig
+from .cnab240.pipeline import TIPOS_SUPORTADOS
+from .cnab240.profiling import Profiler
+from .cnab240.txid import emitted_payments
+from .output_store import OutputStore
+from .run_cache import RunCache, is_deterministic, run_key
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+CANCELADO = "cancelado"
+FALHOU = "falhou"
+FINALIZADOS = (CONCLUIDO, CANCELADO, FALHOU)
+
+ARQUIVO_ESTADO = "job.json"
+# Intervalo mínimo entre gravações do progresso em disco (segundos)
+INTERVALO_PERSISTENCIA = 0.5
+# Retenção dos jobs finalizados em disco
+MAX_JOBS = 50
+IDADE_MAXIMA = 7 * 24 * 3600  # segundos
+
+
+class JobCancelled(Exception):
+    """Lançada pelo callback de progresso quando o job foi cancelado."""
+
+
+@dataclass
+class GenerationJob:
+    """Estado de um job de geração (serializado em job.json)."""
+    id: str
+    total: int
+    status: str = PENDENTE
+    processados: int = 0
+    arquivos: List[Dict[str, Any]] = field(default_factory=list)
+    erros: List[str] = field(default_factory=list)
+    avisos: List[str] = field(default_factory=list)
+    criado_em: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+    finalizado_em: str | None = None
+    perfil: Dict[str, Any] | None = None  # engine, arquivos e top (quando perfilado)
+    do_cache: bool = False  # resultado reaproveitado de uma geração idêntica
+
+    @property
+    def finalizado(self) -> bool:
+        return self.status in FINALIZADOS
+
+    @property
+    def fracao(self) -> float:
+        """Progresso entre 0 e 1."""
+        return min(self.processados / self.total, 1.0) if self.total else 1.0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GenerationJob":
+        known = {k: data[k] for k in cls.__dataclass_fields__ if k in data}
+        return cls(**known)
+
+
+class JobManager:
+    """Executa jobs de geração em threads e persiste o estado em disco."""
+
+    def __init__(self, base_dir: str | os.PathLike, max_workers: int = 2, cache: RunCache | None = None,
+                 max_jobs: int | None = MAX_JOBS, max_age: float | None = IDADE_MAXIMA) -> None:
+        self.base_dir = Path(base_dir)
+        self.cache = cache
+        self.max_jobs = max_jobs
+        self.max_age = max_age
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cnab-job")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, GenerationJob] = {}
+        self._cancel: Dict[str, threading.Event] = {}
+        self.prune()
+
+    def job_dir(self, job_id: str) -> Path:
+        """Diretório com os arquivos e o estado do job."""
+        return self.base_dir / job_id
+
+    def store(self, job_id: str) -> OutputStore:
+        """Remessas gravadas pelo job."""
+        return OutputStore(self.job_dir(job_id))
+
+    def submit(self, grupos: Dict[Tuple[str, str], List[Dict]], accounts: Dict[str, BankConfig],
+               file_date: datetime, multi_contas: bool = False, profile: bool = False) -> str:
+        """
+        Enfileira a geração de um arquivo por (conta, tipo).
+
+        Se há cache e a geração é determinística (e não perfilada), um resultado
+        idêntico já gerado é devolvido sem executar o job.
+
+        Args:
+            grupos: Saída de group_by_account
+            accounts: Contas de débito
+            file_date: Data de geração
+            multi_contas: Inclui o id da conta no nome dos arquivos
+            profile: Perfila a geração e salva o perfil no diretório do job
+
+        Returns:
+            Id do job
+        """
+        job = GenerationJob(id=uuid.uuid4().hex[:12],
+                            total=sum(len(p) for (_, tipo), p in grupos.items() if tipo in TIPOS_SUPORTADOS))
+        for (conta_id, tipo), pagamentos in grupos.items():
+            if pagamentos and tipo not in TIPOS_SUPORTADOS:
+                job.avisos.append(f"Tipo de pagamento não suportado: {tipo}. "
+                                  f"Pulando {len(pagamentos)} pagamento(s).")
+            elif tipo == "PIX" and pagamentos:
+                repetidos = emitted_payments(accounts[conta_id], pagamentos)
+                if repetidos:
+                    job.avisos.append(f"{len(repetidos)} pagamento(s) PIX da conta {conta_id} já saíram em remessa "
+                                      f"anterior com o mesmo TXID ({', '.join(repetidos[:5])}): "
+                                      f"confira antes de enviar de novo.")
+
+        chave = None
+        if self.cache is not None and not profile and is_deterministic(accounts):
+            chave = run_key(grupos, accounts, file_date, multi_contas)
+
+        cancel_event = threading.Event()
+        with self._lock:
+            self._jobs[job.id] = job
+            self._cancel[job.id] = cancel_event
+        self.job_dir(job.id).mkdir(parents=True, exist_ok=True)
+
+        arquivos = self.cache.restore(chave, self.job_dir(job.id)) if chave else None
+        if arquivos is not None:
+            job.arquivos = arquivos
+            job.processados = job.total
+            job.do_cache = True
+            job.status = CONCLUIDO
+            job.finalizado_em = datetime.now().isoformat(timespec="seconds")
+            self._persist(job)
+            return job.id
+
+        # Sequenciais só são reservados (ledger) quando o job vai de fato gerar as remessas
+        tarefas = plan_account_files(grupos, accounts, TIPOS_SUPORTADOS)
+        self._persist(job)
+        self._executor.submit(self._run, job, tarefas, file_date, multi_contas, cancel_event, profile, chave)
+        self.prune()
+        return job.id
+
+    def get(self, job_id: str) -> GenerationJob | None:
+        """Retorna o estado do job (da memória ou, após reinício, do disco)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        estado = self.job_dir(job_id) / ARQUIVO_ESTADO
+        if not estado.exists():
+            return None
+        job = GenerationJob.from_dict(json.loads(estado.read_text(encoding="utf-8")))
+        if not job.finalizado:
+            # Processo que executava o job não existe mais
+            job.status = FALHOU
+            job.erros.append("Geração interrompida (servidor reiniciado).")
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Solicita o cancelamento; retorna False se o job não está em execução."""
+        with self._lock:
+            event = self._cancel.get(job_id)
+            job = self._jobs.get(job_id)
+        if event is None or job is None or job.finalizado:
+            return False
+        event.set()
+        return True
+
+    def discard(self, job_id: str) -> None:
+        """Remove o job finalizado e seus arquivos do disco."""
+        job = self.get(job_id)
+        if job is not None and not job.finalizado:
+            raise ValueError(f"Job {job_id} ainda em execução")
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self._cancel.pop(job_id, None)
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def prune(self) -> List[str]:
+        """
+        Remove do disco os jobs finalizados mais antigos que `max_age` e, além dos
+        `max_jobs` mais recentes, os demais. Jobs em execução são mantidos.
+
+        Returns:
+            Ids dos jobs removidos
+        """
+        with self._lock:
+            ativos = {job_id for job_id, job in self._jobs.items() if not job.finalizado}
+        entradas = []
+        for diretorio in self.base_dir.iterdir():
+            if not diretorio.is_dir() or diretorio.name in ativos:
+                continue
+            estado = diretorio / ARQUIVO_ESTADO
+            try:
+                # Última gravação do estado (ou o diretório, se o job.json não existe)
+                modificado = (estado if estado.exists() else diretorio).stat().st_mtime
+            except OSError:
+                continue
+            entradas.append((modificado, diretorio.name))
+        entradas.sort(reverse=True)
+        agora = time.time()
+        removidos = []
+        for posicao, (modificado, job_id) in enumerate(entradas):
+            excedente = self.max_jobs is not None and posicao >= self.max_jobs
+            antigo = self.max_age is not None and agora - modificado > self.max_age
+            if excedente or antigo:
+                try:
+                    self.discard(job_id)
+                except ValueError:
+                    continue  # começou a executar neste meio-tempo
+                removidos.append(job_id)
+        return removidos
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _persist(self, job: GenerationJob) -> None:
+        destino = self.job_dir(job.id) / ARQUIVO_ESTADO
+        tmp = destino.with_suffix(".tmp")
+        with self._lock:
+            data = asdict(job)
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, destino)
+
+    def _run(self, job: GenerationJob, tarefas, file_date: datetime, multi_contas: bool,
+             cancel_event: threading.Event, profile: bool = False, chave: str | None = None) -> None:
+        job.status = EXECUTANDO
+        self._persist(job)
+        store = self.store(job.id)
+        profiler = Profiler(self.job_dir(job.id), "perfil") if profile else None
+        if profiler is not None:
+            try:
+                profiler.__enter__()
+            except (ValueError, RuntimeError) as e:
+                # Outro perfilador ativo no processo (ex.: outro job perfilado)
+                job.avisos.append(f"Perfil não coletado: {e}")
+                profiler = None
+        status = FALHOU
+        concluidos = 0
+        ultima_gravacao = time.monotonic()
+
+        def progress(renderizados: int) -> None:
+            nonlocal ultima_gravacao
+            if cancel_event.is_set():
+                raise JobCancelled()
+            job.processados = concluidos + renderizados
+            agora = time.monotonic()
+            if agora - ultima_gravacao >= INTERVALO_PERSISTENCIA:
+                ultima_gravacao = agora
+                self._persist(job)
+
+        try:
+            for bank, tipo, pagamentos, seq in tarefas:
+                nome = remessa_filename(tipo, bank.conta_id, file_date, seq, multi_contas)
+                try:
+                    gerado = render_account_file(bank, tipo, pagamentos, file_date, seq, progress=progress)
+                except JobCancelled:
+                    raise
+                except Exception as e:
+                    job.erros.append(f"Erro ao gerar arquivo para {tipo} ({bank.conta_id}): {e}")
+                    concluidos += len(pagamentos)
+                    continue
+                concluidos += len(pagamentos)
+                job.processados = concluidos
+
+                # Mesma validação estrutural do CLI (tamanho, lotes, sequenciais, pares de
+                # segmentos e trailers): remessa inválida não é publicada
+                try:
+                    conteudo = structure.encode_lines(gerado.lines)
+                except UnicodeEncodeError as e:
+                    job.erros.append(f"{nome}: caractere fora do ASCII: {e}")
+                    continue
+                estrutura = structure.validate_buffer(conteudo)
+                if not estrutura.valido:
+                    job.erros.append(f"{nome}: estrutura CNAB inválida: {'; '.join(estrutura.erros)}")
+                    continue
+
+                entrada = store.write_bytes(
+                    nome, conteudo,
+                    tipo=tipo,
+                    conta=bank.conta_id,
+                    data=file_date.isoformat(),
+                    sequencial=seq,
+                    total_valor=gerado.valor,
+                    quantidade=gerado.pagamentos,
+                )
+                with self._lock:
+                    job.arquivos.append(entrada)
+                self._persist(job)
+            status = CONCLUIDO
+            if chave is not None and not job.erros:
+                try:
+                    self.cache.put(chave, self.job_dir(job.id))
+                except OSError as e:
+                    job.avisos.append(f"Resultado não guardado no cache: {e}")
+        except JobCancelled:
+            status = CANCELADO
+            store.discard_partial()
+        except Exception as e:
+            job.erros.append(str(e))
+        if profiler is not None:
+            profiler.__exit__(None, None, None)
+            job.perfil = {
+                "engine": profiler.result.engine,
+                "arquivos": [p.name for p in profiler.result.arquivos],
+                "top": profiler.result.top,
+            }
+        # Estado final gravado antes de o job aparecer finalizado em memória: quem o vê
+        # finalizado (get, prune) já encontra o job.json final no disco
+        finalizado_em = datetime.now().isoformat(timespec="seconds")
+        self._persist(replace(job, status=status, finalizado_em=finalizado_em))
+        with self._lock:
+            job.status = status
+            job.finalizado_em = finalizado_em
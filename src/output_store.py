@@ -0,0 +1,126 @@
+"""
+Armazenamento em disco das remessas geradas.
+
+Cada arquivo é gravado uma única vez (ASCII, CRLF) e registrado em um
+`manifest.json` com seus metadados. A interface guarda apenas esses metadados
+na sessão; downloads, prévias e o ZIP são lidos do disco sob demanda.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+MANIFESTO = "manifest.json"
+NOME_ZIP = "remessas.zip"
+# Registro CNAB 240 + CRLF: permite posicionar a leitura em qualquer linha
+TAMANHO_REGISTRO = 242
+
+
+class OutputStore:
+    """Diretório de remessas com manifesto de metadados."""
+
+    def __init__(self, directory: str | os.PathLike) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / MANIFESTO
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Metadados dos arquivos gravados, na ordem de gravação."""
+        if not self.manifest_path.exists():
+            return []
+        return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+
+    def path(self, nome: str) -> Path:
+        """Caminho do arquivo `nome` dentro do store."""
+        caminho = self.directory / nome
+        if caminho.parent != self.directory:
+            raise ValueError(f"Nome de arquivo inválido: {nome}")
+        return caminho
+
+    def write(self, nome: str, lines: Iterable[str], **meta: Any) -> Dict[str, Any]:
+        """
+        Grava a remessa e registra seus metadados no manifesto.
+
+        Args:
+            nome: Nome do arquivo
+            lines: Linhas de 240 caracteres (sem terminador)
+            **meta: Metadados adicionais (tipo, conta, sequencial...)
+
+        Returns:
+            Entrada do manifesto (inclui 'nome', 'linhas' e 'bytes')
+        """
+        # CNAB240 exige ASCII e CRLF ao final de cada linha, incluindo a última
+        return self.write_bytes(nome, b"".join(line.encode("ascii") + b"\r\n" for line in lines), **meta)
+
+    def write_bytes(self, nome: str, conteudo: bytes, **meta: Any) -> Dict[str, Any]:
+        """
+        Grava uma remessa já codificada (ex.: conferida por structure.validate_buffer).
+
+        O conteúdo é sincronizado em disco antes do rename para o nome final, de
+        modo que uma queda no meio da gravação não deixa remessa truncada publicada.
+
+        Args:
+            nome: Nome do arquivo
+            conteudo: Bytes do arquivo (linhas ASCII terminadas em CRLF)
+            **meta: Metadados adicionais (tipo, conta, sequencial...)
+
+        Returns:
+            Entrada do manifesto (inclui 'nome', 'linhas' e 'bytes')
+        """
+        destino = self.path(nome)
+        parcial = destino.with_name(destino.name + ".part")
+        with open(parcial, "wb") as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(parcial, destino)
+
+        entrada = {**meta, "nome": nome, "linhas": conteudo.count(b"\r\n"), "bytes": len(conteudo)}
+        with self._lock:
+            entradas = [e for e in self.entries() if e["nome"] != nome]
+            entradas.append(entrada)
+            tmp = self.manifest_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(entradas, ensure_ascii=False, indent=2), encoding="utf-8")
+            os.replace(tmp, self.manifest_path)
+            self.path(NOME_ZIP).unlink(missing_ok=True)
+        return entrada
+
+    def discard_partial(self) -> None:
+        """Remove arquivos parcialmente gravados (geração interrompida)."""
+        for parcial in self.directory.glob("*.part"):
+            parcial.unlink(missing_ok=True)
+
+    def read_lines(self, nome: str, start: int = 0, count: int = 10) -> List[str]:
+        """
+        Lê `count` registros a partir da linha `start` (0 = header de arquivo)
+        posicionando diretamente no registro, sem carregar o arquivo inteiro.
+        """
+        with open(self.path(nome), "rb") as f:
+            f.seek(start * TAMANHO_REGISTRO)
+            dados = f.read(count * TAMANHO_REGISTRO)
+        return [linha for linha in dados.decode("ascii").split("\r\n") if linha]
+
+    def open(self, nome: str):
+        """Abre a remessa para leitura binária (download em streaming)."""
+        return open(self.path(nome), "rb")
+
+    def zip_path(self) -> Path:
+        """Caminho do ZIP com todas as remessas, montado na primeira chamada."""
+        destino = self.path(NOME_ZIP)
+        with self._lock:
+            if not destino.exists():
+                parcial = destino.with_name(destino.name + ".part")
+                with zipfile.ZipFile(parcial, "w", zipfile.ZIP_DEFLATED) as zf:
+                    for entrada in self.entries():
+                        zf.write(self.path(entrada["nome"]), arcname=entrada["nome"])
+                os.replace(parcial, destino)
+        return destino
@@ -0,0 +1,101 @@
+"""
+Paginação e filtros no servidor para as grades da interface.
+
+As páginas montam um DataFrame com o resultado da validação (uma linha por
+mensagem, junto com tipo/favorecido/valor do pagamento), filtram com máscaras
+vetorizadas e enviam ao navegador apenas a fatia da página visível.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List
+
+import pandas as pd
+
+COLUNAS_REVISAO = ["id_pagamento", "tipo_pagamento", "nome_favorecido", "valor", "status", "mensagem"]
+TAMANHOS_PAGINA = (50, 100, 500)
+
+
+@dataclass
+class Page:
+    """Fatia de uma grade paginada."""
+    rows: pd.DataFrame
+    page: int       # 1-based, já limitada ao intervalo válido
+    pages: int
+    total: int      # linhas após o filtro
+    start: int      # índice (0-based) da primeira linha da página
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.rows)
+
+
+def review_frame(pagamentos: List[Dict[str, Any]], resultado: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Junta o resultado da validação aos dados de cada pagamento.
+
+    Args:
+        pagamentos: Lista de pagamentos
+        resultado: Saída de ValidationCache.resultado()
+
+    Returns:
+        DataFrame com as colunas de COLUNAS_REVISAO (erros, avisos e válidos)
+    """
+    por_id: Dict[str, Dict[str, Any]] = {}
+    for index, pagamento in enumerate(pagamentos):
+        por_id.setdefault(pagamento.get("id_pagamento") or f"#{index}", pagamento)
+
+    colunas: Dict[str, list] = {c: [] for c in COLUNAS_REVISAO}
+    for chave in ("erros", "avisos", "validos"):
+        for row in resultado.get(chave, []):
+            pagamento = por_id.get(row["id_pagamento"], {})
+            colunas["id_pagamento"].append(row["id_pagamento"])
+            colunas["tipo_pagamento"].append(pagamento.get("tipo_pagamento", ""))
+            colunas["nome_favorecido"].append(pagamento.get("nome_favorecido", ""))
+            colunas["valor"].append(pagamento.get("valor", 0.0))
+            colunas["status"].append(row["status"])
+            colunas["mensagem"].append(row["mensagem"])
+    df = pd.DataFrame(colunas, columns=COLUNAS_REVISAO)
+    for coluna in ("tipo_pagamento", "status"):
+        df[coluna] = df[coluna].astype("category")
+    return df
+
+
+def filter_frame(df: pd.DataFrame, status: Iterable[str] | None = None, tipos: Iterable[str] | None = None,
+                 favorecido: str = "") -> pd.DataFrame:
+    """
+    Filtra a grade por status, tipo de pagamento e trecho do nome do favorecido.
+
+    Filtros vazios/None não restringem o resultado.
+    """
+    mask = pd.Series(True, index=df.index)
+    if status:
+        mask &= df["status"].isin(list(status))
+    if tipos:
+        mask &= df["tipo_pagamento"].isin(list(tipos))
+    favorecido = (favorecido or "").strip()
+    if favorecido:
+        mask &= df["nome_favorecido"].astype(str).str.contains(favorecido, case=False, regex=False)
+    return df if mask.all() else df[mask]
+
+
+def paginate(df: pd.DataFrame, page: int, page_size: int) -> Page:
+    """
+    Seleciona uma página da grade.
+
+    Args:
+        df: Grade (já filtrada)
+        page: Página desejada (1-based; valores fora do intervalo são ajustados)
+        page_size: Linhas por página
+
+    Returns:
+        Page com a fatia visível
+    """
+    page_size = max(int(page_size), 1)
+    total = len(df)
+    pages = max(math.ceil(total / page_size), 1)
+    page = min(max(int(page), 1), pages)
+    start = (page - 1) * page_size
+    return Page(rows=df.iloc[start:start + page_size], page=page, pages=pages, total=total, start=start)
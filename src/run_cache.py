@@ -0,0 +1,182 @@
+"""
+Cache de execuções de geração, endereçado pelo conteúdo.
+
+A chave de uma execução é o SHA-256 de tudo que determina as remessas geradas:
+versão dos geradores (GENERATOR_VERSION), configuração de cada conta de débito,
+calendário de dias úteis e diretório de bancos já resolvidos (o conteúdo de
+`config/feriados.csv` e `data/bancos.csv`, não só o caminho), pagamentos já
+normalizados e agrupados, data de geração, data atual (as regras de data do TED
+dependem do dia) e o formato dos nomes de arquivo. Clicar "Gerar"
+de novo com a mesma planilha devolve os arquivos gravados na primeira vez.
+
+Só faz sentido com geração determinística (`arquivo.txid_deterministico` ligado e
+data de geração fixa): com TXIDs aleatórios, duas gerações nunca são iguais.
+
+Cada entrada é um diretório `<chave>/` com as remessas e o `manifest.json` do
+OutputStore. O uso de uma entrada atualiza o mtime do diretório; quando o total
+em disco passa de `max_bytes`, as entradas usadas há mais tempo são removidas.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from .cnab240 import GENERATOR_VERSION
+from .cnab240.bank_directory import BankDirectory
+from .cnab240.business_days import BusinessCalendar
+from .cnab240.config import BankConfig
+from .output_store import MANIFESTO, OutputStore
+
+# Tamanho máximo padrão do cache em disco (bytes)
+TAMANHO_MAXIMO = 512 * 1024 * 1024
+
+
+def is_deterministic(accounts: Dict[str, BankConfig]) -> bool:
+    """Indica se todas as contas geram TXIDs derivados do conteúdo."""
+    return all(bank.arquivo.get("txid_deterministico") for bank in accounts.values())
+
+
+def _bank_state(bank: BankConfig) -> Dict[str, Any]:
+    """Campos da conta que entram na remessa (sem o dicionário bruto da configuração)."""
+    estado = {f.name: getattr(bank, f.name) for f in dataclasses.fields(bank) if f.name != "raw"}
+    # Feriados e diretório de bancos alteram datas, câmara e validação sem mudar a configuração
+    estado["calendario"] = BusinessCalendar.from_config(bank.arquivo).digest()
+    estado["diretorio_bancos"] = BankDirectory.from_config(bank.arquivo).digest()
+    return estado
+
+
+def run_key(grupos: Dict[Tuple[str, str], List[Dict]], accounts: Dict[str, BankConfig],
+            file_date: datetime, multi_contas: bool = False) -> str:
+    """
+    Chave de cache de uma geração.
+
+    Args:
+        grupos: Saída de group_by_account (a ordem dos pagamentos faz parte da chave)
+        accounts: Contas de débito
+        file_date: Data de geração
+        multi_contas: Inclui o id da conta no nome dos arquivos
+
+    Returns:
+        SHA-256 em hexadecimal
+    """
+    digest = hashlib.sha256()
+
+    def feed(value: Any) -> None:
+        digest.update(json.dumps(value, sort_keys=True, default=str, ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\n")
+
+    feed({
+        "versao": GENERATOR_VERSION,
+        "data_geracao": file_date.isoformat(),
+        "hoje": date.today().isoformat(),
+        "multi_contas": multi_contas,
+        "contas": {conta_id: _bank_state(bank) for conta_id, bank in accounts.items()},
+    })
+    for (conta_id, tipo), pagamentos in grupos.items():
+        feed([conta_id, tipo, len(pagamentos)])
+        for pagamento in pagamentos:
+            feed(pagamento)
+    return digest.hexdigest()
+
+
+def _link_or_copy(origem: Path, destino: Path) -> None:
+    """Hard link (instantâneo, sem duplicar espaço) com cópia como alternativa."""
+    try:
+        os.link(origem, destino)
+    except OSError:
+        shutil.copy2(origem, destino)
+
+
+def _copy_store(origem: Path, destino: Path) -> List[Dict[str, Any]]:
+    """Copia as remessas e o manifesto de um OutputStore para `destino`."""
+    entradas = OutputStore(origem).entries()
+    destino.mkdir(parents=True, exist_ok=True)
+    for entrada in entradas:
+        _link_or_copy(origem / entrada["nome"], destino / entrada["nome"])
+    shutil.copy2(origem / MANIFESTO, destino / MANIFESTO)
+    return entradas
+
+
+class RunCache:
+    """Resultados de geração em disco, com remoção LRU limitada por tamanho."""
+
+    def __init__(self, base_dir: str | os.PathLike, max_bytes: int = TAMANHO_MAXIMO) -> None:
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _entry_dir(self, key: str) -> Path:
+        if not key.isalnum():
+            raise ValueError(f"Chave de cache inválida: {key}")
+        return self.base_dir / key
+
+    def restore(self, key: str, directory: str | os.PathLike) -> List[Dict[str, Any]] | None:
+        """
+        Copia o resultado em cache para `directory` (um OutputStore).
+
+        Returns:
+            Entradas do manifesto, ou None se a chave não está no cache
+        """
+        entrada = self._entry_dir(key)
+        with self._lock:
+            if not (entrada / MANIFESTO).exists():
+                return None
+            os.utime(entrada)
+            return _copy_store(entrada, Path(directory))
+
+    def put(self, key: str, directory: str | os.PathLike) -> bool:
+        """
+        Guarda as remessas do OutputStore em `directory` sob `key`.
+
+        Returns:
+            False se o resultado é maior que o próprio limite do cache (não guardado)
+        """
+        origem = Path(directory)
+        entradas = OutputStore(origem).entries()
+        if sum(e["bytes"] for e in entradas) > self.max_bytes:
+            return False
+        destino = self._entry_dir(key)
+        parcial = destino.with_name(f"{key}.part{os.getpid()}-{threading.get_ident()}")
+        try:
+            _copy_store(origem, parcial)
+            with self._lock:
+                if not destino.exists():
+                    os.replace(parcial, destino)
+                os.utime(destino)
+                self._evict()
+        finally:
+            shutil.rmtree(parcial, ignore_errors=True)
+        return True
+
+    def size(self) -> int:
+        """Total em bytes das entradas do cache."""
+        return sum(tamanho for _, _, tamanho in self._entries())
+
+    def _entries(self) -> List[Tuple[float, Path, int]]:
+        entradas = []
+        for entrada in self.base_dir.iterdir():
+            # Ignora entradas ainda sendo gravadas (`<chave>.part...`)
+            if not entrada.name.isalnum() or not (entrada / MANIFESTO).exists():
+                continue
+            tamanho = sum(arquivo.stat().st_size for arquivo in entrada.iterdir())
+            entradas.append((entrada.stat().st_mtime, entrada, tamanho))
+        return entradas
+
+    def _evict(self) -> None:
+        """Remove as entradas usadas há mais tempo até caber em `max_bytes`."""
+        entradas = sorted(self._entries(), key=lambda e: e[0])
+        total = sum(tamanho for _, _, tamanho in entradas)
+        for _, entrada, tamanho in entradas:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entrada, ignore_errors=True)
+            total -= tamanho
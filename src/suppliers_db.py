@@ -12,6 +12,7 @@ from typing import Dict, Any
 
 import pandas as pd
 
+from .cnab240.pix_keys import infer_type
 from .validators import normalize_doc, validate_cpf_cnpj, validate_pix, validate_ted_fields
 
 DEFAULT_SHEET = "Fornecedores"
@@ -159,6 +160,8 @@ def upsert_supplier(df: pd.DataFrame, record: Dict[str, Any]) -> pd.DataFrame:
     rec["tipo_pessoa"] = rec["tipo_pessoa"].upper() or "F"
     rec["tipo_pgto"] = rec["tipo_pgto"].upper()
     rec["cpf_cnpj"] = normalize_doc(rec["cpf_cnpj"])
+    if rec["tipo_pgto"] == "PIX" and not rec["tipo_chave_pix"]:
+        rec["tipo_chave_pix"] = infer_type(rec["chave_pix"])
 
     # validações
     ok, msg = validate_cpf_cnpj(rec["cpf_cnpj"])
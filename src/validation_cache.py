@@ -0,0 +1,179 @@
+"""
+Cache de validação incremental para a sessão do Streamlit.
+
+Cada pagamento é identificado por um hash do seu conteúdo; só pagamentos novos ou
+alterados são validados (juntos, em um único lote de `rules`), e os totais
+(erros/avisos/válidos) são atualizados pela diferença em vez de recalculados
+sobre a lista inteira.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Tuple
+
+from .cnab240 import errors, validate
+from .cnab240.rules import RuleSet
+
+# Mensagens que indicam ajuste automático (não bloqueiam a geração)
+_MARCADORES_AVISO = ("será truncado", "será ajustado")
+
+
+def classify_error(message: str) -> str:
+    """
+    Classifica uma mensagem já formatada como 'AVISO' ou 'ERRO'.
+
+    Os erros de validate.check_pagamento já trazem a severidade; esta função só
+    serve para mensagens de texto vindas de outras fontes.
+    """
+    lowered = message.lower()
+    return "AVISO" if any(m in lowered for m in _MARCADORES_AVISO) else "ERRO"
+
+
+def payment_key(pagamento: Dict[str, Any], index: int) -> str:
+    """
+    Hash do conteúdo do pagamento.
+
+    O índice só entra na chave quando não há id_pagamento, pois nesse caso as
+    mensagens de erro usam '#índice' como identificador.
+    """
+    payload = repr(sorted(pagamento.items(), key=lambda kv: kv[0]))
+    if not pagamento.get("id_pagamento"):
+        payload += f"#{index}"
+    return hashlib.blake2b(payload.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+@dataclass
+class _Entry:
+    """Resultado de um pagamento: só os registros de erro (mensagens são montadas na exibição)."""
+    id_pagamento: str
+    erros: List[errors.ErrorRecord] = field(default_factory=list)
+    avisos: List[errors.ErrorRecord] = field(default_factory=list)
+
+    @property
+    def validos(self) -> int:
+        return 0 if self.erros or self.avisos else 1
+
+
+def _validate_entries(pagamentos: List[Dict[str, Any]], indices: List[int],
+                      regras: RuleSet | None = None) -> List[_Entry]:
+    """Valida os pagamentos em um único lote (ver rules.RuleSet.check)."""
+    entries = []
+    for pagamento, index, found in zip(pagamentos, indices, (regras or validate.REGRAS).check(pagamentos, indices)):
+        entry = _Entry(pagamento.get("id_pagamento", f"#{index}"))
+        for erro in found:
+            (entry.avisos if erro.severidade == errors.AVISO else entry.erros).append(erro)
+        entries.append(entry)
+    return entries
+
+
+class ValidationCache:
+    """
+    Resultado de validação por pagamento, reaproveitado entre reruns.
+
+    Args:
+        regras: Regras de validação (padrão: rules.REGRAS; ver rules.for_config)
+    """
+
+    def __init__(self, regras: RuleSet | None = None) -> None:
+        self.regras = regras
+        self._keys: List[str] = []
+        self._entries: Dict[str, _Entry] = {}
+        self._day: date | None = None
+        self.total_erros = 0
+        self.total_avisos = 0
+        self.total_validos = 0
+        self.revalidados = 0  # pagamentos validados na última atualização
+        self.version = 0      # muda sempre que o resultado muda (chave para caches da UI)
+
+    def _apply(self, entry: _Entry, sign: int) -> None:
+        self.total_erros += sign * len(entry.erros)
+        self.total_avisos += sign * len(entry.avisos)
+        self.total_validos += sign * entry.validos
+
+    def clear(self) -> None:
+        """Descarta todos os resultados."""
+        version = self.version
+        self.__init__(self.regras)
+        self.version = version + 1
+
+    def update(self, pagamentos: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Sincroniza o cache com a lista atual de pagamentos.
+
+        Args:
+            pagamentos: Lista de pagamentos da sessão
+
+        Returns:
+            Dicionário no formato de `st.session_state.validacao_resultado`
+        """
+        # Regras de data dependem do dia atual: vira o dia, revalida tudo
+        hoje = date.today()
+        if self._day != hoje:
+            self.clear()
+            self._day = hoje
+
+        old_keys = self._keys
+        old_entries = self._entries
+        new_keys = [payment_key(pagamento, index) for index, pagamento in enumerate(pagamentos)]
+        new_entries: Dict[str, _Entry] = {}
+
+        # Só pagamentos novos ou alterados são validados, todos de uma vez
+        pendentes: Dict[str, int] = {}
+        for index, key in enumerate(new_keys):
+            if key not in old_entries and key not in pendentes:
+                pendentes[key] = index
+        indices = list(pendentes.values())
+        for key, entry in zip(pendentes, _validate_entries([pagamentos[i] for i in indices], indices, self.regras)):
+            new_entries[key] = entry
+        self.revalidados = len(pendentes)
+
+        for index, key in enumerate(new_keys):
+            entry = new_entries.get(key) or old_entries[key]
+            new_entries[key] = entry
+            if index < len(old_keys) and old_keys[index] == key:
+                continue
+            if index < len(old_keys):
+                self._apply(old_entries[old_keys[index]], -1)
+            self._apply(entry, +1)
+
+        for key in old_keys[len(new_keys):]:
+            self._apply(old_entries[key], -1)
+
+        if new_keys != old_keys:
+            self.version += 1
+        self._keys = new_keys
+        self._entries = new_entries
+        return self.resultado()
+
+    def _rows(self, attr: str) -> List[Dict[str, str]]:
+        rows: List[Dict[str, str]] = []
+        for key in self._keys:
+            entry = self._entries[key]
+            if attr == "validos":
+                if entry.validos:
+                    rows.append({"id_pagamento": entry.id_pagamento, "status": "OK",
+                                 "mensagem": "Pagamento válido"})
+                continue
+            for erro in getattr(entry, attr):
+                rows.append({"id_pagamento": entry.id_pagamento, "status": erro.severidade,
+                             "mensagem": errors.render(erro), "codigo": erro.codigo, "campo": erro.campo})
+        return rows
+
+    def resultado(self) -> Dict[str, Any]:
+        """Monta o resumo de validação (listas + totais) da lista atual."""
+        return {
+            "erros": self._rows("erros"),
+            "avisos": self._rows("avisos"),
+            "validos": self._rows("validos"),
+            "total": len(self._keys),
+            "total_erros": self.total_erros,
+            "total_avisos": self.total_avisos,
+            "total_validos": self.total_validos,
+        }
+
+    def counters(self) -> Tuple[int, int, int]:
+        """Retorna (total_erros, total_avisos, total_validos) sem montar as listas."""
+        return self.total_erros, self.total_avisos, self.total_validos
@@ -7,6 +7,8 @@ from __future__ import annotations
 import re
 from typing import Tuple, Dict, Any
 
+from .cnab240.pix_keys import TIPOS_CHAVE_PIX, infer_type, validate_key
+
 
 def normalize_doc(value: str | None) -> str:
     """Remove qualquer pontuação e retorna apenas dígitos."""
@@ -64,26 +66,16 @@ def validate_pix(record: Dict[str, Any]) -> Tuple[bool, str]:
 
     tipo = str(record.get("tipo_chave_pix", "")).strip().upper()
     chave = str(record.get("chave_pix", "")).strip()
-    if not tipo or not chave:
-        return False, "PIX: tipo_chave_pix e chave_pix são obrigatórios."
-
-    if tipo in {"CPF", "CNPJ"}:
-        doc = normalize_doc(chave)
-        if tipo == "CPF" and len(doc) != 11:
-            return False, "PIX: chave CPF deve ter 11 dígitos."
-        if tipo == "CNPJ" and len(doc) != 14:
-            return False, "PIX: chave CNPJ deve ter 14 dígitos."
-    elif tipo == "TELEFONE":
-        if not normalize_doc(chave):
-            return False, "PIX: chave TELEFONE deve conter dígitos."
-    elif tipo == "EMAIL":
-        if "@" not in chave:
-            return False, "PIX: chave EMAIL inválida."
-    elif tipo == "ALEATORIA":
-        # aceita 32/36 chars normalmente; não bloqueia por contrato
-        pass
-    else:
+    if not chave:
+        return False, "PIX: chave_pix é obrigatória."
+    if not tipo:
+        tipo = infer_type(chave)
+        if not tipo:
+            return False, "PIX: tipo_chave_pix não informado e não inferido pela chave."
+    if tipo not in TIPOS_CHAVE_PIX:
         return False, "PIX: tipo_chave_pix inválido (CPF/CNPJ/EMAIL/TELEFONE/ALEATORIA)."
+    if not validate_key(chave, tipo):
+        return False, f"PIX: chave_pix inválida para o tipo {tipo}."
 
     return True, ""
 
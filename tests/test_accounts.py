@@ -0,0 +1,115 @@
+"""
+Testes para múltiplas contas de débito
+"""
+import copy
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from src.cnab240 import accounts
+
+
+CONFIG = {
+    'empresa': {'tipo_inscricao': 2, 'numero_inscricao': '11222333000181', 'nome': 'MATRIZ LTDA'},
+    'conta': {'codigo_convenio': '123456', 'agencia': '00134', 'conta': '000000184492', 'digito_conta': '0'},
+    'arquivo': {'sequencial_inicial': 10},
+    'contas': [
+        {
+            'id': 'filial',
+            'empresa': {'nome': 'FILIAL LTDA'},
+            'conta': {'agencia': '00200', 'conta': '000000000555', 'digito_conta': '1'},
+            'arquivo': {'sequencial_inicial': 1},
+        },
+    ],
+    'roteamento': {
+        'regras': [{'campo': 'tipo_pagamento', 'valor': 'TED', 'conta': 'filial'}],
+    },
+}
+
+
+def _pagamento(id_pag, tipo='PIX', **extra):
+    pagamento = {
+        'id_pagamento': id_pag,
+        'tipo_pagamento': tipo,
+        'data_pagamento': datetime.now().strftime('%Y-%m-%d'),
+        'valor': 10.0,
+        'nome_favorecido': 'Fulano',
+        'tipo_pessoa': 'F',
+        'cpf_cnpj': '11144477735',
+        'tipo_chave_pix': 'CPF',
+        'chave_pix': '11144477735',
+        'banco_favorecido': '341',
+        'agencia_favorecido': '00001',
+        'conta_favorecido': '123',
+        'digito_conta_favorecido': '4',
+        'tipo_conta': '1',
+    }
+    pagamento.update(extra)
+    return pagamento
+
+
+class TestAccounts(unittest.TestCase):
+    """Testes para carregamento, roteamento e geração por conta"""
+    
+    def test_load_accounts_herda_empresa(self):
+        """Testa herança dos dados da empresa pela conta adicional"""
+        contas = accounts.load_accounts(CONFIG)
+        self.assertEqual(list(contas), ['principal', 'filial'])
+        self.assertEqual(contas['filial'].numero_inscricao, '11222333000181')
+        self.assertEqual(contas['filial'].nome.strip(), 'FILIAL LTDA')
+        self.assertEqual(contas['filial'].agencia, '00200')
+        self.assertEqual(contas['filial'].conta_id, 'filial')
+    
+    def test_load_accounts_id_duplicado(self):
+        """Testa erro para id de conta duplicado"""
+        config = dict(CONFIG, contas=CONFIG['contas'] * 2)
+        with self.assertRaises(ValueError):
+            accounts.load_accounts(config)
+    
+    def test_roteamento(self):
+        """Testa coluna, regra e conta padrão"""
+        router = accounts.AccountRouter.from_config(CONFIG)
+        self.assertEqual(router.route(_pagamento('1')), 'principal')
+        self.assertEqual(router.route(_pagamento('2', 'TED')), 'filial')
+        self.assertEqual(router.route(_pagamento('3', conta_debito='filial')), 'filial')
+        with self.assertRaises(ValueError):
+            router.route(_pagamento('4', conta_debito='inexistente'))
+    
+    def test_group_e_geracao(self):
+        """Testa agrupamento em uma passada e sequencial por conta"""
+        router = accounts.AccountRouter.from_config(CONFIG)
+        pagamentos = [
+            _pagamento('1'),
+            _pagamento('2', 'TED'),
+            _pagamento('3', conta_debito='filial'),
+            _pagamento('4', conta_debito='xx'),
+        ]
+        grupos, erros = accounts.group_by_account(pagamentos, router)
+        self.assertEqual(set(grupos), {('principal', 'PIX'), ('filial', 'TED'), ('filial', 'PIX')})
+        self.assertIn('4', erros)
+        
+        contas = router.accounts
+        gerados = accounts.generate_account_files(grupos, contas, datetime(2024, 1, 15), max_workers=1)
+        self.assertEqual([(g.conta_id, g.tipo, g.file_seq) for g in gerados],
+                         [('principal', 'PIX', 10), ('filial', 'TED', 1), ('filial', 'PIX', 2)])
+        # Header de arquivo usa a agência/conta da conta de débito
+        self.assertEqual(gerados[1].lines[0][52:57], '00200')
+        self.assertEqual(gerados[0].lines[0][52:57], '00134')
+
+    def test_sequencial_pelo_ledger(self):
+        """Testa sequenciais contínuos entre execuções quando há ledger"""
+        with tempfile.TemporaryDirectory() as tmp:
+            config = copy.deepcopy(CONFIG)
+            config['arquivo']['ledger'] = str(Path(tmp) / 'ledger.sqlite3')
+            router = accounts.AccountRouter.from_config(config)
+            grupos, _ = accounts.group_by_account([_pagamento('1'), _pagamento('2', 'TED'),
+                                                   _pagamento('3', conta_debito='filial')], router)
+            planejar = lambda: [(b.conta_id, t, seq) for b, t, _, seq in
+                                accounts.plan_account_files(grupos, router.accounts)]
+            self.assertEqual(planejar(), [('principal', 'PIX', 10), ('filial', 'TED', 1), ('filial', 'PIX', 2)])
+            self.assertEqual(planejar(), [('principal', 'PIX', 11), ('filial', 'TED', 3), ('filial', 'PIX', 4)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Testes para o diretório de bancos
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.cnab240 import errors, rules, validate
+from src.cnab240.bank_directory import BankDirectory
+from src.cnab240.bradesco_ted import BradescoTEDGenerator
+
+from tests.test_accounts import CONFIG, _pagamento
+
+
+class TestBankDirectory(unittest.TestCase):
+    """Testes para BankDirectory e as regras de banco_favorecido"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / 'bancos.csv'
+        self.path.write_text("# teste\ncompe,ispb,nome,ted,pix,camara\n237,60746948,BRADESCO,1,1,000\n"
+                             "341,60701190,ITAU,1,1,018\n999,12345678,SO PIX,0,1,\n888,1,CAMARA PROPRIA,1,0,1\n",
+                             encoding='utf-8')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_indice(self):
+        """Testa consultas vetorizadas por código COMPE (texto ou número) e a câmara da coluna camara"""
+        diretorio = BankDirectory.load(self.path)
+        self.assertEqual(list(diretorio.known(['341', 237, '999', '001', '3410', 'abc', None])),
+                         [True, True, True, False, False, False, False])
+        self.assertEqual(list(diretorio.ted(['341', '999'])), [True, False])
+        self.assertEqual(diretorio.get('237').ispb, '60746948')
+        self.assertEqual([diretorio.camara(b) for b in ('237', 237, ' 237', '341', '888', '001', '')],
+                         ['000'] * 3 + ['018', '001', '018', '018'])
+        self.assertEqual(BankDirectory({}).camara('237'), '018')   # sem a linha do Bradesco, sem câmara 000
+
+    def test_regras(self):
+        """Testa rejeição de bancos fora do diretório ou sem TED, e o aviso sem validar_bancos"""
+        pagamentos = [_pagamento('1', 'TED', banco_favorecido='001'),
+                      _pagamento('2', 'TED', banco_favorecido='999'),
+                      _pagamento('3', 'DOC', banco_favorecido='341'),
+                      _pagamento('4', 'TED', banco_favorecido='12'),
+                      _pagamento('5', banco_favorecido='001')]
+        regras = rules.for_config({'validar_bancos': True, 'bancos': str(self.path)})
+        encontrados = validate.check_pagamentos(pagamentos, regras=regras)
+        self.assertEqual({k: [e.codigo for e in v] for k, v in encontrados.items()},
+                         {'1': [errors.BANCO_DESCONHECIDO], '2': [errors.BANCO_SEM_TED],
+                          '4': [errors.QUANTIDADE_DIGITOS]})
+        self.assertEqual(encontrados['2'][0].mensagem, '2: banco_favorecido 999 (SO PIX) não participa de TED')
+        self.assertIs(rules.for_config({'validar_bancos': False, 'bancos': str(self.path)}), rules.REGRAS)
+
+        # Padrão: banco fora do diretório só gera aviso (não bloqueia); sem TED continua erro
+        padrao = validate.check_pagamentos(pagamentos, regras=rules.for_config({'bancos': str(self.path)}))
+        self.assertEqual({k: [(e.codigo, e.severidade) for e in v] for k, v in padrao.items()},
+                         {'1': [(errors.BANCO_NAO_LISTADO, errors.AVISO)], '2': [(errors.BANCO_SEM_TED, errors.ERRO)],
+                          '4': [(errors.QUANTIDADE_DIGITOS, errors.ERRO)]})
+        self.assertEqual(list(errors.blocking(padrao['1'])), [])
+
+    def test_camara_no_segmento_a(self):
+        """Testa a câmara do Segmento A pelo diretório, também com código numérico"""
+        gerador = BradescoTEDGenerator(dict(CONFIG, arquivo=dict(CONFIG['arquivo'], bancos=str(self.path))))
+        for banco, esperado in (('237', '000237'), (237, '000237'), ('341', '018341')):
+            linha = gerador.generate_segmento_a(_pagamento('1', 'TED', banco_favorecido=banco), 1)
+            self.assertEqual(linha[17:23], esperado)  # Câmara + Banco Favorecido
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Testes para o calendário de dias úteis
+"""
+import copy
+import tempfile
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+
+from src.cnab240 import accounts, business_days, errors, rules, validate
+
+from tests.test_accounts import CONFIG, _pagamento
+
+
+class TestBusinessDays(unittest.TestCase):
+    """Testes para BusinessCalendar e o tratamento de datas em dia não útil"""
+
+    def test_feriados_nacionais(self):
+        """Testa a Páscoa e os feriados móveis e fixos calculados"""
+        self.assertEqual(business_days.easter(2024), date(2024, 3, 31))
+        self.assertEqual(business_days.easter(2025), date(2025, 4, 20))
+        feriados = business_days.national_holidays(2025)
+        self.assertIn(date(2025, 3, 3), feriados)     # Carnaval
+        self.assertIn(date(2025, 4, 18), feriados)    # Sexta-feira Santa
+        self.assertIn(date(2025, 6, 19), feriados)    # Corpus Christi
+        self.assertIn(date(2025, 11, 20), feriados)
+        self.assertNotIn(date(2023, 11, 20), business_days.national_holidays(2023))
+
+    def test_indice_vetorizado(self):
+        """Testa consultas por lote e o arquivo local de feriados"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'feriados.csv'
+            path.write_text("# locais\ndata,tipo,descricao\n2025-01-20,feriado,São Sebastião\n"
+                            "2025-11-20,util,\n", encoding='utf-8')
+            calendario = business_days.BusinessCalendar(2024, 2026, business_days.load_overrides(path))
+
+        dias = np.array(['2025-01-17', '2025-01-18', '2025-01-20', '2025-11-20', '2025-12-25'], dtype='datetime64[D]')
+        np.testing.assert_array_equal(calendario.is_business_day(dias), [True, False, False, True, False])
+        np.testing.assert_array_equal(
+            calendario.next_business_day(dias),
+            np.array(['2025-01-17', '2025-01-21', '2025-01-21', '2025-11-20', '2025-12-26'], dtype='datetime64[D]'))
+        self.assertEqual(calendario.next_business_day(date(2024, 12, 31)), date(2024, 12, 31))
+        self.assertFalse(calendario.is_business_day(date(2025, 1, 1)))
+        with self.assertRaises(ValueError):
+            calendario.is_business_day(date(2030, 1, 2))
+
+    def test_ajustar_e_rejeitar(self):
+        """Testa o ajuste na geração (PIX e TED) e a rejeição na validação"""
+        sabado = _pagamento('1', data_pagamento='2030-06-01')
+        regras = rules.for_config({'dia_nao_util': 'rejeitar'})
+        encontrados = validate.check_pagamentos([sabado, _pagamento('2', data_pagamento='2030-06-03')], regras=regras)
+        self.assertEqual(list(encontrados), ['1'])
+        self.assertEqual(encontrados['1'][0].codigo, errors.DATA_NAO_UTIL)
+        self.assertEqual(encontrados['1'][0].params, ('01/06/2030', '03/06/2030'))
+        self.assertIs(rules.for_config({'validar_bancos': False}), rules.REGRAS)
+
+        config = copy.deepcopy(CONFIG)
+        config['arquivo']['dia_nao_util'] = 'ajustar'
+        bank = accounts.load_accounts(config)['principal']
+        pix = accounts.render_account_file(bank, 'PIX', [dict(sabado, txid='T1')], datetime(2030, 6, 1), 1).lines
+        self.assertEqual(pix[2][50:58], '20300603')
+        self.assertEqual(pix[2][118:126], '20300603')
+        ted = _pagamento('3', tipo='TED', data_pagamento='')
+        ted_lines = accounts.render_account_file(bank, 'TED', [ted], datetime(2030, 6, 1), 1).lines
+        self.assertEqual(ted_lines[2][93:101], '03062030')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Testes para carregamento da configuração (BankConfig)
+"""
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from src.cnab240 import config
+from src.cnab240.bradesco_pix import BradescoPIXGenerator
+
+
+CONFIG_DICT = {
+    'empresa': {'tipo_inscricao': 2, 'numero_inscricao': '11.222.333/0001-81', 'nome': 'Empresa Ação Ltda'},
+    'conta': {
+        'codigo_convenio': '0000391266',
+        'agencia': '134',
+        'digito_agencia': '',
+        'conta': '184492',
+        'digito_conta': '0',
+    },
+    'arquivo': {'sequencial_inicial': 7},
+}
+
+
+class TestBankConfig(unittest.TestCase):
+    """Testes para BankConfig"""
+    
+    def test_from_dict_formata_campos(self):
+        """Testa normalização dos campos constantes"""
+        bank = config.BankConfig.from_dict(CONFIG_DICT)
+        self.assertEqual(bank.numero_inscricao, '11222333000181')
+        self.assertEqual(bank.agencia, '00134')
+        self.assertEqual(bank.conta, '000000184492')
+        self.assertEqual(bank.nome, 'Empresa Acao Ltda'.ljust(30))
+        self.assertEqual(len(bank.nome_devedor), 40)
+        self.assertEqual(bank.convenio_ted, '000039' + ' ' * 14)
+        self.assertEqual(len(bank.agencia_conta), 20)
+        self.assertEqual(bank.arquivo['sequencial_inicial'], 7)
+    
+    def test_from_dict_incompleto(self):
+        """Testa erro para configuração incompleta"""
+        with self.assertRaises(ValueError):
+            config.BankConfig.from_dict({'empresa': {}, 'conta': {}})
+    
+    def test_frozen(self):
+        """Testa imutabilidade"""
+        bank = config.BankConfig.from_dict(CONFIG_DICT)
+        with self.assertRaises(Exception):
+            bank.agencia = '99999'
+    
+    def test_load_bank_config_cache(self):
+        """Testa cache pela data de modificação do YAML"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'bradesco.yaml'
+            path.write_text(
+                "empresa:\n  tipo_inscricao: 2\n  numero_inscricao: '11222333000181'\n  nome: 'A'\n"
+                "conta:\n  agencia: '1'\n  conta: '2'\n  digito_conta: '3'\n",
+                encoding='utf-8'
+            )
+            first = config.load_bank_config(path)
+            self.assertIs(config.load_bank_config(path), first)
+            
+            path.write_text(path.read_text(encoding='utf-8').replace("nome: 'A'", "nome: 'B'"), encoding='utf-8')
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            second = config.load_bank_config(path)
+            self.assertIsNot(second, first)
+            self.assertEqual(second.nome.strip(), 'B')
+    
+    def test_gerador_aceita_bank_config(self):
+        """Testa que o gerador aceita BankConfig ou dicionário diretamente"""
+        bank = config.BankConfig.from_dict(CONFIG_DICT)
+        gen_bank = BradescoPIXGenerator(bank)
+        gen_dict = BradescoPIXGenerator(CONFIG_DICT)
+        self.assertIs(gen_bank.bank, bank)
+        dt = datetime(2024, 1, 15, 10, 0, 0)
+        self.assertEqual(gen_bank.generate_header_arquivo(dt, 1), gen_dict.generate_header_arquivo(dt, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+"""
+Testes para normalização de datas e o contexto de datas por arquivo
+"""
+import unittest
+from datetime import date, datetime
+
+from src.cnab240 import dates
+
+
+class TestDates(unittest.TestCase):
+    """Testes para normalize_date e DateContext"""
+
+    def test_normalize_date(self):
+        """Testa datas aceitas pela validação gravadas como AAAA-MM-DD e as demais preservadas"""
+        self.assertEqual(dates.normalize_date(datetime(2024, 1, 5, 13, 0)), '2024-01-05')
+        self.assertEqual(dates.normalize_date(' 05/01/2024 '), '2024-01-05')
+        self.assertEqual(dates.normalize_date('05/01/24'), '2024-01-05')
+        self.assertEqual(dates.normalize_date('2024-01-05 00:00:00'), '2024-01-05')
+        self.assertEqual(dates.normalize_date('20240105'), '2024-01-05')
+        # DDMMAAAA não é aceito pela validação: mantido para o erro citar o valor original
+        self.assertEqual(dates.normalize_date('05012024'), '05012024')
+        self.assertEqual(dates.normalize_date(' 31/02/2024 '), '31/02/2024')
+        self.assertEqual(dates.normalize_date(None), '')
+
+    def test_contexto_do_arquivo(self):
+        """Testa as regras de data dos Segmentos A e B com gravação e hoje fixos"""
+        contexto = dates.DateContext(datetime(2024, 1, 10, 15, 30), today=date(2024, 1, 12))
+        self.assertEqual(contexto.file_ddmmyyyy, '10012024')
+        self.assertEqual(contexto.data_pagamento('2024-01-11'), '11012024')
+        self.assertEqual(contexto.data_pagamento('12012024'), '12012024')
+        self.assertEqual(contexto.data_pagamento('2024-01-13'), '10012024')   # futura
+        self.assertEqual(contexto.data_pagamento('2024-01-09'), '10012024')   # anterior à gravação
+        self.assertEqual(contexto.data_pagamento('lixo'), '12012024')         # inválida: hoje
+        self.assertEqual(contexto.data_pagamento(' '), '10012024')
+        self.assertEqual(contexto.data_vencimento('2024-02-01'), '01022024')
+        self.assertEqual(contexto.data_vencimento(''), '10012024')
+        self.assertEqual(contexto.data_vencimento(datetime(2023, 12, 1)), '01122023')
+        self.assertEqual(dates.format_ddmmyyyy('', date(2024, 1, 12)), '12012024')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Testes para a leitura de remessas geradas
+"""
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from src.cnab240 import accounts, decoder, structure
+
+from tests.test_accounts import CONFIG, _pagamento
+
+
+class TestDecoder(unittest.TestCase):
+    """Testes para decode_file, encode_tables e pagamentos"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = Path(self.tmp.name)
+        self.contas = accounts.load_accounts(CONFIG)
+        self.file_date = datetime(2024, 1, 15, 10, 30)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _grava(self, nome, tipo, pagamentos):
+        lines = accounts.render_account_file(self.contas['principal'], tipo, pagamentos, self.file_date, 1).lines
+        path = self.output / nome
+        path.write_bytes(structure.encode_lines(lines))
+        return path, list(lines)
+
+    def test_ida_e_volta(self):
+        """Testa que decodificar e recodificar reproduz o arquivo gerado"""
+        pix_path, pix = self._grava('pix.txt', 'PIX', [
+            _pagamento('1', valor=12.34, txid='TX1'),
+            _pagamento('2', tipo_pessoa='J', cpf_cnpj='11.222.333/0001-81', chave_pix='11222333000181',
+                       tipo_chave_pix='CNPJ', nome_favorecido='Empresa  Dois'),
+        ])
+        ted_path, ted = self._grava('ted.txt', 'TED', [_pagamento('3', 'TED', valor=0.29)])
+
+        tabelas = decoder.decode_file(pix_path)
+        self.assertEqual(list(tabelas), ['header_arquivo', 'header_lote_pix', 'segmento_j', 'segmento_j52',
+                                         'trailer_lote_pix', 'trailer_arquivo'])
+        self.assertEqual(tabelas['segmento_j']['valor'].tolist(), [1234, 1000])
+        self.assertEqual(tabelas['segmento_j52']['chave_pix'].tolist(), ['11144477735', '11222333000181'])
+        self.assertEqual(tabelas['trailer_lote_pix']['valor_total'].tolist(), [2234])
+        self.assertEqual(decoder.encode_tables(tabelas), pix)
+
+        tabelas = decoder.decode_file(ted_path)
+        self.assertEqual(tabelas['segmento_a']['linha'].tolist(), [2])
+        self.assertEqual(tabelas['segmento_b']['inscricao'].tolist(), [11144477735])
+        self.assertEqual(decoder.encode_tables(tabelas), ted)
+
+    def test_pagamentos_de_varios_arquivos(self):
+        """Testa uma linha por pagamento, com o arquivo de origem, para conferência com a planilha"""
+        origem = [_pagamento('1', valor=5.5), _pagamento('2', tipo_pessoa='J', cpf_cnpj='11222333000181')]
+        paths = [self._grava('pix.txt', 'PIX', origem)[0],
+                 self._grava('ted.txt', 'TED', [_pagamento('3', 'TED', valor=7)])[0]]
+
+        tabelas = decoder.decode_files(paths)
+        self.assertEqual(tabelas['header_arquivo']['arquivo'].tolist(), ['pix.txt', 'ted.txt'])
+        pagamentos = decoder.pagamentos(tabelas)
+        self.assertEqual(pagamentos['id_pagamento'].tolist(), ['1', '2', '3'])
+        self.assertEqual(pagamentos['tipo'].tolist(), ['PIX', 'PIX', 'TED/DOC'])
+        self.assertEqual(pagamentos['valor'].tolist(), [5.5, 10.0, 7.0])
+        self.assertEqual(pagamentos['cpf_cnpj'].tolist(), ['11144477735', '11222333000181', '11144477735'])
+        self.assertEqual(pagamentos['arquivo'].tolist(), ['pix.txt', 'pix.txt', 'ted.txt'])
+        self.assertEqual(pagamentos.loc[2, 'banco_favorecido'], '341')
+        self.assertEqual(pagamentos.loc[0, 'data_pagamento'].date(), datetime.now().date())
+
+    def test_estrutura_invalida(self):
+        """Testa recusa de arquivo com estrutura inválida"""
+        path, lines = self._grava('pix.txt', 'PIX', [_pagamento('1')])
+        path.write_bytes(structure.encode_lines(lines[:2] + lines[3:]))
+        with self.assertRaisesRegex(ValueError, 'Estrutura CNAB inválida'):
+            decoder.decode_file(path)
+        self.assertEqual(len(decoder.decode_file(path, validar=False)['segmento_j52']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
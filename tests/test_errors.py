@@ -0,0 +1,46 @@
+"""
+Testes para os erros de validação estruturados
+"""
+import unittest
+
+from src.cnab240 import errors, validate
+
+from tests.test_accounts import _pagamento
+
+
+class TestErrors(unittest.TestCase):
+    """Testes para códigos, severidade e mensagens dos erros"""
+
+    def test_check_pagamento(self):
+        """Testa registros emitidos com código, campo, linha e severidade"""
+        pagamento = _pagamento('7', 'TED', nome_favorecido='N' * 31, banco_favorecido='', tipo_conta='9')
+        found = validate.check_pagamento(pagamento, 3)
+        self.assertEqual([(e.codigo, e.campo) for e in found], [
+            (errors.TAMANHO_EXCEDIDO, 'nome_favorecido'),
+            (errors.CAMPO_OBRIGATORIO, 'banco_favorecido'),
+            (errors.OPCAO_INVALIDA, 'tipo_conta'),
+        ])
+        self.assertEqual([e.severidade for e in found], [errors.AVISO, errors.ERRO, errors.ERRO])
+        self.assertEqual({(e.linha, e.id_pagamento) for e in found}, {(3, '7')})
+        self.assertEqual(validate.check_pagamento(_pagamento('8'), 0), [])
+
+    def test_render(self):
+        """Testa mensagens montadas apenas na exibição"""
+        found = validate.check_pagamento(_pagamento('7', 'TED', banco_favorecido='', tipo_conta='9'), 0)
+        self.assertEqual([e.mensagem for e in found], [
+            '7: banco_favorecido não informado (obrigatório para TED)',
+            '7: tipo_conta deve ser 1 (Corrente), 2 (Poupança) ou 3 (Salário)',
+        ])
+        self.assertEqual(errors.render(errors.record(errors.ID_DUPLICADO, 'id_pagamento', 1, '7')),
+                         'id_pagamento duplicado: 7')
+        self.assertEqual(validate.validate_pagamento(_pagamento('7', valor=0))[1], ['7: valor deve ser > 0'])
+
+    def test_check_pagamentos(self):
+        """Testa erros por id, incluindo duplicados"""
+        errors_by_id = validate.check_pagamentos([_pagamento('1'), _pagamento('2', valor=0), _pagamento('1')])
+        self.assertEqual(set(errors_by_id), {'1', '2'})
+        self.assertEqual(errors_by_id['1'][0].codigo, errors.ID_DUPLICADO)
+
+
+if __name__ == '__main__':
+    unittest.main()
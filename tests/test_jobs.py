@@ -0,0 +1,159 @@
+"""
+Testes para os jobs de geração em segundo plano
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from src import jobs
+from src.cnab240 import accounts
+
+from tests.test_accounts import CONFIG, _pagamento
+
+
+def _aguardar(manager, job_id, timeout=10):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        job = manager.get(job_id)
+        if job.finalizado:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job não finalizou")
+
+
+class TestJobs(unittest.TestCase):
+    """Testes para execução, persistência e cancelamento de jobs"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = jobs.JobManager(self.tmp.name, max_workers=1)
+        router = accounts.AccountRouter.from_config(CONFIG)
+        self.contas = router.accounts
+        pagamentos = [_pagamento(str(i), 'TED' if i % 2 else 'PIX') for i in range(10)]
+        pagamentos.append(_pagamento('b', 'BOLETO'))
+        self.grupos, _ = accounts.group_by_account(pagamentos, router)
+
+    def tearDown(self):
+        self.manager.shutdown()
+        self.tmp.cleanup()
+
+    def test_job_persistido_em_disco(self):
+        """Testa geração completa e leitura do estado por outro gerenciador"""
+        job_id = self.manager.submit(self.grupos, self.contas, datetime(2024, 1, 15), multi_contas=True)
+        job = _aguardar(self.manager, job_id)
+        self.assertEqual(job.status, jobs.CONCLUIDO)
+        self.assertEqual((job.processados, job.total), (10, 10))
+        self.assertEqual(len(job.arquivos), 2)
+        self.assertTrue(any('BOLETO' in aviso for aviso in job.avisos))
+
+        nome = job.arquivos[0]['nome']
+        self.assertEqual(nome, 'BRADESCO_PIX_principal_REMESSA_20240115_000010.txt')
+        conteudo = (Path(self.tmp.name) / job_id / nome).read_bytes()
+        self.assertEqual(len(conteudo), job.arquivos[0]['linhas'] * 242)
+        self.assertTrue(conteudo.endswith(b'\r\n'))
+
+        # Simula recarga/reinício: outro gerenciador lê o job do disco
+        outro = jobs.JobManager(self.tmp.name)
+        try:
+            recarregado = outro.get(job_id)
+            self.assertEqual(recarregado.status, jobs.CONCLUIDO)
+            self.assertEqual(recarregado.arquivos, job.arquivos)
+        finally:
+            outro.shutdown()
+
+    def test_job_perfilado(self):
+        """Testa perfil salvo no diretório do job e resumo no estado"""
+        job_id = self.manager.submit(self.grupos, self.contas, datetime(2024, 1, 15), profile=True)
+        job = _aguardar(self.manager, job_id)
+        self.assertEqual(job.status, jobs.CONCLUIDO)
+        self.assertTrue(job.perfil['top'])
+        for nome in job.perfil['arquivos']:
+            self.assertTrue((Path(self.tmp.name) / job_id / nome).exists())
+        self.assertEqual(len(self.manager.store(job_id).entries()), 2)
+
+    def test_cancelamento(self):
+        """Testa cancelamento durante a renderização dos pagamentos"""
+        liberar = threading.Event()
+        original = accounts.render_account_file
+
+        def render_lento(*args, progress=None):
+            def progresso(n):
+                liberar.wait(5)
+                progress(n)
+            return original(*args, progress=progresso)
+
+        jobs.render_account_file = render_lento
+        try:
+            job_id = self.manager.submit(self.grupos, self.contas, datetime(2024, 1, 15))
+            self.assertTrue(self.manager.cancel(job_id))
+            liberar.set()
+            job = _aguardar(self.manager, job_id)
+        finally:
+            jobs.render_account_file = original
+        self.assertEqual(job.status, jobs.CANCELADO)
+        self.assertEqual(job.arquivos, [])
+        self.assertEqual(list((Path(self.tmp.name) / job_id).glob('*.txt')), [])
+
+    def test_estrutura_invalida_nao_publicada(self):
+        """Testa que remessa com trailer inconsistente não é publicada pelo job"""
+        original = accounts.render_account_file
+
+        def render_quebrado(*args, progress=None):
+            gerado = original(*args, progress=progress)
+            if gerado.tipo == 'PIX':
+                gerado.lines[-1] = gerado.lines[-1][:23] + '999999' + gerado.lines[-1][29:]  # qtde de registros
+            return gerado
+
+        jobs.render_account_file = render_quebrado
+        try:
+            job = _aguardar(self.manager, self.manager.submit(self.grupos, self.contas, datetime(2024, 1, 15)))
+        finally:
+            jobs.render_account_file = original
+        self.assertEqual([a['tipo'] for a in job.arquivos], ['TED'])
+        self.assertEqual(len(job.erros), 1)
+        self.assertIn('estrutura CNAB inválida', job.erros[0])
+        self.assertEqual(len(list((Path(self.tmp.name) / job.id).glob('*.txt'))), 1)
+
+    def test_descarte_e_limpeza(self):
+        """Testa descarte do job com seus arquivos e limpeza por idade/quantidade ao criar o gerenciador"""
+        ids = [_aguardar(self.manager, self.manager.submit(self.grupos, self.contas, datetime(2024, 1, 15))).id
+               for _ in range(4)]
+        self.manager.discard(ids[0])
+        self.assertIsNone(self.manager.get(ids[0]))
+        self.assertFalse(self.manager.job_dir(ids[0]).exists())
+
+        # ids[1] com o estado gravado há 8 dias: sai por idade; dos demais, fica só o mais recente
+        antigo = time.time() - 8 * 24 * 3600
+        os.utime(self.manager.job_dir(ids[1]) / jobs.ARQUIVO_ESTADO, (antigo, antigo))
+        outro = jobs.JobManager(self.tmp.name, max_jobs=1)
+        outro.shutdown()
+        self.assertEqual(sorted(p.name for p in Path(self.tmp.name).iterdir()), [ids[3]])
+        self.assertEqual(self.manager.get(ids[3]).status, jobs.CONCLUIDO)
+
+        # Job em execução não é removido
+        liberar = threading.Event()
+        original = accounts.render_account_file
+
+        def render_lento(*args, progress=None):
+            liberar.wait(5)
+            return original(*args, progress=progress)
+
+        jobs.render_account_file = render_lento
+        try:
+            job_id = self.manager.submit(self.grupos, self.contas, datetime(2024, 1, 15))
+            self.manager.max_jobs = 0
+            self.assertEqual(self.manager.prune(), [ids[3]])
+            with self.assertRaises(ValueError):
+                self.manager.discard(job_id)
+            liberar.set()
+            self.assertEqual(_aguardar(self.manager, job_id).status, jobs.CONCLUIDO)
+        finally:
+            jobs.render_account_file = original
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Testes para a instrumentação (timers, contadores e histogramas)
+"""
+import unittest
+
+from src.cnab240.metrics import BUCKETS, Metrics
+
+
+class TestMetrics(unittest.TestCase):
+    """Testes para registro, junção de snapshots e exportação"""
+    
+    def test_desligado_nao_registra(self):
+        """Testa que nada é registrado com as métricas desligadas"""
+        m = Metrics()
+        with m.timer('etapa'):
+            pass
+        m.incr('contador')
+        m.observe('hist', 1.0)
+        self.assertEqual(m.snapshot(), {'counters': [], 'histograms': []})
+    
+    def test_timer_e_contadores(self):
+        """Testa timers com labels, contadores e buckets"""
+        m = Metrics(enabled=True)
+        for _ in range(3):
+            with m.timer('generate_file', tipo='PIX'):
+                pass
+        m.incr('pagamentos', 10, tipo='PIX')
+        m.incr('pagamentos', 5, tipo='PIX')
+        m.observe('tamanho', 1000.0)
+        snap = m.snapshot()
+        self.assertEqual(snap['counters'], [{'name': 'pagamentos', 'labels': {'tipo': 'PIX'}, 'value': 15}])
+        hist = {h['name']: h for h in snap['histograms']}
+        self.assertEqual(hist['generate_file']['count'], 3)
+        self.assertEqual(hist['generate_file']['labels'], {'tipo': 'PIX'})
+        self.assertEqual(hist['tamanho']['buckets'][-1], 1)
+        self.assertEqual(len(hist['tamanho']['buckets']), len(BUCKETS) + 1)
+    
+    def test_merge_e_prometheus(self):
+        """Testa junção de snapshot de outro processo e formato Prometheus"""
+        filho = Metrics(enabled=True)
+        filho.observe('generate_file', 0.002)
+        filho.incr('pagamentos')
+        m = Metrics(enabled=True)
+        m.observe('generate_file', 0.02)
+        m.merge(filho.snapshot())
+        texto = m.to_prometheus()
+        self.assertIn('cnab_pagamentos_total 1', texto)
+        self.assertIn('cnab_generate_file_seconds_count 2', texto)
+        self.assertIn('cnab_generate_file_seconds_bucket{le="0.005"} 1', texto)
+        self.assertIn('cnab_generate_file_seconds_bucket{le="+Inf"} 2', texto)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Testes para o armazenamento em disco das remessas
+"""
+import tempfile
+import unittest
+import zipfile
+
+from src.output_store import OutputStore
+
+
+def _linhas(n, prefixo='L'):
+    return [f"{prefixo}{i:03d}".ljust(240, 'X') for i in range(n)]
+
+
+class TestOutputStore(unittest.TestCase):
+    """Testes para gravação, manifesto, leitura posicionada e ZIP"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = OutputStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_write_e_manifesto(self):
+        """Testa gravação em CRLF e metadados no manifesto"""
+        entrada = self.store.write('A.txt', _linhas(5), tipo='PIX', sequencial=3)
+        self.assertEqual(entrada, {'tipo': 'PIX', 'sequencial': 3, 'nome': 'A.txt', 'linhas': 5, 'bytes': 5 * 242})
+        self.assertEqual(OutputStore(self.tmp.name).entries(), [entrada])
+        with self.store.open('A.txt') as f:
+            self.assertTrue(f.read().endswith(b'X\r\n'))
+
+    def test_read_lines_posicionado(self):
+        """Testa leitura a partir de uma linha arbitrária"""
+        self.store.write('A.txt', _linhas(20))
+        self.assertEqual(self.store.read_lines('A.txt', 0, 2), _linhas(2))
+        self.assertEqual(self.store.read_lines('A.txt', 18, 10), _linhas(20)[18:])
+
+    def test_zip_montado_uma_vez(self):
+        """Testa ZIP reaproveitado e invalidado ao gravar novo arquivo"""
+        self.store.write('A.txt', _linhas(2))
+        caminho = self.store.zip_path()
+        mtime = caminho.stat().st_mtime_ns
+        self.assertEqual(self.store.zip_path().stat().st_mtime_ns, mtime)
+
+        self.store.write('B.txt', _linhas(3, 'M'))
+        with zipfile.ZipFile(self.store.zip_path()) as zf:
+            self.assertEqual(zf.namelist(), ['A.txt', 'B.txt'])
+            self.assertEqual(len(zf.read('B.txt')), 3 * 242)
+
+    def test_nome_invalido(self):
+        """Testa rejeição de nomes fora do diretório do store"""
+        with self.assertRaises(ValueError):
+            self.store.path('../fora.txt')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Testes para paginação e filtros das grades
+"""
+import unittest
+
+from src.pagination import filter_frame, paginate, review_frame
+
+
+PAGAMENTOS = [
+    {'id_pagamento': '1', 'tipo_pagamento': 'PIX', 'nome_favorecido': 'José da Silva', 'valor': 10.0},
+    {'id_pagamento': '2', 'tipo_pagamento': 'TED', 'nome_favorecido': 'Maria Souza', 'valor': 20.0},
+    {'id_pagamento': '', 'tipo_pagamento': 'PIX', 'nome_favorecido': 'Ana', 'valor': 30.0},
+]
+RESULTADO = {
+    'erros': [{'id_pagamento': '2', 'status': 'ERRO', 'mensagem': 'conta inválida'}],
+    'avisos': [{'id_pagamento': '#2', 'status': 'AVISO', 'mensagem': 'nome será truncado'}],
+    'validos': [{'id_pagamento': '1', 'status': 'OK', 'mensagem': 'Pagamento válido'}],
+}
+
+
+class TestPagination(unittest.TestCase):
+    """Testes para montagem, filtro e paginação da grade de revisão"""
+
+    def test_review_frame(self):
+        """Testa junção do resultado com os dados do pagamento"""
+        df = review_frame(PAGAMENTOS, RESULTADO)
+        self.assertEqual(list(df['id_pagamento']), ['2', '#2', '1'])
+        self.assertEqual(list(df['nome_favorecido']), ['Maria Souza', 'Ana', 'José da Silva'])
+        self.assertEqual(list(df['valor']), [20.0, 30.0, 10.0])
+
+    def test_filter_frame(self):
+        """Testa filtros por status, tipo e favorecido"""
+        df = review_frame(PAGAMENTOS, RESULTADO)
+        self.assertEqual(len(filter_frame(df)), 3)
+        self.assertEqual(list(filter_frame(df, status=['ERRO', 'AVISO'])['id_pagamento']), ['2', '#2'])
+        self.assertEqual(list(filter_frame(df, tipos=['PIX'])['id_pagamento']), ['#2', '1'])
+        self.assertEqual(list(filter_frame(df, favorecido='josé')['id_pagamento']), ['1'])
+        self.assertEqual(len(filter_frame(df, status=['OK'], tipos=['TED'])), 0)
+
+    def test_paginate(self):
+        """Testa fatias e ajuste de página fora do intervalo"""
+        df = review_frame(PAGAMENTOS * 40, {'validos': RESULTADO['validos'] * 120})
+        pagina = paginate(df, 3, 50)
+        self.assertEqual((pagina.page, pagina.pages, pagina.total), (3, 3, 120))
+        self.assertEqual((pagina.start, pagina.end), (100, 120))
+        self.assertEqual(paginate(df, 99, 50).page, 3)
+        self.assertEqual(paginate(df.iloc[:0], 1, 50).pages, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Testes para o pipeline de passada única
+"""
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from src.cnab240 import accounts, errors, rules, validate
+from src.cnab240.pipeline import run_pipeline, validate_blocks
+
+from tests.test_accounts import CONFIG, _pagamento
+
+
+class TestPipeline(unittest.TestCase):
+    """Testes para validação, roteamento e gravação em uma única passada"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = Path(self.tmp.name)
+        self.router = accounts.AccountRouter.from_config(CONFIG)
+        self.contas = self.router.accounts
+        self.file_date = datetime(2024, 1, 15, 10, 30)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_mesmo_conteudo_do_fluxo_em_lote(self):
+        """Testa remessa PIX idêntica à gerada por render_account_file"""
+        pagamentos = [_pagamento(str(i), txid=f'TX{i:030d}', valor=1.5 * (i + 1)) for i in range(5)]
+        resultado = run_pipeline(iter([dict(p) for p in pagamentos]), self.contas, self.router,
+                                 self.file_date, self.output)
+        self.assertEqual(len(resultado.arquivos), 1)
+        info = resultado.arquivos[0]
+        self.assertEqual((info.pagamentos, info.registros, info.file_seq), (5, 14, 10))
+        self.assertAlmostEqual(info.valor, 22.5)
+
+        esperado = accounts.render_account_file(self.contas['principal'], 'PIX', pagamentos, self.file_date, 10)
+        self.assertEqual(info.path.read_bytes(), b''.join(l.encode('ascii') + b'\r\n' for l in esperado.lines))
+        self.assertEqual([p.name for p in self.output.iterdir()], [info.path.name])
+
+    def test_invalidos_desviados_para_relatorio(self):
+        """Testa desvio de inválidos, duplicados e tipos sem gerador; avisos não desviam"""
+        pagamentos = [
+            _pagamento('1'),
+            _pagamento('2', 'TED'),
+            _pagamento('3', valor=-1),
+            _pagamento('1'),
+            _pagamento('4', 'BOLETO', nosso_numero='1', data_vencimento='2030-01-01', sacado_nome='Sacado',
+                       sacado_tipo_pessoa='F', sacado_cpf_cnpj='11144477735'),
+            _pagamento('5', conta_debito='inexistente'),
+            _pagamento('6', 'TED', banco_favorecido='999'),   # fora do diretório: aviso
+        ]
+        relatorio = []
+        resultado = run_pipeline(pagamentos, self.contas, self.router, self.file_date, self.output,
+                                 report=lambda *linha: relatorio.append(linha), regras=rules.for_config({}))
+        self.assertEqual((resultado.total, resultado.validos), (7, 4))
+        self.assertEqual(set(resultado.erros), {'3', '1', '5'})
+        self.assertEqual(resultado.erros['1'][0].codigo, errors.ID_DUPLICADO)
+        self.assertEqual(resultado.erros['5'][0].codigo, errors.CONTA_DESCONHECIDA)
+        self.assertEqual(resultado.ignorados, {('principal', 'BOLETO'): 1})
+        self.assertEqual([(i, s) for i, s, _, _ in relatorio],
+                         [('1', 'OK'), ('2', 'OK'), ('3', 'ERRO'), ('1', 'ERRO'), ('4', 'OK'), ('5', 'ERRO'),
+                          ('6', errors.AVISO)])
+        self.assertEqual(relatorio[-1][2][0].codigo, errors.BANCO_NAO_LISTADO)
+
+        por_tipo = {info.tipo: info for info in resultado.arquivos}
+        self.assertEqual((por_tipo['TED'].conta_id, por_tipo['TED'].pagamentos), ('filial', 2))
+        for info in resultado.arquivos:
+            lines = info.path.read_bytes().decode('ascii').split('\r\n')[:-1]
+            self.assertTrue(validate.validate_trailers(lines, info.pagamentos, info.valor)[0])
+
+    def test_falha_nao_deixa_arquivo_parcial(self):
+        """Testa remoção dos arquivos .part quando a passada é interrompida"""
+        def pagamentos():
+            yield _pagamento('1')
+            raise RuntimeError('leitura interrompida')
+
+        with self.assertRaises(RuntimeError):
+            run_pipeline(pagamentos(), self.contas, self.router, self.file_date, self.output)
+        self.assertEqual(list(self.output.iterdir()), [])
+
+    def test_blocos_validados(self):
+        """Testa blocos entregues um a um e ids repetidos conhecidos (fluxo em lote)"""
+        pagamentos = [_pagamento('1'), _pagamento('2', 'TED'), _pagamento('1'), _pagamento('3', valor=0)]
+        blocos = validate_blocks(iter(pagamentos), self.router, tamanho_lote=2, duplicados={'1'})
+        primeiro = next(blocos)
+        self.assertEqual([(v.id_pagamento, v.status, v.conta_id) for v in primeiro],
+                         [('1', 'ERRO', None), ('2', 'OK', 'filial')])
+        self.assertEqual(primeiro[0].erros[0].codigo, errors.ID_DUPLICADO)
+        self.assertEqual([(v.index, v.status) for v in next(blocos)], [(2, 'ERRO'), (3, 'ERRO')])
+        self.assertIsNone(next(blocos, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Testes para a validação vetorizada de chaves PIX
+"""
+import unittest
+
+import pandas as pd
+
+from src import validators
+from src.cnab240 import errors, pix_keys, validate
+from src.cnab240.bradesco_pix import BradescoPIXGenerator
+
+from tests.test_accounts import _pagamento
+
+
+class TestPixKeys(unittest.TestCase):
+    """Testes para validate_keys e infer_types"""
+
+    def test_validate_keys(self):
+        """Testa validação em lote contra o tipo de cada linha"""
+        chaves = pd.Series(['529.982.247-25', '52998224724', '11222333000181', 'a@b.com', 'a@b',
+                            '(11) 99999-9999', '123', '123E4567-E89B-12D3-A456-426614174000', '', None])
+        tipos = pd.Series(['CPF', 'cpf', 'CNPJ', 'EMAIL', 'EMAIL',
+                           'TELEFONE', 'TELEFONE', 'ALEATORIA', 'CPF', 'EMAIL'])
+        self.assertEqual(pix_keys.validate_keys(chaves, tipos).tolist(),
+                         [True, False, True, True, False, True, False, True, False, False])
+        self.assertFalse(pix_keys.validate_key('52998224725', 'RG'))
+        self.assertEqual(validate.validate_pix_key('52998224725', 'CPF'), pix_keys.validate_key('52998224725', 'CPF'))
+
+    def test_infer_types(self):
+        """Testa inferência do tipo pela chave"""
+        chaves = pd.Series(['529.982.247-25', '11.222.333/0001-81', 'fulano@exemplo.com.br',
+                            '123e4567-e89b-12d3-a456-426614174000', '11987654321', '+55 11 98765-4321',
+                            '(11) 3333-4444', '12345', 'abc', ''])
+        self.assertEqual(pix_keys.infer_types(chaves).tolist(), [
+            'CPF', 'CNPJ', 'EMAIL', 'ALEATORIA', 'TELEFONE', 'TELEFONE', 'TELEFONE', '', '', '',
+        ])
+        self.assertEqual(pix_keys.infer_type('52998224725'), 'CPF')
+
+    def test_inferencia_e_validacao(self):
+        """Testa que toda chave com tipo inferido é válida para esse tipo (telefone com e sem +55)"""
+        chaves = pd.Series(['+5511987654321', '5511987654321', '+55 11 98765-4321', '11987654321',
+                            '(11) 3333-4444', '551133334444', '529.982.247-25', '11222333000181',
+                            'fulano@exemplo.com.br', '123e4567-e89b-12d3-a456-426614174000'])
+        tipos = pix_keys.infer_types(chaves)
+        self.assertEqual(tipos.tolist(), ['TELEFONE'] * 6 + ['CPF', 'CNPJ', 'EMAIL', 'ALEATORIA'])
+        self.assertTrue(pix_keys.validate_keys(chaves, tipos).all())
+        for chave, tipo in zip(chaves, tipos):
+            self.assertEqual(pix_keys.infer_type(chave), tipo)   # mesma regra sem Series
+            self.assertTrue(pix_keys.validate_key(chave, pix_keys.infer_type(chave)), chave)
+        for chave, tipo in zip(['11987654321\n', None, float('nan'), ' a@b.com', '00000000000'],
+                               ['TELEFONE', 'CPF', 'EMAIL', 'EMAIL', 'CPF']):
+            self.assertEqual(pix_keys.validate_key(chave, tipo),
+                             pix_keys.validate_keys(pd.Series([chave]), pd.Series([tipo]))[0], chave)
+        self.assertTrue(validate.validate_phone('+55 11 98765-4321'))
+
+        # Na remessa a chave de telefone sai só com dígitos: 55 + DDD + número
+        gerador = BradescoPIXGenerator()
+        for tipo in ('TELEFONE', ''):
+            linha = gerador.generate_segmento_j52(_pagamento('1', tipo_chave_pix=tipo, chave_pix='(11) 98765-4321'), 1)
+            self.assertEqual(linha[131:210].strip(), '5511987654321')
+        linha = gerador.generate_segmento_j52(_pagamento('1', tipo_chave_pix='', chave_pix='529.982.247-25'), 1)
+        self.assertEqual(linha[131:210].strip(), '529.982.247-25')
+
+    def test_tipo_inferido_na_validacao(self):
+        """Testa que tipo_chave_pix vazio é inferido na validação e no cadastro de fornecedores"""
+        found = validate.check_pagamentos([
+            _pagamento('1', tipo_chave_pix='', chave_pix='fulano@exemplo.com'),
+            _pagamento('2', tipo_chave_pix='', chave_pix='xyz'),
+            _pagamento('3', tipo_chave_pix='EMAIL', chave_pix='52998224725'),
+        ])
+        self.assertEqual([(e.codigo, e.params) for e in found['2']], [
+            (errors.OPCAO_INVALIDA, (f"um de: {', '.join(pix_keys.TIPOS_CHAVE_PIX)}",)),
+            (errors.CHAVE_PIX_INVALIDA, ('',)),
+        ])
+        self.assertEqual([(e.codigo, e.params) for e in found['3']], [(errors.CHAVE_PIX_INVALIDA, ('EMAIL',))])
+        self.assertNotIn('1', found)
+
+        registro = {'tipo_pgto': 'PIX', 'tipo_chave_pix': '', 'chave_pix': '11222333000181'}
+        self.assertEqual(validators.validate_pix(registro), (True, ''))
+        registro['chave_pix'] = '11222333000180'
+        self.assertEqual(validators.validate_pix(registro), (False, 'PIX: tipo_chave_pix não informado e não inferido pela chave.'))
+
+
+if __name__ == '__main__':
+    unittest.main()
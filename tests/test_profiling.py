@@ -0,0 +1,40 @@
+"""
+Testes para o perfilamento opcional do pipeline
+"""
+import pstats
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.cnab240 import fields
+from src.cnab240.profiling import Profiler
+
+
+class TestProfiling(unittest.TestCase):
+    """Testes para gravação do perfil e resumo das funções custosas"""
+
+    def test_cprofile(self):
+        """Testa arquivo .prof legível pelo pstats e resumo ordenado por tempo próprio"""
+        with tempfile.TemporaryDirectory() as tmp:
+            profiler = Profiler(tmp, 'perfil', engine='cprofile', top=5)
+            with profiler:
+                for i in range(2000):
+                    fields.format_numeric(i, 10)
+            resultado = profiler.result
+            self.assertEqual(resultado.engine, 'cprofile')
+            self.assertEqual(resultado.arquivos, [Path(tmp) / 'perfil.prof'])
+            pstats.Stats(str(resultado.arquivos[0]))
+            self.assertEqual(len(resultado.top), 5)
+            proprios = [item['tempo_proprio'] for item in resultado.top]
+            self.assertEqual(proprios, sorted(proprios, reverse=True))
+            self.assertTrue(any('format_numeric' in item['funcao'] for item in resultado.top))
+            self.assertIn('format_numeric', resultado.summary())
+
+    def test_engine_invalido(self):
+        """Testa rejeição de perfilador desconhecido"""
+        with self.assertRaises(ValueError):
+            Profiler('.', engine='perf')
+
+
+if __name__ == '__main__':
+    unittest.main()
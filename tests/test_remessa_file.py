@@ -0,0 +1,76 @@
+"""
+Testes para a gravação de remessas pré-alocadas
+"""
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from src.cnab240 import accounts, remessa_file, structure
+
+from tests.test_accounts import CONFIG, _pagamento
+
+
+class TestRemessaFile(unittest.TestCase):
+    """Testes para RemessaFile e write_remessas"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = Path(self.tmp.name)
+        self.bank = accounts.load_accounts(CONFIG)['principal']
+        self.file_date = datetime(2024, 1, 15, 10, 30)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _esperado(self, tipo, pagamentos):
+        lines = accounts.render_account_file(self.bank, tipo, pagamentos, self.file_date, 1).lines
+        return structure.encode_lines(lines)
+
+    def test_mesmo_conteudo_da_geracao_em_memoria(self):
+        """Testa bytes idênticos aos da geração em lista, com e sem divisão em faixas"""
+        pix = [_pagamento(str(i), valor=0.29 * (i + 1), txid=f'TX{i}') for i in range(7)]
+        ted = [_pagamento(str(i), 'TED', valor=1.1) for i in range(5)]
+        tarefas = [(self.output / 'pix.txt', self.bank, 'PIX', pix, 1),
+                   (self.output / 'ted.txt', self.bank, 'TED', ted, 1)]
+
+        relatorios = remessa_file.write_remessas(tarefas, self.file_date, max_workers=1, tamanho_faixa=3)
+        self.assertTrue(all(r.valido for r in relatorios))
+        self.assertEqual((self.output / 'pix.txt').read_bytes(), self._esperado('PIX', pix))
+        self.assertEqual((self.output / 'ted.txt').read_bytes(), self._esperado('TED', ted))
+        self.assertEqual((self.output / 'pix.txt').stat().st_size, remessa_file.file_size(7))
+
+        # Faixas renderizadas em processos diferentes gravam o mesmo arquivo
+        (self.output / 'pix.txt').unlink()
+        remessa_file.write_remessas(tarefas[:1], self.file_date, max_workers=2, tamanho_faixa=2)
+        self.assertEqual((self.output / 'pix.txt').read_bytes(), self._esperado('PIX', pix))
+        self.assertEqual(sorted(p.name for p in self.output.iterdir()), ['pix.txt', 'ted.txt'])
+
+    def test_arquivo_invalido_nao_publicado(self):
+        """Testa que estrutura inválida ou erro na gravação não deixa arquivo no diretório"""
+        path = self.output / 'pix.txt'
+        arquivo = remessa_file.RemessaFile(path, 1)
+        arquivo.write(0, self._esperado('PIX', [_pagamento('1')]).decode('ascii').split('\r\n')[:3])
+        relatorio = arquivo.commit()  # faltam J-52 e trailers
+        self.assertFalse(relatorio.valido)
+        self.assertEqual(list(self.output.iterdir()), [])
+
+        with self.assertRaises(ValueError):
+            with remessa_file.RemessaFile(path, 1) as arquivo:
+                arquivo.write(0, ['curta'])
+        self.assertEqual(list(self.output.iterdir()), [])
+
+    def test_write_account_files(self):
+        """Testa gravação por (conta, tipo) com nome e sequencial do plano"""
+        grupos = {('principal', 'PIX'): [_pagamento('1', txid='TX1'), _pagamento('2', txid='TX2')],
+                  ('principal', 'TED'): [_pagamento('3', 'TED')]}
+        gerados = accounts.write_account_files(grupos, {'principal': self.bank}, self.file_date, self.output,
+                                               multi_contas=False, max_workers=1)
+        self.assertEqual([(g.tipo, g.file_seq, g.pagamentos, g.erros) for g in gerados],
+                         [('PIX', 10, 2, []), ('TED', 11, 1, [])])
+        self.assertEqual(gerados[0].path.name, 'BRADESCO_PIX_REMESSA_20240115_000010.txt')
+        self.assertTrue(structure.validate_file(gerados[1].path).valido)
+
+
+if __name__ == '__main__':
+    unittest.main()
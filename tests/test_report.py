@@ -0,0 +1,62 @@
+"""
+Testes para o relatório de validação incremental
+"""
+import csv
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.cnab240 import errors
+from src.cnab240.report import ReportWriter
+
+
+class TestReport(unittest.TestCase):
+    """Testes para os formatos do relatório"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _escrever(self, nome):
+        with ReportWriter(self.dir / nome) as report:
+            report.write('1', 'OK', [], 0)
+            report.write('2', 'ERRO', [errors.record(errors.VALOR_NAO_POSITIVO, 'valor', 1, '2'),
+                                       errors.record(errors.DOCUMENTO_INVALIDO, 'cpf_cnpj', 1, '2', 'CPF')], 1)
+        return report
+
+    def test_csv(self):
+        """Testa layout histórico com colunas de códigos e campos"""
+        report = self._escrever('relatorio.csv')
+        with open(report.path, newline='', encoding='utf-8') as f:
+            linhas = list(csv.reader(f, delimiter=';'))
+        self.assertEqual(linhas[0], ['id_pagamento', 'status', 'erros', 'codigos', 'campos'])
+        self.assertEqual(linhas[1], ['1', 'OK', '', '', ''])
+        self.assertEqual(linhas[2][2:], ['2: valor deve ser > 0 | 2: CPF inválido',
+                                         'VALOR_NAO_POSITIVO|DOCUMENTO_INVALIDO', 'valor|cpf_cnpj'])
+        self.assertEqual((report.total, report.com_erro), (2, 1))
+
+    def test_jsonl(self):
+        """Testa um objeto por pagamento com erros estruturados"""
+        report = self._escrever('relatorio.jsonl')
+        registros = [json.loads(l) for l in report.path.read_text(encoding='utf-8').splitlines()]
+        self.assertEqual([r['linha'] for r in registros], [0, 1])
+        self.assertEqual(registros[1]['erros'][1], {'codigo': 'DOCUMENTO_INVALIDO', 'campo': 'cpf_cnpj',
+                                                    'severidade': 'ERRO', 'mensagem': '2: CPF inválido'})
+
+    def test_falha_descarta_parcial(self):
+        """Testa que nada é publicado quando a gravação é interrompida"""
+        with self.assertRaises(RuntimeError):
+            with ReportWriter(self.dir / 'relatorio.csv') as report:
+                report.write('1', 'OK', [], 0)
+                raise RuntimeError()
+        self.assertEqual(list(self.dir.iterdir()), [])
+        with self.assertRaises(ValueError):
+            ReportWriter(self.dir / 'relatorio.xml')
+
+
+if __name__ == '__main__':
+    unittest.main()
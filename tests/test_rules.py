@@ -0,0 +1,82 @@
+"""
+Testes para o motor de validação declarativo
+"""
+import unittest
+from datetime import datetime, timedelta
+
+from src.cnab240 import errors, rules, synth, validate
+
+from tests.test_accounts import _pagamento
+
+
+class TestRules(unittest.TestCase):
+    """Testes para RuleSet (regras compiladas por tipo, validação em lote)"""
+
+    def test_lote_igual_a_validacao_individual(self):
+        """Testa que o lote emite os mesmos erros, na mesma ordem, que a validação um a um"""
+        pagamentos = [
+            _pagamento('1'),
+            _pagamento('2', 'TED', banco_favorecido='23', tipo_conta='9'),
+            _pagamento('3', tipo_pessoa='F', cpf_cnpj='529.982.247-24', chave_pix='x@y'),
+            _pagamento('4', 'BOLETO', sacado_tipo_pessoa='J', sacado_cpf_cnpj='123'),
+            _pagamento('', 'CHEQUE', valor='abc', aviso_favorecido=2, data_pagamento='31/02/2024'),
+            _pagamento('6', 'doc', nome_favorecido='N' * 31, valor=1.234),
+        ]
+        del pagamentos[0]['valor']
+        found = rules.REGRAS.check(pagamentos, [10, 11, 12, 13, 14, 15])
+        self.assertEqual(found, [validate.check_pagamento(p, i) for p, i in zip(pagamentos, range(10, 16))])
+        self.assertEqual([e.codigo for e in found[4]], [
+            errors.ID_AUSENTE, errors.DATA_INVALIDA, errors.VALOR_INVALIDO,
+            errors.TIPO_PAGAMENTO_INVALIDO, errors.OPCAO_INVALIDA,
+        ])
+        self.assertEqual(found[4][0].id_pagamento, '')
+        self.assertEqual([e.codigo for e in found[2]], [errors.DOCUMENTO_INVALIDO, errors.CHAVE_PIX_INVALIDA])
+
+    def test_caminho_escalar_igual_ao_lote(self):
+        """Testa que check_pagamento (Python puro com as regras padrão) emite o mesmo que o lote"""
+        amanha = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        bases = [_pagamento('p'), _pagamento('p2', tipo_chave_pix='', chave_pix='+55 11 98765-4321'),
+                 _pagamento('t', 'TED'), _pagamento('d', 'doc '), _pagamento('x', 'CHEQUE'),
+                 _pagamento('b', 'BOLETO', nosso_numero='1', data_vencimento=amanha, sacado_nome='X',
+                            sacado_tipo_pessoa='F', sacado_cpf_cnpj='11144477735')]
+        valores = [None, '', float('nan'), 0, -1, 10.005, 'abc', ' 10 ', True, '  ', 'a' * 40, '2020-01-01',
+                   datetime.now(), '529.982.247-25', '11222333000181', 'f', 'j', '12', '4', 2]
+        pagamentos = synth.to_pagamentos(synth.generate_frame(50, seed=2)) + bases
+        for base in bases:
+            for campo in sorted(set(base) | {'tipo_chave_pix', 'tipo_pagamento'}):
+                pagamentos.append({k: v for k, v in base.items() if k != campo})
+                pagamentos.extend(dict(base, **{campo: valor}) for valor in valores)
+        lote = rules.REGRAS.check(pagamentos)
+        for index, (pagamento, found) in enumerate(zip(pagamentos, lote)):
+            self.assertEqual(repr(validate.check_pagamento(pagamento, index)), repr(found), pagamento)
+
+    def test_compilacao_por_tipo(self):
+        """Testa que cada tipo de pagamento só avalia as regras que se aplicam a ele"""
+        campos_pix = {r.campo for r in rules.REGRAS.compile('PIX')}
+        self.assertIn('chave_pix', campos_pix)
+        self.assertNotIn('banco_favorecido', campos_pix)
+        self.assertNotIn('nosso_numero', campos_pix)
+        self.assertNotIn('tipo_pagamento', campos_pix)
+        self.assertIn('tipo_pagamento', {r.campo for r in rules.REGRAS.compile('CHEQUE')})
+        self.assertIs(rules.REGRAS.compile('PIX'), rules.REGRAS.compile('PIX'))
+
+    def test_regra_especifica_de_banco(self):
+        """Testa regra adicional registrada sem alterar o conjunto padrão"""
+        errors.register('DESCRICAO_LONGA', '{id}: {campo} excede {0} caracteres', aviso=True)
+        self.addCleanup(errors.MENSAGENS.pop, 'DESCRICAO_LONGA')
+        regras = rules.REGRAS.copy()
+        regras.add(rules.Rule('DESCRICAO_LONGA', 'descricao_pagamento',
+                              lambda b: b.texto('descricao_pagamento').str.len() > 10,
+                              tipos={'TED'}, params=(10,)))
+        pagamentos = [_pagamento('1', 'TED', descricao_pagamento='Pagamento de fornecedor'),
+                      _pagamento('2', 'PIX', descricao_pagamento='Pagamento de fornecedor')]
+
+        found = validate.check_pagamentos(pagamentos, regras=regras)
+        self.assertEqual(list(found), ['1'])
+        self.assertEqual(found['1'][0].severidade, errors.AVISO)
+        self.assertEqual(found['1'][0].mensagem, '1: descricao_pagamento excede 10 caracteres')
+        self.assertEqual(validate.check_pagamentos(pagamentos), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
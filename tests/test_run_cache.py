@@ -0,0 +1,110 @@
+"""
+Testes para o cache de execuções e a geração determinística
+"""
+import copy
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from src import jobs, run_cache
+from src.cnab240 import accounts
+from src.output_store import OutputStore
+
+from tests.test_accounts import CONFIG, _pagamento
+from tests.test_jobs import _aguardar
+
+
+def _contas(deterministico=True):
+    config = copy.deepcopy(CONFIG)
+    config.setdefault('arquivo', {}).update(txid_deterministico=deterministico, txid_chave='segredo')
+    router = accounts.AccountRouter.from_config(config)
+    return router, router.accounts
+
+
+class TestRunCache(unittest.TestCase):
+    """Testes para run_key, RunCache e o uso do cache pelo JobManager"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.router, self.contas = _contas()
+        pagamentos = [_pagamento(str(i), 'TED' if i % 3 == 0 else 'PIX', valor=i + 1) for i in range(6)]
+        self.grupos, _ = accounts.group_by_account(pagamentos, self.router)
+        self.file_date = datetime(2024, 1, 15)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_txid_deterministico(self):
+        """Testa TXIDs derivados do conteúdo: mesma planilha, mesmo arquivo"""
+        pix = self.grupos[('principal', 'PIX')]
+        gerar = lambda contas: accounts.render_account_file(contas['principal'], 'PIX', pix, self.file_date, 1).lines
+        self.assertEqual(gerar(self.contas), gerar(self.contas))
+        txids = {line[210:240] for line in gerar(self.contas)[3:-2:2]}
+        self.assertEqual(len(txids), len(pix))
+        self.assertNotEqual(gerar(_contas(False)[1]), gerar(_contas(False)[1]))
+
+    def test_chave_e_lru(self):
+        """Testa chave sensível a pagamentos/config/data e remoção das entradas menos usadas"""
+        chave = run_cache.run_key(self.grupos, self.contas, self.file_date)
+        self.assertEqual(chave, run_cache.run_key(copy.deepcopy(self.grupos), _contas()[1], self.file_date))
+        alterado = copy.deepcopy(self.grupos)
+        alterado[('principal', 'PIX')][0]['valor'] = 99.99
+        self.assertNotEqual(chave, run_cache.run_key(alterado, self.contas, self.file_date))
+        self.assertNotEqual(chave, run_cache.run_key(self.grupos, _contas(False)[1], self.file_date))
+        self.assertNotEqual(chave, run_cache.run_key(self.grupos, self.contas, datetime(2024, 1, 16)))
+
+        # Editar os feriados ou o diretório de bancos (mesmo caminho) muda a chave
+        feriados, bancos = self.base / 'feriados.csv', self.base / 'bancos.csv'
+        feriados.write_text("data,tipo,descricao\n", encoding='utf-8')
+        bancos.write_text("compe,ispb,nome,ted,pix\n341,60701190,ITAU,1,1\n", encoding='utf-8')
+        for conta in self.contas.values():
+            conta.arquivo.update(feriados=str(feriados), bancos=str(bancos))
+        chaves = {run_cache.run_key(self.grupos, self.contas, self.file_date)}
+        feriados.write_text("data,tipo,descricao\n2024-01-15,feriado,Local\n", encoding='utf-8')
+        chaves.add(run_cache.run_key(self.grupos, self.contas, self.file_date))
+        bancos.write_text("compe,ispb,nome,ted,pix\n341,60701190,ITAU,1,1\n237,60746948,BRADESCO,1,1\n",
+                          encoding='utf-8')
+        chaves.add(run_cache.run_key(self.grupos, self.contas, self.file_date))
+        self.assertEqual(len(chaves | {chave}), 4)
+
+        stores = []
+        for nome in 'abc':
+            store = OutputStore(self.base / 'jobs' / nome)
+            store.write(f'{nome}.txt', ['0' * 240] * 4)
+            stores.append(store)
+        cache = run_cache.RunCache(self.base / 'cache', max_bytes=2 * 4 * 242 + 600)
+        for i, (nome, store) in enumerate(zip('ab', stores)):
+            self.assertTrue(cache.put(nome * 64, store.directory))
+            os.utime(cache.base_dir / (nome * 64), (time.time() - 100 + i, time.time() - 100 + i))
+        # 'a' é usada de novo: 'b' passa a ser a menos recente e sai ao entrar 'c'
+        self.assertIsNotNone(cache.restore('a' * 64, self.base / 'restaurado'))
+        self.assertTrue(cache.put('c' * 64, stores[2].directory))
+        self.assertIsNone(cache.restore('b' * 64, self.base / 'outro'))
+        self.assertIsNotNone(cache.restore('c' * 64, self.base / 'outro'))
+        self.assertEqual((self.base / 'restaurado' / 'a.txt').read_bytes(), stores[0].path('a.txt').read_bytes())
+        self.assertLessEqual(cache.size(), cache.max_bytes)
+
+    def test_job_reaproveitado(self):
+        """Testa que a segunda geração idêntica sai do cache, com os mesmos arquivos"""
+        manager = jobs.JobManager(self.base / 'jobs', max_workers=1, cache=run_cache.RunCache(self.base / 'cache'))
+        try:
+            primeiro = _aguardar(manager, manager.submit(self.grupos, self.contas, self.file_date))
+            segundo_id = manager.submit(self.grupos, self.contas, self.file_date)
+            segundo = manager.get(segundo_id)
+        finally:
+            manager.shutdown()
+        self.assertFalse(primeiro.do_cache)
+        self.assertTrue(segundo.do_cache)
+        self.assertEqual(segundo.status, jobs.CONCLUIDO)
+        self.assertEqual(segundo.arquivos, primeiro.arquivos)
+        for arquivo in primeiro.arquivos:
+            self.assertEqual(manager.store(segundo_id).path(arquivo['nome']).read_bytes(),
+                             manager.store(primeiro.id).path(arquivo['nome']).read_bytes())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Testes para a agenda de remessas diárias
+"""
+import copy
+import tempfile
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+
+from src.cnab240 import accounts, decoder
+from src.cnab240.scheduler import Scheduler
+
+from tests.test_accounts import CONFIG, _pagamento
+
+
+class TestScheduler(unittest.TestCase):
+    """Testes para Scheduler"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        config = copy.deepcopy(CONFIG)
+        config['arquivo']['ledger'] = str(self.dir / 'ledger.sqlite3')
+        self.accounts = accounts.load_accounts(config)
+        self.scheduler = Scheduler(config['arquivo']['ledger'], self.accounts, self.dir)
+
+    def tearDown(self):
+        self.scheduler.close()
+        self.tmp.cleanup()
+
+    def _agendar(self, *pagamentos, hoje=date(2030, 6, 3)):
+        grupos = {}
+        for p in pagamentos:
+            grupos.setdefault(('principal', p['tipo_pagamento']), []).append(dict(p, txid=p['id_pagamento']))
+        return self.scheduler.schedule(grupos, hoje)
+
+    def test_agenda_por_dia_util(self):
+        """Testa o dia de cada pagamento: passado vai para hoje, fim de semana e feriado para o dia útil seguinte"""
+        resultado = self._agendar(_pagamento('antigo', data_pagamento='2030-05-01'),
+                                  _pagamento('sabado', data_pagamento='2030-06-08'),
+                                  _pagamento('ted', tipo='TED', data_pagamento='2030-06-20'),  # Corpus Christi
+                                  _pagamento('boleto', tipo='BOLETO'))
+        self.assertEqual(resultado.agendados, 3)
+        self.assertEqual(resultado.por_dia, {'2030-06-03': 1, '2030-06-10': 1, '2030-06-21': 1})
+        self.assertEqual(resultado.ignorados, {('principal', 'BOLETO'): 1})
+        self.assertEqual(self.scheduler.run_day(date(2030, 6, 8)), [])   # sábado
+
+    def test_emite_somente_o_dia(self):
+        """Testa remessas do dia divididas por tamanho, sequenciais contínuos e pagamentos marcados"""
+        self._agendar(*[_pagamento(f'P{i}', data_pagamento='2030-06-04') for i in (3, 1, 2)],
+                      _pagamento('depois', data_pagamento='2030-06-05'))
+        gerados = self.scheduler.run_day(date(2030, 6, 4), datetime(2030, 6, 4, 8), max_workers=1, max_pagamentos=2)
+        self.assertEqual([(g.file_seq, g.pagamentos) for g in gerados], [(10, 2), (11, 1)])
+        lidos = decoder.pagamentos(decoder.decode_file(gerados[0].path))
+        self.assertEqual(list(lidos['id_pagamento'].str.strip()), ['P1', 'P2'])
+        self.assertTrue((lidos['data_pagamento'] == datetime(2030, 6, 4)).all())
+
+        # Emitidos não saem de novo nem são reagendados; o sequencial continua no dia seguinte
+        self.assertEqual(self.scheduler.run_day(date(2030, 6, 4), max_workers=1), [])
+        self.assertEqual(self._agendar(_pagamento('P1', data_pagamento='2030-06-04')).ja_emitidos, ['P1'])
+        seguinte = self.scheduler.run_day(date(2030, 6, 5), datetime(2030, 6, 5, 8), max_workers=1)
+        self.assertEqual([(g.file_seq, g.pagamentos) for g in seguinte], [(12, 1)])
+        self.assertEqual(self.scheduler.ledger.pending(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
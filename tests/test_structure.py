@@ -0,0 +1,99 @@
+"""
+Testes para a validação estrutural das remessas
+"""
+import tempfile
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+from src.cnab240 import accounts, layouts, structure
+
+from tests.test_accounts import CONFIG, _pagamento
+
+
+def _altera(lines, linha, campo, valor):
+    """Sobrescreve um campo (Campo de layouts) de uma linha da remessa."""
+    line = lines[linha]
+    lines[linha] = line[:campo.inicio - 1] + valor + line[campo.fim:]
+
+
+class TestStructure(unittest.TestCase):
+    """Testes para validate_buffer e validate_file"""
+
+    def setUp(self):
+        self.contas = accounts.load_accounts(CONFIG)
+        self.file_date = datetime(2024, 1, 15, 10, 30)
+
+    def _remessa(self, tipo, pagamentos):
+        return list(accounts.render_account_file(self.contas['principal'], tipo, pagamentos,
+                                                 self.file_date, 1).lines)
+
+    def test_remessas_geradas_validas(self):
+        """Testa remessas PIX e TED geradas, em memória e em disco"""
+        pix = self._remessa('PIX', [_pagamento(str(i), valor=1.5 * (i + 1)) for i in range(3)])
+        relatorio = structure.validate_buffer(structure.encode_lines(pix))
+        self.assertEqual(relatorio.erros, [])
+        self.assertEqual((relatorio.registros, relatorio.lotes, relatorio.pagamentos), (10, 1, 3))
+        self.assertEqual(relatorio.valor, Decimal('9.00'))
+
+        ted = self._remessa('TED', [_pagamento(str(i), 'TED') for i in range(2)])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'ted.rem'
+            path.write_bytes(structure.encode_lines(ted))
+            relatorio = structure.validate_file(path)
+        self.assertTrue(relatorio.valido)
+        self.assertEqual((relatorio.pagamentos, relatorio.valor_centavos), (2, 2000))
+
+    def test_corrupcoes_detectadas(self):
+        """Testa detecção de sequencial, par de segmentos, campo numérico, lote e CRLF"""
+        pix = self._remessa('PIX', [_pagamento(str(i)) for i in range(3)])
+
+        def erros(lines):
+            return structure.validate_buffer(structure.encode_lines(lines)).erros
+
+        lines = list(pix)
+        _altera(lines, 4, layouts.SEGMENTO_J.campo('sequencial'), '00009')
+        self.assertEqual(erros(lines), ['Linha 5: número sequencial do registro no lote fora da ordem '
+                                        '(esperado contíguo a partir de 1)'])
+
+        lines = list(pix)
+        lines[2], lines[3] = lines[3], lines[2]
+        self.assertIn('Linhas 3, 4: segmento fora do par por pagamento (esperado Segmento J, Segmento J-52)',
+                      erros(lines))
+
+        lines = list(pix)
+        _altera(lines, 3, layouts.SEGMENTO_J52.campo('favorecido_inscricao'), '00011144477735X')
+        self.assertEqual(erros(lines), ['Linha 4: campo numérico com caracteres não numéricos '
+                                        '(Segmento J-52: favorecido_inscricao)'])
+
+        lines = list(pix)
+        _altera(lines, 6, layouts.SEGMENTO_J.campo('lote'), '0002')
+        self.assertEqual(erros(lines), ['Linha 7: número do lote incorreto'])
+
+        lines = list(pix)
+        del lines[1]
+        self.assertEqual(len(erros(lines)), 1)
+        self.assertIn('tipo de registro fora da sequência', erros(lines)[0])
+
+        conteudo = bytearray(structure.encode_lines(pix))
+        conteudo[structure.TAMANHO_LINHA * 2 + 241] = ord(' ')
+        self.assertEqual(structure.validate_buffer(bytes(conteudo)).erros, ['Linha 3: registro sem terminador CRLF'])
+        self.assertIn('não é múltiplo de 242', structure.validate_buffer(bytes(conteudo[:-1])).erros[0])
+
+    def test_trailers_recalculados_dos_detalhes(self):
+        """Testa trailer de lote conferido contra a soma em centavos dos detalhes"""
+        ted = self._remessa('TED', [_pagamento(str(i), 'TED', valor=0.29) for i in range(3)])
+        self.assertTrue(structure.validate_buffer(structure.encode_lines(ted)).valido)
+        self.assertEqual(ted[-2][layouts.TRAILER_LOTE_TED.campo('valor_total').fatia], '000000000000000087')
+
+        _altera(ted, 2, layouts.SEGMENTO_A.campo('valor'), '000000000000030')
+        _altera(ted, -1, layouts.TRAILER_ARQUIVO.campo('quantidade_registros'), '000009')
+        self.assertEqual(structure.validate_buffer(structure.encode_lines(ted)).erros, [
+            'Linha 9: Trailer Lote 1: valor total incorreto (soma dos detalhes 0.88, encontrado 0.87)',
+            'Trailer Arquivo: quantidade de registros incorreta (esperado 10, encontrado 9)',
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Testes para o gerador de lotes sintéticos
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+import main
+from src.cnab240 import synth, validate
+from src.cnab240.bradesco_pix import PIX_KEY_TYPE_MAP
+
+
+class TestSynth(unittest.TestCase):
+    """Testes para determinismo e validade da massa sintética"""
+    
+    def test_deterministico(self):
+        """Testa que a mesma semente gera o mesmo lote"""
+        a = synth.generate_frame(200, seed=7)
+        b = synth.generate_frame(200, seed=7)
+        c = synth.generate_frame(200, seed=8)
+        self.assertTrue(a.equals(b))
+        self.assertFalse(a.equals(c))
+        self.assertEqual(list(a.columns), synth.COLUNAS)
+    
+    def test_documentos_validos(self):
+        """Testa dígitos verificadores de CPF/CNPJ"""
+        import numpy as np
+        rng = np.random.default_rng(0)
+        self.assertTrue(all(validate.validate_cpf(c) for c in synth.make_cpfs(rng, 500)))
+        self.assertTrue(all(validate.validate_cnpj(c) for c in synth.make_cnpjs(rng, 500)))
+    
+    def test_lote_valido(self):
+        """Testa que o lote passa na validação e cobre todos os tipos de chave"""
+        df = synth.generate_frame(3000, seed=1)
+        todos_validos, erros = validate.validate_pagamentos(synth.to_pagamentos(df))
+        self.assertTrue(todos_validos, list(erros.items())[:3])
+        self.assertEqual(set(df.loc[df.tipo_pagamento == 'PIX', 'tipo_chave_pix']), set(PIX_KEY_TYPE_MAP))
+        self.assertEqual(set(df.tipo_pagamento), {'PIX', 'TED', 'DOC'})
+    
+    def test_xlsx_ida_e_volta(self):
+        """Testa que o .xlsx gravado volta por main.read_excel com zeros à esquerda e válido"""
+        df = synth.generate_frame(500, seed=1)
+        with tempfile.TemporaryDirectory() as tmp:
+            pagamentos = main.read_excel(str(synth.write_output(df, Path(tmp) / 'lote.xlsx')))
+        for coluna in synth.COLUNAS_TEXTO:
+            self.assertEqual([p[coluna] for p in pagamentos], list(df[coluna]), coluna)
+        self.assertEqual(validate.check_pagamentos(pagamentos), {})
+    
+    def test_mix(self):
+        """Testa proporção de tipos informada"""
+        df = synth.generate_frame(100, mix={'TED': 1.0})
+        self.assertEqual(set(df.tipo_pagamento), {'TED'})
+        with self.assertRaises(ValueError):
+            synth.generate_frame(10, mix={'PIX': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Testes para a geração de TXIDs e o ledger
+"""
+import copy
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+from src.cnab240 import accounts, ledger, txid
+
+from tests.test_accounts import CONFIG, _pagamento
+
+
+class TestTxid(unittest.TestCase):
+    """Testes para TxidProvider e Ledger"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.ledger_path = Path(self.tmp.name) / 'ledger.sqlite3'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_aleatorios_em_bloco(self):
+        """Testa TXIDs no formato do campo, únicos, com um os.urandom por bloco"""
+        provider = txid.TxidProvider(bloco=64)
+        with mock.patch('src.cnab240.txid.os.urandom', wraps=txid.os.urandom) as urandom:
+            gerados = [provider.txid(_pagamento(str(i))) for i in range(100)]
+        self.assertEqual(urandom.call_count, 2)
+        self.assertEqual(len(set(gerados)), 100)
+        self.assertTrue(all(len(t) == 30 and t == t.upper() and int(t, 16) >= 0 for t in gerados))
+
+    def test_deterministicos_com_chave(self):
+        """Testa TXID reproduzível, dependente do conteúdo e da chave configurada"""
+        pagamento = _pagamento('1')
+        provider = txid.TxidProvider(deterministic=True, chave='segredo')
+        self.assertEqual(provider.txid(pagamento), txid.TxidProvider(True, 'segredo').txid(dict(pagamento)))
+        self.assertNotEqual(provider.txid(pagamento), txid.TxidProvider(True, 'outra').txid(pagamento))
+        self.assertNotEqual(provider.txid(pagamento), provider.txid(_pagamento('2')))
+        self.assertEqual(provider.txid(pagamento), txid.deterministic_txid(pagamento, txid._key('segredo')))
+        with self.assertRaises(ValueError):
+            txid.TxidProvider(True)
+
+    def test_ledger(self):
+        """Testa registro dos TXIDs emitidos e descarte dos já emitidos"""
+        config = copy.deepcopy(CONFIG)
+        config['arquivo']['ledger'] = str(self.ledger_path)
+        bank = accounts.load_accounts(config)['principal']
+        pagamentos = [_pagamento(str(i)) for i in range(3)] + [_pagamento('4', txid='INFORMADO')]
+        lines = accounts.render_account_file(bank, 'PIX', pagamentos, datetime(2024, 1, 15), 1).lines
+        emitidos = [line[210:240] for line in lines[3:-2:2]]
+
+        with ledger.Ledger(self.ledger_path) as registro:
+            self.assertEqual(registro.existing_txids(emitidos + ['X' * 30]), set(emitidos[:3]))
+            rows = registro.conn.execute("SELECT id_pagamento FROM txids ORDER BY id_pagamento").fetchall()
+        self.assertEqual([r[0] for r in rows], ['0', '1', '2'])
+
+        # Sorteio que repete um TXID já emitido: o repetido é descartado do bloco
+        repetido = bytes.fromhex(emitidos[0])
+        provider = txid.TxidProvider(ledger=str(self.ledger_path), bloco=2)
+        with mock.patch('src.cnab240.txid.os.urandom', side_effect=[repetido + b'\x01' * 15]):
+            self.assertEqual(provider.txid(_pagamento('9')), '01' * 15)
+        provider.close()
+        with ledger.Ledger(self.ledger_path) as registro:
+            self.assertEqual(registro.existing_txids(['01' * 15]), {'01' * 15})
+
+    def test_deterministico_ja_emitido(self):
+        """Testa aviso dos pagamentos cujo TXID determinístico já saiu em remessa"""
+        config = copy.deepcopy(CONFIG)
+        config['arquivo'].update(ledger=str(self.ledger_path), txid_deterministico=True, txid_chave='segredo')
+        bank = accounts.load_accounts(config)['principal']
+        pagamentos = [_pagamento('1'), _pagamento('2'), _pagamento('3', txid='INFORMADO')]
+        self.assertEqual(txid.emitted_payments(bank, pagamentos), [])
+        accounts.render_account_file(bank, 'PIX', pagamentos[:1], datetime(2024, 1, 15), 1)
+        self.assertEqual(txid.emitted_payments(bank, pagamentos), ['1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
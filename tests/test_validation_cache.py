@@ -0,0 +1,64 @@
+"""
+Testes para o cache de validação incremental
+"""
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from src import validation_cache
+
+
+def _pagamento(id_pag, valor=10.0):
+    return {
+        'id_pagamento': id_pag,
+        'tipo_pagamento': 'PIX',
+        'data_pagamento': datetime.now().strftime('%Y-%m-%d'),
+        'valor': valor,
+        'nome_favorecido': 'Fulano',
+        'tipo_pessoa': 'F',
+        'cpf_cnpj': '11144477735',
+        'tipo_chave_pix': 'CPF',
+        'chave_pix': '11144477735',
+        'aviso_favorecido': 0,
+    }
+
+
+class TestValidationCache(unittest.TestCase):
+    """Testes para ValidationCache"""
+    
+    def test_classify_error(self):
+        """Testa classificação de avisos"""
+        self.assertEqual(validation_cache.classify_error('x: nome_favorecido excede 30 caracteres (será truncado)'), 'AVISO')
+        self.assertEqual(validation_cache.classify_error('x: CPF inválido'), 'ERRO')
+    
+    def test_revalida_apenas_novos_e_alterados(self):
+        """Testa que só pagamentos novos/alterados são revalidados"""
+        cache = validation_cache.ValidationCache()
+        pagamentos = [_pagamento('1'), _pagamento('2')]
+        resultado = cache.update(pagamentos)
+        self.assertEqual(cache.revalidados, 2)
+        self.assertEqual(resultado['total_validos'], 2)
+        
+        pagamentos.append(_pagamento('3', valor=0))
+        with mock.patch.object(validation_cache.validate.REGRAS, 'check',
+                               wraps=validation_cache.validate.REGRAS.check) as spy:
+            resultado = cache.update(pagamentos)
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual([p['id_pagamento'] for p in spy.call_args.args[0]], ['3'])
+        self.assertEqual(resultado['total'], 3)
+        self.assertEqual(resultado['total_validos'], 2)
+        self.assertEqual(resultado['total_erros'], 1)
+        
+        pagamentos[2] = _pagamento('3', valor=5.0)
+        resultado = cache.update(pagamentos)
+        self.assertEqual(cache.revalidados, 1)
+        self.assertEqual((resultado['total_erros'], resultado['total_validos']), (0, 3))
+        
+        resultado = cache.update(pagamentos[:1])
+        self.assertEqual(cache.revalidados, 0)
+        self.assertEqual(cache.counters(), (0, 0, 1))
+        self.assertEqual(len(resultado['validos']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()